@@ -0,0 +1,128 @@
+"""
+CLI起動時間ベンチマーク
+
+以下を計測する:
+1. `--help` と引数エラー時の起動時間（複数回の中央値）
+2. `-X importtime` によるモジュール別の import 時間
+3. 重い依存ライブラリ（openai, cv2, mediapipe, pandas, weasyprint）が
+   起動時に読み込まれていないこと
+
+使い方:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 20 --budget-ms 100 --top 15
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MAIN_SCRIPT = PROJECT_ROOT / "src" / "main.py"
+
+# 起動時に読み込まれてはいけない重い依存ライブラリ
+HEAVY_MODULES = ["openai", "cv2", "mediapipe", "pandas", "numpy", "weasyprint"]
+
+# 計測するCLI呼び出し
+SCENARIOS = {
+    "help": ["--help"],
+    "subcommand_help": ["full", "--help"],
+    "missing_argument": ["analyze"],
+    "missing_file": ["analyze", "--video", "/nonexistent/video.mp4"],
+}
+
+
+def measure_wall_time(cli_args: List[str], runs: int) -> Dict[str, float]:
+    """
+    CLI呼び出しの実行時間を計測
+
+    Args:
+        cli_args: main.py に渡す引数
+        runs: 計測回数
+
+    Returns:
+        中央値・最小値（ミリ秒）
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(MAIN_SCRIPT)] + cli_args,
+            cwd=str(PROJECT_ROOT),
+            capture_output=True
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples)
+    }
+
+
+def profile_imports(cli_args: List[str]) -> List[Dict[str, Any]]:
+    """
+    `-X importtime` でモジュール別の import 時間を取得
+
+    Args:
+        cli_args: main.py に渡す引数
+
+    Returns:
+        モジュールごとの self / cumulative（マイクロ秒）のリスト
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN_SCRIPT)] + cli_args,
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return entries
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="CLI起動時間ベンチマーク")
+    parser.add_argument("--runs", type=int, default=10, help="各シナリオの計測回数")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="起動時間の上限（ミリ秒）")
+    parser.add_argument("--top", type=int, default=10, help="表示する import 上位件数")
+    args = parser.parse_args()
+
+    failed = False
+
+    print("=== 起動時間 ===")
+    for name, cli_args in SCENARIOS.items():
+        timing = measure_wall_time(cli_args, args.runs)
+        status = "OK" if timing["median_ms"] <= args.budget_ms else "OVER"
+        failed = failed or status == "OVER"
+        print(f"{name:20s} median {timing['median_ms']:7.1f} ms  min {timing['min_ms']:7.1f} ms  [{status}]")
+
+    print(f"\n=== import 時間（--help, 上位{args.top}件） ===")
+    entries = profile_imports(SCENARIOS["help"])
+    for entry in sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:args.top]:
+        print(f"{entry['cumulative_us'] / 1000:8.1f} ms  (self {entry['self_us'] / 1000:6.1f} ms)  {entry['module']}")
+
+    print("\n=== 重い依存ライブラリの読み込み ===")
+    loaded = {entry["module"].split(".")[0] for entry in entries}
+    for module in HEAVY_MODULES:
+        status = "LOADED" if module in loaded else "not loaded"
+        failed = failed or module in loaded
+        print(f"{module:12s} {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Audio Segmenter Module
+音声のボール打球音（立ち上がりの鋭い音）からラリーの区間を求める
+
+ffmpeg で音声トラックをモノラル PCM に変換しながら少しずつ読み、
+スペクトルフラックス（周波数ごとの振幅の増加量の和）で打球音を検出する。
+打球音の間隔が空いたところでラリーを区切る。
+"""
+
+import json
+import subprocess
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from storage.result_index import compute_file_hash
+from storage.writer import atomic_write_json
+
+
+SAMPLE_RATE = 16000
+N_FFT = 512
+HOP = 160  # 10ms
+
+# 打球音の成分が集まる周波数帯（Hz）
+ONSET_BAND = (1500, 7000)
+
+DEFAULT_RALLY_DIR = "data/rallies"
+
+
+def iter_audio_chunks(
+    video_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = 30.0
+) -> Iterator[np.ndarray]:
+    """
+    ffmpeg で音声トラックを取り出し、一定の長さずつ返す
+
+    Args:
+        video_path: 動画ファイルのパス
+        sample_rate: サンプリング周波数
+        chunk_seconds: 1回に読む長さ（秒）
+
+    Yields:
+        float32 のモノラル音声（-1〜1）
+    """
+    process = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", video_path, "-vn", "-ac", "1", "-ar", str(sample_rate),
+         "-f", "s16le", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    chunk_bytes = int(sample_rate * chunk_seconds) * 2
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            samples = np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2")
+            yield samples.astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode("utf-8", "replace")
+        process.stderr.close()
+        if process.wait() != 0:
+            raise ValueError(f"音声を取り出せません: {video_path}: {stderr.strip()}")
+
+
+class SpectralFlux:
+    """
+    スペクトルフラックスの逐次計算（伸び続ける録画やストリームの音声を少しずつ処理する）
+
+    チャンクの境目では n_fft - hop サンプルと直前の振幅スペクトルを持ち越すため、
+    まとめて計算した場合と同じ値になる。先頭は n_fft - hop サンプルの無音で埋めるため、
+    フレーム i は時刻 i * hop / sample_rate の音を窓の後半に含む。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        n_fft: int = N_FFT,
+        hop: int = HOP,
+        band: Tuple[float, float] = ONSET_BAND
+    ):
+        """
+        初期化
+
+        Args:
+            sample_rate: サンプリング周波数
+            n_fft: FFT の長さ
+            hop: フレームの間隔（サンプル）
+            band: 集計する周波数帯（Hz）
+        """
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop = hop
+        self.window = np.hanning(n_fft).astype(np.float32)
+        frequencies = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        self.bins = (frequencies >= band[0]) & (frequencies <= band[1])
+        self.frames = 0
+        self._carry = np.zeros(n_fft - hop, dtype=np.float32)
+        self._previous = None
+
+    def update(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        音声チャンクを追加し、新しく計算できたフレームのフラックスを返す
+
+        Args:
+            chunk: float32 のモノラル音声
+
+        Returns:
+            新しいフレームのフラックス（通算のフレーム番号は self.frames - len(戻り値) から）
+        """
+        samples = np.concatenate([self._carry, chunk])
+        count = (len(samples) - self.n_fft) // self.hop + 1
+        if count <= 0:
+            self._carry = samples
+            return np.zeros(0, dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.n_fft)[::self.hop][:count]
+        # 対数圧縮した振幅で、音量の大小によらず立ち上がりを捉える
+        magnitude = np.log1p(100.0 * np.abs(np.fft.rfft(frames * self.window, axis=1)[:, self.bins]))
+        if self._previous is None:
+            self._previous = magnitude[:1]
+        diff = np.diff(np.concatenate([self._previous, magnitude]), axis=0)
+        flux = np.maximum(diff, 0.0).sum(axis=1).astype(np.float32)
+        # 先頭は無音で埋めた窓との差になるため、立ち上がりとして扱わない
+        flux[:max(0, self.n_fft // self.hop + 1 - self.frames)] = 0.0
+        self._previous = magnitude[-1:]
+        self._carry = samples[count * self.hop:]
+        self.frames += count
+        return flux
+
+
+def spectral_flux(
+    chunks: Iterable[np.ndarray],
+    sample_rate: int = SAMPLE_RATE,
+    n_fft: int = N_FFT,
+    hop: int = HOP,
+    band: Tuple[float, float] = ONSET_BAND
+) -> np.ndarray:
+    """
+    音声のスペクトルフラックスを計算（SpectralFlux でチャンクごとに計算してつなぐ）
+
+    Args:
+        chunks: 音声チャンクの並び
+        sample_rate: サンプリング周波数
+        n_fft: FFT の長さ
+        hop: フレームの間隔（サンプル）
+        band: 集計する周波数帯（Hz）
+
+    Returns:
+        フレームごとのフラックス（フレーム i の時刻は i * hop / sample_rate 秒）
+    """
+    stream = SpectralFlux(sample_rate, n_fft, hop, band)
+    fluxes = [stream.update(chunk) for chunk in chunks]
+    if not fluxes:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(fluxes)
+
+
+def pick_onsets(
+    flux: np.ndarray,
+    frame_rate: float = SAMPLE_RATE / HOP,
+    window_seconds: float = 0.5,
+    delta: float = 8.0,
+    min_interval: float = 0.08
+) -> np.ndarray:
+    """
+    フラックスのピークから打球音の時刻を求める
+
+    直近 window_seconds の平均に、全体のばらつき（MAD）の delta 倍を足した値を閾値とし、
+    閾値を超える局所最大を打球音とする。min_interval より近い打球音は大きい方だけを残す。
+
+    Args:
+        flux: spectral_flux の戻り値
+        frame_rate: フラックスの1秒あたりのフレーム数
+        window_seconds: 閾値の移動平均の長さ（秒）
+        delta: ばらつきに対する閾値の倍率
+        min_interval: 打球音の最小間隔（秒）
+
+    Returns:
+        打球音の時刻（秒）
+    """
+    if len(flux) < 3:
+        return np.zeros(0)
+    window = max(1, int(window_seconds * frame_rate))
+    cumsum = np.cumsum(np.insert(flux.astype(np.float64), 0, 0.0))
+    starts = np.maximum(np.arange(len(flux)) - window, 0)
+    local_mean = (cumsum[np.arange(len(flux))] - cumsum[starts]) / np.maximum(np.arange(len(flux)) - starts, 1)
+    median = np.median(flux)
+    spread = np.median(np.abs(flux - median)) + 1e-6
+    threshold = np.maximum(local_mean, median) + delta * spread
+
+    peaks = np.flatnonzero(
+        (flux[1:-1] > threshold[1:-1]) & (flux[1:-1] >= flux[:-2]) & (flux[1:-1] > flux[2:])
+    ) + 1
+
+    # 近すぎるピークは強い順に採用
+    min_frames = int(min_interval * frame_rate)
+    kept: List[int] = []
+    taken = np.zeros(len(flux), dtype=bool)
+    for peak in peaks[np.argsort(-flux[peaks], kind="stable")]:
+        if not taken[peak]:
+            kept.append(peak)
+            taken[max(0, peak - min_frames):peak + min_frames + 1] = True
+    return np.sort(np.asarray(kept, dtype=np.int64)) / frame_rate
+
+
+def cluster_rallies(
+    onsets: np.ndarray,
+    max_gap: float = 2.0,
+    min_hits: int = 3,
+    padding: float = 0.5
+) -> List[Dict[str, Any]]:
+    """
+    打球音の時刻をラリーにまとめる
+
+    Args:
+        onsets: 打球音の時刻（秒、昇順）
+        max_gap: 同じラリーとみなす打球音の最大間隔（秒）
+        min_hits: ラリーとみなす最小の打球音の数
+        padding: ラリーの前後に付ける余白（秒）
+
+    Returns:
+        ラリーのリスト（index / start / end / hits / onsets）
+    """
+    if len(onsets) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(onsets) > max_gap) + 1
+    rallies = []
+    for group in np.split(onsets, breaks):
+        if len(group) < min_hits:
+            continue
+        rallies.append({
+            "index": len(rallies),
+            "start": round(max(0.0, float(group[0]) - padding), 3),
+            "end": round(float(group[-1]) + padding, 3),
+            "hits": int(len(group)),
+            "onsets": [round(float(t), 3) for t in group],
+        })
+    return rallies
+
+
+def rally_frame_ranges(rallies: List[Dict[str, Any]], fps: float) -> List[Tuple[int, int]]:
+    """
+    ラリー区間をフレーム範囲に変換（CVAnalyzer.track_ball や姿勢推定の分担に使う）
+
+    Args:
+        rallies: cluster_rallies の戻り値
+        fps: 動画のフレームレート
+
+    Returns:
+        (開始フレーム, 終了フレーム) のリスト（終了フレームは含まない）
+    """
+    return [(int(rally["start"] * fps), int(np.ceil(rally["end"] * fps))) for rally in rallies]
+
+
+def select_frame_times(rallies: List[Dict[str, Any]], max_frames: int = 8) -> List[float]:
+    """
+    LLM に渡すフレームの時刻を選ぶ（打球の多いラリーから、ラリー中の打球の瞬間を優先）
+
+    Args:
+        rallies: cluster_rallies の戻り値
+        max_frames: 選ぶフレーム数
+
+    Returns:
+        時刻（秒、昇順）
+    """
+    times: List[float] = []
+    for rally in sorted(rallies, key=lambda r: -r["hits"]):
+        onsets = rally["onsets"]
+        # ラリーの中盤の打球
+        times.append(onsets[len(onsets) // 2])
+        if len(times) >= max_frames:
+            break
+    return sorted(times)
+
+
+class AudioSegmenter:
+    """
+    音声によるラリー区間の検出
+
+    打球音の時刻を動画ハッシュと検出閾値ごとに <rally_dir>/<ハッシュ>_d<閾値>.json に保存し、
+    再利用する。ラリーへのまとめは軽いので毎回やり直す。
+    """
+
+    def __init__(
+        self,
+        rally_dir: str = DEFAULT_RALLY_DIR,
+        max_gap: float = 2.0,
+        min_hits: int = 3,
+        delta: float = 8.0
+    ):
+        """
+        初期化
+
+        Args:
+            rally_dir: 保存先ディレクトリ
+            max_gap: 同じラリーとみなす打球音の最大間隔（秒）
+            min_hits: ラリーとみなす最小の打球音の数
+            delta: 打球音の検出閾値（ばらつきに対する倍率）
+        """
+        self.rally_dir = Path(rally_dir)
+        self.max_gap = max_gap
+        self.min_hits = min_hits
+        self.delta = delta
+
+    def detect_onsets(self, chunks: Iterable[np.ndarray], sample_rate: int = SAMPLE_RATE) -> Dict[str, Any]:
+        """
+        音声チャンクの並びから打球音を検出（ラリーへのまとめ方によらない部分）
+
+        Args:
+            chunks: 音声チャンクの並び
+            sample_rate: サンプリング周波数
+
+        Returns:
+            duration / onset_times を持つ辞書
+        """
+        hop = HOP * sample_rate // SAMPLE_RATE
+        n_fft = N_FFT * sample_rate // SAMPLE_RATE
+        flux = spectral_flux(chunks, sample_rate, n_fft, hop)
+        onsets = pick_onsets(flux, sample_rate / hop, delta=self.delta)
+        return {
+            "duration": round(len(flux) * hop / sample_rate, 3),
+            "onset_times": [round(float(t), 3) for t in onsets],
+        }
+
+    def cluster(self, detected: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        検出した打球音を現在の設定（max_gap / min_hits）でラリーにまとめる
+
+        Args:
+            detected: detect_onsets の戻り値
+
+        Returns:
+            duration / onsets / rallies を持つ辞書
+        """
+        onsets = np.asarray(detected["onset_times"], dtype=np.float64)
+        return {
+            "duration": detected["duration"],
+            "onsets": int(len(onsets)),
+            "rallies": cluster_rallies(onsets, self.max_gap, self.min_hits),
+        }
+
+    def segment_chunks(self, chunks: Iterable[np.ndarray], sample_rate: int = SAMPLE_RATE) -> Dict[str, Any]:
+        """
+        音声チャンクの並びからラリーを検出
+
+        Args:
+            chunks: 音声チャンクの並び
+            sample_rate: サンプリング周波数
+
+        Returns:
+            duration / onsets / rallies を持つ辞書
+        """
+        return self.cluster(self.detect_onsets(chunks, sample_rate))
+
+    def path(self, video_hash: str) -> Path:
+        """打球音の検出結果の保存先のパス（検出閾値ごとに分ける）"""
+        return self.rally_dir / f"{video_hash}_d{self.delta:g}.json"
+
+    def segment(self, video_path: str, video_hash: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        動画のラリーを検出
+
+        打球音の時刻だけを保存し、保存済みなら音声は読まずにラリーへのまとめ直しだけを行う
+        （max_gap / min_hits を変えても音声を読み直さない）。
+
+        Args:
+            video_path: 動画ファイルのパス
+            video_hash: 動画ハッシュ（省略時は計算）
+            force: 保存済みでも検出し直す
+
+        Returns:
+            segment_chunks の戻り値に video_hash を加えた辞書
+        """
+        video_hash = video_hash or compute_file_hash(video_path)
+        path = self.path(video_hash)
+        if not force and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                detected = json.load(f)
+        else:
+            detected = {"video_hash": video_hash, **self.detect_onsets(iter_audio_chunks(video_path))}
+            atomic_write_json(str(path), detected)
+        return {"video_hash": video_hash, **self.cluster(detected)}
@@ -0,0 +1,199 @@
+"""
+Clips Module
+ラリー・サーブ・得点のイベントの索引を作り、区間を再エンコードせずに切り出す
+
+ffprobe でパケットだけを読んでキーフレームの時刻とバイト位置を求め（デコードしない）、
+音声から求めたラリーをラリー・サーブ・得点のイベントに分けて storage.events.EventIndex に保存する。
+切り出しは区間の直前のキーフレームから -c copy で行うため、長い試合動画でも1本あたり一瞬で済む。
+"""
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from storage.result_index import compute_file_hash
+
+
+DEFAULT_EVENT_CLIP_DIR = "data/clips/events"
+
+EVENT_KINDS = ("rally", "serve", "point")
+
+# サーブの区間: 打球音の前（トス）と後（レシーブ）の秒数
+SERVE_BEFORE = 2.0
+SERVE_AFTER = 1.5
+
+# 得点の区間: 最後の打球音の前と、ラリーの終わりの後の秒数
+POINT_BEFORE = 2.0
+POINT_AFTER = 1.5
+
+
+def probe_keyframes(video_path: str) -> np.ndarray:
+    """
+    ffprobe でキーフレームの時刻とバイト位置を取得（パケットだけを読み、デコードしない）
+
+    Args:
+        video_path: 動画ファイルのパス
+
+    Returns:
+        (キーフレーム数, 2) の float64 配列（時刻（秒）, バイト位置。位置が不明なら NaN）。時刻の昇順
+
+    Raises:
+        FileNotFoundError: ffprobe がない場合
+        ValueError: 動画を読めない場合
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,pos,flags", "-of", "csv=p=0", video_path
+    ], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"動画を開けません: {video_path}")
+    keyframes = []
+    for line in result.stdout.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 3 or "K" not in fields[2] or fields[0] in ("", "N/A"):
+            continue
+        offset = float(fields[1]) if fields[1] not in ("", "N/A") else np.nan
+        keyframes.append((float(fields[0]), offset))
+    if not keyframes:
+        return np.empty((0, 2))
+    keyframes = np.array(keyframes)
+    return keyframes[np.argsort(keyframes[:, 0], kind="stable")]
+
+
+def rally_events(rallies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    ラリーをラリー・サーブ・得点のイベントに分ける
+
+    サーブは最初の打球音、得点は最後の打球音の時刻とする。
+
+    Args:
+        rallies: audio_segmenter.cluster_rallies の戻り値
+
+    Returns:
+        kind / number / time / start_time / end_time を持つイベントのリスト（ラリー順）
+    """
+    events = []
+    for number, rally in enumerate(rallies):
+        onsets = rally.get("onsets") or [rally["start"], rally["end"]]
+        serve, last = float(onsets[0]), float(onsets[-1])
+        events += [
+            {"kind": "rally", "number": number, "time": rally["start"],
+             "start_time": rally["start"], "end_time": rally["end"]},
+            {"kind": "serve", "number": number, "time": serve,
+             "start_time": round(max(0.0, serve - SERVE_BEFORE), 3), "end_time": round(serve + SERVE_AFTER, 3)},
+            {"kind": "point", "number": number, "time": last,
+             "start_time": round(max(0.0, last - POINT_BEFORE), 3), "end_time": round(rally["end"] + POINT_AFTER, 3)},
+        ]
+    return events
+
+
+def align_keyframes(events: List[Dict[str, Any]], keyframes: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    各イベントに区間の開始以前で最も近いキーフレームを付ける
+
+    Args:
+        events: rally_events の戻り値
+        keyframes: probe_keyframes の戻り値
+
+    Returns:
+        keyframe_time / keyframe_offset を加えたイベントのリスト（キーフレームがなければ None）
+    """
+    if len(keyframes) == 0:
+        return [{**event, "keyframe_time": None, "keyframe_offset": None} for event in events]
+    starts = np.array([event["start_time"] for event in events], dtype=float)
+    positions = np.maximum(np.searchsorted(keyframes[:, 0], starts + 1e-6, side="right") - 1, 0)
+    aligned = []
+    for event, position in zip(events, positions):
+        time, offset = keyframes[position]
+        aligned.append({
+            **event,
+            "keyframe_time": float(time),
+            "keyframe_offset": None if np.isnan(offset) else int(offset),
+        })
+    return aligned
+
+
+def index_events(
+    video_path: str,
+    video_hash: Optional[str] = None,
+    db_path: Optional[str] = None,
+    rallies: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    動画のイベントとキーフレームを求めて索引に保存
+
+    Args:
+        video_path: 動画ファイルのパス
+        video_hash: 動画の内容ハッシュ（省略時は計算）
+        db_path: 索引の SQLite ファイル
+        rallies: ラリー（省略時は音声から検出）
+
+    Returns:
+        保存したイベントのリスト
+
+    Raises:
+        FileNotFoundError: ffmpeg / ffprobe がない場合
+    """
+    from storage.events import EventIndex
+
+    from .audio_segmenter import AudioSegmenter
+
+    video_hash = video_hash or compute_file_hash(video_path)
+    if rallies is None:
+        rallies = AudioSegmenter().segment(video_path, video_hash)["rallies"]
+    keyframes = probe_keyframes(video_path)
+    events = align_keyframes(rally_events(rallies), keyframes)
+    EventIndex(db_path).save(
+        video_hash, events, [(t, None if np.isnan(offset) else offset) for t, offset in keyframes]
+    )
+    return events
+
+
+def extract_event_clips(
+    video_path: str,
+    events: List[Dict[str, Any]],
+    clip_dir: str = DEFAULT_EVENT_CLIP_DIR,
+    video_hash: Optional[str] = None
+) -> List[str]:
+    """
+    イベントの区間を再エンコードせずに切り出す（作成済みのファイルは再利用する）
+
+    区間の直前のキーフレームから -c copy で切り出すので、クリップの先頭には
+    キーフレームから区間の開始までの余白が付く。
+
+    Args:
+        video_path: 動画ファイルのパス（索引を作った動画）
+        events: EventIndex.events または index_events の戻り値
+        clip_dir: 保存先ディレクトリ
+        video_hash: 動画の内容ハッシュ（ファイル名に使う。省略時は計算）
+
+    Returns:
+        クリップのパスのリスト（events の順）
+
+    Raises:
+        FileNotFoundError: ffmpeg がない場合
+        ValueError: 切り出しに失敗した場合
+    """
+    video_hash = video_hash or compute_file_hash(video_path)
+    directory = Path(clip_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for event in events:
+        path = directory / f"{video_hash}_{event['kind']}_{event['start_time']:.2f}_{event['end_time']:.2f}.mp4"
+        if not path.exists():
+            start = event["keyframe_time"] if event.get("keyframe_time") is not None else event["start_time"]
+            tmp = path.with_name(f".{path.name}.tmp.mp4")
+            result = subprocess.run([
+                "ffmpeg", "-y", "-v", "error", "-ss", f"{start:.3f}", "-i", video_path,
+                "-t", f"{event['end_time'] - start:.3f}", "-map", "0:v:0", "-map", "0:a?",
+                "-c", "copy", "-avoid_negative_ts", "make_zero", str(tmp)
+            ], capture_output=True, text=True)
+            if result.returncode != 0:
+                tmp.unlink(missing_ok=True)
+                raise ValueError(f"クリップを切り出せません: {result.stderr.strip()[-200:]}")
+            os.replace(tmp, path)
+        paths.append(str(path))
+    return paths
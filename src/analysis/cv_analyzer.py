@@ -0,0 +1,611 @@
+"""
+CV Analyzer Module
+動画からボールを検出・追跡する（定量分析）
+
+検出はフレームをまとめた NumPy 配列（バッチ）に対してベクトル演算で行い、
+追跡だけをフレーム順に処理する。OpenCV は動画のデコードにのみ使う。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+import numpy as np
+
+
+# ボールの色（BGR の下限・上限）
+BALL_COLORS = {
+    "white": ((170, 170, 170), (255, 255, 255)),
+    "orange": ((0, 60, 170), (110, 200, 255)),
+}
+
+
+def video_info(video_path: str) -> Dict[str, Any]:
+    """
+    動画のフレームレート・フレーム数・解像度を取得
+
+    Args:
+        video_path: 動画ファイルのパス
+
+    Returns:
+        fps / frame_count / width / height を持つ辞書
+    """
+    import cv2  # 起動時間に影響しないよう遅延読み込み
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"動画を開けません: {video_path}")
+    try:
+        return {
+            "fps": cap.get(cv2.CAP_PROP_FPS) or 30.0,
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+
+def iter_frame_batches(
+    video_path: str,
+    batch_size: int = 64,
+    downscale: int = 2,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    動画をデコードし、フレームをバッチ単位で返す
+
+    Args:
+        video_path: 動画ファイルのパス
+        batch_size: 1バッチのフレーム数
+        downscale: 縮小率（2 なら縦横 1/2。間引きで縮小する）
+        start_frame: 開始フレーム
+        end_frame: 終了フレーム（このフレームは含まない。省略時は最後まで）
+
+    Yields:
+        (バッチ先頭のフレーム番号, (フレーム数, 高さ, 幅, 3) の uint8 配列 BGR)
+    """
+    import cv2  # 起動時間に影響しないよう遅延読み込み
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"動画を開けません: {video_path}")
+    try:
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        index = start_frame
+        batch = None
+        filled = 0
+        while end_frame is None or index + filled < end_frame:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame = frame[::downscale, ::downscale]
+            if batch is None:
+                batch = np.empty((batch_size,) + frame.shape, dtype=np.uint8)
+            batch[filled] = frame
+            filled += 1
+            if filled == batch_size:
+                yield index, batch.copy()
+                index += filled
+                filled = 0
+        if filled:
+            yield index, batch[:filled].copy()
+    finally:
+        cap.release()
+
+
+def read_frames_at(video_path: str, frames: List[int], downscale: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    指定したフレームだけをデコード（台の検出などで数フレームを抜き出す用）
+
+    Args:
+        video_path: 動画ファイルのパス
+        frames: フレーム番号のリスト
+        downscale: 縮小率
+
+    Yields:
+        (フレーム番号, (高さ, 幅, 3) の uint8 配列 BGR)。読めなかったフレームは返さない
+    """
+    import cv2  # 起動時間に影響しないよう遅延読み込み
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"動画を開けません: {video_path}")
+    try:
+        for index in sorted(frames):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, frame = cap.read()
+            if ok:
+                yield index, frame[::downscale, ::downscale]
+    finally:
+        cap.release()
+
+
+def color_mask(frames: np.ndarray, colors=("white", "orange")) -> np.ndarray:
+    """
+    ボールの色に近い画素のマスク
+
+    Args:
+        frames: (フレーム数, 高さ, 幅, 3) の BGR 配列
+        colors: BALL_COLORS のキー
+
+    Returns:
+        (フレーム数, 高さ, 幅) の bool 配列
+    """
+    mask = np.zeros(frames.shape[:-1], dtype=bool)
+    for name in colors:
+        lower, upper = BALL_COLORS[name]
+        match = np.ones(frames.shape[:-1], dtype=bool)
+        for channel in range(3):
+            values = frames[..., channel]
+            if lower[channel] > 0:
+                match &= values >= lower[channel]
+            if upper[channel] < 255:
+                match &= values <= upper[channel]
+        mask |= match
+    return mask
+
+
+def foreground_mask(frames: np.ndarray, threshold: int = 25, samples: int = 9) -> np.ndarray:
+    """
+    背景差分による動体マスク
+
+    バッチ内から等間隔に選んだフレームの中央値を背景とみなす
+    （ボールは1か所に留まらないため、中央値には残らない）。
+
+    Args:
+        frames: (フレーム数, 高さ, 幅, 3) の BGR 配列
+        threshold: 背景との差の閾値（緑チャンネル）
+        samples: 背景の推定に使うフレーム数
+
+    Returns:
+        (フレーム数, 高さ, 幅) の bool 配列
+    """
+    green = frames[..., 1]
+    step = max(1, len(green) // samples)
+    background = np.median(green[::step], axis=0).astype(np.int16)
+    return np.abs(green.astype(np.int16) - background) > threshold
+
+
+def _neighborhood(values: np.ndarray, reduce=np.add, radius: int = 1) -> np.ndarray:
+    """(バッチ, 高さ, 幅) の各要素について (2*radius+1)² の近傍を集計"""
+    padded = np.pad(values, ((0, 0), (radius, radius), (radius, radius)))
+    h, w = values.shape[1:]
+    result = values.copy()
+    for dy in range(2 * radius + 1):
+        for dx in range(2 * radius + 1):
+            if dy == radius and dx == radius:
+                continue
+            result = reduce(result, padded[:, dy:dy + h, dx:dx + w])
+    return result
+
+
+def detect_candidates(
+    mask: np.ndarray,
+    block: int = 4,
+    min_pixels: int = 3,
+    max_pixels: int = 120,
+    top_k: int = 3
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    マスクからボールの候補位置を検出
+
+    画像を block×block のブロックに分けて画素数を数え、3x3 ブロックの範囲に
+    ボールらしい大きさ（min_pixels〜max_pixels）の塊がある局所最大を候補とする。
+    その外側（5x5 ブロックの外周）にも画素が続く塊は、大きな物体の端とみなして除く。
+    位置はその範囲の画素の重心。
+
+    Args:
+        mask: (フレーム数, 高さ, 幅) の bool 配列
+        block: ブロックの大きさ（画素）
+        min_pixels: 候補とする最小の画素数
+        max_pixels: 候補とする最大の画素数（人物などの大きな動体を除く）
+        top_k: 1フレームあたりの候補数
+
+    Returns:
+        (候補位置 (フレーム数, top_k, 2) の x, y, スコア (フレーム数, top_k))。
+        候補がない枠のスコアは0
+    """
+    frames, height, width = mask.shape
+    h, w = height // block, width // block
+    cells = mask[:, :h * block, :w * block].reshape(frames, h, block, w, block)
+
+    offsets = np.arange(block, dtype=np.float32)
+    column_counts = cells.sum(axis=2, dtype=np.int32)  # (frames, h, w, block)
+    row_counts = cells.sum(axis=4, dtype=np.int32)     # (frames, h, block, w)
+    counts = column_counts.sum(axis=-1)
+    xs = (np.arange(w, dtype=np.float32) * block)[None, None, :] * counts + column_counts @ offsets
+    ys = (np.arange(h, dtype=np.float32) * block)[None, :, None] * counts + np.einsum("fhbw,b->fhw", row_counts, offsets)
+
+    total = _neighborhood(counts)
+    peak = _neighborhood(counts, np.maximum)
+    ring = _neighborhood(counts, radius=2) - total
+    valid = (
+        (counts > 0) & (counts == peak) & (total >= min_pixels) & (total <= max_pixels)
+        & (ring * 4 <= total)
+    )
+    score = np.where(valid, total, 0).reshape(frames, -1)
+
+    k = min(top_k, score.shape[1])
+    best = np.argpartition(-score, k - 1, axis=1)[:, :k]
+    best_score = np.take_along_axis(score, best, axis=1)
+    safe_total = np.maximum(np.take_along_axis(total.reshape(frames, -1), best, axis=1), 1)
+    x = np.take_along_axis(_neighborhood(xs).reshape(frames, -1), best, axis=1) / safe_total + 0.5
+    y = np.take_along_axis(_neighborhood(ys).reshape(frames, -1), best, axis=1) / safe_total + 0.5
+
+    order = np.argsort(-best_score, axis=1)
+    positions = np.stack([np.take_along_axis(x, order, 1), np.take_along_axis(y, order, 1)], axis=-1)
+    return positions.astype(np.float32), np.take_along_axis(best_score, order, 1)
+
+
+class BallTracker:
+    """
+    等速モデルのカルマンフィルタと最近傍対応付けによるボール追跡
+
+    予測位置から gate 以内で最も近い候補を観測として採用する。
+    max_missed フレーム続けて観測がなければ追跡を打ち切り、
+    次に見つかった候補から新しい軌跡を始める。
+    """
+
+    F = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=float)
+    H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=float)
+
+    def __init__(
+        self,
+        gate: float = 60.0,
+        max_missed: int = 5,
+        process_noise: float = 25.0,
+        measurement_noise: float = 4.0
+    ):
+        """
+        初期化
+
+        Args:
+            gate: 観測として採用する予測位置からの最大距離（画素、処理解像度）
+            max_missed: 追跡を打ち切るまでの連続未検出フレーム数
+            process_noise: 加速度（打球・バウンド）による状態のばらつき
+            measurement_noise: 検出位置のばらつき
+        """
+        self.gate = gate
+        self.max_missed = max_missed
+        self.Q = np.eye(4) * process_noise
+        self.R = np.eye(2) * measurement_noise
+        self.state: Optional[np.ndarray] = None
+        self.P: Optional[np.ndarray] = None
+        self.missed = 0
+        self.track_id = -1
+        self._next_id = 0
+
+    def _start(self, position: np.ndarray):
+        self.state = np.array([position[0], position[1], 0.0, 0.0])
+        self.P = np.diag([self.R[0, 0], self.R[1, 1], 400.0, 400.0])
+        self.missed = 0
+        self.track_id = self._next_id
+        self._next_id += 1
+
+    def update(self, positions: np.ndarray, scores: np.ndarray) -> Tuple[float, float, bool, int]:
+        """
+        1フレーム分の候補で状態を更新
+
+        Args:
+            positions: (候補数, 2) の x, y
+            scores: (候補数,) のスコア（0 は候補なし）
+
+        Returns:
+            (x, y, 観測あり, 軌跡ID)。追跡していなければ x, y は NaN、軌跡IDは -1
+        """
+        available = scores > 0
+        if self.state is None:
+            if not available.any():
+                return np.nan, np.nan, False, -1
+            self._start(positions[np.argmax(scores)])
+            return float(self.state[0]), float(self.state[1]), True, self.track_id
+
+        # 予測
+        self.state = self.F @ self.state
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+        distances = np.where(available, np.hypot(*(positions - self.state[:2]).T), np.inf)
+        nearest = int(np.argmin(distances)) if len(distances) else -1
+        if nearest >= 0 and distances[nearest] <= self.gate:
+            # 観測で補正
+            innovation = positions[nearest] - self.H @ self.state
+            S = self.H @ self.P @ self.H.T + self.R
+            K = self.P @ self.H.T @ np.linalg.inv(S)
+            self.state = self.state + K @ innovation
+            self.P = (np.eye(4) - K @ self.H) @ self.P
+            self.missed = 0
+            return float(self.state[0]), float(self.state[1]), True, self.track_id
+
+        self.missed += 1
+        if self.missed > self.max_missed:
+            self.state = None
+            if available.any():
+                # 見失った後の最初の候補から新しい軌跡を始める
+                self._start(positions[np.argmax(scores)])
+                return float(self.state[0]), float(self.state[1]), True, self.track_id
+            return np.nan, np.nan, False, -1
+        return float(self.state[0]), float(self.state[1]), False, self.track_id
+
+
+def _track_segment(args) -> Dict[str, Any]:
+    analyzer, start, end, fps = args
+    batches = iter_frame_batches(analyzer.video_path, analyzer.batch_size, analyzer.downscale, start, end)
+    return analyzer.track_batches(batches, fps)
+
+
+class CVAnalyzer:
+    """
+    定量分析クラス（ボール追跡）
+
+    動画をバッチ単位でデコードし、背景差分と色マスクでボール候補を検出して
+    カルマンフィルタで追跡する。720p の動画は縦横 1/2 に縮小して処理する。
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        batch_size: int = 64,
+        downscale: int = 2,
+        colors=("white", "orange"),
+        calibration=None,
+        scale: Tuple[float, float] = (1.0, 1.0)
+    ):
+        """
+        初期化
+
+        Args:
+            video_path: 動画ファイルのパス
+            batch_size: 1バッチのフレーム数
+            downscale: 処理時の縮小率
+            colors: ボールの色（BALL_COLORS のキー）
+            calibration: 台の位置（table_calibration.TableCalibration。指定時は台の座標も求める）
+            scale: 動画の座標を元の動画の座標に戻す (x, y) の倍率（プロキシを読む場合）
+        """
+        self.video_path = video_path
+        self.batch_size = batch_size
+        self.downscale = downscale
+        self.colors = colors
+        self.calibration = calibration
+        self.scale = tuple(scale)
+
+    @classmethod
+    def from_proxy(cls, proxy: Dict[str, Any], **kwargs) -> "CVAnalyzer":
+        """
+        プロキシ動画を読む CVAnalyzer（追跡結果の座標は元の動画の解像度で返す）
+
+        プロキシは縮小済みなので、downscale を指定しなければ縮小せずに処理する。
+
+        Args:
+            proxy: proxy.ProxyGenerator.generate または proxy.proxy_or_source の戻り値
+            **kwargs: __init__ のその他の引数
+
+        Returns:
+            CVAnalyzer
+        """
+        if proxy.get("proxy"):
+            kwargs.setdefault("downscale", 1)
+        return cls(proxy["path"], scale=proxy["scale"], **kwargs)
+
+    def detect(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        1バッチのフレームからボール候補を検出
+
+        Args:
+            frames: (フレーム数, 高さ, 幅, 3) の BGR 配列（処理解像度）
+
+        Returns:
+            detect_candidates の戻り値
+        """
+        mask = foreground_mask(frames) & color_mask(frames, self.colors)
+        return detect_candidates(mask)
+
+    def track_batches(self, batches, fps: float = 30.0) -> Dict[str, Any]:
+        """
+        フレームのバッチ列からボールを追跡
+
+        Args:
+            batches: (先頭フレーム番号, フレーム配列) の並び
+            fps: フレームレート
+
+        Returns:
+            fps と、フレームごとの frame / time / x / y / detected / track_id の配列を持つ辞書
+            （x, y は元の動画の解像度の画素座標。追跡していないフレームは NaN）。
+            calibration 指定時は台の座標（メートル）の table_x / table_y も持つ
+        """
+        tracker = BallTracker()
+        frame_ids, xs, ys, detected, track_ids = [], [], [], [], []
+        for start, frames in batches:
+            positions, scores = self.detect(frames)
+            for i in range(len(frames)):
+                x, y, hit, track_id = tracker.update(positions[i], scores[i])
+                frame_ids.append(start + i)
+                xs.append(x)
+                ys.append(y)
+                detected.append(hit)
+                track_ids.append(track_id)
+
+        frame_ids = np.asarray(frame_ids, dtype=np.int32)
+        track = {
+            "fps": fps,
+            "frame": frame_ids,
+            "time": (frame_ids / fps).astype(np.float32),
+            "x": np.asarray(xs, dtype=np.float32) * np.float32(self.downscale * self.scale[0]),
+            "y": np.asarray(ys, dtype=np.float32) * np.float32(self.downscale * self.scale[1]),
+            "detected": np.asarray(detected, dtype=bool),
+            "track_id": np.asarray(track_ids, dtype=np.int32),
+        }
+        if self.calibration is not None:
+            track["table_x"], track["table_y"] = self.calibration.to_table(frame_ids, track["x"], track["y"])
+        return track
+
+    def track_frames(self, batches, fps: float = 30.0) -> Dict[str, Any]:
+        """
+        元の解像度のフレームのバッチ列からボールを追跡（frame_buffer.share_batches の処理用）
+
+        Args:
+            batches: (先頭フレーム番号, 元の解像度のフレーム配列) の並び
+            fps: フレームレート
+
+        Returns:
+            track_batches の戻り値
+        """
+        d = self.downscale
+        return self.track_batches(((start, frames[:, ::d, ::d]) for start, frames in batches), fps)
+
+    def track_ball(self, start_frame: int = 0, end_frame: Optional[int] = None) -> Dict[str, Any]:
+        """
+        動画のボールを追跡
+
+        Args:
+            start_frame: 開始フレーム
+            end_frame: 終了フレーム（省略時は最後まで）
+
+        Returns:
+            track_batches の戻り値
+        """
+        fps = video_info(self.video_path)["fps"]
+        batches = iter_frame_batches(self.video_path, self.batch_size, self.downscale, start_frame, end_frame)
+        return self.track_batches(batches, fps)
+
+    def track_segments(self, ranges, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        区間ごとにボールを追跡（audio_segmenter.rally_frame_ranges のラリー区間など）
+
+        ラリーの間の区間はデコードしない。区間は独立しているので、複数プロセスで並列に追跡する。
+
+        Args:
+            ranges: (開始フレーム, 終了フレーム) の並び
+            workers: 追跡プロセス数（1ならプロセスを使わない。省略時はCPU数）
+
+        Returns:
+            区間ごとの track_batches の戻り値（ranges の順）
+        """
+        fps = video_info(self.video_path)["fps"]
+        tasks = [(self, start, end, fps) for start, end in ranges]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                return list(executor.map(_track_segment, tasks))
+        return [_track_segment(task) for task in tasks]
+
+    def estimate_pose(self, workers: Optional[int] = None, frame_step: int = 1):
+        """
+        姿勢を推定（動画ハッシュごとに保存され、2回目以降は読み込むだけ）
+
+        Args:
+            workers: 推定プロセス数
+            frame_step: 推定するフレームの間隔
+
+        Returns:
+            ((フレーム数, 33, 4) のキーポイント配列, メタ情報)
+        """
+        from .pose_estimator import PoseEstimator
+
+        return PoseEstimator(workers=workers, frame_step=frame_step).run(self.video_path)
+
+    def calibrate(self, force: bool = False):
+        """
+        台の位置を求める（動画ハッシュごとに保存され、2回目以降は読み込むだけ）
+
+        Args:
+            force: 保存済みでも検出し直す
+
+        Returns:
+            TableCalibration
+        """
+        from .table_calibration import TableCalibrator
+
+        self.calibration = TableCalibrator().calibrate(self.video_path, force=force)
+        return self.calibration
+
+    def run_analysis(self) -> Dict[str, Any]:
+        """
+        定量分析を実行（台の位置を求めてからボールを追跡する）
+
+        Returns:
+            {"ball": track_ball の戻り値, "calibration": 台の位置の辞書}
+        """
+        if self.calibration is None:
+            self.calibrate()
+        return {"ball": self.track_ball(), "calibration": self.calibration.data}
+
+    def run_shared(self, video_hash: Optional[str] = None, pose_estimator=None, calibrate: bool = True) -> Dict[str, Any]:
+        """
+        ボール追跡・姿勢推定・台の検出を1回のデコードで行う
+
+        動画（プロキシを含む）を1回だけデコードし、frame_buffer の共有メモリを通して
+        各処理のプロセスに配る。姿勢と台の位置は保存済みならその処理を省く
+        （保存済みでなければ処理後に保存する）。姿勢推定は1プロセスで行う。
+
+        Args:
+            video_hash: 動画ハッシュ（省略時は計算）
+            pose_estimator: 姿勢推定の保存先などを持つ PoseEstimator（省略時は姿勢推定をしない）
+            calibrate: 台の位置も求める
+
+        Returns:
+            {"ball": track_batches の戻り値, "calibration": 台の位置の辞書, "pose": (キーポイント配列, メタ情報)}
+            （calibration / pose は求めなかった場合 None）
+        """
+        from functools import partial
+
+        from storage.result_index import compute_file_hash
+
+        from .frame_buffer import decode_shared
+        from .pose_estimator import estimate_batches
+        from .table_calibration import TableCalibrator
+
+        video_hash = video_hash or compute_file_hash(self.video_path)
+        info = video_info(self.video_path)
+        calibrator = TableCalibrator() if calibrate else None
+        if calibrator is not None and self.calibration is None and calibrator.path(video_hash).exists():
+            self.calibration = calibrator.calibrate(self.video_path, info, video_hash)
+        pose = pose_estimator.load(video_hash) if pose_estimator is not None else None
+
+        consumers = {"ball": partial(self.track_frames, fps=info["fps"])}
+        if calibrator is not None and self.calibration is None:
+            consumers["calibration"] = partial(
+                calibrator.calibrate_batches, frame_count=info["frame_count"], scale=self.scale[0]
+            )
+        if pose_estimator is not None and pose is None:
+            consumers["pose"] = partial(
+                estimate_batches,
+                frame_step=pose_estimator.frame_step, model_complexity=pose_estimator.model_complexity
+            )
+        results = decode_shared(self.video_path, consumers, self.batch_size)
+
+        track = results["ball"]
+        if "calibration" in results:
+            self.calibration = calibrator.save(video_hash, results["calibration"])
+            track["table_x"], track["table_y"] = self.calibration.to_table(track["frame"], track["x"], track["y"])
+        if "pose" in results:
+            # キーポイントは正規化座標なので、解像度だけ元の動画に合わせる
+            source = {**info, "width": round(info["width"] * self.scale[0]), "height": round(info["height"] * self.scale[1])}
+            pose = pose_estimator.save(video_hash, source, results["pose"][1])
+        return {
+            "ball": track,
+            "calibration": self.calibration.data if self.calibration is not None else None,
+            "pose": pose,
+        }
+
+
+def summarize_track(track: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    追跡結果の要約（JSON化できる形式）
+
+    Args:
+        track: CVAnalyzer.track_ball の戻り値
+
+    Returns:
+        フレーム数・検出率・軌跡数など
+    """
+    frames = len(track["frame"])
+    track_ids = track["track_id"][track["track_id"] >= 0]
+    return {
+        "frames": frames,
+        "duration": round(frames / track["fps"], 2) if frames else 0.0,
+        "detection_rate": round(float(track["detected"].mean()), 3) if frames else 0.0,
+        "tracks": int(len(np.unique(track_ids))),
+    }
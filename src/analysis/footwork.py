@@ -0,0 +1,267 @@
+"""
+Footwork Module
+姿勢推定のキーポイント配列からフットワークの指標を計算する
+
+腰の中点の左右の位置を試合全体の時系列として扱い、累積和による移動平均などの
+ベクトル演算だけで、横方向の移動速度・基本姿勢の位置への戻りの時間・カバー範囲を求める。
+LLM の「移動速度（1-5）」「戻りの速さ（1-5）」の評価は、この計測値から求めた評価で置き換える。
+"""
+
+import copy
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+
+from storage.schema import find_key
+
+from .pose_estimator import LANDMARKS
+from .table_calibration import TABLE_WIDTH
+
+
+# 画素→メートルの換算に使う胴体（肩の中点〜腰の中点）の長さ（台が検出できない場合）
+TORSO_LENGTH = 0.5
+# 解像度が分からない場合に仮定する画像の大きさ
+DEFAULT_FRAME_SIZE = (1280, 720)
+
+# 評価の境界（この値以上で1段階上がる。戻りの時間は短いほど高評価）
+SPEED_THRESHOLDS = (0.6, 0.9, 1.2, 1.5)       # 移動中の横方向の速度の90パーセンタイル（m/s）
+RECOVERY_THRESHOLDS = (1.2, 0.9, 0.7, 0.5)    # 戻りの時間の中央値（秒）
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    中心の移動平均（NaN は除いて平均し、窓内がすべて NaN なら NaN）
+
+    Args:
+        values: 1次元配列
+        window: 窓の長さ（サンプル数）
+
+    Returns:
+        values と同じ長さの配列
+    """
+    window = max(1, int(window))
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    index = np.arange(len(values))
+    lower = np.clip(index - window // 2, 0, len(values))
+    upper = np.clip(index + (window - window // 2), 0, len(values))
+    total = counts[upper] - counts[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (sums[upper] - sums[lower]) / np.maximum(total, 1), np.nan)
+
+
+def fill_gaps(values: np.ndarray, max_gap: int) -> np.ndarray:
+    """
+    max_gap サンプル以下の NaN の途切れを線形補間で埋める（先頭・末尾と長い途切れは NaN のまま）
+
+    Args:
+        values: 1次元配列
+        max_gap: 埋める途切れの最大長
+
+    Returns:
+        補間した配列
+    """
+    missing = np.isnan(values)
+    if missing.all() or not missing.any():
+        return values.copy()
+    index = np.arange(len(values))
+    filled = np.interp(index, index[~missing], values[~missing])
+
+    # NaN の連続区間ごとの長さ
+    edges = np.diff(np.concatenate([[0], missing.astype(np.int8), [0]]))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    fill = (ends - starts <= max_gap) & (starts > 0) & (ends < len(values))
+    run_fill = np.zeros(len(values) + 1, dtype=np.int64)
+    np.add.at(run_fill, starts[fill], 1)
+    np.add.at(run_fill, ends[fill], -1)
+    return np.where(missing & (np.cumsum(run_fill)[:-1] > 0), filled, values)
+
+
+def _midpoint(keypoints: np.ndarray, left: str, right: str) -> np.ndarray:
+    return (keypoints[:, LANDMARKS[left], :2].astype(np.float64)
+            + keypoints[:, LANDMARKS[right], :2].astype(np.float64)) / 2
+
+
+def meters_per_pixel(
+    keypoints: np.ndarray,
+    meta: Dict[str, Any],
+    calibration=None
+) -> Tuple[np.ndarray, str]:
+    """
+    画素→メートルの換算係数
+
+    台の位置があれば手前のエンドライン（幅 1.525m）の画素数から、なければ胴体の長さから求める。
+
+    Args:
+        keypoints: (サンプル数, 33, 4) の配列
+        meta: PoseEstimator のメタ情報
+        calibration: table_calibration.TableCalibration
+
+    Returns:
+        (サンプルごとの係数の配列, "table" または "torso")
+    """
+    width, height = meta.get("width") or DEFAULT_FRAME_SIZE[0], meta.get("height") or DEFAULT_FRAME_SIZE[1]
+    samples = len(keypoints)
+    if calibration is not None and calibration.segments:
+        frames = np.arange(samples) * meta.get("frame_step", 1)
+        scale = np.full(samples, np.nan)
+        for segment in calibration.segments:
+            corners = segment["corners"]
+            if corners is None:
+                continue
+            selected = (frames >= segment["start_frame"]) & (frames < segment["end_frame"])
+            scale[selected] = TABLE_WIDTH / max(corners[2][0] - corners[3][0], 1e-6)
+        if not np.isnan(scale).all():
+            return scale, "table"
+
+    torso = _midpoint(keypoints, "left_shoulder", "right_shoulder") - _midpoint(keypoints, "left_hip", "right_hip")
+    torso_pixels = np.hypot(torso[:, 0] * width, torso[:, 1] * height)
+    median = np.nanmedian(torso_pixels) if not np.isnan(torso_pixels).all() else np.nan
+    return np.full(samples, TORSO_LENGTH / median if median and median > 0 else np.nan), "torso"
+
+
+def _rating(value: float, thresholds, lower_is_better: bool = False) -> Optional[int]:
+    """境界値の何段目にあたるかを1-5で返す"""
+    if value is None or np.isnan(value):
+        return None
+    if lower_is_better:
+        return 1 + int(np.sum(value <= np.asarray(thresholds)))
+    return 1 + int(np.sum(value >= np.asarray(thresholds)))
+
+
+def footwork_metrics(
+    keypoints: np.ndarray,
+    meta: Dict[str, Any],
+    calibration=None,
+    smooth_seconds: float = 0.2,
+    ready_seconds: float = 4.0,
+    excursion: float = 0.3,
+    recovered: float = 0.1,
+    moving_speed: float = 0.3
+) -> Dict[str, Any]:
+    """
+    フットワークの指標を計算
+
+    基本姿勢の位置は腰の位置の長い移動平均（ready_seconds）とし、そこから excursion メートル
+    以上離れた動きごとに、最も離れた時点から recovered メートル以内に戻るまでの時間を数える。
+
+    Args:
+        keypoints: (サンプル数, 33, 4) の配列（PoseEstimator の出力）
+        meta: PoseEstimator のメタ情報（fps / frame_step / width / height）
+        calibration: table_calibration.TableCalibration（メートル換算に使う）
+        smooth_seconds: 位置の平滑化の窓（秒）
+        ready_seconds: 基本姿勢の位置の窓（秒）
+        excursion: 基本姿勢から離れたとみなす距離（メートル）
+        recovered: 戻ったとみなす距離（メートル）
+        moving_speed: 移動中とみなす速度（m/s）
+
+    Returns:
+        lateral_speed（m/s）/ recovery（秒）/ coverage（メートルと滞在割合）/ ratings を持つ辞書
+    """
+    dt = meta.get("frame_step", 1) / meta.get("fps", 30.0)
+    samples = len(keypoints)
+    scale, scale_source = meters_per_pixel(keypoints, meta, calibration)
+    width = meta.get("width") or DEFAULT_FRAME_SIZE[0]
+
+    hips = _midpoint(keypoints, "left_hip", "right_hip")[:, 0]
+    detected = ~np.isnan(hips)
+    position = fill_gaps(hips * width * scale, max(1, int(0.5 / dt)))
+    missing = np.isnan(position)
+    position = rolling_mean(position, smooth_seconds / dt)
+    position[missing] = np.nan
+
+    # 横方向の速度（カメラの切り替わりで換算係数が変わる点は除く）
+    velocity = np.diff(position) / dt
+    velocity[np.diff(scale) != 0] = np.nan
+    speed = np.abs(velocity)
+    moving = speed > moving_speed
+    peak_speed = rolling_mean(speed, max(1, int(0.3 / dt)))
+
+    # 基本姿勢の位置からのずれ
+    displacement = np.abs(position - rolling_mean(position, ready_seconds / dt))
+    away = displacement > excursion
+    starts = np.flatnonzero(away[1:] & ~away[:-1]) + 1
+    back = np.flatnonzero(displacement <= recovered)
+    positions = np.searchsorted(back, starts)
+    complete = positions < len(back)
+    starts, ends = starts[complete], back[positions[complete]]
+    recovery_times = []
+    for start, end in zip(starts, ends):
+        peak = start + int(np.nanargmax(displacement[start:end]))
+        recovery_times.append((end - peak) * dt)
+    recovery_times = np.asarray(recovery_times)
+
+    offset = position - np.nanmedian(position) if not np.isnan(position).all() else position
+    observed = ~np.isnan(offset)
+
+    def _round(value, digits=2):
+        return None if value is None or np.isnan(value) else round(float(value), digits)
+
+    def _share(mask):
+        return round(float(mask[observed].mean()), 3) if observed.any() else None
+
+    speed_p90 = np.percentile(speed[moving], 90) if moving.any() else np.nan
+    recovery_median = np.median(recovery_times) if len(recovery_times) else np.nan
+    return {
+        "samples": int(samples),
+        "duration": round(samples * dt, 1),
+        "detection_rate": round(float(detected.mean()), 3) if samples else 0.0,
+        "scale": scale_source,
+        "lateral_speed": {
+            "mean": _round(np.nanmean(speed[moving]) if moving.any() else np.nan),
+            "p90": _round(speed_p90),
+            "peak": _round(np.nanmax(peak_speed) if (~np.isnan(peak_speed)).any() else np.nan),
+        },
+        "recovery": {
+            "count": int(len(recovery_times)),
+            "median": _round(recovery_median),
+            "p90": _round(np.percentile(recovery_times, 90) if len(recovery_times) else np.nan),
+        },
+        "coverage": {
+            "range": _round(np.nanpercentile(offset, 95) - np.nanpercentile(offset, 5) if observed.any() else np.nan),
+            "left": _share(offset < -excursion),
+            "center": _share(np.abs(offset) <= excursion),
+            "right": _share(offset > excursion),
+        },
+        "ratings": {
+            "移動速度（1-5）": _rating(speed_p90, SPEED_THRESHOLDS),
+            "戻りの速さ（1-5）": _rating(recovery_median, RECOVERY_THRESHOLDS, lower_is_better=True),
+        },
+    }
+
+
+def ground_footwork(analysis: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    分析結果のフットワークの評価を計測値による評価で置き換える
+
+    日本語キー（"2.技術分析" → "2.5_フットワーク"）と英語キー（"techniques" → "footwork"）の
+    どちらにも対応し、計測できなかった評価は元の値を残す。
+
+    Args:
+        analysis: LLM の分析結果
+        metrics: footwork_metrics の戻り値
+
+    Returns:
+        置き換えた分析結果（元の辞書は変更しない）
+    """
+    grounded = copy.deepcopy(analysis)
+    if isinstance(grounded.get("techniques"), dict):
+        techniques = grounded["techniques"]
+        name = find_key(techniques, "footwork") or "footwork"
+    else:
+        section = find_key(grounded, "技術分析") or "技術分析"
+        if not isinstance(grounded.get(section), dict):
+            grounded[section] = {}
+        techniques = grounded[section]
+        name = find_key(techniques, "フットワーク") or "フットワーク"
+    if not isinstance(techniques.get(name), dict):
+        techniques[name] = {}
+    footwork = techniques[name]
+
+    for label, rating in metrics["ratings"].items():
+        if rating is None:
+            continue
+        footwork[find_key(footwork, label.split("（")[0]) or label] = rating
+    footwork["計測値"] = {key: metrics[key] for key in ("lateral_speed", "recovery", "coverage")}
+    return grounded
@@ -0,0 +1,304 @@
+"""
+Frame Buffer Module
+1回のデコードで複数の CV 処理にフレームを配る共有メモリのリングバッファ
+
+デコードするプロセスがフレームのバッチを multiprocessing.shared_memory 上のスロットに書き込み、
+ボール追跡・姿勢推定・台の検出などの各プロセスは NumPy のビューとしてコピーせずに読む。
+スロットは全員が読み終えるまで上書きしないため、遅い処理があればデコードも待つ。
+"""
+
+import itertools
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+import numpy as np
+
+
+# スロットの状態（フレーム数の代わりに書き込む）
+END = 0
+FAILED = -1
+
+# デコード側が処理プロセスの生存を確認する間隔（秒）
+POLL_SECONDS = 0.5
+
+
+class FrameRing:
+    """
+    共有メモリ上のフレームバッチのリングバッファ（書き込み1 / 読み出し複数）
+
+    処理プロセスごとに「空きスロット数」と「未読スロット数」のセマフォを持ち、
+    write() は全員の空きを待ってから書き込む。読み出しは batches() が返すビューで行い、
+    次のバッチに進んだ時点でスロットを解放する。
+    プロセス間では multiprocessing.Process の引数として渡し、共有メモリの削除は確保した側が行う。
+    """
+
+    def __init__(
+        self,
+        frame_shape: Tuple[int, ...],
+        batch_size: int,
+        consumers: int,
+        slots: int = 4,
+        dtype=np.uint8
+    ):
+        """
+        初期化（共有メモリを確保する）
+
+        Args:
+            frame_shape: 1フレームの形（高さ, 幅, 3）
+            batch_size: 1スロットの最大フレーム数
+            consumers: 読み出すプロセスの数
+            slots: スロット数
+            dtype: フレームの型
+        """
+        context = multiprocessing.get_context()
+        self.shape = (slots, batch_size) + tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.consumers = consumers
+        self.free = [context.Semaphore(slots) for _ in range(consumers)]
+        self.filled = [context.Semaphore(0) for _ in range(consumers)]
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self._frames_memory = shared_memory.SharedMemory(create=True, size=size)
+        self._meta_memory = shared_memory.SharedMemory(create=True, size=slots * 2 * 8)
+        self._attach()
+        self._written = 0
+        self._detached = set()
+
+    def _attach(self):
+        self.frames = np.ndarray(self.shape, dtype=self.dtype, buffer=self._frames_memory.buf)
+        # スロットごとの (先頭のフレーム番号, フレーム数)
+        self.meta = np.ndarray((self.shape[0], 2), dtype=np.int64, buffer=self._meta_memory.buf)
+        self._read = 0
+        self._finished = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "shape": self.shape, "dtype": self.dtype.str, "consumers": self.consumers,
+            "free": self.free, "filled": self.filled,
+            "frames_name": self._frames_memory.name, "meta_name": self._meta_memory.name,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.shape, self.dtype, self.consumers = state["shape"], np.dtype(state["dtype"]), state["consumers"]
+        self.free, self.filled = state["free"], state["filled"]
+        self._frames_memory = shared_memory.SharedMemory(name=state["frames_name"])
+        self._meta_memory = shared_memory.SharedMemory(name=state["meta_name"])
+        self._attach()
+
+    @property
+    def slots(self) -> int:
+        return self.shape[0]
+
+    def _acquire(self, consumer: int, alive: Optional[Callable[[int], bool]]) -> bool:
+        """処理プロセスの空きスロットを待つ（プロセスが終了していれば以降は待たない）"""
+        while not self.free[consumer].acquire(timeout=POLL_SECONDS):
+            if alive is not None and not alive(consumer):
+                self._detached.add(consumer)
+                return False
+        return True
+
+    def _publish(self, start: int, count: int, frames: Optional[np.ndarray], alive):
+        slot = self._written % self.slots
+        readers = [c for c in range(self.consumers) if c not in self._detached and self._acquire(c, alive)]
+        if frames is not None:
+            self.frames[slot, :count] = frames
+        self.meta[slot] = (start, count)
+        for consumer in readers:
+            self.filled[consumer].release()
+        self._written += 1
+
+    def write(self, start: int, frames: np.ndarray, alive: Optional[Callable[[int], bool]] = None):
+        """
+        フレームのバッチを書き込む（全員が読み終えた空きスロットが出るまで待つ）
+
+        Args:
+            start: バッチ先頭のフレーム番号
+            frames: (フレーム数, *frame_shape) の配列（スロットより長ければ分けて書き込む）
+            alive: 処理プロセスが生きているかを返す関数（終了したプロセスは待たない）
+        """
+        if frames.shape[1:] != self.shape[2:]:
+            raise ValueError(f"フレームの形が異なります: {frames.shape[1:]} != {self.shape[2:]}")
+        batch_size = self.shape[1]
+        for offset in range(0, len(frames), batch_size):
+            part = frames[offset:offset + batch_size]
+            self._publish(start + offset, len(part), part, alive)
+
+    def close(self, failed: bool = False, alive: Optional[Callable[[int], bool]] = None):
+        """
+        書き込みの終了を知らせる
+
+        Args:
+            failed: デコードに失敗した場合 True（読み出し側は RuntimeError になる）
+            alive: write() と同じ
+        """
+        self._publish(0, FAILED if failed else END, None, alive)
+
+    def batches(self, consumer: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        バッチを順に読む（処理プロセス側）
+
+        返すのは共有メモリの読み取り専用のビューで、次のバッチに進むと上書きされる。
+        残したいフレームは呼び出し側でコピーすること。
+
+        Args:
+            consumer: 処理プロセスの番号（0 〜 consumers-1）
+
+        Yields:
+            (バッチ先頭のフレーム番号, (フレーム数, *frame_shape) の配列)
+        """
+        while not self._finished:
+            self.filled[consumer].acquire()
+            slot = self._read % self.slots
+            self._read += 1
+            start, count = (int(value) for value in self.meta[slot])
+            if count <= 0:
+                self._finished = True
+                self.free[consumer].release()
+                if count == FAILED:
+                    raise RuntimeError("フレームのデコードに失敗しました")
+                return
+            view = self.frames[slot, :count]
+            view.flags.writeable = False
+            try:
+                yield start, view
+            finally:
+                self.free[consumer].release()
+
+    def drain(self, consumer: int):
+        """残りのバッチを読み捨てる（処理を途中でやめたプロセスがデコードを止めないように）"""
+        try:
+            for _ in self.batches(consumer):
+                pass
+        except RuntimeError:
+            pass
+
+    def detach(self):
+        """共有メモリの割り当てを外す（処理プロセス側）"""
+        self.frames = self.meta = None
+        self._frames_memory.close()
+        self._meta_memory.close()
+
+    def release(self):
+        """共有メモリを削除（確保したプロセス側）"""
+        self.detach()
+        self._frames_memory.unlink()
+        self._meta_memory.unlink()
+
+
+def _consume(ring: FrameRing, consumer: int, name: str, func: Callable, results):
+    """処理プロセスの本体（結果または例外の内容を results に送る）"""
+    try:
+        results.put((name, True, func(ring.batches(consumer))))
+    except BaseException as e:
+        results.put((name, False, f"{type(e).__name__}: {e}"))
+    finally:
+        ring.drain(consumer)
+        ring.detach()
+
+
+def share_batches(
+    batches: Iterable[Tuple[int, np.ndarray]],
+    consumers: Dict[str, Callable[[Iterator[Tuple[int, np.ndarray]]], Any]],
+    slots: int = 4
+) -> Dict[str, Any]:
+    """
+    フレームのバッチ列を複数の処理に配る
+
+    処理ごとにプロセスを起動し、呼び出し元のプロセスが batches を読んで共有メモリに書き込む。
+    処理が1つだけならプロセスを使わずにそのまま渡す。
+
+    Args:
+        batches: (先頭のフレーム番号, フレーム配列) の並び（iter_frame_batches の戻り値など）
+        consumers: 名前 → バッチ列を受け取って結果を返す関数（プロセス間で渡せるもの）
+        slots: リングバッファのスロット数
+
+    Returns:
+        名前 → 関数の戻り値
+
+    Raises:
+        RuntimeError: 処理が例外で終わった、またはプロセスが異常終了した場合
+    """
+    iterator = iter(batches)
+    first = next(iterator, None)
+    if first is None:
+        return {name: func(iter(())) for name, func in consumers.items()}
+    if len(consumers) == 1:
+        (name, func), = consumers.items()
+        return {name: func(itertools.chain([first], iterator))}
+
+    names = list(consumers)
+    ring = FrameRing(first[1].shape[1:], len(first[1]), len(names), slots, first[1].dtype)
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    processes = [
+        context.Process(target=_consume, args=(ring, i, name, consumers[name], results), daemon=True)
+        for i, name in enumerate(names)
+    ]
+    for process in processes:
+        process.start()
+
+    def alive(consumer: int) -> bool:
+        return processes[consumer].is_alive()
+
+    collected: Dict[str, Tuple[bool, Any]] = {}
+    try:
+        try:
+            for start, frames in itertools.chain([first], iterator):
+                ring.write(start, frames, alive)
+        except BaseException:
+            ring.close(failed=True, alive=alive)
+            raise
+        ring.close(alive=alive)
+
+        # キューを読み切ってから join する（大きな結果でパイプが詰まらないように）
+        while len(collected) < len(names):
+            try:
+                name, ok, value = results.get(timeout=POLL_SECONDS)
+                collected[name] = (ok, value)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break
+    finally:
+        for process in processes:
+            process.join(timeout=POLL_SECONDS * 4)
+            if process.is_alive():
+                process.terminate()
+        ring.release()
+
+    output = {}
+    for name in names:
+        if name not in collected:
+            raise RuntimeError(f"{name} の処理プロセスが異常終了しました")
+        ok, value = collected[name]
+        if not ok:
+            raise RuntimeError(f"{name} の処理に失敗しました: {value}")
+        output[name] = value
+    return output
+
+
+def decode_shared(
+    video_path: str,
+    consumers: Dict[str, Callable[[Iterator[Tuple[int, np.ndarray]]], Any]],
+    batch_size: int = 32,
+    slots: int = 4,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    動画を1回だけ（元の解像度で）デコードし、複数の処理に配る
+
+    Args:
+        video_path: 動画ファイルのパス
+        consumers: share_batches と同じ
+        batch_size: 1バッチのフレーム数
+        slots: リングバッファのスロット数
+        start_frame: 開始フレーム
+        end_frame: 終了フレーム（含まない。省略時は最後まで）
+
+    Returns:
+        名前 → 処理の戻り値
+    """
+    from .cv_analyzer import iter_frame_batches
+
+    return share_batches(iter_frame_batches(video_path, batch_size, 1, start_frame, end_frame), consumers, slots)
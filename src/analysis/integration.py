@@ -0,0 +1,423 @@
+"""
+Integration Module
+CV の定量分析と LLM の定性分析を統合する
+
+ラリー区間・打球の種類・配球・フットワークを先に計測し、その結果から LLM に見せる
+短いクリップと計測値だけを選ぶ。LLM は試合全体ではなく抜粋だけを見て質的な評価を行い、
+回数・割合・コースなどの数値は計測値で置き換えて1つの分析結果にまとめる。
+"""
+
+import copy
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from storage.schema import find_key
+
+from .audio_segmenter import cluster_rallies
+from .footwork import ground_footwork
+from .placement import PHASES, SIDES
+from .stroke_classifier import STROKE_LABELS, count_strokes
+
+
+DEFAULT_CLIP_DIR = "data/clips"
+
+# ラリーの長さの区分（打球音の数）
+RALLY_LENGTHS = (("短い（4打以下）", 0, 4), ("中（5-8打）", 5, 8), ("長い（9打以上）", 9, None))
+
+# コースが偏っているとみなす最多コースの割合と最小の件数
+PREDICTABLE_SHARE = 0.5
+PREDICTABLE_MIN_SHOTS = 5
+
+
+def collect_cv_results(
+    video_path: str,
+    video_hash: str,
+    db_path: Optional[str] = None,
+    self_side: Optional[str] = None,
+    model_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    CV の各ステージの結果を集める（保存済みの結果は読み込むだけ）
+
+    依存ライブラリや ffmpeg がなく実行できないステージは飛ばし、理由を unavailable に記録する。
+
+    Args:
+        video_path: 動画ファイルのパス
+        video_hash: 動画の内容ハッシュ
+        db_path: 打球イベントの索引の SQLite ファイル
+        self_side: 自分の位置（"near" / "far"）
+        model_path: 打球の分類モデル（打球イベントが未保存の場合に使う）
+
+    Returns:
+        video_hash / self_side / rallies / strokes / placement / footwork / unavailable を持つ辞書
+    """
+    from storage.strokes import StrokeIndex
+
+    from .audio_segmenter import AudioSegmenter
+    from .footwork import footwork_metrics
+    from .placement import PlacementAnalyzer
+    from .pose_estimator import PoseEstimator
+    from .proxy import proxy_or_source
+    from .stroke_classifier import DEFAULT_MODEL_PATH, SoftmaxClassifier, StrokeDetector, detect_strokes
+
+    result: Dict[str, Any] = {
+        "video_hash": video_hash, "self_side": self_side,
+        "rallies": None, "strokes": None, "placement": None, "footwork": None, "unavailable": {},
+    }
+    unavailable = result["unavailable"]
+
+    # ラリー検出とクリップの切り出しはプロキシを読む（作成できなければ元の動画）
+    proxy = proxy_or_source(video_path, video_hash)
+    try:
+        result["rallies"] = AudioSegmenter().segment(proxy["path"], video_hash)["rallies"]
+    except (FileNotFoundError, ValueError) as e:
+        unavailable["rallies"] = f"ラリー検出には ffmpeg が必要です ({e})"
+
+    try:
+        result["placement"] = PlacementAnalyzer(self_side=self_side).run(video_path, video_hash)
+    except (ImportError, ValueError) as e:
+        unavailable["placement"] = str(e)
+
+    keypoints = meta = None
+    try:
+        keypoints, meta = PoseEstimator().run(video_path, video_hash=video_hash)
+        result["footwork"] = footwork_metrics(keypoints, meta)
+    except (ImportError, ValueError) as e:
+        unavailable["footwork"] = str(e)
+
+    index = StrokeIndex(db_path)
+    events = index.events(video_hash)
+    model_path = model_path or DEFAULT_MODEL_PATH
+    if not events and keypoints is not None and os.path.exists(model_path):
+        model = SoftmaxClassifier.load(model_path)
+        events = list(detect_strokes(StrokeDetector(model, meta), keypoints))
+        index.save(video_hash, events, model=model_path)
+    if events:
+        result["strokes"] = events
+    else:
+        unavailable["strokes"] = "打球イベントがありません（strokes コマンドで検出してください）"
+    return result
+
+
+class IntegrationEngine:
+    """
+    定量分析（CV）と定性分析（LLM）の統合
+
+    CV の結果から LLM に渡すクリップと計測値を選び（select_clips / prompt_metrics）、
+    LLM の結果と合わせて1つの分析結果にする（run_integration）。
+    """
+
+    def __init__(
+        self,
+        cv_result: Dict[str, Any],
+        llm_result: Optional[Dict[str, Any]] = None,
+        self_side: Optional[str] = None
+    ):
+        """
+        初期化
+
+        Args:
+            cv_result: collect_cv_results の戻り値
+            llm_result: LLM の分析結果（クリップの分析前は None）
+            self_side: 自分の位置（配球データの選手が near / far の場合に使う。省略時は cv_result の値）
+        """
+        self.cv_result = cv_result
+        self.llm_result = llm_result
+        self.self_side = self_side or cv_result.get("self_side")
+
+    def _rallies(self) -> List[Dict[str, Any]]:
+        """ラリー区間（音声で検出できなければ打球イベントの時刻からまとめる）"""
+        if self.cv_result.get("rallies"):
+            return self.cv_result["rallies"]
+        events = self.cv_result.get("strokes") or []
+        return cluster_rallies(np.array([event["time"] for event in events]), min_hits=2)
+
+    def _player(self, is_opponent: bool) -> Optional[Dict[str, Any]]:
+        """配球データの自分または相手の集計（どちらか分からなければ None）"""
+        players = (self.cv_result.get("placement") or {}).get("players") or {}
+        name = "opponent" if is_opponent else "self"
+        if name in players or "self" in players or "opponent" in players:
+            return players.get(name)
+        if self.self_side in SIDES:
+            side = SIDES[1 - SIDES.index(self.self_side)] if is_opponent else self.self_side
+            return players.get(side)
+        return None
+
+    @staticmethod
+    def _share(group: Dict[str, Any]) -> float:
+        counts = np.asarray(group["counts"])
+        return float(counts.max() / max(counts.sum(), 1))
+
+    def analyze_rally_patterns(self, is_opponent: bool = False) -> Dict[str, Any]:
+        """
+        ラリーの長さの分布と、3球目以降の配球（FA-01 / FA-06）
+
+        Args:
+            is_opponent: 相手の配球を集計するか
+
+        Returns:
+            rallies / hits / duration / length_mix / courses を持つ辞書
+        """
+        rallies = self._rallies()
+        hits = np.array([rally["hits"] for rally in rallies])
+        durations = np.array([rally["end"] - rally["start"] for rally in rallies])
+        patterns: Dict[str, Any] = {"rallies": len(rallies)}
+        if len(rallies):
+            patterns["hits"] = {"mean": round(float(hits.mean()), 1), "max": int(hits.max())}
+            patterns["duration"] = {"mean": round(float(durations.mean()), 1), "max": round(float(durations.max()), 1)}
+            mix = {}
+            for label, low, high in RALLY_LENGTHS:
+                selected = hits >= low if high is None else (hits >= low) & (hits <= high)
+                mix[label] = round(float(selected.mean()), 2)
+            patterns["length_mix"] = mix
+
+        player = self._player(is_opponent)
+        if player:
+            courses = {}
+            for role, phases in player.items():
+                for phase in ("third", "fourth", "rally"):
+                    if phase in phases:
+                        courses[f"{role}.{phase}"] = {"n": phases[phase]["n"], "top": phases[phase]["top"]}
+            patterns["courses"] = courses
+        return patterns
+
+    def calculate_technique_stats(self) -> Dict[str, Any]:
+        """
+        打球の種類ごとの本数・割合とフットワークの計測値（FA-02）
+
+        Returns:
+            strokes（種類 → n / share / confidence）/ footwork を持つ辞書
+        """
+        stats: Dict[str, Any] = {}
+        events = self.cv_result.get("strokes") or []
+        if events:
+            counts = count_strokes(events)
+            total = sum(counts.values())
+            strokes = {}
+            for stroke, n in counts.items():
+                confidences = [e["confidence"] for e in events if e.get("stroke") == stroke and e.get("confidence")]
+                strokes[STROKE_LABELS[stroke]] = {
+                    "n": n,
+                    "share": round(n / total, 2) if total else 0.0,
+                    "confidence": round(float(np.mean(confidences)), 2) if confidences else None,
+                }
+            stats["strokes"] = strokes
+        footwork = self.cv_result.get("footwork")
+        if footwork:
+            stats["footwork"] = {
+                key: footwork[key] for key in ("lateral_speed", "recovery", "coverage", "ratings")
+            }
+        return stats
+
+    def analyze_serve_receive(self, is_opponent: bool = False) -> Dict[str, Any]:
+        """
+        サーブ・レシーブと3球目・4球目のコース（FA-03 / FA-07）
+
+        Args:
+            is_opponent: 相手を集計するか
+
+        Returns:
+            "server.serve" などのキー → n / top / share の辞書（配球データがなければ空）
+        """
+        player = self._player(is_opponent) or {}
+        result = {}
+        for role, phases in (("server", ("serve", "third")), ("receiver", ("receive", "fourth"))):
+            for phase in phases:
+                group = player.get(role, {}).get(phase)
+                if group:
+                    result[f"{role}.{phase}"] = {
+                        "n": group["n"], "top": group["top"], "share": round(self._share(group), 2)
+                    }
+        return result
+
+    def identify_opponent_weakness(self) -> Dict[str, Any]:
+        """
+        相手の弱点（FA-08）
+
+        計測値からはコースの偏り（最多コースの割合が高く読まれやすい場面）を挙げ、
+        LLM の分析に弱点の記述があればあわせて返す。
+
+        Returns:
+            predictable（偏りのある場面のリスト）/ llm を持つ辞書
+        """
+        predictable = []
+        for role, phases in (self._player(True) or {}).items():
+            for phase in PHASES:
+                group = phases.get(phase)
+                if group and group["n"] >= PREDICTABLE_MIN_SHOTS and self._share(group) >= PREDICTABLE_SHARE:
+                    predictable.append({"role": role, "phase": phase, "n": group["n"], "top": group["top"]})
+
+        llm = None
+        if isinstance(self.llm_result, dict):
+            for section in self.llm_result.values():
+                if isinstance(section, dict):
+                    key = find_key(section, "弱点") or find_key(section, "weakness")
+                    if key:
+                        llm = section[key]
+                        break
+        return {"predictable": predictable, "llm": llm}
+
+    def select_clips(
+        self,
+        max_clips: int = 6,
+        clip_seconds: float = 8.0,
+        max_total: float = 45.0
+    ) -> List[Dict[str, Any]]:
+        """
+        LLM に見せるクリップを選ぶ
+
+        打球音の多いラリーと、多くの種類の打球を含むラリーを優先し、長いラリーは
+        中央の clip_seconds 秒に切り詰める。
+
+        Args:
+            max_clips: クリップの最大数
+            clip_seconds: 1本の最大の長さ（秒）
+            max_total: 合計の最大の長さ（秒）
+
+        Returns:
+            start / end / hits / strokes を持つクリップのリスト（時刻順）
+        """
+        events = self.cv_result.get("strokes") or []
+        times = np.array([event["time"] for event in events])
+        candidates = []
+        for rally in self._rallies():
+            inside = (times >= rally["start"]) & (times <= rally["end"])
+            kinds = sorted({events[i]["stroke"] for i in np.flatnonzero(inside) if events[i].get("stroke")})
+            start, end = rally["start"], rally["end"]
+            if end - start > clip_seconds:
+                middle = (start + end) / 2
+                start, end = middle - clip_seconds / 2, middle + clip_seconds / 2
+            candidates.append((rally["hits"] + 2 * len(kinds), round(start, 2), round(end, 2), rally["hits"], kinds))
+
+        clips = []
+        total = 0.0
+        for _, start, end, hits, kinds in sorted(candidates, key=lambda c: (-c[0], c[1])):
+            if len(clips) >= max_clips or total + (end - start) > max_total:
+                continue
+            clips.append({"start": start, "end": end, "hits": hits, "strokes": kinds})
+            total += end - start
+        return sorted(clips, key=lambda clip: clip["start"])
+
+    def prompt_metrics(self) -> Dict[str, Any]:
+        """
+        LLM のプロンプトに埋め込む計測値（打球イベントなどの生データは含めない）
+
+        Returns:
+            ラリー / 技術統計 / サーブ・レシーブ の辞書
+        """
+        return {
+            "ラリー": self.analyze_rally_patterns(),
+            "技術統計": self.calculate_technique_stats(),
+            "サーブ・レシーブ": {
+                "自分": self.analyze_serve_receive(),
+                "相手": self.analyze_serve_receive(is_opponent=True),
+            },
+        }
+
+    def run_integration(self) -> Dict[str, Any]:
+        """
+        LLM の分析結果に計測値を統合する
+
+        フットワークの評価は計測値による評価で置き換え、計測値は "定量分析" にまとめる。
+
+        Returns:
+            統合した分析結果（llm_result は変更しない）
+        """
+        merged = copy.deepcopy(self.llm_result) if isinstance(self.llm_result, dict) else {}
+        footwork = self.cv_result.get("footwork")
+        if footwork:
+            merged = ground_footwork(merged, footwork)
+        merged["定量分析"] = {
+            **self.prompt_metrics(),
+            "相手のラリー": self.analyze_rally_patterns(is_opponent=True),
+            "相手の弱点": self.identify_opponent_weakness(),
+            "計測できなかった項目": self.cv_result.get("unavailable") or {},
+        }
+        return merged
+
+
+def cut_clips(
+    video_path: str,
+    clips: List[Dict[str, Any]],
+    clip_dir: str = DEFAULT_CLIP_DIR,
+    video_hash: Optional[str] = None,
+    height: int = 480
+) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    クリップを低解像度の動画ファイルに切り出す（作成済みのファイルは再利用する）
+
+    Args:
+        video_path: 動画ファイルのパス
+        clips: select_clips の戻り値
+        clip_dir: 保存先ディレクトリ
+        video_hash: 動画の内容ハッシュ（ファイル名に使う。省略時は計算）
+        height: 出力の高さ（画素。元の動画より大きくはしない）
+
+    Returns:
+        (クリップ, ファイルのパス) のリスト
+
+    Raises:
+        FileNotFoundError: ffmpeg がない場合
+    """
+    from storage.result_index import compute_file_hash
+
+    video_hash = video_hash or compute_file_hash(video_path)
+    directory = Path(clip_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    outputs = []
+    for clip in clips:
+        path = directory / f"{video_hash}_{clip['start']:.2f}_{clip['end']:.2f}.mp4"
+        if not path.exists():
+            tmp = path.with_name(f".{path.name}.tmp.mp4")
+            subprocess.run([
+                "ffmpeg", "-y", "-v", "error",
+                "-ss", f"{clip['start']:.3f}", "-i", video_path, "-t", f"{clip['end'] - clip['start']:.3f}",
+                "-vf", f"scale=-2:'min({height},ih)'", "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+                "-an", str(tmp)
+            ], check=True, capture_output=True)
+            os.replace(tmp, path)
+        outputs.append((clip, str(path)))
+    return outputs
+
+
+def integrated_analysis(
+    analyzer,
+    video_path: str,
+    cv_result: Dict[str, Any],
+    player_name: str,
+    team_name: str,
+    clip_dir: str = DEFAULT_CLIP_DIR,
+    max_clips: int = 6
+) -> Dict[str, Any]:
+    """
+    計測値と選んだクリップだけを LLM に渡して分析し、計測値と統合する
+
+    Args:
+        analyzer: LLMAnalyzer
+        video_path: 動画ファイルのパス
+        cv_result: collect_cv_results の戻り値
+        player_name: 選手名
+        team_name: 所属チーム名
+        clip_dir: クリップの保存先ディレクトリ
+        max_clips: クリップの最大数
+
+    Returns:
+        統合した分析結果
+    """
+    from .proxy import proxy_or_source
+
+    engine = IntegrationEngine(cv_result)
+    clips = engine.select_clips(max_clips=max_clips)
+    if clips:
+        # クリップはキーフレームの間隔が短いプロキシから切り出す
+        source = proxy_or_source(video_path, cv_result.get("video_hash"))["path"]
+        files = cut_clips(source, clips, clip_dir, cv_result.get("video_hash"))
+        engine.llm_result = analyzer.analyze_clips(files, engine.prompt_metrics(), player_name, team_name)
+    else:
+        # ラリーも打球も計測できなければ、従来どおり動画全体を渡す
+        engine.llm_result = analyzer.analyze_video(video_path, player_name, team_name)
+    return engine.run_integration()
@@ -7,16 +7,32 @@ import os
 import json
 import base64
 from pathlib import Path
-from typing import Optional, Dict, Any
-from openai import OpenAI
+from typing import Optional, Dict, Any, List, Tuple
 
 from .prompts import (
     COMPREHENSIVE_ANALYSIS_PROMPT,
+    INTEGRATED_ANALYSIS_CONTEXT,
     STRATEGY_GENERATION_PROMPT,
     PRACTICE_PLAN_PROMPT,
-    OPPONENT_ANALYSIS_PROMPT
+    OPPONENT_ANALYSIS_PROMPT,
+    SERVE_MONTAGE_CONTEXT,
+    SERVE_ANALYSIS_PROMPT,
+    OPPONENT_SERVE_ANALYSIS_PROMPT,
+    LIVE_ADVICE_PROMPT
 )
 
+# openai は import コストが大きいため、クライアントを初めて使う時に読み込む
+OpenAI = None
+
+
+def _load_openai_client_class():
+    """OpenAIクライアントクラスを遅延読み込み"""
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as _OpenAI
+        OpenAI = _OpenAI
+    return OpenAI
+
 
 class LLMAnalyzer:
     """
@@ -42,7 +58,18 @@ class LLMAnalyzer:
             raise ValueError("API key is required. Set OPENAI_API_KEY environment variable.")
         
         self.model = model
-        self.client = OpenAI()  # 環境変数から自動設定
+        self._client = None
+    
+    @property
+    def client(self):
+        """APIクライアント（初回アクセス時に生成）"""
+        if self._client is None:
+            self._client = _load_openai_client_class()()  # 環境変数から自動設定
+        return self._client
+    
+    @client.setter
+    def client(self, value):
+        self._client = value
         
     def _encode_video(self, video_path: str) -> str:
         """
@@ -143,6 +170,207 @@ class LLMAnalyzer:
         except json.JSONDecodeError:
             return {"raw_response": result_text}
     
+    def analyze_clips(
+        self,
+        clips: List[Tuple[Dict[str, Any], str]],
+        metrics: Dict[str, Any],
+        player_name: str = "浅見江里佳",
+        team_name: str = "文化学園大学杉並"
+    ) -> Dict[str, Any]:
+        """
+        計測値と抜粋クリップだけで総合分析を実行（動画全体は送らない）
+        
+        Args:
+            clips: (クリップ, ファイルのパス) のリスト（integration.cut_clips の戻り値）
+            metrics: 計測値（IntegrationEngine.prompt_metrics の戻り値）
+            player_name: 選手名
+            team_name: 所属チーム名
+            
+        Returns:
+            分析結果の辞書
+        """
+        content = []
+        for clip, path in clips:
+            content.append({
+                "type": "text",
+                "text": f"【{clip['start']:.1f}〜{clip['end']:.1f}秒のクリップ】"
+            })
+            content.append({
+                "type": "video_url",
+                "video_url": {
+                    "url": f"data:{self._get_video_mime_type(path)};base64,{self._encode_video(path)}"
+                }
+            })
+        
+        context = INTEGRATED_ANALYSIS_CONTEXT.format(
+            metrics=json.dumps(metrics, ensure_ascii=False, separators=(",", ":")),
+            clips=len(clips),
+            seconds=sum(clip["end"] - clip["start"] for clip, _ in clips)
+        )
+        prompt = COMPREHENSIVE_ANALYSIS_PROMPT.format(
+            player_name=player_name,
+            team_name=team_name
+        )
+        content.append({
+            "type": "text",
+            "text": context + prompt
+        })
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=4096,
+            temperature=0.7
+        )
+        
+        result_text = response.choices[0].message.content
+        
+        try:
+            json_start = result_text.find('{')
+            json_end = result_text.rfind('}') + 1
+            if json_start != -1 and json_end > json_start:
+                json_str = result_text[json_start:json_end]
+                return json.loads(json_str)
+            else:
+                return {"raw_response": result_text}
+        except json.JSONDecodeError:
+            return {"raw_response": result_text}
+    
+    def analyze_serves(
+        self,
+        montage_path: str,
+        serves: List[Dict[str, Any]],
+        player_name: str = "浅見江里佳",
+        team_name: str = "文化学園大学杉並",
+        opponent: bool = False
+    ) -> Dict[str, Any]:
+        """
+        サーブの場面だけをつないだ動画でサーブ・レシーブを分析（動画全体は送らない）
+        
+        Args:
+            montage_path: サーブの場面をつないだ動画（serve.build_montage の戻り値）
+            serves: offset / time / server / start_time / end_time を持つサーブのリスト
+            player_name: 選手名（opponent=True の場合は相手選手名）
+            team_name: 所属チーム名
+            opponent: 相手選手のサーブ・レシーブの傾向として分析する
+            
+        Returns:
+            分析結果の辞書
+        """
+        labels = {"self": "分析対象", "opponent": "相手"}
+        serve_list = "\n".join(
+            f"- {serve['offset']:.1f}秒〜 / {serve['time']:.1f}秒 / {labels.get(serve.get('server'), '不明')}"
+            for serve in serves
+        )
+        context = SERVE_MONTAGE_CONTEXT.format(
+            serves=len(serves),
+            seconds=sum(serve["end_time"] - serve["start_time"] for serve in serves),
+            serve_list=serve_list
+        )
+        prompt = (OPPONENT_SERVE_ANALYSIS_PROMPT if opponent else SERVE_ANALYSIS_PROMPT).format(
+            player_name=player_name,
+            team_name=team_name
+        )
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "video_url",
+                            "video_url": {
+                                "url": f"data:{self._get_video_mime_type(montage_path)};base64,{self._encode_video(montage_path)}"
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": context + prompt
+                        }
+                    ]
+                }
+            ],
+            max_tokens=2048,
+            temperature=0.7
+        )
+        
+        result_text = response.choices[0].message.content
+        
+        try:
+            json_start = result_text.find('{')
+            json_end = result_text.rfind('}') + 1
+            if json_start != -1 and json_end > json_start:
+                json_str = result_text[json_start:json_end]
+                return json.loads(json_str)
+            else:
+                return {"raw_response": result_text}
+        except json.JSONDecodeError:
+            return {"raw_response": result_text}
+    
+    def live_advice(
+        self,
+        frames: List[Dict[str, Any]],
+        stats: Dict[str, Any],
+        player_name: str = "浅見江里佳",
+        team_name: str = "文化学園大学杉並",
+        strategy: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        試合中の助言（直近のラリーのフレームと統計から、試合前の戦略の変更点を求める）
+        
+        Args:
+            frames: timestamp / data（Base64 の JPEG）を持つフレームのリスト
+            stats: pipeline.live.LiveStats.snapshot の戻り値
+            player_name: 選手名
+            team_name: 所属チーム名
+            strategy: 試合前の戦略（省略時は統計と画像だけで助言する）
+            timeout: API 呼び出しのタイムアウト（秒）
+            
+        Returns:
+            継続 / 変更 / 次のゲームの最優先事項 を持つ辞書
+        """
+        content: List[Dict[str, Any]] = []
+        for frame in frames:
+            content.append({"type": "text", "text": f"【{frame['timestamp']:.1f}秒】"})
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{frame['data']}"}
+            })
+        recent = stats.get("recent") or {}
+        prompt = LIVE_ADVICE_PROMPT.format(
+            player_name=player_name,
+            team_name=team_name,
+            rallies=recent.get("rallies", 0),
+            stats=json.dumps({"試合全体": stats.get("match"), "直近": recent}, ensure_ascii=False),
+            strategy=json.dumps(strategy, ensure_ascii=False) if strategy else "なし",
+            frames=len(frames)
+        )
+        content.append({"type": "text", "text": prompt})
+        
+        options = {} if timeout is None else {"timeout": timeout}
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=1024,
+            temperature=0.4,
+            **options
+        )
+        
+        result_text = response.choices[0].message.content
+        
+        try:
+            json_start = result_text.find('{')
+            json_end = result_text.rfind('}') + 1
+            if json_start != -1 and json_end > json_start:
+                json_str = result_text[json_start:json_end]
+                return json.loads(json_str)
+            else:
+                return {"raw_response": result_text}
+        except json.JSONDecodeError:
+            return {"raw_response": result_text}
+    
     def analyze_multiple_videos(
         self,
         video_paths: list,
@@ -218,7 +446,8 @@ JSON形式で出力してください。
     def generate_strategy(
         self,
         self_analysis: Dict[str, Any],
-        opponent_analysis: Optional[Dict[str, Any]] = None
+        opponent_analysis: Optional[Dict[str, Any]] = None,
+        placement: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         試合戦略を生成
@@ -226,15 +455,19 @@ JSON形式で出力してください。
         Args:
             self_analysis: 自己分析結果
             opponent_analysis: 相手分析結果（オプション）
+            placement: 配球の集計（placement.placement_stats の戻り値。オプション）
             
         Returns:
             試合戦略の辞書
         """
         opponent_info = opponent_analysis if opponent_analysis else {"note": "相手情報なし。一般的な戦略を提案。"}
+        # 件数の表は行ごとに1行で十分なため、インデントせずに埋め込む
+        placement_info = json.dumps(placement, ensure_ascii=False, separators=(",", ":")) if placement else "なし"
         
         prompt = STRATEGY_GENERATION_PROMPT.format(
             self_analysis=json.dumps(self_analysis, ensure_ascii=False, indent=2),
-            opponent_analysis=json.dumps(opponent_info, ensure_ascii=False, indent=2)
+            opponent_analysis=json.dumps(opponent_info, ensure_ascii=False, indent=2),
+            placement=placement_info
         )
         
         response = self.client.chat.completions.create(
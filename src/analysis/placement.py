@@ -0,0 +1,337 @@
+"""
+Placement Module
+ボールの軌跡からバウンドを検出し、台の上の落下位置（コース）を集計する
+
+バウンドは画像上の縦方向の速度が下向きから上向きに変わる点とし、台の座標
+（table_calibration）に変換する。ラリー内の順番からサーブ・レシーブ・3球目…と
+打った選手（サーバー/レシーバー）を決め、相手コートを 3x3 のコースに分けて数える。
+集計結果は戦略生成プロンプトにそのまま埋め込める小さな JSON にする。
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from storage.result_index import compute_file_hash
+from storage.writer import atomic_write_json
+
+from .table_calibration import TABLE_LENGTH, TABLE_WIDTH
+
+
+# 打った選手の位置（カメラ側 / 奥側）
+SIDES = ("near", "far")
+ROLES = ("server", "receiver")
+# 何球目か（5球目以降はラリー）
+PHASES = ("serve", "receive", "third", "fourth", "rally")
+
+# コースの名前（打った選手から見た相手コート。行はネットからの深さ、列は左右）
+DEPTH_LABELS = ("短", "ハーフロング", "長")
+LATERAL_LABELS = ("左", "中央", "右")
+
+DEFAULT_PLACEMENT_DIR = "data/placement"
+
+
+def detect_bounces(
+    track: Dict[str, Any],
+    min_speed: float = 1.0,
+    max_skip: int = 2,
+    margin: float = 0.05
+) -> Dict[str, np.ndarray]:
+    """
+    ボールの軌跡から台上のバウンドを検出
+
+    同じ軌跡の連続した検出点で、画像上の y の速度が下向き（min_speed 画素/フレーム以上）
+    から上向きに変わった点をバウンドとし、台の範囲（margin メートルの余裕つき）の外は除く。
+
+    Args:
+        track: table_x / table_y を持つ CVAnalyzer.track_batches の戻り値
+        min_speed: バウンド前後の縦方向の最小速度（画素/フレーム）
+        max_skip: 連続とみなす検出点のフレーム間隔の上限
+        margin: 台の範囲の余裕（メートル）
+
+    Returns:
+        frame / time / table_x / table_y の配列を持つ辞書（時刻順）
+    """
+    detected = np.flatnonzero(track["detected"] & ~np.isnan(track["table_x"]))
+    frames = track["frame"][detected]
+    gaps = np.diff(frames)
+    connected = (np.diff(track["track_id"][detected]) == 0) & (gaps <= max_skip) & (gaps > 0)
+    velocity = np.diff(track["y"][detected]) / np.maximum(gaps, 1)
+
+    turn = (
+        (velocity[:-1] >= min_speed) & (velocity[1:] <= -min_speed)
+        & connected[:-1] & connected[1:]
+    )
+    points = detected[np.flatnonzero(turn) + 1]
+    table_x, table_y = track["table_x"][points], track["table_y"][points]
+    on_table = (
+        (table_x >= -margin) & (table_x <= TABLE_WIDTH + margin)
+        & (table_y >= -margin) & (table_y <= TABLE_LENGTH + margin)
+    )
+    points = points[on_table]
+    return {
+        "frame": track["frame"][points],
+        "time": track["time"][points],
+        "table_x": track["table_x"][points],
+        "table_y": track["table_y"][points],
+    }
+
+
+def assign_shots(
+    bounces: Dict[str, np.ndarray],
+    rallies: Optional[List[Dict[str, Any]]] = None,
+    max_gap: float = 2.0
+) -> Dict[str, np.ndarray]:
+    """
+    バウンドに何球目か・打った選手を割り当てる
+
+    ラリーの最初のバウンドはサーブが自コートに落ちた点とみなし、その側をサーバーとする。
+    2つ目以降のバウンドは相手コートへの着地で、打った選手は着地点の反対側。
+
+    Args:
+        bounces: detect_bounces の戻り値
+        rallies: ラリー区間（audio_segmenter.cluster_rallies の戻り値。start / end は秒）。
+            省略時はバウンドの間隔が max_gap 秒を超えたところで区切る
+        max_gap: rallies 省略時にラリーを区切る間隔（秒）
+
+    Returns:
+        着地したバウンドだけの辞書（frame / time / table_x / table_y に加えて
+        rally / shot（1 がサーブ）/ hitter / role / phase の配列。hitter / role / phase は
+        SIDES / ROLES / PHASES の添字）
+    """
+    times = bounces["time"]
+    if rallies:
+        starts = np.array([rally["start"] for rally in rallies])
+        ends = np.array([rally["end"] for rally in rallies])
+        rally_ids = np.searchsorted(starts, times, side="right") - 1
+        inside = (rally_ids >= 0) & (times <= ends[np.maximum(rally_ids, 0)])
+    else:
+        rally_ids = np.cumsum(np.concatenate([[False], np.diff(times) > max_gap]))[:len(times)].astype(np.int64)
+        inside = np.ones(len(times), dtype=bool)
+
+    keep = np.flatnonzero(inside)
+    rally_ids = rally_ids[keep]
+    far = bounces["table_y"][keep] < TABLE_LENGTH / 2  # 奥側のコートに落ちた
+
+    # ラリー内の順番（0 がサーブの1バウンド目）
+    _, first, counts = np.unique(rally_ids, return_index=True, return_counts=True)
+    order = np.arange(len(rally_ids)) - np.repeat(first, counts)
+    server_near = np.repeat(~far[first], counts)  # サーブの1バウンド目が手前ならカメラ側がサーバー
+
+    landing = order >= 1
+    hitter = np.where(far, 0, 1)  # 着地点の反対側の選手が打った
+    role = np.where((hitter == 0) == server_near, 0, 1)
+    phase = np.minimum(order - 1, len(PHASES) - 1)
+
+    result = {name: values[keep][landing] for name, values in bounces.items()}
+    result.update({
+        "rally": rally_ids[landing],
+        "shot": order[landing],
+        "hitter": hitter[landing],
+        "role": role[landing],
+        "phase": phase[landing],
+    })
+    return result
+
+
+def course_coordinates(shots: Dict[str, np.ndarray]):
+    """
+    着地点を打った選手から見た相手コートの座標に変換
+
+    Args:
+        shots: assign_shots の戻り値
+
+    Returns:
+        (深さ, 左右) の配列。深さはネットが0・エンドラインが1、左右は打った選手から見て左端が0
+    """
+    half = TABLE_LENGTH / 2
+    near_hitter = shots["hitter"] == 0
+    depth = np.where(near_hitter, half - shots["table_y"], shots["table_y"] - half) / half
+    lateral = np.where(near_hitter, shots["table_x"], TABLE_WIDTH - shots["table_x"]) / TABLE_WIDTH
+    return depth, lateral
+
+
+def placement_heatmaps(shots: Dict[str, np.ndarray], rows: int = 3, cols: int = 3) -> np.ndarray:
+    """
+    打った選手・サーバー/レシーバー・何球目かごとのコースのヒートマップ
+
+    全グループを1回の np.bincount で数える。
+
+    Args:
+        shots: assign_shots の戻り値
+        rows: 深さ方向の分割数
+        cols: 左右方向の分割数
+
+    Returns:
+        (len(SIDES), len(ROLES), len(PHASES), rows, cols) の件数配列
+    """
+    depth, lateral = course_coordinates(shots)
+    row = np.clip((depth * rows).astype(np.int64), 0, rows - 1)
+    col = np.clip((lateral * cols).astype(np.int64), 0, cols - 1)
+    group = (shots["hitter"] * len(ROLES) + shots["role"]) * len(PHASES) + shots["phase"]
+    shape = (len(SIDES), len(ROLES), len(PHASES), rows, cols)
+    counts = np.bincount((group * rows + row) * cols + col, minlength=int(np.prod(shape)))
+    return counts.reshape(shape)
+
+
+def placement_stats(shots: Dict[str, np.ndarray], self_side: Optional[str] = None) -> Dict[str, Any]:
+    """
+    コースの集計を JSON 化できる形式で返す（戦略生成プロンプトに埋め込む）
+
+    Args:
+        shots: assign_shots の戻り値
+        self_side: 自分の位置（"near" / "far"）。指定時は選手のキーを self / opponent にする
+
+    Returns:
+        grid（行・列の名前）と、選手 → サーバー/レシーバー → 何球目か ごとの
+        件数（n）・3x3 の件数（counts）・最も多いコース（top）を持つ辞書。件数0のグループは省く
+    """
+    heatmaps = placement_heatmaps(shots)
+    names = list(SIDES)
+    if self_side in SIDES:
+        names = ["self" if side == self_side else "opponent" for side in SIDES]
+
+    players: Dict[str, Any] = {}
+    for s, name in enumerate(names):
+        for r, role in enumerate(ROLES):
+            for p, phase in enumerate(PHASES):
+                grid = heatmaps[s, r, p]
+                total = int(grid.sum())
+                if not total:
+                    continue
+                row, col = np.unravel_index(int(np.argmax(grid)), grid.shape)
+                players.setdefault(name, {}).setdefault(role, {})[phase] = {
+                    "n": total,
+                    "counts": grid.tolist(),
+                    "top": f"{DEPTH_LABELS[row]}・{LATERAL_LABELS[col]} ({grid[row, col] / total:.0%})",
+                }
+    return {
+        "shots": int(len(shots["shot"])),
+        "rallies": int(len(np.unique(shots["rally"]))),
+        "grid": {"rows": list(DEPTH_LABELS), "cols": list(LATERAL_LABELS), "view": "打った選手から見た相手コート"},
+        "players": players,
+    }
+
+
+class PlacementAnalyzer:
+    """
+    動画の配球（コース）分析
+
+    台の位置の検出・ラリー区間の検出・ボール追跡を順に行い、選手の位置によらない
+    着地の配列を動画ハッシュごとに <placement_dir>/<ハッシュ>.npz に保存する。
+    集計（placement_stats）は自分の位置を反映して毎回やり直し、
+    <placement_dir>/<ハッシュ>[_<位置>].json に書き出す。
+    """
+
+    def __init__(self, placement_dir: str = DEFAULT_PLACEMENT_DIR, self_side: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            placement_dir: 保存先ディレクトリ
+            self_side: 自分の位置（"near" / "far"）
+        """
+        self.placement_dir = Path(placement_dir)
+        self.self_side = self_side
+
+    def path(self, video_hash: str) -> Path:
+        """集計結果の保存先のパス（自分の位置ごとに分ける）"""
+        suffix = f"_{self.self_side}" if self.self_side in SIDES else ""
+        return self.placement_dir / f"{video_hash}{suffix}.json"
+
+    def shots_path(self, video_hash: str) -> Path:
+        """着地の配列の保存先のパス"""
+        return self.placement_dir / f"{video_hash}.npz"
+
+    def load_shots(self, video_hash: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        保存済みの着地の配列を読み込む
+
+        Args:
+            video_hash: 動画ハッシュ
+
+        Returns:
+            assign_shots の戻り値の形式の辞書。保存されていなければ None
+        """
+        path = self.shots_path(video_hash)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    def save_shots(self, video_hash: str, shots: Dict[str, np.ndarray]):
+        """
+        着地の配列を一時ファイル経由で保存
+
+        Args:
+            video_hash: 動画ハッシュ
+            shots: assign_shots の戻り値
+        """
+        path = self.shots_path(video_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **shots)
+        os.replace(tmp, path)
+
+    def track_shots(self, video_path: str, video_hash: str) -> Dict[str, np.ndarray]:
+        """
+        ボールを追跡して着地を求める
+
+        音声からラリー区間が求まればその区間だけを追跡し、求まらなければ動画全体を追跡する。
+        作成できればプロキシ動画（proxy モジュール）を読む。
+
+        Args:
+            video_path: 動画ファイルのパス
+            video_hash: 動画ハッシュ
+
+        Returns:
+            assign_shots の戻り値
+        """
+        from .audio_segmenter import AudioSegmenter, rally_frame_ranges
+        from .cv_analyzer import CVAnalyzer, video_info
+        from .proxy import proxy_or_source
+        from .table_calibration import TableCalibrator
+
+        # 追跡とラリー検出はプロキシを読む（座標は元の動画の解像度に戻る）
+        proxy = proxy_or_source(video_path, video_hash)
+        info = video_info(proxy["path"])
+        analyzer = CVAnalyzer.from_proxy(
+            proxy, calibration=TableCalibrator().calibrate(video_path, info, video_hash)
+        )
+        try:
+            rallies = AudioSegmenter().segment(proxy["path"], video_hash)["rallies"]
+        except (FileNotFoundError, ValueError):
+            rallies = None
+
+        if rallies:
+            tracks = analyzer.track_segments(rally_frame_ranges(rallies, info["fps"]))
+        else:
+            tracks = [analyzer.track_ball()]
+        parts = [detect_bounces(track) for track in tracks]
+        bounces = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        return assign_shots(bounces, rallies)
+
+    def run(self, video_path: str, video_hash: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        動画の配球を集計（着地の配列が保存済みなら追跡はせず、集計だけをやり直す）
+
+        Args:
+            video_path: 動画ファイルのパス
+            video_hash: 動画ハッシュ（省略時は計算）
+            force: 保存済みでも追跡し直す
+
+        Returns:
+            placement_stats の戻り値に video_hash を加えた辞書
+        """
+        video_hash = video_hash or compute_file_hash(video_path)
+        shots = None if force else self.load_shots(video_hash)
+        if shots is None:
+            shots = self.track_shots(video_path, video_hash)
+            self.save_shots(video_hash, shots)
+
+        result = {"video_hash": video_hash, **placement_stats(shots, self.self_side)}
+        atomic_write_json(str(self.path(video_hash)), result)
+        return result
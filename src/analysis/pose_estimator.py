@@ -0,0 +1,301 @@
+"""
+Pose Estimator Module
+MediaPipe Pose で動画の全フレームの姿勢を推定し、NumPy 配列ファイルに保存する
+
+フレーム範囲をプロセスプールに分担させ、各プロセスは自分の範囲だけをデコードする。
+結果は (フレーム数, 33, 4) の配列（x, y, z, visibility）として動画ハッシュごとに保存し、
+以降のフットワーク分析などは推論をやり直さずにこのファイルを読む。
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, List, Tuple, Callable
+
+import numpy as np
+
+from storage.result_index import compute_file_hash
+from storage.writer import atomic_write_json
+
+
+NUM_LANDMARKS = 33
+
+# MediaPipe Pose のランドマーク番号（下流の分析で使うもの）
+LANDMARKS = {
+    "nose": 0,
+    "left_shoulder": 11, "right_shoulder": 12,
+    "left_elbow": 13, "right_elbow": 14,
+    "left_wrist": 15, "right_wrist": 16,
+    "left_hip": 23, "right_hip": 24,
+    "left_knee": 25, "right_knee": 26,
+    "left_ankle": 27, "right_ankle": 28,
+}
+
+DEFAULT_POSE_DIR = "data/poses"
+
+# 1プロセスに割り当てる最小フレーム数（短い範囲ではモデル読み込みの方が重い）
+MIN_SHARD_FRAMES = 300
+
+
+def shard_ranges(frame_count: int, shards: int, min_frames: int = MIN_SHARD_FRAMES) -> List[Tuple[int, int]]:
+    """
+    フレーム範囲を分割
+
+    Args:
+        frame_count: 総フレーム数
+        shards: 分割数の上限
+        min_frames: 1つの範囲の最小フレーム数
+
+    Returns:
+        (開始フレーム, 終了フレーム) のリスト（終了フレームは含まない）
+    """
+    if frame_count <= 0:
+        return []
+    shards = max(1, min(shards, frame_count // max(1, min_frames)))
+    bounds = np.linspace(0, frame_count, shards + 1).round().astype(int)
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def estimate_batches(
+    batches: Iterable[Tuple[int, np.ndarray]],
+    frame_step: int = 1,
+    model_complexity: int = 1,
+    start: int = 0
+) -> Tuple[int, np.ndarray]:
+    """
+    フレームのバッチ列の姿勢を推定（frame_buffer.share_batches の処理としても使う）
+
+    Args:
+        batches: (先頭のフレーム番号, 元の解像度の BGR 配列) の並び
+        frame_step: 推定するフレームの間隔
+        model_complexity: MediaPipe Pose のモデル（0〜2）
+        start: 推定間隔の基準にするフレーム番号
+
+    Returns:
+        (開始フレーム, (推定したフレーム数, 33, 4) の float32 配列)。人物がいないフレームは NaN
+    """
+    import mediapipe as mp  # 起動時間に影響しないよう遅延読み込み
+
+    keypoints = []
+    with mp.solutions.pose.Pose(static_image_mode=False, model_complexity=model_complexity) as pose:
+        for batch_start, frames in batches:
+            offset = (-(batch_start - start)) % frame_step
+            for frame in frames[offset::frame_step]:
+                result = pose.process(np.ascontiguousarray(frame[..., ::-1]))
+                if result.pose_landmarks is None:
+                    keypoints.append(np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32))
+                    continue
+                keypoints.append(np.array(
+                    [(lm.x, lm.y, lm.z, lm.visibility) for lm in result.pose_landmarks.landmark],
+                    dtype=np.float32
+                ))
+    if not keypoints:
+        return start, np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+    return start, np.stack(keypoints)
+
+
+def estimate_range(
+    video_path: str,
+    start: int,
+    end: int,
+    frame_step: int = 1,
+    model_complexity: int = 1
+) -> Tuple[int, np.ndarray]:
+    """
+    フレーム範囲の姿勢を推定（ワーカープロセスで実行）
+
+    Args:
+        video_path: 動画ファイルのパス
+        start: 開始フレーム
+        end: 終了フレーム（含まない）
+        frame_step: 推定するフレームの間隔
+        model_complexity: MediaPipe Pose のモデル（0〜2）
+
+    Returns:
+        estimate_batches の戻り値
+    """
+    from .cv_analyzer import iter_frame_batches
+
+    return estimate_batches(iter_frame_batches(video_path, 32, 1, start, end), frame_step, model_complexity, start)
+
+
+def _estimate_shard(args) -> Tuple[int, np.ndarray]:
+    estimate, video_path, start, end, frame_step, model_complexity = args
+    return estimate(video_path, start, end, frame_step, model_complexity)
+
+
+def save_keypoints(path: str, keypoints: np.ndarray):
+    """
+    キーポイント配列を一時ファイル経由で保存
+
+    Args:
+        path: 保存先（.npy）
+        keypoints: (フレーム数, 33, 4) の配列
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, keypoints)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_keypoints(path: str) -> np.ndarray:
+    """
+    保存したキーポイント配列を読み込む（メモリマップ）
+
+    Args:
+        path: .npy ファイルのパス
+
+    Returns:
+        (フレーム数, 33, 4) の配列
+    """
+    return np.load(path, mmap_mode="r")
+
+
+class PoseEstimator:
+    """
+    姿勢推定パイプライン
+
+    動画ハッシュと推定の設定をキーに <pose_dir>/<ハッシュ>_s<間隔>_c<モデル>.npy と
+    メタ情報 <ハッシュ>_s<間隔>_c<モデル>.json を保存し、同じ動画・同じ設定に対しては
+    推論せずに保存済みの配列を返す。
+    キーポイントは MediaPipe の正規化座標（x, y は 0〜1）を float16 で保存する。
+    """
+
+    def __init__(
+        self,
+        pose_dir: str = DEFAULT_POSE_DIR,
+        workers: Optional[int] = None,
+        frame_step: int = 1,
+        model_complexity: int = 1,
+        estimate: Callable[..., Tuple[int, np.ndarray]] = estimate_range
+    ):
+        """
+        初期化
+
+        Args:
+            pose_dir: 保存先ディレクトリ
+            workers: 推定プロセス数（1ならプロセスを使わない。省略時はCPU数）
+            frame_step: 推定するフレームの間隔（2 なら1フレームおき）
+            model_complexity: MediaPipe Pose のモデル（0〜2）
+            estimate: フレーム範囲の推定関数（プロセス間で渡せるモジュール関数）
+        """
+        self.pose_dir = Path(pose_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.frame_step = max(1, frame_step)
+        self.model_complexity = model_complexity
+        self.estimate = estimate
+
+    def paths(self, video_hash: str) -> Tuple[Path, Path]:
+        """キーポイント配列とメタ情報のパス（推定間隔とモデルごとに分ける）"""
+        stem = f"{video_hash}_s{self.frame_step}_c{self.model_complexity}"
+        return self.pose_dir / f"{stem}.npy", self.pose_dir / f"{stem}.json"
+
+    def run(
+        self,
+        video_path: str,
+        info: Optional[Dict[str, Any]] = None,
+        video_hash: Optional[str] = None,
+        force: bool = False
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        動画の姿勢を推定（保存済みなら読み込むだけ）
+
+        Args:
+            video_path: 動画ファイルのパス
+            info: 動画情報（fps / frame_count。省略時は動画から取得）
+            video_hash: 動画ハッシュ（省略時は計算）
+            force: 保存済みでも推定し直す
+
+        Returns:
+            ((推定したフレーム数, 33, 4) の配列, メタ情報)
+        """
+        video_hash = video_hash or compute_file_hash(video_path)
+        cached = None if force else self.load(video_hash)
+        if cached is not None:
+            return cached
+
+        if info is None:
+            from .cv_analyzer import video_info
+
+            info = video_info(video_path)
+
+        # 推定するフレーム単位で分割し、各範囲の先頭を frame_step の倍数に揃える
+        # （範囲の境目で推定間隔がずれないようにする）
+        step = self.frame_step
+        samples = -(-info["frame_count"] // step)
+        shards = [
+            (start * step, min(end * step, info["frame_count"]))
+            for start, end in shard_ranges(samples, self.workers, max(1, MIN_SHARD_FRAMES // step))
+        ]
+        tasks = [
+            (self.estimate, video_path, start, end, self.frame_step, self.model_complexity)
+            for start, end in shards
+        ]
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+                results = list(executor.map(_estimate_shard, tasks))
+        else:
+            results = [_estimate_shard(task) for task in tasks]
+
+        parts = [keypoints for _, keypoints in sorted(results, key=lambda item: item[0])]
+        keypoints = (
+            np.concatenate(parts) if parts
+            else np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+        )
+        return self.save(video_hash, info, keypoints)
+
+    def load(self, video_hash: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        保存済みの推定結果を読み込む
+
+        Args:
+            video_hash: 動画ハッシュ
+
+        Returns:
+            (キーポイント配列, メタ情報)。保存されていなければ None
+        """
+        array_path, meta_path = self.paths(video_hash)
+        if not (array_path.exists() and meta_path.exists()):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return load_keypoints(str(array_path)), json.load(f)
+
+    def save(
+        self,
+        video_hash: str,
+        info: Dict[str, Any],
+        keypoints: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        推定結果を float16 に変換して保存
+
+        Args:
+            video_hash: 動画ハッシュ
+            info: 動画情報（fps / width / height）
+            keypoints: (推定したフレーム数, 33, 4) の配列
+
+        Returns:
+            (保存したキーポイント配列, メタ情報)
+        """
+        keypoints = np.asarray(keypoints).astype(np.float16)
+        meta = {
+            "video_hash": video_hash,
+            "fps": info.get("fps", 30.0),
+            "width": info.get("width"),
+            "height": info.get("height"),
+            "frame_step": self.frame_step,
+            "model_complexity": self.model_complexity,
+            "frames": int(len(keypoints)),
+            "detected": int((~np.isnan(keypoints[:, 0, 0])).sum()),
+            "landmarks": NUM_LANDMARKS,
+            "columns": ["x", "y", "z", "visibility"],
+        }
+        array_path, meta_path = self.paths(video_hash)
+        save_keypoints(str(array_path), keypoints)
+        atomic_write_json(str(meta_path), meta)
+        return keypoints, meta
@@ -95,6 +95,16 @@ COMPREHENSIVE_ANALYSIS_PROMPT = """
 JSON形式で出力してください。
 """
 
+# 統合分析の前置き（計測値と抜粋クリップ。COMPREHENSIVE_ANALYSIS_PROMPT の前に付ける）
+INTEGRATED_ANALYSIS_CONTEXT = """
+【計測データ（ボール追跡・姿勢推定・打球音による実測）】
+{metrics}
+
+添付の動画は試合全体ではなく、計測データから選んだ {clips} 本の短いクリップ（合計 {seconds:.0f} 秒）です。
+回数・割合・コース・速度などの数値は計測データを正とし、動画からはフォームや判断などの
+質的な評価を行ってください。計測データにない数値を推測で記述しないでください。
+"""
+
 # 試合戦略生成プロンプト
 STRATEGY_GENERATION_PROMPT = """
 あなたは卓球の戦術コーチです。
@@ -106,6 +116,12 @@ STRATEGY_GENERATION_PROMPT = """
 【相手分析】
 {opponent_analysis}
 
+【配球データ（ボール追跡による実測）】
+{placement}
+
+配球データがある場合、counts は打った選手から見た相手コートを grid の行（ネットからの深さ）×
+列（左右）に分けた着地回数です。狙うべきコースやサーブのコースはこの実測値を根拠にしてください。
+
 【戦略立案項目】
 
 ## 1. サーブ戦略
@@ -315,3 +331,105 @@ OPPONENT_ANALYSIS_PROMPT = """
 【出力形式】
 JSON形式で出力してください。
 """
+
+# サーブ・レシーブ分析の前置き（サーブの場面だけをつないだ動画。各サーブ分析プロンプトの前に付ける）
+SERVE_MONTAGE_CONTEXT = """
+添付の動画は試合全体ではなく、サーブの場面だけを順につないだ {serves} 本のクリップ（合計 {seconds:.0f} 秒）です。
+各クリップはサーブのトスからレシーブの直後までを含みます。
+
+【クリップの一覧（動画内の開始秒 / 試合中の時刻 / サーブを出した選手）】
+{serve_list}
+
+サーブを出した選手は姿勢推定によるトスの検出結果です。「不明」のクリップは映像から判断してください。
+動画に映っていない場面（ラリーの続きなど）について推測で記述しないでください。
+"""
+
+# サーブ・レシーブ分析プロンプト（COMPREHENSIVE_ANALYSIS_PROMPT の 2.3 / 2.4 / 3.3 / 3.4 に相当）
+SERVE_ANALYSIS_PROMPT = """
+あなたは卓球の専門コーチであり、戦術アナリストです。
+分析対象選手のサーブと、相手のサーブに対するレシーブを評価してください。
+
+【分析対象選手】
+- 名前: {player_name}
+- 所属: {team_name}
+
+【評価項目】
+
+### 2.3 サーブ（分析対象選手がサーブを出したクリップ）
+- 種類のバリエーション
+- コースの精度（1-5）
+- 回転の質（1-5）
+- 3球目攻撃への連携
+- 強み
+- 改善点
+
+### 2.4 レシーブ（相手がサーブを出したクリップ）
+- 対応力（1-5）
+- 攻撃的レシーブの割合
+- 苦手なサーブタイプ
+- 強み
+- 改善点
+
+### 3.3 サーブ戦術
+- よく使うサーブの種類と割合
+- サーブからの展開パターン
+
+### 3.4 レシーブ戦術
+- レシーブの傾向
+
+【出力形式】
+以下のキーを持つJSON形式で出力してください。
+{{"2.技術分析": {{"2.3_サーブ": {{...}}, "2.4_レシーブ": {{...}}}}, "3.戦術分析": {{"3.3_サーブ戦術": {{...}}, "3.4_レシーブ戦術": {{...}}}}}}
+"""
+
+# 相手のサーブ・レシーブ分析プロンプト（OPPONENT_ANALYSIS_PROMPT の 3.3 / 3.4 に相当）
+OPPONENT_SERVE_ANALYSIS_PROMPT = """
+あなたは卓球の戦術アナリストです。
+対戦相手のサーブの傾向とレシーブの傾向を分析し、攻略法を提案してください。
+クリップの一覧の「相手」が分析対象の相手選手のサーブ、「分析対象」が相手選手がレシーブする場面です。
+
+【分析対象】
+- 相手選手名: {player_name}
+- 所属: {team_name}
+
+【分析項目】
+
+### 3.3 サーブの傾向
+- よく使うサーブ（種類・回転・コースと、その割合）
+- サーブからの展開
+
+### 3.4 レシーブの傾向
+- レシーブの特徴
+- 苦手なサーブタイプ
+
+### 攻略法
+- 相手のサーブに対する推奨レシーブ
+- 相手のレシーブを崩す推奨サーブ（種類×コース）
+
+【出力形式】
+以下のキーを持つJSON形式で出力してください。
+{{"3.戦術的特徴": {{"3.3_サーブの傾向": {{...}}, "3.4_レシーブの傾向": {{...}}}}, "4.攻略法": {{...}}}}
+"""
+
+# 試合中（ゲーム間）の助言プロンプト（短時間で返すため、試合前の戦略からの変更点だけを求める）
+LIVE_ADVICE_PROMPT = """
+あなたは卓球のベンチコーチです。ゲーム間の短い時間で選手に伝える助言を作ってください。
+
+【選手】
+- 名前: {player_name}
+- 所属: {team_name}
+
+【打球音から計測したラリーの統計（試合全体 / 直近 {rallies} ラリー）】
+{stats}
+
+【試合前の戦略】
+{strategy}
+
+添付の画像は直近のラリーのサーブと打ち合いの瞬間（{frames} 枚、時刻順）です。
+統計の変化と画像から、試合前の戦略のうち続けることと変えることを挙げてください。
+すぐに伝えられるよう、各項目は1文で、変更は重要な順に最大3つまでにしてください。
+
+【出力形式】
+以下のキーを持つJSON形式だけを出力してください。
+{{"継続": ["..."], "変更": [{{"項目": "...", "変更前": "...", "変更後": "...", "根拠": "..."}}], "次のゲームの最優先事項": "..."}}
+"""
@@ -0,0 +1,170 @@
+"""
+Proxy Module
+CV 処理やクリップの切り出し用の低解像度の代理動画（プロキシ）を作成・保存する
+
+1080p や 4K の元動画を高さ 480 画素・短いキーフレーム間隔の H.264 に変換し、
+動画ハッシュごとに <proxy_dir>/<ハッシュ>.mp4 とメタ情報 <ハッシュ>.json を保存する。
+ボール追跡・ラリー検出・クリップの切り出しはプロキシを読み、
+画素座標は scale を掛けて元の解像度に戻す。
+"""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+
+from storage.result_index import compute_file_hash
+from storage.writer import atomic_write_json
+
+
+DEFAULT_PROXY_DIR = "data/proxies"
+
+# プロキシの高さ（画素。元の動画より大きくはしない）
+PROXY_HEIGHT = 480
+
+# キーフレームの間隔（フレーム数。途中からのデコードやクリップの切り出しを速くする）
+PROXY_GOP = 15
+
+
+def probe_size(video_path: str) -> Tuple[int, int]:
+    """
+    ffprobe で動画の解像度を取得
+
+    Args:
+        video_path: 動画ファイルのパス
+
+    Returns:
+        (幅, 高さ)
+
+    Raises:
+        FileNotFoundError: ffprobe がない場合
+        ValueError: 映像がない・読めない場合
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=width,height", "-of", "json", video_path
+    ], capture_output=True, text=True)
+    streams = json.loads(result.stdout or "{}").get("streams") or []
+    if result.returncode != 0 or not streams:
+        raise ValueError(f"動画を開けません: {video_path}")
+    return int(streams[0]["width"]), int(streams[0]["height"])
+
+
+def to_source(proxy: Dict[str, Any], x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    プロキシの画素座標を元の動画の画素座標に変換
+
+    Args:
+        proxy: ProxyGenerator.generate の戻り値
+        x: プロキシの x 座標
+        y: プロキシの y 座標
+
+    Returns:
+        元の解像度の (x, y)
+    """
+    scale_x, scale_y = proxy["scale"]
+    return np.asarray(x) * scale_x, np.asarray(y) * scale_y
+
+
+class ProxyGenerator:
+    """
+    プロキシ動画の作成
+
+    動画ハッシュをキーに保存し、同じ動画に対しては変換せずに保存済みのプロキシを返す。
+    音声はラリー検出に使うため残す。
+    """
+
+    def __init__(self, proxy_dir: str = DEFAULT_PROXY_DIR, height: int = PROXY_HEIGHT, gop: int = PROXY_GOP):
+        """
+        初期化
+
+        Args:
+            proxy_dir: 保存先ディレクトリ
+            height: プロキシの高さ（画素）
+            gop: キーフレームの間隔（フレーム数）
+        """
+        self.proxy_dir = Path(proxy_dir)
+        self.height = height
+        self.gop = max(1, gop)
+
+    def paths(self, video_hash: str) -> Tuple[Path, Path]:
+        """プロキシ動画とメタ情報のパス"""
+        return self.proxy_dir / f"{video_hash}.mp4", self.proxy_dir / f"{video_hash}.json"
+
+    def generate(self, video_path: str, video_hash: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        プロキシを作成（保存済みなら読み込むだけ）
+
+        Args:
+            video_path: 元の動画ファイルのパス
+            video_hash: 動画ハッシュ（省略時は計算）
+            force: 保存済みでも作成し直す
+
+        Returns:
+            video_hash / path / width / height / source_width / source_height / scale / gop / proxy を持つ辞書
+            （scale はプロキシの座標に掛けて元の解像度に戻す (x, y) の倍率）
+
+        Raises:
+            FileNotFoundError: ffmpeg がない場合
+            ValueError: 動画を変換できない場合
+        """
+        video_hash = video_hash or compute_file_hash(video_path)
+        path, meta_path = self.paths(video_hash)
+        if not force and path.exists() and meta_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        source_width, source_height = probe_size(video_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp.mp4")
+        result = subprocess.run([
+            "ffmpeg", "-y", "-v", "error", "-i", video_path,
+            "-vf", f"scale=-2:'min({self.height},ih)'", "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+            "-pix_fmt", "yuv420p", "-g", str(self.gop), "-keyint_min", str(self.gop), "-sc_threshold", "0",
+            "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", str(tmp)
+        ], capture_output=True, text=True)
+        if result.returncode != 0:
+            tmp.unlink(missing_ok=True)
+            raise ValueError(f"プロキシを作成できません: {result.stderr.strip()[-200:]}")
+        os.replace(tmp, path)
+
+        width, height = probe_size(str(path))
+        meta = {
+            "video_hash": video_hash,
+            "path": str(path),
+            "width": width,
+            "height": height,
+            "source_width": source_width,
+            "source_height": source_height,
+            "scale": [source_width / width, source_height / height],
+            "gop": self.gop,
+            "proxy": True,
+        }
+        atomic_write_json(str(meta_path), meta)
+        return meta
+
+
+def proxy_or_source(
+    video_path: str,
+    video_hash: Optional[str] = None,
+    proxy_dir: str = DEFAULT_PROXY_DIR
+) -> Dict[str, Any]:
+    """
+    CV 処理で読む動画（プロキシを作成できなければ元の動画）
+
+    Args:
+        video_path: 元の動画ファイルのパス
+        video_hash: 動画ハッシュ（省略時は計算）
+        proxy_dir: プロキシの保存先ディレクトリ
+
+    Returns:
+        ProxyGenerator.generate の戻り値。ffmpeg がない場合などは path が元の動画・scale が 1・proxy が False の辞書
+    """
+    video_hash = video_hash or compute_file_hash(video_path)
+    try:
+        return ProxyGenerator(proxy_dir).generate(video_path, video_hash)
+    except (FileNotFoundError, ValueError):
+        return {"video_hash": video_hash, "path": video_path, "scale": [1.0, 1.0], "proxy": False}
@@ -0,0 +1,260 @@
+"""
+Serve Module
+サーブの場面だけを切り出して LLM に渡す（サーブ・レシーブに絞った分析）
+
+サーブの候補は音声の打球音から求めたラリーの最初の打球（clips.rally_events の serve）とし、
+姿勢推定の結果があればサーブ直前のトス（利き手と反対の手首が肩より上がる動き）の有無で
+撮影している選手のサーブか相手のサーブかを分ける。選んだサーブの区間を低解像度で切り出し、
+1本の動画（モンタージュ）につないで送る。
+"""
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from storage.result_index import compute_file_hash, content_hash
+
+from .pose_estimator import LANDMARKS
+
+
+DEFAULT_MONTAGE_DIR = "data/clips/serves"
+
+# トスを探す範囲（サーブの打球音の何秒前から何秒後まで）
+TOSS_WINDOW = (1.5, 0.2)
+
+# トスとみなす手首の高さ（肩からの高さ。胴体の長さに対する割合）
+TOSS_MIN_RISE = 0.25
+
+DEFAULT_FRAME_SIZE = (1280, 720)
+
+SERVER_LABELS = {"self": "分析対象", "opponent": "相手", None: "不明"}
+
+
+def toss_scores(
+    keypoints: np.ndarray,
+    meta: Dict[str, Any],
+    times: List[float],
+    handedness: str = "right"
+) -> np.ndarray:
+    """
+    サーブの時刻ごとのトスの高さ
+
+    Args:
+        keypoints: (サンプル数, 33, 4) の配列（PoseEstimator の出力）
+        meta: PoseEstimator のメタ情報（fps / frame_step / width / height）
+        times: サーブの打球音の時刻（秒）
+        handedness: 利き手（トスはもう一方の手で上げる）
+
+    Returns:
+        時刻ごとの、トスする手首の肩からの最大の高さ（胴体の長さに対する割合）。
+        範囲に人物が映っていなければ NaN
+    """
+    width, height = meta.get("width") or DEFAULT_FRAME_SIZE[0], meta.get("height") or DEFAULT_FRAME_SIZE[1]
+    side = "left" if handedness == "right" else "right"
+    points = keypoints[..., :2].astype(np.float64) * (width, height)
+    shoulders = (points[:, LANDMARKS["left_shoulder"]] + points[:, LANDMARKS["right_shoulder"]]) / 2
+    hips = (points[:, LANDMARKS["left_hip"]] + points[:, LANDMARKS["right_hip"]]) / 2
+    torso = np.hypot(*(shoulders - hips).T)
+    # 画像の y は下向きなので、肩の y から手首の y を引くと上向きの高さになる
+    rise = (points[:, LANDMARKS[f"{side}_shoulder"], 1] - points[:, LANDMARKS[f"{side}_wrist"], 1]) / torso
+
+    rate = meta.get("fps", 30.0) / meta.get("frame_step", 1)
+    scores = np.full(len(times), np.nan)
+    for i, t in enumerate(times):
+        start = max(0, int(np.floor((t - TOSS_WINDOW[0]) * rate)))
+        end = min(len(rise), int(np.ceil((t + TOSS_WINDOW[1]) * rate)) + 1)
+        window = rise[start:end]
+        if end > start and not np.isnan(window).all():
+            scores[i] = np.nanmax(window)
+    return scores
+
+
+def classify_servers(
+    serves: List[Dict[str, Any]],
+    keypoints: Optional[np.ndarray] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    handedness: str = "right"
+) -> List[Dict[str, Any]]:
+    """
+    サーブを撮影している選手（分析対象）のものと相手のものに分ける
+
+    Args:
+        serves: kind が serve のイベント（EventIndex.events の戻り値など）
+        keypoints: 分析対象の選手のキーポイント（省略時は分けない）
+        meta: PoseEstimator のメタ情報
+        handedness: 分析対象の選手の利き手
+
+    Returns:
+        toss（トスの高さ）と server（"self" / "opponent" / None）を加えたサーブのリスト
+    """
+    if keypoints is None or meta is None or not serves:
+        return [{**serve, "toss": None, "server": None} for serve in serves]
+    scores = toss_scores(keypoints, meta, [serve["time"] for serve in serves], handedness)
+    classified = []
+    for serve, score in zip(serves, scores):
+        if np.isnan(score):
+            toss, server = None, None
+        else:
+            toss, server = round(float(score), 2), "self" if score >= TOSS_MIN_RISE else "opponent"
+        classified.append({**serve, "toss": toss, "server": server})
+    return classified
+
+
+def select_serves(serves: List[Dict[str, Any]], max_serves: int = 20) -> List[Dict[str, Any]]:
+    """
+    送るサーブを選ぶ（試合全体から等間隔に、分析対象と相手のサーブを同じ数ずつ）
+
+    Args:
+        serves: classify_servers の戻り値
+        max_serves: 選ぶ最大数
+
+    Returns:
+        時刻順のサーブのリスト
+    """
+    def spread(items: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+        if count >= len(items):
+            return items
+        return [items[i] for i in np.linspace(0, len(items) - 1, count).round().astype(int)]
+
+    groups: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for serve in serves:
+        groups.setdefault(serve.get("server"), []).append(serve)
+    selected: List[Dict[str, Any]] = []
+    remaining = max_serves
+    # 少ないグループから割り当て、余った枠は残りのグループに回す
+    for i, (_, items) in enumerate(sorted(groups.items(), key=lambda item: len(item[1]))):
+        share = remaining // (len(groups) - i)
+        chosen = spread(items, share)
+        selected += chosen
+        remaining -= len(chosen)
+    return sorted(selected, key=lambda serve: serve["time"])
+
+
+def build_montage(
+    video_path: str,
+    serves: List[Dict[str, Any]],
+    montage_dir: str = DEFAULT_MONTAGE_DIR,
+    video_hash: Optional[str] = None,
+    height: int = 360
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    サーブの区間を低解像度で切り出し、1本の動画につなぐ（作成済みなら再利用する）
+
+    Args:
+        video_path: 切り出す動画（プロキシがあればプロキシ）
+        serves: select_serves の戻り値
+        montage_dir: 保存先ディレクトリ
+        video_hash: 元の動画の内容ハッシュ（ファイル名に使う。省略時は計算）
+        height: 出力の高さ（画素）
+
+    Returns:
+        (モンタージュのパス, offset（モンタージュ内の開始秒）を加えたサーブのリスト)
+
+    Raises:
+        FileNotFoundError: ffmpeg がない場合
+        ValueError: つなげなかった場合
+    """
+    from .integration import cut_clips
+
+    video_hash = video_hash or compute_file_hash(video_path)
+    clips = [{"start": serve["start_time"], "end": serve["end_time"]} for serve in serves]
+    files = cut_clips(video_path, clips, montage_dir, video_hash, height)
+
+    placed, offset = [], 0.0
+    for serve, clip in zip(serves, clips):
+        placed.append({**serve, "offset": round(offset, 2)})
+        offset += clip["end"] - clip["start"]
+
+    directory = Path(montage_dir)
+    path = directory / f"{video_hash}_montage_{content_hash(clips)[:12]}.mp4"
+    if not path.exists():
+        listing = directory / f".{path.stem}.txt"
+        listing.write_text("".join(f"file '{os.path.abspath(file)}'\n" for _, file in files), encoding="utf-8")
+        tmp = path.with_name(f".{path.name}.tmp.mp4")
+        result = subprocess.run([
+            "ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", str(listing),
+            "-c", "copy", "-movflags", "+faststart", str(tmp)
+        ], capture_output=True, text=True)
+        listing.unlink(missing_ok=True)
+        if result.returncode != 0:
+            tmp.unlink(missing_ok=True)
+            raise ValueError(f"サーブの動画をつなげません: {result.stderr.strip()[-200:]}")
+        os.replace(tmp, path)
+    return str(path), placed
+
+
+def serve_analysis(
+    analyzer,
+    video_path: str,
+    player_name: str,
+    team_name: str,
+    video_hash: Optional[str] = None,
+    db_path: Optional[str] = None,
+    opponent: bool = False,
+    max_serves: int = 20,
+    handedness: str = "right",
+    use_pose: bool = True,
+    montage_dir: str = DEFAULT_MONTAGE_DIR
+) -> Dict[str, Any]:
+    """
+    サーブの場面だけを LLM に渡してサーブ・レシーブを分析
+
+    Args:
+        analyzer: LLMAnalyzer
+        video_path: 動画ファイルのパス
+        player_name: 分析対象の選手名（opponent=True の場合は相手選手名）
+        team_name: 所属チーム名
+        video_hash: 動画の内容ハッシュ（省略時は計算）
+        db_path: イベント索引の SQLite ファイル
+        opponent: 相手選手のサーブの傾向・レシーブの傾向として分析する
+        max_serves: 送るサーブの最大数
+        handedness: 撮影している選手の利き手（トスの検出に使う）
+        use_pose: 姿勢推定の結果でサーブを出した選手を分ける
+        montage_dir: モンタージュの保存先ディレクトリ
+
+    Returns:
+        LLM の分析結果に「サーブ統計」を加えた辞書
+
+    Raises:
+        FileNotFoundError: ffmpeg がない場合
+        ValueError: サーブが見つからない場合
+    """
+    from storage.events import EventIndex
+
+    from .clips import index_events
+    from .proxy import proxy_or_source
+
+    video_hash = video_hash or compute_file_hash(video_path)
+    index = EventIndex(db_path)
+    if not index.counts(video_hash):
+        index_events(video_path, video_hash, db_path)
+    serves = index.events(video_hash, kind="serve")
+    if not serves:
+        raise ValueError("サーブが見つかりません（ラリーを検出できませんでした）")
+
+    keypoints = meta = None
+    if use_pose:
+        from .pose_estimator import PoseEstimator
+
+        try:
+            keypoints, meta = PoseEstimator().run(video_path, video_hash=video_hash)
+        except ImportError:
+            pass
+    serves = classify_servers(serves, keypoints, meta, handedness)
+    selected = select_serves(serves, max_serves)
+
+    source = proxy_or_source(video_path, video_hash)["path"]
+    montage, placed = build_montage(source, selected, montage_dir, video_hash)
+    result = analyzer.analyze_serves(montage, placed, player_name, team_name, opponent=opponent)
+    by_server = {SERVER_LABELS[server]: sum(s["server"] == server for s in serves) for server in SERVER_LABELS}
+    result["サーブ統計"] = {
+        "serves": len(serves),
+        "sent": len(placed),
+        "seconds": round(sum(s["end_time"] - s["start_time"] for s in placed), 1),
+        "by_server": {label: n for label, n in by_server.items() if n},
+        "montage": montage,
+    }
+    return result
@@ -0,0 +1,444 @@
+"""
+Stroke Classifier Module
+姿勢とボールの軌跡から打球（フォアハンドドライブ・バックハンドドライブ・ツッツキ・
+ブロック・サーブ）を検出して分類する
+
+利き手の手首の速さのピークを打球の候補とし、その前後の短い窓から NumPy で特徴量を
+求めて、小さな多クラスロジスティック回帰（softmax）で分類する。検出は姿勢推定の
+サンプルをチャンクで受け取るストリーム処理で、窓がそろった候補から順に打球イベントを返す。
+"""
+
+import os
+import warnings
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Sequence
+
+import numpy as np
+
+from .pose_estimator import LANDMARKS
+
+
+STROKES = ("forehand_drive", "backhand_drive", "push", "block", "serve")
+STROKE_LABELS = {
+    "forehand_drive": "フォアハンドドライブ",
+    "backhand_drive": "バックハンドドライブ",
+    "push": "ツッツキ",
+    "block": "ブロック",
+    "serve": "サーブ",
+}
+
+# 特徴量（長さは胴体の長さ、時間は秒を単位とし、左右は利き手側を正とする）
+FEATURES = (
+    "swing_dx", "swing_dy", "swing_length", "peak_speed", "contact_x", "contact_y", "rotation",
+    "ball_speed", "ball_rise", "ball_seen", "gap_before",
+)
+
+DEFAULT_MODEL_PATH = "data/models/stroke_classifier.npz"
+
+# 解像度が分からない場合に仮定する画像の大きさ
+DEFAULT_FRAME_SIZE = (1280, 720)
+
+# 直前の打球からの時間の上限（サーブ前の間はこれ以上区別しない）
+MAX_GAP = 5.0
+
+
+class SoftmaxClassifier:
+    """
+    多クラスロジスティック回帰（scikit-learn と同じ fit / predict / predict_proba の形）
+
+    特徴量は学習データの平均・標準偏差で標準化し、L2 正則化つきの勾配降下法で学習する。
+    NaN の特徴量は標準化後に0（平均値）として扱う。
+    """
+
+    def __init__(self, l2: float = 1e-3, learning_rate: float = 0.5, epochs: int = 2000):
+        """
+        初期化
+
+        Args:
+            l2: L2 正則化の強さ
+            learning_rate: 学習率
+            epochs: 反復回数
+        """
+        self.l2 = l2
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.classes_ = np.array([], dtype=str)
+        self.mean_ = self.scale_ = self.coef_ = self.intercept_ = None
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        return np.nan_to_num((np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_)
+
+    def fit(self, X: np.ndarray, y: Sequence[str]) -> "SoftmaxClassifier":
+        """
+        学習
+
+        Args:
+            X: (サンプル数, 特徴量数) の配列
+            y: ラベルの並び
+
+        Returns:
+            self
+        """
+        X = np.asarray(X, dtype=np.float64)
+        self.classes_, targets = np.unique(np.asarray(y, dtype=str), return_inverse=True)
+        with warnings.catch_warnings():
+            # ボールを使わない学習では、ボールの特徴量の列がすべて NaN になる
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            self.mean_ = np.nan_to_num(np.nanmean(X, axis=0))
+            self.scale_ = np.nan_to_num(np.nanstd(X, axis=0), nan=1.0)
+        self.scale_[self.scale_ < 1e-9] = 1.0
+        Z = self._standardize(X)
+
+        onehot = np.eye(len(self.classes_))[targets]
+        self.coef_ = np.zeros((Z.shape[1], len(self.classes_)))
+        self.intercept_ = np.zeros(len(self.classes_))
+        for _ in range(self.epochs):
+            error = self._softmax(Z @ self.coef_ + self.intercept_) - onehot
+            self.coef_ -= self.learning_rate * (Z.T @ error / len(Z) + self.l2 * self.coef_)
+            self.intercept_ -= self.learning_rate * error.mean(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        クラスごとの確率
+
+        Args:
+            X: (サンプル数, 特徴量数) の配列
+
+        Returns:
+            (サンプル数, クラス数) の配列（列の順は classes_）
+        """
+        return self._softmax(self._standardize(np.atleast_2d(X)) @ self.coef_ + self.intercept_)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        ラベルを予測
+
+        Args:
+            X: (サンプル数, 特徴量数) の配列
+
+        Returns:
+            ラベルの配列
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str):
+        """
+        一時ファイル経由で .npz に保存
+
+        Args:
+            path: 保存先
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f, classes=self.classes_, features=np.array(FEATURES), mean=self.mean_, scale=self.scale_,
+                coef=self.coef_, intercept=self.intercept_
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SoftmaxClassifier":
+        """
+        保存したモデルを読み込む
+
+        Args:
+            path: .npz ファイルのパス
+
+        Returns:
+            SoftmaxClassifier
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(data["features"]) != FEATURES:
+                raise ValueError(f"特徴量の異なるモデルです: {path}")
+            model = cls()
+            model.classes_ = data["classes"]
+            model.mean_, model.scale_ = data["mean"], data["scale"]
+            model.coef_, model.intercept_ = data["coef"], data["intercept"]
+        return model
+
+
+def ball_samples(track: Dict[str, Any], frames: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    ボールの軌跡を姿勢推定のサンプルのフレームに合わせる
+
+    Args:
+        track: CVAnalyzer.track_batches の戻り値
+        frames: 姿勢推定のサンプルのフレーム番号
+
+    Returns:
+        x / y / detected の配列（軌跡のないフレームは NaN / False）
+    """
+    frames = np.asarray(frames)
+    if not len(track["frame"]):
+        return {"x": np.full(len(frames), np.nan), "y": np.full(len(frames), np.nan),
+                "detected": np.zeros(len(frames), dtype=bool)}
+    positions = np.minimum(np.searchsorted(track["frame"], frames), len(track["frame"]) - 1)
+    found = track["frame"][positions] == frames
+    return {
+        "x": np.where(found, track["x"][positions], np.nan),
+        "y": np.where(found, track["y"][positions], np.nan),
+        "detected": found & track["detected"][positions],
+    }
+
+
+class StrokeDetector:
+    """
+    打球のストリーム検出
+
+    feed() に姿勢推定のサンプル（とボールの位置）をチャンクで渡すと、前後の窓が
+    そろった打球の候補を分類してイベントを返す。チャンクの切り方によらず同じ結果になる。
+    """
+
+    def __init__(
+        self,
+        model: Optional[SoftmaxClassifier],
+        meta: Dict[str, Any],
+        handedness: str = "right",
+        lookback: float = 0.4,
+        lookahead: float = 0.3,
+        min_speed: float = 4.0,
+        min_interval: float = 0.5
+    ):
+        """
+        初期化
+
+        Args:
+            model: 分類モデル（特徴量の抽出だけなら None）
+            meta: PoseEstimator のメタ情報（fps / frame_step / width / height）
+            handedness: 利き手（"right" / "left"）
+            lookback: 打球前の窓（秒）
+            lookahead: 打球後の窓（秒）
+            min_speed: 打球とみなす手首の最小の速さ（胴体の長さ/秒）
+            min_interval: 打球の最小間隔（秒）
+        """
+        self.model = model
+        self.fps = meta.get("fps", 30.0)
+        self.frame_step = meta.get("frame_step", 1)
+        self.rate = self.fps / self.frame_step
+        self.size = (meta.get("width") or DEFAULT_FRAME_SIZE[0], meta.get("height") or DEFAULT_FRAME_SIZE[1])
+        self.wrist = LANDMARKS["right_wrist" if handedness == "right" else "left_wrist"]
+        self.sign = 1.0 if handedness == "right" else -1.0
+        self.before = max(1, int(round(lookback * self.rate)))
+        self.after = max(1, int(round(lookahead * self.rate)))
+        self.interval = max(1, int(round(min_interval * self.rate)))
+        self.min_speed = min_speed
+
+        self._buffer: Dict[str, np.ndarray] = {}
+        self._offset = 0       # バッファ先頭のサンプル番号
+        self._next = 0         # まだ候補として調べていない最初のサンプル番号
+        self._last_event: Optional[int] = None
+
+    def _signals(self, keypoints: np.ndarray, ball: Optional[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """キーポイントを画素単位の信号に変換（腰の中点を原点とする）"""
+        width, height = self.size
+        points = keypoints[:, :, :2].astype(np.float64) * (width, height)
+        hip = (points[:, LANDMARKS["left_hip"]] + points[:, LANDMARKS["right_hip"]]) / 2
+        left, right = points[:, LANDMARKS["left_shoulder"]], points[:, LANDMARKS["right_shoulder"]]
+        shoulder = (left + right) / 2
+        wrist = points[:, self.wrist] - hip
+        count = len(keypoints)
+        if ball is None:
+            ball = {"x": np.full(count, np.nan), "y": np.full(count, np.nan), "detected": np.zeros(count, dtype=bool)}
+        return {
+            "wrist_x": wrist[:, 0],
+            "wrist_y": wrist[:, 1],
+            "shoulder_y": shoulder[:, 1] - hip[:, 1],
+            "angle": np.arctan2(right[:, 1] - left[:, 1], right[:, 0] - left[:, 0]),
+            "torso": np.hypot(*(shoulder - hip).T),
+            "ball_x": np.asarray(ball["x"], dtype=np.float64),
+            "ball_y": np.asarray(ball["y"], dtype=np.float64),
+            "ball_seen": np.asarray(ball["detected"], dtype=bool),
+        }
+
+    def _append(self, signals: Dict[str, np.ndarray]):
+        if not self._buffer:
+            self._buffer = {name: values.copy() for name, values in signals.items()}
+        else:
+            self._buffer = {name: np.concatenate([self._buffer[name], signals[name]]) for name in signals}
+
+    def _speed(self) -> np.ndarray:
+        """手首の速さ（胴体の長さ/秒。サンプル j は j-1 → j の移動を j の胴体の長さで割る）"""
+        buffer = self._buffer
+        step = np.hypot(np.diff(buffer["wrist_x"]), np.diff(buffer["wrist_y"]))
+        return np.concatenate([[np.nan], step / buffer["torso"][1:] * self.rate])
+
+    def features(self, index: int, speed: np.ndarray, gap: float) -> np.ndarray:
+        """
+        バッファ内のサンプル index を打球の瞬間とした特徴量
+
+        Args:
+            index: バッファ内の位置（前後の窓がバッファに収まること）
+            speed: _speed() の戻り値
+            gap: 直前の打球からの時間（秒）
+
+        Returns:
+            FEATURES の順の配列
+        """
+        b = self._buffer
+        window = slice(index - self.before, index + self.after + 1)
+        after = slice(index, index + self.after + 1)
+        with warnings.catch_warnings():
+            # 人物やボールを見失った窓は NaN の特徴量になる（分類時は平均値として扱う）
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            torso = np.nanmedian(b["torso"][window])
+            wx = b["wrist_x"][window] / torso * self.sign
+            wy = -b["wrist_y"][window] / torso
+            angle = np.unwrap(np.nan_to_num(b["angle"][window]))
+            seen = b["ball_seen"][after]
+            bx, by = b["ball_x"][after][seen], b["ball_y"][after][seen]
+            return np.array([
+                np.nanmean(wx[-2:]) - np.nanmean(wx[:2]),
+                np.nanmean(wy[-2:]) - np.nanmean(wy[:2]),
+                np.nansum(np.hypot(np.diff(wx), np.diff(wy))),
+                speed[index],
+                b["wrist_x"][index] / torso * self.sign,
+                (b["shoulder_y"][index] - b["wrist_y"][index]) / torso,
+                (angle[-1] - angle[0]) * self.sign,
+                np.hypot(np.diff(bx), np.diff(by)).mean() / torso * self.rate if len(bx) >= 2 else np.nan,
+                -(by[-1] - by[0]) / torso if len(by) >= 2 else np.nan,
+                b["ball_seen"][window].mean(),
+                min(gap, MAX_GAP),
+            ])
+
+    def feed(self, keypoints: np.ndarray, ball: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        """
+        サンプルを追加し、確定した打球イベントを返す
+
+        Args:
+            keypoints: (サンプル数, 33, 4) の配列（前回の続き）
+            ball: ball_samples の戻り値（同じサンプル数。省略時はボールなし）
+
+        Returns:
+            frame / time / stroke / confidence を持つイベントのリスト
+        """
+        self._append(self._signals(keypoints, ball))
+        count = len(self._buffer["torso"])
+        margin = max(self.after, self.interval)
+        first = max(self._next - self._offset, self.before, self.interval)
+        last = count - margin  # この位置より前は後ろの窓がそろっている
+
+        events = []
+        if last > first:
+            speed = self._speed()
+            filled = np.nan_to_num(speed, nan=-np.inf)
+            padded = np.pad(filled, self.interval, constant_values=-np.inf)
+            local_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * self.interval + 1).max(axis=1)
+            candidates = np.flatnonzero((filled >= self.min_speed) & (filled >= local_max))
+            for index in candidates[(candidates >= first) & (candidates < last)]:
+                sample = self._offset + int(index)
+                if self._last_event is not None and sample - self._last_event < self.interval:
+                    continue
+                gap = (sample - self._last_event) / self.rate if self._last_event is not None else MAX_GAP
+                events.append(self._event(sample, self.features(int(index), speed, gap)))
+                self._last_event = sample
+            self._next = self._offset + last
+
+        # 次の候補の前の窓に必要な分だけ残す
+        keep_from = max(0, self._next - self._offset - max(self.before, self.interval) - 1)
+        if keep_from:
+            self._buffer = {name: values[keep_from:] for name, values in self._buffer.items()}
+            self._offset += keep_from
+        return events
+
+    def _event(self, sample: int, features: np.ndarray) -> Dict[str, Any]:
+        frame = sample * self.frame_step
+        event = {"frame": int(frame), "time": round(frame / self.fps, 3)}
+        if self.model is not None:
+            probability = self.model.predict_proba(features[None])[0]
+            best = int(np.argmax(probability))
+            event.update(stroke=str(self.model.classes_[best]), confidence=round(float(probability[best]), 3))
+        return event
+
+
+def detect_strokes(
+    detector: StrokeDetector,
+    keypoints: np.ndarray,
+    ball: Optional[Dict[str, np.ndarray]] = None,
+    chunk: int = 256
+) -> Iterator[Dict[str, Any]]:
+    """
+    配列全体をチャンクに分けて StrokeDetector に流す
+
+    Args:
+        detector: StrokeDetector
+        keypoints: (サンプル数, 33, 4) の配列（メモリマップでもよい）
+        ball: ball_samples の戻り値
+        chunk: 1回に渡すサンプル数
+
+    Yields:
+        打球イベント
+    """
+    for start in range(0, len(keypoints), chunk):
+        part = None if ball is None else {name: values[start:start + chunk] for name, values in ball.items()}
+        yield from detector.feed(np.asarray(keypoints[start:start + chunk]), part)
+
+
+def training_features(
+    keypoints: np.ndarray,
+    meta: Dict[str, Any],
+    times: Sequence[float],
+    ball: Optional[Dict[str, np.ndarray]] = None,
+    handedness: str = "right",
+    search: float = 0.15
+) -> np.ndarray:
+    """
+    ラベルを付けた時刻の特徴量（学習データの作成用）
+
+    ラベルの時刻の前後 search 秒で手首が最も速いサンプルを打球の瞬間とする。
+
+    Args:
+        keypoints: (サンプル数, 33, 4) の配列
+        meta: PoseEstimator のメタ情報
+        times: 打球の時刻（秒、昇順）
+        ball: ball_samples の戻り値
+        handedness: 利き手
+        search: 打球の瞬間を探す範囲（秒）
+
+    Returns:
+        (時刻の数, 特徴量数) の配列（窓が動画の端にかかる時刻は NaN）
+    """
+    detector = StrokeDetector(None, meta, handedness)
+    detector._append(detector._signals(np.asarray(keypoints), ball))
+    raw_speed = detector._speed()
+    speed = np.nan_to_num(raw_speed, nan=-np.inf)
+    reach = max(1, int(round(search * detector.rate)))
+    rows = []
+    previous = None
+    for time in times:
+        center = int(round(time * detector.rate))
+        lower, upper = max(center - reach, 0), min(center + reach + 1, len(speed))
+        index = lower + int(np.argmax(speed[lower:upper])) if upper > lower else center
+        gap = time - previous if previous is not None else MAX_GAP
+        previous = time
+        if index - detector.before < 0 or index + detector.after >= len(speed):
+            rows.append(np.full(len(FEATURES), np.nan))
+            continue
+        rows.append(detector.features(index, raw_speed, gap))
+    return np.array(rows).reshape(len(rows), len(FEATURES))
+
+
+def count_strokes(events: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    打球の種類ごとの本数
+
+    Args:
+        events: 打球イベントの並び
+
+    Returns:
+        STROKES の順の 種類 → 本数（0本の種類も含む）
+    """
+    counts = {stroke: 0 for stroke in STROKES}
+    for event in events:
+        if event.get("stroke") in counts:
+            counts[event["stroke"]] += 1
+    return counts
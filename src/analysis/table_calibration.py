@@ -0,0 +1,400 @@
+"""
+Table Calibration Module
+卓球台の4隅を検出し、画素座標を台の座標（メートル）に変換する射影変換を求める
+
+動画から数フレームだけを抜き出して台を検出し、カメラの切り替わり（台の位置が
+大きく変わったところ）で区間に分けて、区間ごとに射影変換を1つ求める。
+結果は動画ハッシュごとに保存し、ボールの落下位置や選手の立ち位置などの
+分析はフレームごとに台を検出し直さずにこれを使う。
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+import numpy as np
+
+from storage.result_index import compute_file_hash
+from storage.writer import atomic_write_json
+
+
+# 卓球台の大きさ（メートル）
+TABLE_WIDTH = 1.525
+TABLE_LENGTH = 2.74
+
+# 台の座標系: 奥のエンドライン左端を原点に、x はサイドライン方向の横（右が正）、
+# y はカメラに近づく向き。画像の4隅（奥左・奥右・手前右・手前左）に対応する
+TABLE_CORNERS = np.array(
+    [[0.0, 0.0], [TABLE_WIDTH, 0.0], [TABLE_WIDTH, TABLE_LENGTH], [0.0, TABLE_LENGTH]]
+)
+
+# 台の色（BGR で値が最も大きいチャンネル）
+TABLE_COLORS = {"blue": 0, "green": 1}
+
+DEFAULT_CALIBRATION_DIR = "data/calibration"
+
+
+def table_mask(frame: np.ndarray, color: str = "blue", margin: int = 35, minimum: int = 60) -> np.ndarray:
+    """
+    台の色の画素のマスク
+
+    Args:
+        frame: (高さ, 幅, 3) の BGR 配列
+        color: TABLE_COLORS のキー
+        margin: 他のチャンネルとの差の下限
+        minimum: 台の色のチャンネルの値の下限
+
+    Returns:
+        (高さ, 幅) の bool 配列
+    """
+    channel = TABLE_COLORS[color]
+    values = frame.astype(np.int16)
+    main = values[..., channel]
+    others = np.delete(values, channel, axis=-1).max(axis=-1)
+    return (main >= minimum) & (main - others >= margin)
+
+
+def _largest_band(rows: np.ndarray, weights: np.ndarray, gap: int) -> np.ndarray:
+    """True の行の連なり（gap 行以下の途切れはつなぐ）のうち、重みの和が最大のものの行番号"""
+    indices = np.flatnonzero(rows)
+    groups = np.split(indices, np.flatnonzero(np.diff(indices) > gap + 1) + 1)
+    return max(groups, key=lambda group: weights[group].sum())
+
+
+def _fit_edge(ys: np.ndarray, xs: np.ndarray) -> np.ndarray:
+    """台の左右の辺の直線 x = a*y + b を当てはめる（腕などで欠けた行は外れ値として除く）"""
+    coef = np.polyfit(ys, xs, 1)
+    residual = np.abs(np.polyval(coef, ys) - xs)
+    keep = residual <= max(2.0, 3.0 * np.median(residual))
+    if keep.sum() >= 2 and not keep.all():
+        coef = np.polyfit(ys[keep], xs[keep], 1)
+    return coef
+
+
+def detect_table_corners(
+    frame: np.ndarray,
+    color: str = "blue",
+    min_area: float = 0.01
+) -> Optional[np.ndarray]:
+    """
+    1フレームから台の4隅を検出
+
+    台の色の画素が一定以上ある行の帯を台とみなし、各行の左端・右端に直線を
+    当てはめて、帯の上端・下端との交点を4隅とする（後方からの撮影を想定）。
+
+    Args:
+        frame: (高さ, 幅, 3) の BGR 配列
+        color: 台の色（TABLE_COLORS のキー）
+        min_area: 台とみなす最小の面積（画像に対する割合）
+
+    Returns:
+        奥左・奥右・手前右・手前左の画素座標 (4, 2)。見つからなければ None
+    """
+    mask = table_mask(frame, color)
+    height, width = mask.shape
+    counts = mask.sum(axis=1)
+    rows = counts >= max(3, int(width * 0.05))
+    if rows.sum() < 3:
+        return None
+
+    # ネットで数行途切れても1枚の台として扱う
+    band = _largest_band(rows, counts, gap=max(2, height // 40))
+    if len(band) < 3 or counts[band].sum() < min_area * height * width:
+        return None
+
+    lefts = np.argmax(mask[band], axis=1).astype(np.float64)
+    rights = width - np.argmax(mask[band, ::-1], axis=1).astype(np.float64)
+    ys = band + 0.5
+    left, right = _fit_edge(ys, lefts), _fit_edge(ys, rights)
+    top, bottom = float(band[0]), float(band[-1] + 1)
+    return np.array([
+        [np.polyval(left, top), top],
+        [np.polyval(right, top), top],
+        [np.polyval(right, bottom), bottom],
+        [np.polyval(left, bottom), bottom],
+    ])
+
+
+def _normalization(points: np.ndarray) -> np.ndarray:
+    """重心を原点に、平均距離を √2 にそろえる変換（DLT の数値安定化）"""
+    center = points.mean(axis=0)
+    scale = np.sqrt(2) / max(np.linalg.norm(points - center, axis=1).mean(), 1e-12)
+    return np.array([[scale, 0, -scale * center[0]], [0, scale, -scale * center[1]], [0, 0, 1]])
+
+
+def fit_homography(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    対応点から射影変換を求める（正規化 DLT）
+
+    Args:
+        src: 変換前の点 (N, 2)。N >= 4
+        dst: 変換後の点 (N, 2)
+
+    Returns:
+        3x3 の射影変換行列（H[2, 2] = 1）
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    t_src, t_dst = _normalization(src), _normalization(dst)
+    s = apply_homography(t_src, src)
+    d = apply_homography(t_dst, dst)
+
+    rows = []
+    for (x, y), (u, v) in zip(s, d):
+        rows.append([-x, -y, -1, 0, 0, 0, u * x, u * y, u])
+        rows.append([0, 0, 0, -x, -y, -1, v * x, v * y, v])
+    _, _, vt = np.linalg.svd(np.asarray(rows))
+    matrix = np.linalg.inv(t_dst) @ vt[-1].reshape(3, 3) @ t_src
+    return matrix / matrix[2, 2]
+
+
+def apply_homography(matrix: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    点列に射影変換を適用
+
+    Args:
+        matrix: 3x3 の射影変換行列
+        points: (N, 2) の点（NaN はそのまま NaN になる）
+
+    Returns:
+        (N, 2) の変換後の点
+    """
+    points = np.asarray(points, dtype=np.float64)
+    projected = points @ matrix[:, :2].T + matrix[:, 2]
+    return projected[:, :2] / projected[:, 2:]
+
+
+class TableCalibration:
+    """
+    動画の台の位置（カメラ区間ごとの射影変換）
+
+    区間は start_frame の昇順に並び、台が映っていない区間の射影変換は None。
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        初期化
+
+        Args:
+            data: TableCalibrator が保存する辞書
+        """
+        self.data = data
+        self.segments: List[Dict[str, Any]] = data["segments"]
+        self._starts = np.array([segment["start_frame"] for segment in self.segments], dtype=np.int64)
+        self._matrices = [
+            np.asarray(segment["homography"]) if segment["homography"] is not None else None
+            for segment in self.segments
+        ]
+
+    def segment_at(self, frame: int) -> Optional[Dict[str, Any]]:
+        """フレームが属するカメラ区間"""
+        if not self.segments:
+            return None
+        return self.segments[max(0, int(np.searchsorted(self._starts, frame, side="right")) - 1)]
+
+    def to_table(self, frames: np.ndarray, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        画素座標を台の座標（メートル）に変換
+
+        Args:
+            frames: フレーム番号の配列
+            x: 画素の x 座標（元の解像度）
+            y: 画素の y 座標
+
+        Returns:
+            (台の x, 台の y) の float32 配列。台が映っていない区間は NaN
+        """
+        frames = np.asarray(frames)
+        table = np.full((len(frames), 2), np.nan)
+        if self.segments:
+            segment_ids = np.maximum(np.searchsorted(self._starts, frames, side="right") - 1, 0)
+            points = np.stack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)], axis=-1)
+            for segment_id in np.unique(segment_ids):
+                matrix = self._matrices[segment_id]
+                if matrix is not None:
+                    selected = segment_ids == segment_id
+                    table[selected] = apply_homography(matrix, points[selected])
+        return table[:, 0].astype(np.float32), table[:, 1].astype(np.float32)
+
+
+class TableCalibrator:
+    """
+    台の検出と射影変換の計算
+
+    動画ハッシュと検出の設定をキーに <calibration_dir>/<ハッシュ>_<色>_n<枚数>_d<縮小率>.json を保存し、
+    同じ動画・同じ設定に対しては検出せずに保存済みの結果を返す。
+    """
+
+    def __init__(
+        self,
+        calibration_dir: str = DEFAULT_CALIBRATION_DIR,
+        samples: int = 24,
+        tolerance: float = 0.02,
+        color: str = "blue",
+        downscale: int = 2
+    ):
+        """
+        初期化
+
+        Args:
+            calibration_dir: 保存先ディレクトリ
+            samples: 台の検出に使うフレーム数（動画全体から等間隔に選ぶ）
+            tolerance: 同じカメラ区間とみなす4隅のずれの上限（画像の対角線に対する割合）
+            color: 台の色（TABLE_COLORS のキー）
+            downscale: 検出時の縮小率
+        """
+        self.calibration_dir = Path(calibration_dir)
+        self.samples = max(1, samples)
+        self.tolerance = tolerance
+        self.color = color
+        self.downscale = downscale
+
+    def path(self, video_hash: str) -> Path:
+        """保存先のパス（台の色・検出に使うフレーム数・縮小率ごとに分ける）"""
+        return self.calibration_dir / f"{video_hash}_{self.color}_n{self.samples}_d{self.downscale}.json"
+
+    def calibrate_frames(
+        self,
+        frames: Iterable[Tuple[int, np.ndarray]],
+        frame_count: int,
+        scale: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        抜き出したフレームから台を検出し、カメラ区間ごとの射影変換を求める
+
+        1枚だけ台が見つからないフレームは選手の重なりなどとみなして無視し、
+        2枚以上続けて見つからない場合は台が映っていない区間とする。
+
+        Args:
+            frames: (フレーム番号, BGR 配列) の並び（フレーム番号の昇順）
+            frame_count: 動画の総フレーム数
+            scale: フレームの縮小率（4隅の座標に掛けて元の解像度に戻す）
+
+        Returns:
+            table / segments を持つ辞書
+        """
+        detections = []
+        diagonal = 1.0
+        for index, frame in frames:
+            diagonal = float(np.hypot(*frame.shape[:2])) * scale
+            corners = detect_table_corners(frame, self.color)
+            detections.append((index, None if corners is None else corners * scale))
+
+        # 前後とも台が見つかっているフレームの間の1枚だけの見落としは除く
+        found = [corners is not None for _, corners in detections]
+        detections = [
+            detection for i, detection in enumerate(detections)
+            if found[i] or (i > 0 and not found[i - 1]) or (i + 1 < len(found) and not found[i + 1])
+        ]
+
+        groups: List[List[Tuple[int, Optional[np.ndarray]]]] = []
+        for index, corners in detections:
+            if groups:
+                last = groups[-1][-1][1]
+                if last is None and corners is None:
+                    groups[-1].append((index, corners))
+                    continue
+                if last is not None and corners is not None:
+                    shift = np.linalg.norm(corners - last, axis=1).mean()
+                    if shift <= self.tolerance * diagonal:
+                        groups[-1].append((index, corners))
+                        continue
+            groups.append([(index, corners)])
+
+        segments = []
+        for i, group in enumerate(groups):
+            # 区間の境目は、隣り合う抜き出しフレームの中間とする
+            start = 0 if i == 0 else (groups[i - 1][-1][0] + group[0][0] + 1) // 2
+            end = frame_count if i + 1 == len(groups) else (group[-1][0] + groups[i + 1][0][0] + 1) // 2
+            if group[0][1] is None:
+                corners, homography = None, None
+            else:
+                median = np.median(np.stack([c for _, c in group]), axis=0)
+                corners = np.round(median, 2).tolist()
+                homography = fit_homography(median, TABLE_CORNERS).tolist()
+            segments.append({
+                "start_frame": int(start),
+                "end_frame": int(end),
+                "samples": len(group),
+                "corners": corners,
+                "homography": homography,
+            })
+        return {"table": {"width": TABLE_WIDTH, "length": TABLE_LENGTH}, "segments": segments}
+
+    def calibrate(
+        self,
+        video_path: str,
+        info: Optional[Dict[str, Any]] = None,
+        video_hash: Optional[str] = None,
+        force: bool = False
+    ) -> TableCalibration:
+        """
+        動画の台の位置を求める（保存済みなら読み込むだけ）
+
+        Args:
+            video_path: 動画ファイルのパス
+            info: 動画情報（frame_count。省略時は動画から取得）
+            video_hash: 動画ハッシュ（省略時は計算）
+            force: 保存済みでも検出し直す
+
+        Returns:
+            TableCalibration
+        """
+        video_hash = video_hash or compute_file_hash(video_path)
+        path = self.path(video_hash)
+        if not force and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return TableCalibration(json.load(f))
+
+        from .cv_analyzer import read_frames_at, video_info
+
+        info = info or video_info(video_path)
+        frame_count = info["frame_count"]
+        frames = read_frames_at(video_path, self.sample_frames(frame_count), self.downscale)
+        return self.save(video_hash, self.calibrate_frames(frames, frame_count, self.downscale))
+
+    def sample_frames(self, frame_count: int) -> List[int]:
+        """台の検出に使うフレーム番号（動画全体から等間隔に選ぶ）"""
+        return np.unique(np.linspace(0, max(frame_count - 1, 0), self.samples).astype(int)).tolist()
+
+    def calibrate_batches(
+        self,
+        batches: Iterable[Tuple[int, np.ndarray]],
+        frame_count: int,
+        scale: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        フレームのバッチ列から検出に使うフレームだけを選んで台の位置を求める
+        （frame_buffer.share_batches の処理として、他の処理と同じデコードを使う）
+
+        Args:
+            batches: (先頭のフレーム番号, BGR 配列) の並び
+            frame_count: 動画の総フレーム数
+            scale: バッチのフレームの座標を元の動画の座標に戻す倍率（プロキシを読む場合）
+
+        Returns:
+            calibrate_frames の戻り値
+        """
+        wanted = set(self.sample_frames(frame_count))
+        d = self.downscale
+        frames = (
+            (start + i, frames[i, ::d, ::d])
+            for start, frames in batches
+            for i in range(len(frames)) if start + i in wanted
+        )
+        return self.calibrate_frames(frames, frame_count, d * scale)
+
+    def save(self, video_hash: str, data: Dict[str, Any]) -> TableCalibration:
+        """
+        検出結果を保存
+
+        Args:
+            video_hash: 動画ハッシュ
+            data: calibrate_frames の戻り値
+
+        Returns:
+            TableCalibration
+        """
+        data = {"video_hash": video_hash, **data}
+        atomic_write_json(str(self.path(video_hash)), data)
+        return TableCalibration(data)
@@ -9,7 +9,6 @@ import os
 import json
 from pathlib import Path
 from typing import Optional, Dict, Any, List
-from openai import OpenAI
 
 
 class VideoAnalyzer:
@@ -27,10 +26,18 @@ class VideoAnalyzer:
             model: 使用するモデル名
         """
         self.model = model
-        self.client = OpenAI()
+        self._client = None
         self.frame_dir = Path("/tmp/tt_frames")
         self.frame_dir.mkdir(parents=True, exist_ok=True)
     
+    @property
+    def client(self):
+        """APIクライアント（初回アクセス時に生成）"""
+        if self._client is None:
+            from openai import OpenAI  # import コストが大きいため遅延読み込み
+            self._client = OpenAI()
+        return self._client
+    
     def _get_video_duration(self, video_path: str) -> float:
         """動画の長さを取得"""
         result = subprocess.run([
@@ -43,7 +50,8 @@ class VideoAnalyzer:
         self, 
         video_path: str, 
         interval: int = 30,
-        max_frames: int = 8
+        max_frames: int = 8,
+        timestamps: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         動画からフレームを抽出
@@ -52,16 +60,20 @@ class VideoAnalyzer:
             video_path: 動画ファイルのパス
             interval: フレーム抽出間隔（秒）
             max_frames: 最大フレーム数
+            timestamps: 抽出する時刻（秒。指定時は interval を使わない）
             
         Returns:
             抽出したフレームのリスト
         """
-        duration = self._get_video_duration(video_path)
-        timestamps = [i * interval for i in range(min(int(duration // interval) + 1, max_frames))]
+        if timestamps is None:
+            duration = self._get_video_duration(video_path)
+            timestamps = [i * interval for i in range(min(int(duration // interval) + 1, max_frames))]
+        else:
+            timestamps = list(timestamps)[:max_frames]
         
         frames = []
         for ts in timestamps:
-            frame_path = self.frame_dir / f"frame_{ts:04d}.jpg"
+            frame_path = self.frame_dir / f"frame_{int(ts * 1000):08d}.jpg"
             subprocess.run([
                 'ffmpeg', '-y', '-i', video_path,
                 '-ss', str(ts),
@@ -80,11 +92,31 @@ class VideoAnalyzer:
         
         return frames
     
+    def _rally_frame_times(self, video_path: str, max_frames: int = 8) -> Optional[List[float]]:
+        """
+        打球音から検出したラリーをもとにフレームの時刻を選ぶ（ラリー間の空き時間を避ける）
+
+        Args:
+            video_path: 動画ファイルのパス
+            max_frames: 最大フレーム数
+
+        Returns:
+            時刻（秒）のリスト。音声がない・ラリーを検出できない場合は None
+        """
+        from .audio_segmenter import AudioSegmenter, select_frame_times
+
+        try:
+            rallies = AudioSegmenter().segment(video_path)["rallies"]
+        except (FileNotFoundError, ValueError):
+            return None
+        return select_frame_times(rallies, max_frames) if rallies else None
+
     def analyze_video(
         self,
         video_path: str,
         player_name: str = "浅見江里佳",
-        team_name: str = "文化学園大学杉並"
+        team_name: str = "文化学園大学杉並",
+        frame_times: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         動画を分析
@@ -93,6 +125,8 @@ class VideoAnalyzer:
             video_path: 動画ファイルのパス
             player_name: 選手名
             team_name: 所属チーム名
+            frame_times: 抽出するフレームの時刻（省略時は打球音から検出したラリーの打球の瞬間。
+                ラリーを検出できなければ30秒間隔）
             
         Returns:
             分析結果の辞書
@@ -102,7 +136,9 @@ class VideoAnalyzer:
         
         # フレーム抽出
         print("フレームを抽出中...")
-        frames = self._extract_frames(video_path)
+        if frame_times is None:
+            frame_times = self._rally_frame_times(video_path)
+        frames = self._extract_frames(video_path, timestamps=frame_times)
         print(f"  {len(frames)} フレームを抽出")
         
         # API用のコンテンツを構築
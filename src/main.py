@@ -7,15 +7,121 @@ AI主導型 卓球パフォーマンス最大化システム
 import argparse
 import json
 import os
-from datetime import datetime
-from pathlib import Path
 
 from analysis.llm_analyzer import LLMAnalyzer
+from pipeline.runner import FullPipeline, reuse_or_run, resolve_analysis, strategy_key, practice_key
+from storage.result_index import ResultIndex
+from storage.writer import ResultWriter, new_run_id
+
+
+def _find_missing_input(args):
+    """
+    指定された入力ファイルのうち存在しないものを探す
+
+    APIクライアントを生成する前に、引数の誤りを素早く検出するために使う。
+
+    Returns:
+        存在しないファイルのパス（すべて存在すればNone）
+    """
+    for name in ("video", "opponent_video", "analysis_file", "strategy_file"):
+        path = getattr(args, name, None)
+        if path and not os.path.exists(path):
+            return path
+    return None
+
+
+def _resolve_analysis(args, analyzer, index):
+    """自己分析結果を取得（--analysis-file → 索引 → 新規分析の順）"""
+    cv_result = None
+    if getattr(args, "integrate", False) and args.video and not getattr(args, "analysis_file", None):
+        from analysis.integration import collect_cv_results
+        
+        print("計測（ラリー・打球・配球・フットワーク）を実行中...")
+        cv_result = collect_cv_results(args.video, index.video_hash(args.video), args.db, getattr(args, "side", None))
+        for stage, reason in cv_result["unavailable"].items():
+            print(f"  {stage}: 計測できませんでした（{reason}）")
+    return resolve_analysis(
+        analyzer, index,
+        video=args.video,
+        player=args.player,
+        team=args.team,
+        analysis_file=getattr(args, "analysis_file", None),
+        use_cache=not args.no_cache,
+        cv_result=cv_result
+    )
+
+
+def _open_index(args):
+    """結果データベースと、それを参照する索引を開く"""
+    from storage.results_store import ResultsStore
+    
+    return ResultIndex(args.output, store=ResultsStore(args.db))
+
+
+def _open_artifacts(args):
+    """--artifacts 指定時は artifact store を開く"""
+    if not args.artifacts:
+        return None
+    from storage.artifacts import ArtifactStore
+    
+    return ArtifactStore()
+
+
+def _save_results(args, analyzer, index, command, file_prefix, payload, outputs):
+    """
+    実行結果をデータベースに保存し、必要ならJSONファイルにも書き出す
+    
+    Args:
+        args: コマンド引数
+        analyzer: LLMAnalyzer
+        index: ResultIndex
+        command: コマンド名
+        file_prefix: JSONファイル名の接頭辞
+        payload: JSONファイルに書き出す内容
+        outputs: (ステージ名, 結果, 索引キー, JSONファイル内のキー) のリスト
+    
+    Returns:
+        (実行ID, JSONファイルのパス) のタプル。JSONを書き出さない場合のパスはNone
+    """
+    run_id = new_run_id()
+    video = getattr(args, "video", None)
+    index.store.save_run(
+        run_id,
+        command,
+        {stage: (data, key) for stage, data, key, _ in outputs},
+        player=args.player,
+        team=args.team,
+        video_hash=index.video_hash(video) if video else None,
+        video_path=os.path.abspath(video) if video else None,
+        video_size=os.path.getsize(video) if video else None,
+        model=analyzer.model,
+        params={"opponent": getattr(args, "opponent", None)}
+    )
+    
+    if args.no_json:
+        return run_id, None
+    
+    writer = ResultWriter(args.output, run_id, group=args.group_runs, artifacts=_open_artifacts(args))
+    output_file = writer.write_json(file_prefix, payload)
+    
+    for _, _, key, field in outputs:
+        if key:
+            index.record(key, output_file, field)
+    
+    return run_id, output_file
+
+
+def _print_saved(run_id, output_file):
+    """保存先を表示"""
+    print(f"結果をデータベースに保存しました: run {run_id}")
+    if output_file:
+        print(f"結果を保存しました: {output_file}")
 
 
 def analyze_command(args):
     """動画分析コマンド"""
     analyzer = LLMAnalyzer()
+    index = _open_index(args)
     
     print(f"=== 動画分析を開始 ===")
     print(f"対象: {args.video}")
@@ -23,24 +129,16 @@ def analyze_command(args):
     print(f"所属: {args.team}")
     print()
     
-    result = analyzer.analyze_video(
-        video_path=args.video,
-        player_name=args.player,
-        team_name=args.team
-    )
+    result, analysis_key = _resolve_analysis(args, analyzer, index)
     
     # 結果を保存
-    output_dir = Path(args.output)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = output_dir / f"analysis_{timestamp}.json"
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    run_id, output_file = _save_results(
+        args, analyzer, index, "analyze", "analysis", result,
+        [("analysis", result, analysis_key, None)]
+    )
     
     print(f"=== 分析完了 ===")
-    print(f"結果を保存しました: {output_file}")
+    _print_saved(run_id, output_file)
     
     # 結果を表示
     if args.verbose:
@@ -53,47 +151,68 @@ def analyze_command(args):
 def strategy_command(args):
     """戦略生成コマンド"""
     analyzer = LLMAnalyzer()
+    index = _open_index(args)
     
     print(f"=== 戦略生成を開始 ===")
     
-    # 自己分析を実行
+    # 自己分析を実行（既存の結果があれば再利用）
     print("自己分析を実行中...")
-    self_analysis = analyzer.analyze_video(
-        video_path=args.video,
-        player_name=args.player,
-        team_name=args.team
-    )
+    self_analysis, analysis_key = _resolve_analysis(args, analyzer, index)
     
     # 相手分析（オプション）
     opponent_analysis = None
+    opponent_key = None
     if args.opponent_video:
         print(f"相手分析を実行中: {args.opponent}")
-        opponent_analysis = analyzer.analyze_opponent(
-            video_path=args.opponent_video,
-            opponent_name=args.opponent,
-            opponent_team=args.opponent_team or ""
+        opponent_key = index.make_key(
+            "opponent_analysis",
+            video=index.video_hash(args.opponent_video),
+            opponent=args.opponent,
+            team=args.opponent_team or "",
+            model=analyzer.model
         )
+        opponent_analysis = reuse_or_run(
+            index, opponent_key, not args.no_cache,
+            lambda: analyzer.analyze_opponent(
+                video_path=args.opponent_video,
+                opponent_name=args.opponent,
+                opponent_team=args.opponent_team or ""
+            )
+        )
+    
+    # 配球データ（オプション）
+    placement = None
+    if args.placement:
+        from storage.artifacts import load_json
+        
+        print(f"配球データを読み込み中: {args.placement}")
+        placement = load_json(args.placement)
     
     # 戦略生成
     print("戦略を生成中...")
-    strategy = analyzer.generate_strategy(self_analysis, opponent_analysis)
+    s_key = strategy_key(index, analyzer, self_analysis, opponent_analysis, placement)
+    strategy = reuse_or_run(
+        index, s_key, not args.no_cache,
+        lambda: analyzer.generate_strategy(self_analysis, opponent_analysis, placement)
+    )
     
     # 結果を保存
-    output_dir = Path(args.output)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = output_dir / f"strategy_{timestamp}.json"
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump({
+    run_id, output_file = _save_results(
+        args, analyzer, index, "strategy", "strategy",
+        {
             "self_analysis": self_analysis,
             "opponent_analysis": opponent_analysis,
             "strategy": strategy
-        }, f, ensure_ascii=False, indent=2)
+        },
+        [
+            ("analysis", self_analysis, analysis_key, "self_analysis"),
+            ("opponent_analysis", opponent_analysis, opponent_key, "opponent_analysis"),
+            ("strategy", strategy, s_key, "strategy")
+        ]
+    )
     
     print(f"=== 戦略生成完了 ===")
-    print(f"結果を保存しました: {output_file}")
+    _print_saved(run_id, output_file)
     
     if args.verbose:
         print("\n=== 戦略 ===")
@@ -105,41 +224,38 @@ def strategy_command(args):
 def practice_command(args):
     """練習計画生成コマンド"""
     analyzer = LLMAnalyzer()
+    index = _open_index(args)
     
     print(f"=== 練習計画生成を開始 ===")
     
-    # 分析結果を読み込むか、新規分析を実行
-    if args.analysis_file:
-        print(f"分析結果を読み込み中: {args.analysis_file}")
-        with open(args.analysis_file, "r", encoding="utf-8") as f:
-            analysis = json.load(f)
-    else:
+    # 分析結果を読み込むか、既存の結果を再利用するか、新規分析を実行
+    if not args.analysis_file:
         print("動画分析を実行中...")
-        analysis = analyzer.analyze_video(
-            video_path=args.video,
-            player_name=args.player,
-            team_name=args.team
-        )
+    analysis, analysis_key = _resolve_analysis(args, analyzer, index)
     
     # 練習計画生成
     print("練習計画を生成中...")
-    practice_plan = analyzer.generate_practice_plan(analysis)
+    p_key = practice_key(index, analyzer, analysis)
+    practice_plan = reuse_or_run(
+        index, p_key, not args.no_cache,
+        lambda: analyzer.generate_practice_plan(analysis)
+    )
     
     # 結果を保存
-    output_dir = Path(args.output)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = output_dir / f"practice_plan_{timestamp}.json"
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump({
+    run_id, output_file = _save_results(
+        args, analyzer, index, "practice", "practice_plan",
+        {
             "analysis": analysis,
             "practice_plan": practice_plan
-        }, f, ensure_ascii=False, indent=2)
+        },
+        [
+            ("analysis", analysis, analysis_key, "analysis"),
+            ("practice_plan", practice_plan, p_key, "practice_plan")
+        ]
+    )
     
     print(f"=== 練習計画生成完了 ===")
-    print(f"結果を保存しました: {output_file}")
+    _print_saved(run_id, output_file)
     
     if args.verbose:
         print("\n=== 練習計画 ===")
@@ -150,52 +266,29 @@ def practice_command(args):
 
 def full_command(args):
     """フル分析コマンド（分析→戦略→練習計画）"""
-    analyzer = LLMAnalyzer()
+    from storage.results_store import ResultsStore
     
-    print(f"=== フル分析を開始 ===")
-    print(f"対象: {args.video}")
-    print(f"選手: {args.player}")
-    print()
-    
-    # 1. 動画分析
-    print("【Step 1/3】動画分析を実行中...")
-    analysis = analyzer.analyze_video(
-        video_path=args.video,
-        player_name=args.player,
-        team_name=args.team
-    )
-    
-    # 2. 戦略生成
-    print("【Step 2/3】戦略を生成中...")
-    strategy = analyzer.generate_strategy(analysis)
-    
-    # 3. 練習計画生成
-    print("【Step 3/3】練習計画を生成中...")
-    practice_plan = analyzer.generate_practice_plan(analysis)
-    
-    # 結果を統合
-    full_result = {
-        "player": args.player,
-        "team": args.team,
-        "video": args.video,
-        "timestamp": datetime.now().isoformat(),
-        "analysis": analysis,
-        "strategy": strategy,
-        "practice_plan": practice_plan
-    }
-    
-    # 結果を保存
-    output_dir = Path(args.output)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = output_dir / f"full_analysis_{timestamp}.json"
+    pipeline = FullPipeline(
+        LLMAnalyzer, args.output,
+        use_cache=not args.no_cache,
+        store=ResultsStore(args.db),
+        export_json=not args.no_json,
+        group_runs=args.group_runs,
+        artifacts=_open_artifacts(args)
+    )
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(full_result, f, ensure_ascii=False, indent=2)
+    full_result, output_file = pipeline.run(
+        video=args.video,
+        player=args.player,
+        team=args.team,
+        analysis_file=args.analysis_file,
+        strategy_file=args.strategy_file,
+        resume=args.resume,
+        opponent=getattr(args, "opponent", None)
+    )
     
     print(f"\n=== フル分析完了 ===")
-    print(f"結果を保存しました: {output_file}")
+    _print_saved(full_result["run_id"], output_file)
     
     if args.verbose:
         print("\n=== 分析結果 ===")
@@ -204,6 +297,689 @@ def full_command(args):
     return full_result
 
 
+def watch_command(args):
+    """フォルダ監視コマンド（新しい動画を自動でフル分析）"""
+    from pipeline.watcher import VideoWatcher
+    from storage.results_store import ResultsStore
+    
+    def process(video):
+        # スレッドごとに独立したパイプラインを使う
+        pipeline = FullPipeline(
+            LLMAnalyzer, args.output,
+            use_cache=not args.no_cache,
+            store=ResultsStore(args.db),
+            export_json=not args.no_json,
+            group_runs=args.group_runs,
+            artifacts=_open_artifacts(args)
+        )
+        if not args.no_cache and pipeline.is_analyzed(video, args.player, args.team):
+            print(f"[watch] 分析済みのためスキップ: {video}")
+            return None
+        full_result, output_file = pipeline.run(
+            video=video,
+            player=args.player,
+            team=args.team
+        )
+        reports = pipeline.render_reports(full_result)
+        return {"run_id": full_result["run_id"], "output_file": str(output_file) if output_file else None, "reports": reports}
+    
+    watcher = VideoWatcher(
+        args.dir,
+        process,
+        poll_interval=args.interval,
+        settle_seconds=args.settle,
+        max_workers=args.workers,
+        max_pending=args.max_pending
+    )
+    watcher.run_forever()
+
+
+def enqueue_command(args):
+    """ジョブ登録コマンド（動画をジョブキューに追加）"""
+    from storage.job_queue import JobQueue
+    
+    queue = JobQueue(args.db, args.journal_mode)
+    for video in args.videos:
+        stat = os.stat(video)
+        path = os.path.abspath(video)
+        job_id = queue.enqueue(
+            args.stage,
+            {
+                "video": path,
+                "player": args.player,
+                "team": args.team,
+                "opponent": args.opponent,
+                "output": os.path.abspath(args.output),
+                "db": os.path.abspath(args.db) if args.db else None,
+                "export_json": not args.no_json,
+                "group_runs": args.group_runs,
+                "artifacts": args.artifacts
+            },
+            priority=args.priority,
+            max_attempts=args.max_attempts,
+            dedupe_key=f"{args.stage}:{path}:{stat.st_size}:{stat.st_mtime_ns}:{args.player}"
+        )
+        print(f"ジョブを登録しました: job {job_id} ({args.stage}) {path}")
+    
+    print(f"キューの状態: {queue.stats()}")
+
+
+def worker_command(args):
+    """ワーカーコマンド（ジョブキューを処理）"""
+    from pipeline.worker import run_workers
+    
+    print(f"=== ワーカーを起動 ({args.processes} プロセス) ===")
+    run_workers(
+        args.processes,
+        db_path=args.db,
+        lease_seconds=args.lease,
+        poll_interval=args.interval,
+        drain=args.drain,
+        journal_mode=args.journal_mode
+    )
+
+
+def history_command(args):
+    """履歴コマンド（データベースに保存した結果を選手・日付で検索）"""
+    from storage.results_store import ResultsStore
+    
+    store = ResultsStore(args.db)
+    rows = store.find_outputs(
+        stage=args.stage,
+        player=args.player,
+        since=args.since,
+        until=args.until,
+        limit=args.limit,
+        include_data=args.verbose
+    )
+    
+    if not rows:
+        print("該当する結果はありません")
+        return rows
+    
+    for row in rows:
+        print(f"{row['created_at'][:19]}  {row['run_id']}  {row['command']:<8} {row['stage']:<18} {row['player'] or '-'}")
+        if args.verbose:
+            print(json.dumps(row["data"], ensure_ascii=False, indent=2))
+    
+    return rows
+
+
+def trend_command(args):
+    """推移コマンド（技術評価の移動平均・変化量・対戦相手別の集計）"""
+    from storage.ratings import TECHNIQUES, RatingTrends
+    
+    trends = RatingTrends(args.db).trend(
+        args.player,
+        technique=args.technique,
+        window=args.window,
+        since=args.since,
+        until=args.until
+    )
+    
+    if not trends:
+        print(f"{args.player} の技術評価はまだありません")
+        return trends
+    
+    def signed(value):
+        return "-" if value is None else f"{value:+.2f}"
+    
+    print(f"=== {args.player} の技術評価の推移（移動平均: 直近{args.window}試合） ===")
+    print("| 技術 | 試合数 | 最新 | 移動平均 | 前回比 | 前期比 | 平均 |")
+    print("|:---|---:|---:|---:|---:|---:|---:|")
+    for technique in TECHNIQUES:
+        if technique not in trends:
+            continue
+        t = trends[technique]
+        print(
+            f"| {technique} | {t['count']} | {t['latest']:.2f} | {t['rolling_latest']:.2f} | "
+            f"{signed(t['delta_last'])} | {signed(t['delta_window'])} | {t['mean']:.2f} |"
+        )
+    
+    if args.by_opponent:
+        print("\n=== 対戦相手別 ===")
+        for technique in TECHNIQUES:
+            if technique not in trends:
+                continue
+            print(f"{technique}:")
+            for opponent, split in trends[technique]["by_opponent"].items():
+                print(f"  {opponent or '（相手指定なし）'}: {split['mean']:.2f} ({split['count']}試合)")
+    
+    if args.verbose:
+        print(json.dumps(trends, ensure_ascii=False, indent=2))
+    
+    return trends
+
+
+def search_command(args):
+    """検索コマンド（得点パターン・失点パターン・改善点・キーポイントを全文検索）"""
+    from storage.search import SearchIndex
+    
+    index = SearchIndex(args.db)
+    if args.rebuild:
+        print(f"検索索引を作り直しました: {index.rebuild()} 件")
+    
+    query = " ".join(args.query)
+    rows = index.search(query, field=args.field, player=args.player, stage=args.stage, limit=args.limit)
+    
+    if not rows:
+        print(f"「{query}」に一致する結果はありません")
+        return rows
+    
+    print(f"=== 「{query}」の検索結果: {len(rows)} 件 ===")
+    for row in rows:
+        print(f"\n{row['created_at'][:10]}  {row['player'] or '-'}  {row['stage']}  (run {row['run_id']})")
+        for field, texts in row["matches"].items():
+            for text in texts:
+                print(f"  [{field}] {text}")
+    
+    return rows
+
+
+def export_command(args):
+    """エクスポートコマンド（結果を Parquet / Feather の表に書き出す）"""
+    from output.analytics_export import AnalyticsExporter
+    
+    try:
+        counts = AnalyticsExporter(args.dir, args.db, args.format).export(full=args.full)
+    except ImportError as e:
+        print(f"Error: {args.format} 形式の書き出しには pandas と pyarrow が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    if not counts["outputs"]:
+        print("新しい結果はありません")
+        return counts
+    
+    print(f"=== エクスポート完了: {args.dir} ===")
+    for table, count in counts.items():
+        print(f"{table}: {count} 行")
+    return counts
+
+
+def import_command(args):
+    """取り込みコマンド（過去の結果JSONをデータベースに一括登録）"""
+    import time
+    from storage.importer import ResultImporter
+    from storage.results_store import ResultsStore
+    
+    print(f"=== 結果の取り込みを開始 ===")
+    started = time.perf_counter()
+    importer = ResultImporter(ResultsStore(args.db), workers=args.workers, batch_size=args.batch_size)
+    stats = importer.run(args.paths)
+    
+    print(f"=== 取り込み完了 ({time.perf_counter() - started:.1f}秒) ===")
+    print(f"ファイル: {stats['files']} / 実行: {stats['runs']} / ステージ結果: {stats['outputs']}")
+    print(f"重複: {stats['duplicates']} / 対象外: {stats['skipped']} / エラー: {stats['errors']}")
+    return stats
+
+
+def pose_command(args):
+    """姿勢推定コマンド（全フレームのキーポイントを NumPy 配列ファイルに保存）"""
+    import time
+    from analysis.pose_estimator import PoseEstimator
+    
+    estimator = PoseEstimator(args.dir, workers=args.workers, frame_step=args.step, model_complexity=args.model)
+    print(f"=== 姿勢推定を開始 ===")
+    print(f"対象: {args.video}")
+    started = time.perf_counter()
+    try:
+        keypoints, meta = estimator.run(args.video, force=args.force)
+    except ImportError as e:
+        print(f"Error: 姿勢推定には opencv-python と mediapipe が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    array_path, _ = estimator.paths(meta["video_hash"])
+    print(f"=== 姿勢推定完了 ({time.perf_counter() - started:.1f}秒) ===")
+    print(f"フレーム: {meta['frames']}（{meta['frame_step']}フレームおき）/ 人物検出: {meta['detected']}")
+    print(f"保存先: {array_path}")
+    return meta
+
+
+def footwork_command(args):
+    """フットワーク分析コマンド（姿勢推定の結果から移動速度・戻りの時間・カバー範囲を計算）"""
+    from analysis.footwork import footwork_metrics, ground_footwork
+    from analysis.pose_estimator import PoseEstimator
+    from analysis.table_calibration import TableCalibrator
+    from storage.result_index import compute_file_hash, load_stage_file
+    
+    video_hash = compute_file_hash(args.video)
+    calibration = None
+    try:
+        keypoints, meta = PoseEstimator(args.pose_dir).run(args.video, video_hash=video_hash)
+        if args.table:
+            calibration = TableCalibrator().calibrate(args.video, video_hash=video_hash)
+    except ImportError as e:
+        print(f"Error: 姿勢推定には opencv-python と mediapipe が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    metrics = footwork_metrics(keypoints, meta, calibration)
+    speed, recovery, coverage = metrics["lateral_speed"], metrics["recovery"], metrics["coverage"]
+    print(f"=== フットワーク分析完了 ===")
+    print(f"横方向の速度: 平均 {speed['mean']} m/s / 90% {speed['p90']} m/s / 最大 {speed['peak']} m/s")
+    print(f"戻りの時間: 中央値 {recovery['median']} 秒（{recovery['count']}回）")
+    print(f"カバー範囲: {coverage['range']} m")
+    for label, rating in metrics["ratings"].items():
+        print(f"{label}: {rating if rating is not None else '計測不可'}")
+    
+    if args.analysis_file:
+        grounded = ground_footwork(load_stage_file(args.analysis_file, "analysis"), metrics)
+        output_file = ResultWriter(args.output).write_json("analysis", grounded)
+        print(f"計測値で評価を置き換えた分析結果を保存しました: {output_file}")
+    
+    if args.verbose:
+        print(json.dumps(metrics, ensure_ascii=False, indent=2))
+    return metrics
+
+
+def strokes_command(args):
+    """打球検出コマンド（姿勢とボールの軌跡から打球を検出・分類して索引に保存）"""
+    import time
+    from analysis.stroke_classifier import STROKE_LABELS, SoftmaxClassifier, StrokeDetector, detect_strokes
+    from storage.strokes import StrokeIndex
+    
+    if args.train:
+        return train_strokes(args)
+    if not os.path.exists(args.model):
+        print(f"Error: 学習済みモデルがありません: {args.model}")
+        print("ラベル付きの打球（video,time,stroke の CSV）から --train で作成してください")
+        return None
+    
+    started = time.perf_counter()
+    try:
+        model = SoftmaxClassifier.load(args.model)
+        video_hash, keypoints, meta, ball = _stroke_inputs(args, args.video)
+    except ImportError as e:
+        print(f"Error: 打球検出には opencv-python と mediapipe が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    detector = StrokeDetector(model, meta, handedness=args.handedness)
+    events = list(detect_strokes(detector, keypoints, ball))
+    index = StrokeIndex(args.db)
+    index.save(video_hash, events, model=args.model)
+    
+    print(f"=== 打球検出完了 ({time.perf_counter() - started:.1f}秒) ===")
+    counts = index.counts(video_hash)
+    for stroke, label in STROKE_LABELS.items():
+        print(f"{label}: {counts.get(stroke, 0)}本")
+    if args.verbose:
+        print("\n| 時刻 | 打球 | 確率 |")
+        print("|---:|:---|---:|")
+        for event in events:
+            print(f"| {event['time']:.2f} | {STROKE_LABELS.get(event['stroke'], event['stroke'])} | {event['confidence']:.2f} |")
+    return counts
+
+
+def serve_command(args):
+    """サーブ分析コマンド（サーブの場面だけをつないだ動画でサーブ・レシーブを分析）"""
+    import time
+    from analysis.serve import serve_analysis
+    
+    started = time.perf_counter()
+    try:
+        result = serve_analysis(
+            LLMAnalyzer(), args.video, args.player, args.team,
+            db_path=args.db, opponent=args.opponent, max_serves=args.max_serves,
+            handedness=args.handedness, use_pose=not args.no_pose
+        )
+    except FileNotFoundError:
+        print("Error: サーブの切り出しには ffmpeg が必要です")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    stats = result["サーブ統計"]
+    by_server = " / ".join(f"{label}: {n}" for label, n in stats["by_server"].items())
+    print(f"=== サーブ分析完了 ({time.perf_counter() - started:.1f}秒) ===")
+    print(f"サーブ: {stats['serves']}本（{by_server}）/ 送ったサーブ: {stats['sent']}本（{stats['seconds']:.0f}秒）")
+    output_file = ResultWriter(args.output).write_json("opponent_serve" if args.opponent else "serve", result)
+    print(f"保存先: {output_file}")
+    if args.verbose:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+
+def live_command(args):
+    """ライブ分析コマンド（録画中の試合を読み続け、求めに応じて直近のラリーについて助言）"""
+    import time
+    from pipeline.live import LiveSession
+    from storage.result_index import load_stage_file
+    
+    if args.source == "-" and not args.interval:
+        print("Error: 標準入力から読む場合は --interval で助言の間隔を指定してください")
+        return None
+    if args.source != "-" and "://" not in args.source and not os.path.exists(args.source):
+        print(f"Error: ファイルが見つかりません: {args.source}")
+        return None
+    strategy = load_stage_file(args.strategy_file, "strategy") if args.strategy_file else None
+    
+    session = LiveSession(
+        args.source, None if args.stats_only else LLMAnalyzer(), args.player, args.team,
+        strategy=strategy, last_rallies=args.rallies, budget=args.budget, follow=not args.no_follow
+    )
+    try:
+        session.start()
+    except FileNotFoundError:
+        print("Error: ライブ分析には ffmpeg が必要です")
+        return None
+    
+    writer = ResultWriter(args.output)
+    
+    def advise():
+        advice = session.advise()
+        stats = advice["stats"]
+        recent, match = stats["recent"], stats["match"]
+        print(f"=== 助言 ({advice['latency']:.1f}秒 / {stats['duration']:.0f}秒まで) ===")
+        if recent.get("rallies"):
+            print(f"直近 {recent['rallies']} ラリー: 平均 {recent['hits']['mean']}打 / "
+                  f"試合全体 {match['rallies']} ラリー: 平均 {match['hits']['mean']}打")
+        if advice.get("error"):
+            print(f"Error: {advice['error']}")
+        if advice["advice"] is not None:
+            print(json.dumps(advice["advice"], ensure_ascii=False, indent=2))
+        output_file = writer.write_json("live_advice", advice)
+        print(f"保存先: {output_file}")
+        return advice
+    
+    print(f"[live] 読み込みを開始: {args.source}")
+    if args.interval:
+        print(f"[live] {args.interval:.0f}秒ごとに助言します（Ctrl+Cで停止）")
+    else:
+        print("[live] Enter で助言、q で終了")
+    advice = None
+    try:
+        while True:
+            if args.interval:
+                time.sleep(args.interval)
+            elif input().strip().lower() == "q":
+                break
+            advice = advise()
+            if not session.running and args.interval:
+                break
+    except (KeyboardInterrupt, EOFError):
+        print("\n[live] 停止します")
+    finally:
+        session.stop()
+    if session.error:
+        print(f"Error: {session.error}")
+    return advice
+
+
+def _stroke_inputs(args, video_path):
+    """打球検出の入力（動画ハッシュ・姿勢推定の結果・姿勢のサンプルに合わせたボールの位置）"""
+    import numpy as np
+    from analysis.cv_analyzer import CVAnalyzer
+    from analysis.pose_estimator import PoseEstimator
+    from analysis.proxy import proxy_or_source
+    from analysis.stroke_classifier import ball_samples
+    from storage.result_index import compute_file_hash
+    
+    video_hash = compute_file_hash(video_path)
+    estimator = PoseEstimator(args.pose_dir)
+    if not args.ball:
+        keypoints, meta = estimator.run(video_path, video_hash=video_hash)
+        return video_hash, keypoints, meta, None
+    
+    # ボールと姿勢をプロキシの1回のデコードで求める
+    proxy = proxy_or_source(video_path, video_hash)
+    result = CVAnalyzer.from_proxy(proxy).run_shared(video_hash, estimator, calibrate=False)
+    keypoints, meta = result["pose"]
+    ball = ball_samples(result["ball"], np.arange(len(keypoints)) * meta["frame_step"])
+    return video_hash, keypoints, meta, ball
+
+
+def train_strokes(args):
+    """ラベル付きの打球（video,time,stroke の CSV）から打球の分類モデルを学習して保存"""
+    import csv
+    import numpy as np
+    from analysis.stroke_classifier import STROKES, SoftmaxClassifier, training_features
+    
+    if not os.path.exists(args.train):
+        print(f"Error: ラベルファイルが見つかりません: {args.train}")
+        return None
+    with open(args.train, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in ("video", "time", "stroke") if column not in (reader.fieldnames or [])]
+        if missing:
+            print(f"Error: ラベルファイルに列がありません: {', '.join(missing)}（video,time,stroke の CSV が必要です）")
+            return None
+        labels = list(reader)
+    by_video = {}
+    unknown = set()
+    for line, row in enumerate(labels, start=2):
+        try:
+            time = float(row["time"])
+        except (TypeError, ValueError):
+            print(f"Error: {args.train}:{line}: time が数値ではありません: {row['time']}")
+            return None
+        if row["stroke"] not in STROKES:
+            unknown.add(row["stroke"])
+        by_video.setdefault(row["video"], []).append((time, row["stroke"]))
+    missing_videos = [video for video in by_video if not os.path.exists(video)]
+    if missing_videos:
+        print(f"Error: 動画ファイルが見つかりません: {', '.join(missing_videos)}")
+        return None
+    if unknown:
+        print(f"Warning: 既知の種類（{', '.join(STROKES)}）以外のラベルがあります: {', '.join(sorted(unknown))}")
+    
+    features, targets = [], []
+    try:
+        for video_path, rows in by_video.items():
+            rows.sort()
+            _, keypoints, meta, ball = _stroke_inputs(args, video_path)
+            features.append(training_features(
+                keypoints, meta, [t for t, _ in rows], ball, handedness=args.handedness
+            ))
+            targets.extend(stroke for _, stroke in rows)
+    except ImportError as e:
+        print(f"Error: 打球検出には opencv-python と mediapipe が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    X = np.concatenate(features) if features else np.empty((0, 0))
+    usable = ~np.isnan(X).all(axis=1) if len(X) else np.zeros(0, dtype=bool)
+    if not usable.any():
+        print("Error: 学習に使える打球がありません")
+        return None
+    model = SoftmaxClassifier().fit(X[usable], np.asarray(targets)[usable])
+    accuracy = float(np.mean(model.predict(X[usable]) == np.asarray(targets)[usable]))
+    model.save(args.model)
+    print(f"=== 打球の分類モデルを学習しました ===")
+    print(f"打球: {int(usable.sum())} / 種類: {', '.join(model.classes_)} / 学習データの正解率: {accuracy:.1%}")
+    print(f"保存先: {args.model}")
+    return model
+
+
+def placement_command(args):
+    """配球分析コマンド（ボールの落下位置をコースごとに集計して保存）"""
+    import time
+    from analysis.placement import PHASES, PlacementAnalyzer
+    
+    analyzer = PlacementAnalyzer(args.dir, self_side=args.side)
+    started = time.perf_counter()
+    try:
+        stats = analyzer.run(args.video, force=args.force)
+    except ImportError as e:
+        print(f"Error: 配球分析には opencv-python が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    print(f"=== 配球分析完了 ({time.perf_counter() - started:.1f}秒) ===")
+    print(f"ラリー: {stats['rallies']} / 着地: {stats['shots']}")
+    if args.verbose:
+        print("\n| 選手 | 立場 | 何球目 | 本数 | 最多コース |")
+        print("|:---|:---|:---|---:|:---|")
+        for player, roles in stats["players"].items():
+            for role, phases in roles.items():
+                for phase in PHASES:
+                    if phase in phases:
+                        group = phases[phase]
+                        print(f"| {player} | {role} | {phase} | {group['n']} | {group['top']} |")
+    print(f"保存先: {analyzer.path(stats['video_hash'])}")
+    print(f"戦略生成で使う場合: python src/main.py strategy ... --placement {analyzer.path(stats['video_hash'])}")
+    return stats
+
+
+def calibrate_command(args):
+    """台の検出コマンド（カメラ区間ごとの射影変換を求めて保存）"""
+    from analysis.table_calibration import TableCalibrator
+    
+    calibrator = TableCalibrator(args.dir, samples=args.samples, color=args.color)
+    try:
+        calibration = calibrator.calibrate(args.video, force=args.force)
+    except ImportError as e:
+        print(f"Error: 台の検出には opencv-python が必要です ({e})")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    segments = calibration.segments
+    print(f"=== 台の検出完了 ===")
+    print(f"カメラ区間: {len(segments)} / 台を検出: {sum(1 for s in segments if s['homography'] is not None)}")
+    if args.verbose:
+        print("\n| 開始フレーム | 終了フレーム | 4隅（奥左・奥右・手前右・手前左） |")
+        print("|---:|---:|:---|")
+        for segment in segments:
+            corners = segment["corners"]
+            label = " ".join(f"({x:.0f},{y:.0f})" for x, y in corners) if corners else "台なし"
+            print(f"| {segment['start_frame']} | {segment['end_frame']} | {label} |")
+    print(f"保存先: {calibrator.path(calibration.data['video_hash'])}")
+    return calibration.data
+
+
+def proxy_command(args):
+    """プロキシ作成コマンド（CV 処理・クリップ切り出し用の低解像度の動画を作成して保存）"""
+    import time
+    from analysis.proxy import ProxyGenerator
+    
+    generator = ProxyGenerator(args.dir, height=args.height, gop=args.gop)
+    started = time.perf_counter()
+    try:
+        proxy = generator.generate(args.video, force=args.force)
+    except FileNotFoundError:
+        print("Error: プロキシの作成には ffmpeg が必要です")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    source_size = os.path.getsize(args.video)
+    proxy_size = os.path.getsize(proxy["path"])
+    pixels = (proxy["source_width"] * proxy["source_height"]) / (proxy["width"] * proxy["height"])
+    print(f"=== プロキシ作成完了 ({time.perf_counter() - started:.1f}秒) ===")
+    print(f"解像度: {proxy['source_width']}x{proxy['source_height']} → {proxy['width']}x{proxy['height']}"
+          f"（画素数 1/{pixels:.1f}）/ キーフレーム間隔: {proxy['gop']}フレーム")
+    print(f"サイズ: {source_size / 1e6:.1f}MB → {proxy_size / 1e6:.1f}MB")
+    print(f"保存先: {proxy['path']}")
+    return proxy
+
+
+def events_command(args):
+    """イベント索引コマンド（ラリー・サーブ・得点とキーフレームの位置を索引に保存し、区間を切り出す）"""
+    import time
+    from analysis.clips import extract_event_clips, index_events
+    from storage.events import EventIndex
+    from storage.result_index import compute_file_hash
+    
+    video_hash = compute_file_hash(args.video)
+    index = EventIndex(args.db)
+    started = time.perf_counter()
+    try:
+        if args.force or not index.counts(video_hash):
+            index_events(args.video, video_hash, args.db)
+        events = index.events(video_hash, args.kind)[:args.limit]
+        counts = index.counts(video_hash)
+        print(f"=== イベント索引 ({time.perf_counter() - started:.1f}秒) ===")
+        print(f"ラリー: {counts.get('rally', 0)} / サーブ: {counts.get('serve', 0)} / 得点: {counts.get('point', 0)}")
+        if args.verbose and events:
+            print("\n| 種類 | # | 時刻 | 区間 | キーフレーム |")
+            print("|:---|---:|---:|:---|---:|")
+            for event in events:
+                keyframe = "-" if event["keyframe_time"] is None else f"{event['keyframe_time']:.2f}"
+                print(f"| {event['kind']} | {event['number'] + 1} | {event['time']:.2f} | "
+                      f"{event['start_time']:.1f}-{event['end_time']:.1f} | {keyframe} |")
+        if args.extract:
+            started = time.perf_counter()
+            paths = extract_event_clips(args.video, events, args.clip_dir, video_hash)
+            print(f"\n{len(paths)} 本のクリップを切り出しました ({time.perf_counter() - started:.1f}秒): {args.clip_dir}")
+    except FileNotFoundError:
+        print("Error: イベント索引の作成には ffmpeg が必要です")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    return events
+
+
+def rallies_command(args):
+    """ラリー検出コマンド（音声の打球音からラリーの区間を求める）"""
+    import time
+    from analysis.audio_segmenter import AudioSegmenter
+    
+    segmenter = AudioSegmenter(args.dir, max_gap=args.max_gap, min_hits=args.min_hits)
+    started = time.perf_counter()
+    try:
+        result = segmenter.segment(args.video, force=args.force)
+    except FileNotFoundError:
+        print("Error: ラリー検出には ffmpeg が必要です")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    
+    rallies = result["rallies"]
+    print(f"=== ラリー検出完了 ({time.perf_counter() - started:.1f}秒) ===")
+    print(f"音声: {result['duration']:.0f}秒 / 打球音: {result['onsets']} / ラリー: {len(rallies)}")
+    if args.verbose and rallies:
+        print("\n| # | 開始 | 終了 | 打球数 |")
+        print("|---:|---:|---:|---:|")
+        for rally in rallies:
+            print(f"| {rally['index'] + 1} | {rally['start']:.1f} | {rally['end']:.1f} | {rally['hits']} |")
+    return result
+
+
+def gc_command(args):
+    """回収コマンド（どの参照ファイルからも参照されていないブロブを削除）"""
+    from storage.artifacts import ArtifactStore, iter_pointers
+    from storage.importer import iter_result_files
+    
+    store = ArtifactStore(args.artifacts_dir)
+    
+    if args.pack:
+        packed, saved = 0, 0
+        for path in iter_result_files(args.paths):
+            reduced = store.pack(path)
+            if reduced:
+                packed += 1
+                saved += reduced
+        print(f"結果JSONを artifact store に移しました: {packed}件 ({saved / 1024 / 1024:.1f} MB)")
+    
+    referenced = {pointer["sha256"] for _, pointer in iter_pointers(args.paths)}
+    stats = store.gc(referenced, grace_seconds=args.grace, dry_run=args.dry_run)
+    
+    label = "削除対象" if args.dry_run else "削除"
+    print(f"=== 回収完了: {store.root} ===")
+    print(f"参照あり: {len(referenced)} / 保持: {stats['kept']} / {label}: {stats['removed']} ({stats['freed'] / 1024 / 1024:.1f} MB)")
+    return stats
+
+
 def main():
     """メイン関数"""
     parser = argparse.ArgumentParser(
@@ -211,8 +987,15 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command", help="コマンド")
     
+    # データベース引数
+    db_parser = argparse.ArgumentParser(add_help=False)
+    db_parser.add_argument(
+        "--db",
+        help="SQLiteファイル（デフォルト: config/settings.yaml の database.path）"
+    )
+    
     # 共通引数
-    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser = argparse.ArgumentParser(add_help=False, parents=[db_parser])
     common_parser.add_argument(
         "--player", "-p",
         default="浅見江里佳",
@@ -233,6 +1016,26 @@ def main():
         action="store_true",
         help="詳細出力"
     )
+    common_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="既存の結果を再利用せずに再実行"
+    )
+    common_parser.add_argument(
+        "--no-json",
+        action="store_true",
+        help="JSONファイルを書き出さない（結果はデータベースにのみ保存）"
+    )
+    common_parser.add_argument(
+        "--group-runs",
+        action="store_true",
+        help="1回の実行の成果物を <出力ディレクトリ>/<実行ID>/ にまとめる"
+    )
+    common_parser.add_argument(
+        "--artifacts",
+        action="store_true",
+        help="結果JSONを圧縮・重複排除して artifact store（artifacts.path）に保存し、出力ディレクトリには参照ファイルだけを置く"
+    )
     
     # analyze コマンド
     analyze_parser = subparsers.add_parser(
@@ -245,6 +1048,20 @@ def main():
         required=True,
         help="分析する動画ファイル"
     )
+    analyze_parser.add_argument(
+        "--integrate",
+        action="store_true",
+        help="先に計測（ラリー・打球・配球・フットワーク）を行い、選んだ短いクリップと計測値だけを LLM に渡して統合する"
+    )
+    analyze_parser.add_argument(
+        "--side",
+        choices=["near", "far"],
+        help="--integrate 時の自分の位置（カメラ側 / 奥側）"
+    )
+    analyze_parser.add_argument(
+        "--opponent",
+        help="対戦相手名（技術評価の推移を相手ごとに集計する）"
+    )
     
     # strategy コマンド
     strategy_parser = subparsers.add_parser(
@@ -254,9 +1071,12 @@ def main():
     )
     strategy_parser.add_argument(
         "--video",
-        required=True,
         help="自己分析用の動画ファイル"
     )
+    strategy_parser.add_argument(
+        "--analysis-file",
+        help="既存の分析結果ファイル"
+    )
     strategy_parser.add_argument(
         "--opponent",
         help="対戦相手名"
@@ -269,6 +1089,10 @@ def main():
         "--opponent-team",
         help="相手所属チーム名"
     )
+    strategy_parser.add_argument(
+        "--placement",
+        help="配球データ（placement コマンドの出力JSON）"
+    )
     
     # practice コマンド
     practice_parser = subparsers.add_parser(
@@ -293,15 +1117,750 @@ def main():
     )
     full_parser.add_argument(
         "--video",
-        required=True,
         help="分析する動画ファイル"
     )
+    full_parser.add_argument(
+        "--analysis-file",
+        help="既存の分析結果ファイル"
+    )
+    full_parser.add_argument(
+        "--strategy-file",
+        help="既存の戦略ファイル"
+    )
+    full_parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="中断した実行を、最初の未完了ステージから再開"
+    )
+    full_parser.add_argument(
+        "--opponent",
+        help="対戦相手名（技術評価の推移を相手ごとに集計する）"
+    )
+    
+    # watch コマンド
+    watch_parser = subparsers.add_parser(
+        "watch",
+        parents=[common_parser],
+        help="動画フォルダを監視し、新しい動画を自動で分析"
+    )
+    watch_parser.add_argument(
+        "--dir",
+        default="data/videos",
+        help="監視するディレクトリ（デフォルト: data/videos）"
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="フォルダの走査間隔（秒）"
+    )
+    watch_parser.add_argument(
+        "--settle",
+        type=float,
+        default=5.0,
+        help="コピー完了とみなすまでのサイズ無変化時間（秒）"
+    )
+    watch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="同時に分析する動画数"
+    )
+    watch_parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=4,
+        help="処理中＋待機中の動画数の上限"
+    )
+    
+    # ジョブキュー共通引数
+    queue_parser = argparse.ArgumentParser(add_help=False)
+    queue_parser.add_argument(
+        "--journal-mode",
+        default="WAL",
+        choices=["WAL", "DELETE"],
+        help="SQLiteのジャーナルモード（複数マシンで共有ボリュームを使う場合は DELETE）"
+    )
+    
+    # enqueue コマンド
+    enqueue_parser = subparsers.add_parser(
+        "enqueue",
+        parents=[common_parser, queue_parser],
+        help="動画の分析ジョブをキューに登録"
+    )
+    enqueue_parser.add_argument(
+        "videos",
+        nargs="+",
+        help="分析する動画ファイル"
+    )
+    enqueue_parser.add_argument(
+        "--stage",
+        default="full",
+        choices=["full"],
+        help="実行するステージ"
+    )
+    enqueue_parser.add_argument(
+        "--opponent",
+        help="対戦相手名（技術評価の推移を相手ごとに集計する）"
+    )
+    enqueue_parser.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="優先度（大きいほど先に処理）"
+    )
+    enqueue_parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="最大試行回数"
+    )
+    
+    # worker コマンド
+    worker_parser = subparsers.add_parser(
+        "worker",
+        parents=[db_parser, queue_parser],
+        help="ジョブキューのワーカーを起動"
+    )
+    worker_parser.add_argument(
+        "--processes", "-n",
+        type=int,
+        default=1,
+        help="ワーカープロセス数"
+    )
+    worker_parser.add_argument(
+        "--lease",
+        type=float,
+        default=300,
+        help="ジョブのリース期間（秒）。期限切れのジョブは他のワーカーが再実行する"
+    )
+    worker_parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="キューが空の時の待ち時間（秒）"
+    )
+    worker_parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="キューが空になったら終了"
+    )
+    
+    # history コマンド
+    history_parser = subparsers.add_parser(
+        "history",
+        parents=[db_parser],
+        help="保存済みの分析結果を検索"
+    )
+    history_parser.add_argument(
+        "--player", "-p",
+        help="選手名で絞り込み"
+    )
+    history_parser.add_argument(
+        "--stage",
+        choices=["analysis", "opponent_analysis", "strategy", "practice_plan"],
+        help="ステージで絞り込み"
+    )
+    history_parser.add_argument(
+        "--since",
+        help="この日付以降（例: 2026-03-01）"
+    )
+    history_parser.add_argument(
+        "--until",
+        help="この日付より前（例: 2026-04-01）"
+    )
+    history_parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="最大件数"
+    )
+    history_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="結果の内容も表示"
+    )
+    
+    # trend コマンド
+    trend_parser = subparsers.add_parser(
+        "trend",
+        parents=[db_parser],
+        help="技術評価（フォアハンド・バックハンド・サーブ・レシーブ・フットワーク）の推移"
+    )
+    trend_parser.add_argument(
+        "--player", "-p",
+        default="浅見江里佳",
+        help="選手名（デフォルト: 浅見江里佳）"
+    )
+    trend_parser.add_argument(
+        "--technique",
+        choices=["フォアハンド", "バックハンド", "サーブ", "レシーブ", "フットワーク"],
+        help="技術で絞り込み"
+    )
+    trend_parser.add_argument(
+        "--window", "-w",
+        type=int,
+        default=5,
+        help="移動平均の試合数"
+    )
+    trend_parser.add_argument(
+        "--since",
+        help="この日付以降（例: 2026-03-01）"
+    )
+    trend_parser.add_argument(
+        "--until",
+        help="この日付より前（例: 2026-04-01）"
+    )
+    trend_parser.add_argument(
+        "--by-opponent",
+        action="store_true",
+        help="対戦相手別の平均も表示"
+    )
+    trend_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="時系列の全データを表示"
+    )
+    
+    # search コマンド
+    search_parser = subparsers.add_parser(
+        "search",
+        parents=[db_parser],
+        help="保存済みの結果を全文検索"
+    )
+    search_parser.add_argument(
+        "query",
+        nargs="+",
+        help="検索語（複数指定でAND。例: 台上）"
+    )
+    search_parser.add_argument(
+        "--field", "-f",
+        choices=["得点パターン", "失点パターン", "改善点", "キーポイント"],
+        help="検索する項目"
+    )
+    search_parser.add_argument(
+        "--player", "-p",
+        help="選手名で絞り込み"
+    )
+    search_parser.add_argument(
+        "--stage",
+        choices=["analysis", "opponent_analysis", "strategy", "practice_plan"],
+        help="ステージで絞り込み"
+    )
+    search_parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="最大件数"
+    )
+    search_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="検索前に索引を作り直す"
+    )
+    
+    # export コマンド
+    export_parser = subparsers.add_parser(
+        "export",
+        parents=[db_parser],
+        help="結果を列指向形式（Parquet / Feather）で書き出し"
+    )
+    export_parser.add_argument(
+        "--dir",
+        default="data/analytics",
+        help="出力先ディレクトリ（デフォルト: data/analytics）"
+    )
+    export_parser.add_argument(
+        "--format",
+        default="parquet",
+        choices=["parquet", "feather"],
+        help="出力形式"
+    )
+    export_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="前回の出力を消して全件を書き出し直す（デフォルトは新しい結果だけを追記）"
+    )
+    
+    # pose コマンド
+    pose_parser = subparsers.add_parser(
+        "pose",
+        help="姿勢推定（MediaPipe）のキーポイントを保存"
+    )
+    pose_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    pose_parser.add_argument(
+        "--dir",
+        default="data/poses",
+        help="保存先ディレクトリ（デフォルト: data/poses）"
+    )
+    pose_parser.add_argument(
+        "--workers", "-n",
+        type=int,
+        help="推定プロセス数（デフォルト: CPU数）"
+    )
+    pose_parser.add_argument(
+        "--step",
+        type=int,
+        default=1,
+        help="推定するフレームの間隔（2 なら1フレームおき）"
+    )
+    pose_parser.add_argument(
+        "--model",
+        type=int,
+        default=1,
+        choices=[0, 1, 2],
+        help="MediaPipe Pose のモデル（0: 高速 〜 2: 高精度）"
+    )
+    pose_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="保存済みでも推定し直す"
+    )
+    
+    # strokes コマンド
+    strokes_parser = subparsers.add_parser(
+        "strokes",
+        parents=[db_parser],
+        help="姿勢とボールの軌跡から打球を検出・分類して種類ごとの本数を集計"
+    )
+    strokes_parser.add_argument(
+        "--video",
+        help="動画ファイルのパス"
+    )
+    strokes_parser.add_argument(
+        "--model",
+        default="data/models/stroke_classifier.npz",
+        help="分類モデルのパス（デフォルト: data/models/stroke_classifier.npz）"
+    )
+    strokes_parser.add_argument(
+        "--train",
+        metavar="CSV",
+        help="ラベル付きの打球（video,time,stroke の CSV）からモデルを学習して --model に保存"
+    )
+    strokes_parser.add_argument(
+        "--handedness",
+        choices=["right", "left"],
+        default="right",
+        help="利き手（デフォルト: right）"
+    )
+    strokes_parser.add_argument(
+        "--ball",
+        action="store_true",
+        help="ボールの軌跡も特徴量に使う（学習時と同じ指定にする）"
+    )
+    strokes_parser.add_argument(
+        "--pose-dir",
+        default="data/poses",
+        help="姿勢推定の保存先ディレクトリ（デフォルト: data/poses）"
+    )
+    strokes_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="打球ごとの時刻と種類を表示"
+    )
+    
+    # serve コマンド
+    serve_parser = subparsers.add_parser(
+        "serve",
+        parents=[db_parser],
+        help="サーブの場面だけを切り出してつなぎ、サーブ・レシーブを分析（動画全体は送らない）"
+    )
+    serve_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    serve_parser.add_argument(
+        "--player", "-p",
+        default="浅見江里佳",
+        help="選手名（--opponent 指定時は相手選手名）"
+    )
+    serve_parser.add_argument(
+        "--team", "-t",
+        default="文化学園大学杉並",
+        help="所属チーム名"
+    )
+    serve_parser.add_argument(
+        "--opponent",
+        action="store_true",
+        help="相手選手のサーブの傾向・レシーブの傾向として分析する"
+    )
+    serve_parser.add_argument(
+        "--max-serves",
+        type=int,
+        default=20,
+        help="LLM に送るサーブの最大数（デフォルト: 20）"
+    )
+    serve_parser.add_argument(
+        "--handedness",
+        choices=["right", "left"],
+        default="right",
+        help="撮影している選手の利き手（トスの検出に使う。デフォルト: right）"
+    )
+    serve_parser.add_argument(
+        "--no-pose",
+        action="store_true",
+        help="姿勢推定でサーブを出した選手を分けない"
+    )
+    serve_parser.add_argument(
+        "--output", "-o",
+        default="data/results",
+        help="出力ディレクトリ"
+    )
+    serve_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="分析結果を表示"
+    )
+    
+    # live コマンド
+    live_parser = subparsers.add_parser(
+        "live",
+        help="録画中の試合（伸び続けるファイル・ストリーム・標準入力）を読み続け、ゲーム間の助言を決まった時間内に返す"
+    )
+    live_parser.add_argument(
+        "--source",
+        required=True,
+        help="録画中のファイル（MPEG-TS / 断片化 MP4 / MKV）、ストリームの URL、または -（標準入力）"
+    )
+    live_parser.add_argument(
+        "--player", "-p",
+        default="浅見江里佳",
+        help="選手名"
+    )
+    live_parser.add_argument(
+        "--team", "-t",
+        default="文化学園大学杉並",
+        help="所属チーム名"
+    )
+    live_parser.add_argument(
+        "--strategy-file",
+        help="試合前の戦略ファイル（strategy_*.json など。助言はこの戦略からの変更点になる）"
+    )
+    live_parser.add_argument(
+        "--rallies",
+        type=int,
+        default=5,
+        help="助言の対象とする直近のラリー数（デフォルト: 5）"
+    )
+    live_parser.add_argument(
+        "--budget",
+        type=float,
+        default=30.0,
+        help="助言を返すまでの上限（秒。超えたら統計だけを返す。デフォルト: 30）"
+    )
+    live_parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.0,
+        help="一定間隔（秒）で助言する（省略時は Enter を押すたびに助言）"
+    )
+    live_parser.add_argument(
+        "--no-follow",
+        action="store_true",
+        help="ファイルの末尾で読み込みを終える（録画済みのファイルで試す場合）"
+    )
+    live_parser.add_argument(
+        "--stats-only",
+        action="store_true",
+        help="LLM を呼ばず、ラリーの統計だけを返す"
+    )
+    live_parser.add_argument(
+        "--output", "-o",
+        default="data/results",
+        help="出力ディレクトリ"
+    )
+    
+    # footwork コマンド
+    footwork_parser = subparsers.add_parser(
+        "footwork",
+        help="姿勢推定の結果からフットワークの指標（移動速度・戻りの時間・カバー範囲）を計算"
+    )
+    footwork_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    footwork_parser.add_argument(
+        "--pose-dir",
+        default="data/poses",
+        help="姿勢推定の保存先ディレクトリ（デフォルト: data/poses）"
+    )
+    footwork_parser.add_argument(
+        "--table",
+        action="store_true",
+        help="台の幅でメートルに換算する（指定しない場合は胴体の長さで換算）"
+    )
+    footwork_parser.add_argument(
+        "--analysis-file",
+        help="フットワークの評価を計測値で置き換える分析結果ファイル"
+    )
+    footwork_parser.add_argument(
+        "--output", "-o",
+        default="data/results",
+        help="置き換えた分析結果の出力ディレクトリ"
+    )
+    footwork_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="すべての指標を表示"
+    )
+    
+    # placement コマンド
+    placement_parser = subparsers.add_parser(
+        "placement",
+        help="ボールの落下位置をコースごとに集計（戦略生成の --placement に渡す）"
+    )
+    placement_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    placement_parser.add_argument(
+        "--dir",
+        default="data/placement",
+        help="保存先ディレクトリ（デフォルト: data/placement）"
+    )
+    placement_parser.add_argument(
+        "--side",
+        choices=["near", "far"],
+        help="自分の位置（カメラ側: near / 奥側: far）"
+    )
+    placement_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="保存済みでも集計し直す"
+    )
+    placement_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="グループごとの最多コースを表示"
+    )
+    
+    # calibrate コマンド
+    calibrate_parser = subparsers.add_parser(
+        "calibrate",
+        help="卓球台を検出し、画素座標を台の座標に変換する射影変換を保存"
+    )
+    calibrate_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    calibrate_parser.add_argument(
+        "--dir",
+        default="data/calibration",
+        help="保存先ディレクトリ（デフォルト: data/calibration）"
+    )
+    calibrate_parser.add_argument(
+        "--samples",
+        type=int,
+        default=24,
+        help="台の検出に使うフレーム数（デフォルト: 24）"
+    )
+    calibrate_parser.add_argument(
+        "--color",
+        choices=["blue", "green"],
+        default="blue",
+        help="台の色"
+    )
+    calibrate_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="保存済みでも検出し直す"
+    )
+    calibrate_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="カメラ区間の一覧を表示"
+    )
+    
+    # proxy コマンド
+    proxy_parser = subparsers.add_parser(
+        "proxy",
+        help="CV 処理・クリップ切り出し用の低解像度のプロキシ動画を作成"
+    )
+    proxy_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    proxy_parser.add_argument(
+        "--dir",
+        default="data/proxies",
+        help="保存先ディレクトリ（デフォルト: data/proxies）"
+    )
+    proxy_parser.add_argument(
+        "--height",
+        type=int,
+        default=480,
+        help="プロキシの高さ（画素。デフォルト: 480）"
+    )
+    proxy_parser.add_argument(
+        "--gop",
+        type=int,
+        default=15,
+        help="キーフレームの間隔（フレーム数。デフォルト: 15）"
+    )
+    proxy_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="保存済みでも作成し直す"
+    )
+    
+    # events コマンド
+    events_parser = subparsers.add_parser(
+        "events",
+        parents=[db_parser],
+        help="ラリー・サーブ・得点の時刻とキーフレームの位置を索引に保存し、区間を再エンコードせずに切り出す"
+    )
+    events_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    events_parser.add_argument(
+        "--kind",
+        choices=["rally", "serve", "point"],
+        help="表示・切り出すイベントの種類（省略時はすべて）"
+    )
+    events_parser.add_argument(
+        "--limit",
+        type=int,
+        help="表示・切り出すイベントの最大数"
+    )
+    events_parser.add_argument(
+        "--extract",
+        action="store_true",
+        help="イベントの区間をキーフレームから -c copy で切り出す"
+    )
+    events_parser.add_argument(
+        "--clip-dir",
+        default="data/clips/events",
+        help="切り出したクリップの保存先（デフォルト: data/clips/events）"
+    )
+    events_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="索引済みでも作り直す"
+    )
+    events_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="イベントの一覧を表示"
+    )
+    
+    # rallies コマンド
+    rallies_parser = subparsers.add_parser(
+        "rallies",
+        help="音声の打球音からラリーの区間を検出"
+    )
+    rallies_parser.add_argument(
+        "--video",
+        required=True,
+        help="動画ファイルのパス"
+    )
+    rallies_parser.add_argument(
+        "--dir",
+        default="data/rallies",
+        help="保存先ディレクトリ（デフォルト: data/rallies）"
+    )
+    rallies_parser.add_argument(
+        "--max-gap",
+        type=float,
+        default=2.0,
+        help="同じラリーとみなす打球音の最大間隔（秒）"
+    )
+    rallies_parser.add_argument(
+        "--min-hits",
+        type=int,
+        default=3,
+        help="ラリーとみなす最小の打球音の数"
+    )
+    rallies_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="保存済みでも検出し直す"
+    )
+    rallies_parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="ラリーの一覧を表示"
+    )
+    
+    # import コマンド
+    import_parser = subparsers.add_parser(
+        "import",
+        parents=[db_parser],
+        help="過去の結果JSONをデータベースに一括取り込み"
+    )
+    import_parser.add_argument(
+        "paths",
+        nargs="*",
+        default=["data/results"],
+        help="結果JSONのファイルまたはディレクトリ（デフォルト: data/results）"
+    )
+    import_parser.add_argument(
+        "--workers", "-n",
+        type=int,
+        help="解析プロセス数（デフォルト: CPU数）"
+    )
+    import_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="1トランザクションで取り込むファイル数"
+    )
+    
+    # gc コマンド
+    gc_parser = subparsers.add_parser(
+        "gc",
+        help="参照されていない artifact を削除"
+    )
+    gc_parser.add_argument(
+        "paths",
+        nargs="*",
+        default=["data/results"],
+        help="参照ファイルを探すディレクトリ（デフォルト: data/results）"
+    )
+    gc_parser.add_argument(
+        "--artifacts-dir",
+        help="artifact store のディレクトリ（デフォルト: config/settings.yaml の artifacts.path）"
+    )
+    gc_parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="先に既存の結果JSONを artifact store に移し、参照ファイルに置き換える"
+    )
+    gc_parser.add_argument(
+        "--grace",
+        type=float,
+        default=3600,
+        help="作成からこの秒数以内のブロブは削除しない（書き込み中の実行の保護）"
+    )
+    gc_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="削除せずに対象を集計するだけ"
+    )
     
     args = parser.parse_args()
     
+    missing = _find_missing_input(args)
+    if missing:
+        print(f"Error: ファイルが見つかりません: {missing}")
+        return
+    
     if args.command == "analyze":
         analyze_command(args)
     elif args.command == "strategy":
+        if not args.video and not args.analysis_file:
+            print("Error: --video または --analysis-file が必要です")
+            return
         strategy_command(args)
     elif args.command == "practice":
         if not args.video and not args.analysis_file:
@@ -309,7 +1868,59 @@ def main():
             return
         practice_command(args)
     elif args.command == "full":
+        if not args.resume and not args.video and not args.analysis_file:
+            print("Error: --video または --analysis-file が必要です")
+            return
         full_command(args)
+    elif args.command == "watch":
+        watch_command(args)
+    elif args.command == "enqueue":
+        for video in args.videos:
+            if not os.path.exists(video):
+                print(f"Error: ファイルが見つかりません: {video}")
+                return
+        enqueue_command(args)
+    elif args.command == "worker":
+        worker_command(args)
+    elif args.command == "history":
+        history_command(args)
+    elif args.command == "trend":
+        trend_command(args)
+    elif args.command == "search":
+        search_command(args)
+    elif args.command == "export":
+        export_command(args)
+    elif args.command == "import":
+        for path in args.paths:
+            if not os.path.exists(path):
+                print(f"Error: ファイルが見つかりません: {path}")
+                return
+        import_command(args)
+    elif args.command == "pose":
+        pose_command(args)
+    elif args.command == "strokes":
+        if not args.video and not args.train:
+            print("Error: --video または --train を指定してください")
+            return
+        strokes_command(args)
+    elif args.command == "footwork":
+        footwork_command(args)
+    elif args.command == "placement":
+        placement_command(args)
+    elif args.command == "calibrate":
+        calibrate_command(args)
+    elif args.command == "proxy":
+        proxy_command(args)
+    elif args.command == "serve":
+        serve_command(args)
+    elif args.command == "events":
+        events_command(args)
+    elif args.command == "live":
+        live_command(args)
+    elif args.command == "rallies":
+        rallies_command(args)
+    elif args.command == "gc":
+        gc_command(args)
     else:
         parser.print_help()
 
@@ -0,0 +1,315 @@
+"""
+Analytics Export Module
+結果データベースの内容を列指向形式（Parquet / Feather）の表に書き出す
+"""
+
+import json
+import os
+import re
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+from storage.database import connect
+from storage.ratings import extract_ratings
+from storage.schema import canonical_key
+from storage.search import extract_fields
+from storage.writer import atomic_write_json
+
+
+STATE_FILENAME = "_export_state.json"
+
+# 出力する表
+TABLES = ("outputs", "ratings", "text_items", "fields")
+
+# 形式 → 拡張子
+FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+# 各表の列と型（pandas の dtype）。player / month はパーティションのディレクトリ名に入る
+COLUMN_TYPES = {
+    "outputs": {
+        "output_id": "int64", "run_id": "string", "stage": "category", "command": "category",
+        "team": "string", "opponent": "string", "model": "string", "created_at": "datetime64[ns]",
+    },
+    "ratings": {
+        "output_id": "int64", "run_id": "string", "opponent": "string", "technique": "category",
+        "rating": "float32", "created_at": "datetime64[ns]",
+    },
+    "text_items": {
+        "output_id": "int64", "stage": "category", "field": "category", "position": "int32",
+        "text": "string", "created_at": "datetime64[ns]",
+    },
+    "fields": {
+        "output_id": "int64", "stage": "category", "path": "string", "position": "int32",
+        "value": "string", "number": "float64",
+    },
+}
+
+PARTITION_COLUMNS = ("player", "month")
+
+_UNSAFE = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def partition_value(value: Optional[str]) -> str:
+    """パーティションのディレクトリ名に使える文字列にする"""
+    if not value:
+        return "__unknown__"
+    return _UNSAFE.sub("_", value)
+
+
+def flatten(data: Any, path: str = "", position: int = -1) -> Iterable[Dict[str, Any]]:
+    """
+    入れ子の結果を (パス, 位置, 値) の行に展開
+
+    パスは番号を除いたキーを "/" でつなぐ（"2.1_フォアハンドドライブ" → "フォアハンドドライブ"）。
+    リストの要素は同じパスで、position に要素番号が入る。
+
+    Args:
+        data: ステージ結果
+        path: 親のパス
+        position: 親がリストの場合の要素番号
+
+    Yields:
+        path / position / value / number を持つ辞書
+    """
+    if isinstance(data, dict):
+        for key, item in data.items():
+            child = canonical_key(key) or str(key)
+            yield from flatten(item, f"{path}/{child}" if path else child, -1)
+    elif isinstance(data, list):
+        for i, item in enumerate(data):
+            yield from flatten(item, path, i)
+    elif data is not None:
+        is_number = isinstance(data, (int, float)) and not isinstance(data, bool)
+        yield {
+            "path": path,
+            "position": position,
+            "value": str(data),
+            "number": float(data) if is_number else None,
+        }
+
+
+def build_rows(record: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    ステージ結果1件を各表の行に変換
+
+    Args:
+        record: stage_outputs と runs / players を結合した1行（data は解析済み）
+
+    Returns:
+        表名 → 行のリスト
+    """
+    data = record["data"]
+    base = {
+        "output_id": record["output_id"],
+        "player": partition_value(record["player"]),
+        "month": record["created_at"][:7],
+    }
+    created_at = record["created_at"]
+    rows: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+
+    rows["outputs"].append(dict(
+        base, run_id=record["run_id"], stage=record["stage"], command=record["command"],
+        team=record["team"], opponent=record["opponent"], model=record["model"], created_at=created_at
+    ))
+    if record["stage"] == "analysis":
+        rows["ratings"].extend(
+            dict(base, run_id=record["run_id"], opponent=record["opponent"], technique=technique,
+                 rating=rating, created_at=created_at)
+            for technique, rating in extract_ratings(data).items()
+        )
+    for field, texts in extract_fields(data).items():
+        rows["text_items"].extend(
+            dict(base, stage=record["stage"], field=field, position=i, text=text, created_at=created_at)
+            for i, text in enumerate(texts)
+        )
+    rows["fields"].extend(dict(base, stage=record["stage"], **item) for item in flatten(data))
+    return rows
+
+
+class AnalyticsExporter:
+    """
+    分析結果の列指向エクスポート
+
+    結果データベースのステージ結果を、型付きの4つの表に展開して書き出す。
+    - outputs: ステージ結果ごとの属性（選手・日時・対戦相手・モデル）
+    - ratings: 技術カテゴリごとの評価
+    - text_items: 得点パターン・失点パターン・改善点・キーポイントの各テキスト
+    - fields: すべての項目を (パス, 値) に展開したもの
+
+    各表は <出力先>/<表>/player=<選手>/month=<YYYY-MM>/ に分割して保存する
+    （Hive形式。pandas.read_parquet でディレクトリごと読める）。
+    前回書き出したステージ結果のIDを記録し、2回目以降は新しい結果だけを追記する。
+    """
+
+    def __init__(self, export_dir: str = "data/analytics", db_path: Optional[str] = None, fmt: str = "parquet"):
+        """
+        初期化
+
+        Args:
+            export_dir: 出力先ディレクトリ
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+            fmt: 出力形式（parquet / feather）
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"未対応の形式です: {fmt}")
+        self.export_dir = Path(export_dir)
+        self.db_path = db_path
+        self.fmt = fmt
+
+    @property
+    def state_path(self) -> Path:
+        return self.export_dir / STATE_FILENAME
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {"last_output_id": 0}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def collect(self, after_id: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        指定IDより後のステージ結果を各表の行に変換
+
+        Args:
+            after_id: このIDより後の結果だけを対象にする
+
+        Returns:
+            表名 → 行のリスト
+        """
+        # テーブルの作成は ResultsStore に任せる
+        from storage.results_store import ResultsStore
+
+        ResultsStore(self.db_path)
+        rows: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+        with closing(connect(self.db_path)) as conn:
+            cursor = conn.execute(
+                """
+                SELECT o.id AS output_id, o.run_id, o.stage, o.data, r.created_at, r.command,
+                       r.model, r.params, p.name AS player, p.team AS team
+                FROM stage_outputs o
+                JOIN runs r ON r.id = o.run_id
+                LEFT JOIN players p ON p.id = r.player_id
+                WHERE o.id > ?
+                ORDER BY o.id
+                """,
+                (after_id,)
+            )
+            for row in cursor:
+                record = dict(row)
+                record["data"] = json.loads(record["data"])
+                record["opponent"] = json.loads(record.pop("params") or "{}").get("opponent")
+                for table, table_rows in build_rows(record).items():
+                    rows[table].extend(table_rows)
+        return rows
+
+    def _to_frame(self, table: str, rows: List[Dict[str, Any]]):
+        """行のリストを型付きの DataFrame にする"""
+        import pandas as pd
+
+        frame = pd.DataFrame.from_records(rows, columns=list(PARTITION_COLUMNS) + list(COLUMN_TYPES[table]))
+        for column, dtype in COLUMN_TYPES[table].items():
+            if dtype.startswith("datetime"):
+                frame[column] = pd.to_datetime(frame[column], format="ISO8601")
+            else:
+                frame[column] = frame[column].astype(dtype)
+        return frame
+
+    def _write_partition(self, frame, path: Path):
+        """1つのパーティションのファイルを一時ファイル経由で書き出す"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        frame = frame.reset_index(drop=True)
+        if self.fmt == "parquet":
+            frame.to_parquet(tmp, index=False)
+        else:
+            frame.to_feather(tmp)
+        os.replace(tmp, path)
+
+    def export(self, full: bool = False) -> Dict[str, int]:
+        """
+        結果を書き出す
+
+        Args:
+            full: 既存の出力を消して全件を書き出し直す
+
+        Returns:
+            表名 → 書き出した行数（outputs は新規ステージ結果の件数）
+        """
+        state = {"last_output_id": 0} if full else self._load_state()
+        if state.get("format", self.fmt) != self.fmt:
+            raise ValueError(f"出力先は {state['format']} 形式です。--full で書き出し直してください")
+        if full:
+            import shutil
+
+            for table in TABLES:
+                shutil.rmtree(self.export_dir / table, ignore_errors=True)
+
+        after_id = state["last_output_id"]
+        rows = self.collect(after_id)
+        counts = {table: len(table_rows) for table, table_rows in rows.items()}
+        if not rows["outputs"]:
+            return counts
+
+        last_id = max(row["output_id"] for row in rows["outputs"])
+        extension = FORMATS[self.fmt]
+        for table, table_rows in rows.items():
+            if not table_rows:
+                continue
+            frame = self._to_frame(table, table_rows)
+            for (player, month), part in frame.groupby(list(PARTITION_COLUMNS), dropna=False, sort=False):
+                directory = self.export_dir / table / f"player={player}" / f"month={month}"
+                # 追記分は別ファイルにし、既存のファイルは書き換えない
+                name = f"part-{after_id + 1:08d}-{last_id:08d}{extension}"
+                self._write_partition(part.drop(columns=list(PARTITION_COLUMNS)), directory / name)
+
+        atomic_write_json(str(self.state_path), {"last_output_id": last_id, "format": self.fmt})
+        return counts
+
+
+def load_table(
+    export_dir: str,
+    table: str,
+    columns: Optional[List[str]] = None,
+    players: Optional[List[str]] = None,
+    months: Optional[List[str]] = None
+):
+    """
+    書き出した表を読み込む（必要なパーティション・列だけを読む）
+
+    Args:
+        export_dir: 出力先ディレクトリ
+        table: 表名
+        columns: 読み込む列（省略時はすべて）
+        players: 読み込む選手（省略時はすべて）
+        months: 読み込む月（YYYY-MM。省略時はすべて）
+
+    Returns:
+        pandas.DataFrame（player / month 列を含む）
+    """
+    import pandas as pd
+
+    root = Path(export_dir) / table
+    wanted_players = {partition_value(player) for player in players} if players else None
+    frames = []
+    for path in sorted(root.glob("player=*/month=*/part-*")):
+        player = path.parent.parent.name.split("=", 1)[1]
+        month = path.parent.name.split("=", 1)[1]
+        if wanted_players is not None and player not in wanted_players:
+            continue
+        if months and month not in months:
+            continue
+        if path.suffix == ".parquet":
+            frame = pd.read_parquet(path, columns=columns)
+        else:
+            frame = pd.read_feather(path, columns=columns)
+        frame.insert(0, "month", month)
+        frame.insert(0, "player", player)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=list(PARTITION_COLUMNS) + (columns or list(COLUMN_TYPES[table])))
+    result = pd.concat(frames, ignore_index=True)
+    result["player"] = result["player"].astype("category")
+    result["month"] = result["month"].astype("category")
+    return result
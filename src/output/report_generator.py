@@ -6,7 +6,10 @@ Report Generator Module
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
+
+from storage.result_index import load_stage_file
+from storage.writer import ResultWriter, atomic_write_text
 
 
 class ReportGenerator:
@@ -14,19 +17,35 @@ class ReportGenerator:
     分析結果からレポートを生成するクラス
     """
     
-    def __init__(self, output_dir: str = "data/results"):
+    def __init__(self, output_dir: str = "data/results", writer: Optional[ResultWriter] = None):
         """
         初期化
         
         Args:
             output_dir: 出力ディレクトリ
+            writer: 成果物の書き出し先（省略時はレポートごとに新しい実行IDを割り当てる）
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.writer = writer
+    
+    def _load(self, data: Union[Dict[str, Any], str], stage: str) -> Dict[str, Any]:
+        """結果ファイルのパスが渡された場合は読み込む（artifact store の参照ファイルにも対応）"""
+        if isinstance(data, (str, Path)):
+            return load_stage_file(str(data), stage)
+        return data
+    
+    def _save(self, prefix: str, text: str, output_path: Optional[str]) -> str:
+        """レポートを一時ファイル経由で保存"""
+        if output_path:
+            atomic_write_text(output_path, text)
+            return str(Path(output_path))
+        writer = self.writer or ResultWriter(str(self.output_dir))
+        return str(writer.write_text(prefix, text))
     
     def generate_analysis_report(
         self,
-        analysis: Dict[str, Any],
+        analysis: Union[Dict[str, Any], str],
         output_path: Optional[str] = None,
         player_name: str = "浅見江里佳",
         team_name: str = "文化学園大学杉並"
@@ -35,13 +54,14 @@ class ReportGenerator:
         分析レポートを生成
         
         Args:
-            analysis: 分析結果
+            analysis: 分析結果（または結果ファイルのパス）
             player_name: 選手名
             team_name: 所属チーム名
             
         Returns:
             生成されたレポートのパス
         """
+        analysis = self._load(analysis, "analysis")
         timestamp = datetime.now().strftime("%Y年%m月%d日")
         
         report = f"""# 卓球パフォーマンス分析レポート
@@ -131,21 +151,11 @@ class ReportGenerator:
                 report += f"{i}. {item}\n"
         
         # ファイルに保存
-        if output_path:
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-        else:
-            timestamp_file = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = self.output_dir / f"analysis_report_{timestamp_file}.md"
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(report)
-        
-        return str(output_file)
+        return self._save("analysis_report", report, output_path)
     
     def generate_strategy_sheet(
         self,
-        strategy: Dict[str, Any],
+        strategy: Union[Dict[str, Any], str],
         output_path: Optional[str] = None,
         player_name: str = "浅見江里佳",
         opponent_name: Optional[str] = None
@@ -154,13 +164,14 @@ class ReportGenerator:
         試合戦略シートを生成（A4一枚）
         
         Args:
-            strategy: 戦略データ
+            strategy: 戦略データ（または結果ファイルのパス）
             player_name: 選手名
             opponent_name: 対戦相手名
             
         Returns:
             生成されたシートのパス
         """
+        strategy = self._load(strategy, "strategy")
         timestamp = datetime.now().strftime("%Y年%m月%d日")
         opponent_str = f" vs {opponent_name}" if opponent_name else ""
         
@@ -217,21 +228,11 @@ class ReportGenerator:
                 sheet += f"**{i}. {point}**\n\n"
         
         # ファイルに保存
-        if output_path:
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-        else:
-            timestamp_file = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = self.output_dir / f"strategy_sheet_{timestamp_file}.md"
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(sheet)
-        
-        return str(output_file)
+        return self._save("strategy_sheet", sheet, output_path)
     
     def generate_practice_plan(
         self,
-        practice_plan: Dict[str, Any],
+        practice_plan: Union[Dict[str, Any], str],
         output_path: Optional[str] = None,
         player_name: str = "浅見江里佳"
     ) -> str:
@@ -239,12 +240,13 @@ class ReportGenerator:
         練習計画書を生成
         
         Args:
-            practice_plan: 練習計画データ
+            practice_plan: 練習計画データ（または結果ファイルのパス）
             player_name: 選手名
             
         Returns:
             生成された計画書のパス
         """
+        practice_plan = self._load(practice_plan, "practice_plan")
         timestamp = datetime.now().strftime("%Y年%m月%d日")
         
         plan = f"""# 練習計画書
@@ -316,17 +318,7 @@ class ReportGenerator:
                 plan += "\n"
         
         # ファイルに保存
-        if output_path:
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-        else:
-            timestamp_file = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = self.output_dir / f"practice_plan_{timestamp_file}.md"
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(plan)
-        
-        return str(output_file)
+        return self._save("practice_plan", plan, output_path)
     
     def _translate_technique_name(self, name: str) -> str:
         """技術名を日本語に変換"""
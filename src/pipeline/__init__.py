@@ -0,0 +1,5 @@
+# AI主導型 卓球パフォーマンス最大化システム - パイプライン実行モジュール
+
+from .runner import FullPipeline
+
+__all__ = ['FullPipeline']
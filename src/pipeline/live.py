@@ -0,0 +1,413 @@
+"""
+Live Module
+伸び続ける録画やストリームを少しずつ読み、試合中（ゲーム間）の助言を決まった時間内に返す
+
+音声を読みながら打球音とラリーを逐次に検出し（audio_segmenter.SpectralFlux）、
+ラリーの統計を更新し続ける。助言を求められたら直近のラリーの打球の瞬間のフレームだけを
+取り出し、統計と合わせて短い LLM 呼び出しで試合前の戦略からの変更点を求める。
+時間内に終わらなければ統計だけを返す。
+
+伸び続けるファイルは、末尾まで書き終わる前から読める形式（MPEG-TS / 断片化 MP4 / MKV）で
+録画すること。通常の MP4 は録画を止めるまで読めない。
+"""
+
+import base64
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from analysis.audio_segmenter import HOP, N_FFT, SAMPLE_RATE, SpectralFlux, cluster_rallies, pick_onsets
+from analysis.integration import IntegrationEngine
+
+
+# 1回に読む音声の長さ（秒）
+LIVE_CHUNK_SECONDS = 0.5
+
+# 打球音の閾値（フラックスのばらつき）を求める直近の長さ（秒）
+ONSET_WINDOW_SECONDS = 60.0
+
+# 打球音を確定するまでの遅れ（秒）。ピークの判定と近すぎるピークの除去に後続のフレームが要る
+SETTLE_SECONDS = 0.25
+
+DEFAULT_BUDGET = 30.0
+DEFAULT_LAST_RALLIES = 5
+
+# 予算のうちフレームの取り出しに使う割合と、LLM の応答を待たずに残す余裕（秒）
+FRAME_SHARE = 0.3
+BUDGET_MARGIN = 1.0
+
+
+def open_live_audio(source: str, follow: bool = True, sample_rate: int = SAMPLE_RATE) -> subprocess.Popen:
+    """
+    録画中のファイル・ストリーム・標準入力の音声を PCM で読み出す ffmpeg を起動
+
+    Args:
+        source: ファイルのパス、ストリームの URL、または "-"（標準入力）
+        follow: ファイルの末尾に達しても書き足されるのを待って読み続ける
+        sample_rate: サンプリング周波数
+
+    Returns:
+        stdout から s16le のモノラル音声を読めるプロセス
+
+    Raises:
+        FileNotFoundError: ffmpeg がない場合
+    """
+    command = ["ffmpeg", "-v", "error"]
+    if follow and source != "-":
+        command += ["-follow", "1"]
+    command += [
+        "-i", "pipe:0" if source == "-" else source,
+        "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"
+    ]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+
+def keyframe_times(rallies: List[Dict[str, Any]], per_rally: int = 2) -> List[float]:
+    """
+    LLM に渡すフレームの時刻（ラリーごとにサーブと中盤の打球の瞬間）
+
+    Args:
+        rallies: cluster_rallies の戻り値
+        per_rally: ラリーごとのフレーム数
+
+    Returns:
+        時刻（秒、昇順）
+    """
+    times: List[float] = []
+    for rally in rallies:
+        onsets = rally["onsets"]
+        chosen = sorted({onsets[0], onsets[len(onsets) // 2]})
+        times += chosen[:per_rally]
+    return sorted(times)
+
+
+def extract_frames(
+    source: str,
+    times: List[float],
+    height: int = 360,
+    deadline: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    指定時刻のフレームを JPEG で取り出す（期限を過ぎたら残りは取り出さない）
+
+    Args:
+        source: 動画ファイルのパス（録画中のファイルでもよい）
+        times: 時刻（秒）
+        height: 出力の高さ（画素）
+        deadline: time.monotonic() の期限
+
+    Returns:
+        timestamp / data（Base64 の JPEG）を持つフレームのリスト
+    """
+    frames = []
+    for t in times:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            break
+        try:
+            result = subprocess.run([
+                "ffmpeg", "-v", "error", "-ss", f"{t:.3f}", "-i", source, "-frames:v", "1",
+                "-vf", f"scale=-2:{height}", "-q:v", "5", "-f", "image2pipe", "-vcodec", "mjpeg", "-"
+            ], capture_output=True, timeout=remaining)
+        except subprocess.TimeoutExpired:
+            break
+        if result.returncode == 0 and result.stdout:
+            frames.append({
+                "timestamp": round(float(t), 2),
+                "data": base64.standard_b64encode(result.stdout).decode("utf-8"),
+            })
+    return frames
+
+
+def rally_tempo(rallies: List[Dict[str, Any]]) -> Optional[float]:
+    """ラリー中の打球の平均間隔（秒。打球が2回以上のラリーがなければ None）"""
+    gaps = [gap for rally in rallies for gap in np.diff(rally["onsets"])]
+    return round(float(np.mean(gaps)), 2) if gaps else None
+
+
+class LiveStats:
+    """
+    打球音とラリーの逐次検出
+
+    音声チャンクを受け取るたびにフラックスを追加し、直近 window_seconds のフラックスで
+    打球音を検出する。SETTLE_SECONDS より前の打球音を確定し、打球音の間隔が max_gap を
+    超えたところでラリーを閉じる。保持するフラックスは直近の分だけなので、長い試合でも
+    メモリと1回あたりの計算量は一定。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        max_gap: float = 2.0,
+        min_hits: int = 3,
+        delta: float = 8.0,
+        window_seconds: float = ONSET_WINDOW_SECONDS
+    ):
+        """
+        初期化
+
+        Args:
+            sample_rate: サンプリング周波数
+            max_gap: 同じラリーとみなす打球音の最大間隔（秒）
+            min_hits: ラリーとみなす最小の打球音の数
+            delta: 打球音の検出閾値（ばらつきに対する倍率）
+            window_seconds: 閾値を求める直近の長さ（秒）
+        """
+        hop = HOP * sample_rate // SAMPLE_RATE
+        self.flux = SpectralFlux(sample_rate, N_FFT * sample_rate // SAMPLE_RATE, hop)
+        self.frame_rate = sample_rate / hop
+        self.max_gap = max_gap
+        self.min_hits = min_hits
+        self.delta = delta
+        self.window_frames = int(window_seconds * self.frame_rate)
+        self.settle_frames = int(np.ceil(SETTLE_SECONDS * self.frame_rate))
+
+        self._recent = np.zeros(0, dtype=np.float32)
+        self._offset = 0  # _recent の先頭の通算フレーム番号
+        self._committed = 0  # このフレームより前の打球音は確定済み
+        self._pending: List[float] = []  # 閉じていないラリーの打球音
+        self.onsets = 0
+        self.rallies: List[Dict[str, Any]] = []
+
+    @property
+    def duration(self) -> float:
+        """読み込んだ音声の長さ（秒）"""
+        return self.flux.frames / self.frame_rate
+
+    def update(self, chunk: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        音声チャンクを追加
+
+        Args:
+            chunk: float32 のモノラル音声
+
+        Returns:
+            今回閉じたラリーのリスト
+        """
+        flux = self.flux.update(chunk)
+        if not len(flux):
+            return []
+        self._recent = np.concatenate([self._recent, flux])
+        excess = len(self._recent) - self.window_frames
+        if excess > 0:
+            self._recent = self._recent[excess:]
+            self._offset += excess
+
+        settled = self.flux.frames - self.settle_frames
+        peaks = np.rint(pick_onsets(self._recent, self.frame_rate, delta=self.delta) * self.frame_rate)
+        peaks = peaks.astype(np.int64) + self._offset
+        closed = []
+        for peak in peaks[(peaks >= self._committed) & (peaks < settled)]:
+            onset = peak / self.frame_rate
+            if self._pending and onset - self._pending[-1] > self.max_gap:
+                closed += self._close()
+            self._pending.append(float(onset))
+            self.onsets += 1
+        self._committed = max(self._committed, settled)
+        if self._pending and settled / self.frame_rate - self._pending[-1] > self.max_gap:
+            closed += self._close()
+        return closed
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """入力の終わりで閉じていないラリーを閉じる"""
+        return self._close()
+
+    def _close(self) -> List[Dict[str, Any]]:
+        """閉じていないラリーの打球音をラリーにまとめる（打球が少なければ捨てる）"""
+        rallies = cluster_rallies(np.array(self._pending), self.max_gap, self.min_hits)
+        self._pending = []
+        for rally in rallies:
+            rally["index"] = len(self.rallies)
+            self.rallies.append(rally)
+        return rallies
+
+    def snapshot(self, last_rallies: int = DEFAULT_LAST_RALLIES) -> Dict[str, Any]:
+        """
+        現在の統計（試合全体と直近のラリー）
+
+        Args:
+            last_rallies: 直近として集計するラリー数
+
+        Returns:
+            duration / onsets / in_rally / match / recent を持つ辞書。
+            match / recent は IntegrationEngine.analyze_rally_patterns の形式に tempo を加えたもの
+        """
+        recent = self.rallies[-last_rallies:] if last_rallies > 0 else []
+        stats: Dict[str, Any] = {
+            "duration": round(self.duration, 1),
+            "onsets": self.onsets,
+            "in_rally": bool(self._pending),
+        }
+        for name, rallies in (("match", self.rallies), ("recent", recent)):
+            stats[name] = {
+                **IntegrationEngine({"rallies": rallies}).analyze_rally_patterns(),
+                "tempo": rally_tempo(rallies),
+            }
+        return stats
+
+
+class LiveSession:
+    """
+    ライブ分析のセッション
+
+    読み込みスレッドで音声を読み続けて LiveStats を更新し、advise() で
+    直近のラリーについての助言を budget 秒以内に返す。
+    """
+
+    def __init__(
+        self,
+        source: str,
+        analyzer=None,
+        player_name: str = "浅見江里佳",
+        team_name: str = "文化学園大学杉並",
+        strategy: Optional[Dict[str, Any]] = None,
+        last_rallies: int = DEFAULT_LAST_RALLIES,
+        budget: float = DEFAULT_BUDGET,
+        follow: bool = True,
+        stats: Optional[LiveStats] = None
+    ):
+        """
+        初期化
+
+        Args:
+            source: 録画中のファイルのパス、ストリームの URL、または "-"（標準入力。フレームは送らない）
+            analyzer: LLMAnalyzer（省略時は統計だけを返す）
+            player_name: 選手名
+            team_name: 所属チーム名
+            strategy: 試合前の戦略（generate_strategy の結果）
+            last_rallies: 助言の対象とする直近のラリー数
+            budget: 助言を返すまでの上限（秒）
+            follow: ファイルの末尾に達しても書き足されるのを待つ
+            stats: 逐次検出（テスト用。省略時は新規作成）
+        """
+        self.source = source
+        self.analyzer = analyzer
+        self.player_name = player_name
+        self.team_name = team_name
+        self.strategy = strategy
+        self.last_rallies = last_rallies
+        self.budget = budget
+        self.follow = follow
+        self.stats = stats or LiveStats()
+        self.error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="live-llm")
+
+    def feed(self, chunk: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        音声チャンクを追加（読み込みスレッドから呼ぶ）
+
+        Args:
+            chunk: float32 のモノラル音声
+
+        Returns:
+            今回閉じたラリーのリスト
+        """
+        with self._lock:
+            closed = self.stats.update(chunk)
+        for rally in closed:
+            print(f"[live] ラリー {rally['index'] + 1}: {rally['hits']}打 ({rally['start']:.0f}秒〜)")
+        return closed
+
+    def start(self):
+        """
+        読み込みスレッドを開始
+
+        Raises:
+            FileNotFoundError: ffmpeg がない場合
+        """
+        self._process = open_live_audio(self.source, self.follow)
+        self._thread = threading.Thread(target=self._read, name="live-audio", daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        """音声を読み続ける（入力の終わりか stop() まで）"""
+        chunk_bytes = int(SAMPLE_RATE * LIVE_CHUNK_SECONDS) * 2
+        try:
+            while not self._stop.is_set():
+                data = self._process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                samples = np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2")
+                self.feed(samples.astype(np.float32) / 32768.0)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._lock:
+                self.stats.finish()
+            if not self._stop.is_set() and self._process.wait() != 0:
+                self.error = self.error or f"音声を読めません: {self.source}"
+
+    @property
+    def running(self) -> bool:
+        """音声を読み込み中か"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """読み込みを止める"""
+        self._stop.set()
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        if self._process is not None:
+            self._process.stdout.close()
+            self._process.wait()
+        self._executor.shutdown(wait=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """現在の統計（LiveStats.snapshot）"""
+        with self._lock:
+            return self.stats.snapshot(self.last_rallies)
+
+    def advise(self) -> Dict[str, Any]:
+        """
+        直近のラリーについての助言（budget 秒以内に返す）
+
+        フレームの取り出しに予算の FRAME_SHARE まで使い、残りの時間で LLM を呼ぶ。
+        LLM が時間内に応答しなければ、統計だけを返す（応答は待たずに捨てる）。
+
+        Returns:
+            stats / rallies / frames / advice / latency を持つ辞書（失敗時は error も持つ）
+        """
+        started = time.monotonic()
+        deadline = started + self.budget
+        with self._lock:
+            stats = self.stats.snapshot(self.last_rallies)
+            rallies = self.stats.rallies[-self.last_rallies:] if self.last_rallies > 0 else []
+
+        result: Dict[str, Any] = {
+            "stats": stats,
+            "rallies": [rally["index"] for rally in rallies],
+            "frames": 0,
+            "advice": None,
+        }
+        if self.analyzer is not None:
+            frames = []
+            if self.source != "-" and rallies:
+                frames = extract_frames(
+                    self.source, keyframe_times(rallies), deadline=started + self.budget * FRAME_SHARE
+                )
+            result["frames"] = len(frames)
+            remaining = deadline - time.monotonic() - BUDGET_MARGIN
+            future = self._executor.submit(
+                self.analyzer.live_advice, frames, stats, self.player_name, self.team_name,
+                strategy=self.strategy, timeout=max(remaining, 0.1)
+            )
+            try:
+                result["advice"] = future.result(timeout=max(remaining, 0.0))
+            except FutureTimeoutError:
+                future.cancel()
+                result["error"] = f"{self.budget:.0f}秒以内に助言を得られませんでした（統計のみ）"
+            except Exception as e:
+                result["error"] = str(e)
+        result["latency"] = round(time.monotonic() - started, 1)
+        return result
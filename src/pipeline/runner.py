@@ -0,0 +1,369 @@
+"""
+Pipeline Runner Module
+分析→戦略→練習計画のフルパイプラインを、結果の再利用とチェックポイント付きで実行する
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from storage.checkpoint import RunCheckpoint
+from storage.result_index import ResultIndex, content_hash, load_stage_file
+from storage.writer import ResultWriter
+
+
+def reuse_or_run(index: ResultIndex, key: str, use_cache: bool, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    索引に既存の結果があれば再利用し、なければ compute を実行
+
+    Args:
+        index: ResultIndex
+        key: 索引キー
+        use_cache: 索引を参照するか
+        compute: 結果を新規に生成する関数
+
+    Returns:
+        ステージ結果の辞書
+    """
+    if use_cache:
+        cached = index.lookup(key)
+        if cached is not None:
+            print(f"既存の結果を再利用します: {index.lookup_file(key)}")
+            return cached
+    return compute()
+
+
+def analysis_key(
+    index: ResultIndex,
+    analyzer,
+    video: str,
+    player: str,
+    team: str,
+    cv_result: Optional[Dict[str, Any]] = None
+) -> str:
+    """自己分析の索引キー（動画の内容・選手・モデル、統合分析では計測値で決まる）"""
+    params = {
+        "video": index.video_hash(video),
+        "player": player,
+        "team": team,
+        "model": analyzer.model,
+    }
+    # 動画全体を渡す分析のキーは従来と同じにして、既存の結果を再利用できるようにする
+    if cv_result is not None:
+        params["integration"] = content_hash(cv_result)
+    return index.make_key("analysis", **params)
+
+
+def strategy_key(
+    index: ResultIndex,
+    analyzer,
+    analysis: Dict[str, Any],
+    opponent_analysis: Optional[Dict[str, Any]] = None,
+    placement: Optional[Dict[str, Any]] = None
+) -> str:
+    """戦略の索引キー（入力となる分析結果の内容で決まる）"""
+    params = {
+        "analysis": content_hash(analysis),
+        "opponent_analysis": content_hash(opponent_analysis) if opponent_analysis else None,
+        "model": analyzer.model,
+    }
+    # 配球データなしのキーは従来と同じにして、既存の結果を再利用できるようにする
+    if placement:
+        params["placement"] = content_hash(placement)
+    return index.make_key("strategy", **params)
+
+
+def practice_key(index: ResultIndex, analyzer, analysis: Dict[str, Any]) -> str:
+    """練習計画の索引キー（入力となる分析結果の内容で決まる）"""
+    return index.make_key(
+        "practice_plan",
+        analysis=content_hash(analysis),
+        model=analyzer.model
+    )
+
+
+def resolve_analysis(
+    analyzer,
+    index: ResultIndex,
+    video: Optional[str],
+    player: str,
+    team: str,
+    analysis_file: Optional[str] = None,
+    use_cache: bool = True,
+    cv_result: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    自己分析結果を取得（分析ファイル → 索引 → 新規分析の順）
+
+    Args:
+        analyzer: LLMAnalyzer
+        index: ResultIndex
+        video: 動画ファイルのパス
+        player: 選手名
+        team: 所属チーム名
+        analysis_file: 既存の分析結果ファイル
+        use_cache: 索引を参照するか
+        cv_result: integration.collect_cv_results の戻り値（指定時は計測値と抜粋クリップで統合分析する）
+
+    Returns:
+        (分析結果, 索引キー) のタプル。ファイル指定時のキーはNone
+    """
+    if analysis_file:
+        print(f"分析結果を読み込み中: {analysis_file}")
+        return load_stage_file(analysis_file, "analysis"), None
+
+    key = analysis_key(index, analyzer, video, player, team, cv_result)
+    if cv_result is not None:
+        from analysis.integration import integrated_analysis
+
+        analysis = reuse_or_run(
+            index, key, use_cache,
+            lambda: integrated_analysis(analyzer, video, cv_result, player, team)
+        )
+        return analysis, key
+
+    analysis = reuse_or_run(
+        index, key, use_cache,
+        lambda: analyzer.analyze_video(
+            video_path=video,
+            player_name=player,
+            team_name=team
+        )
+    )
+    return analysis, key
+
+
+class FullPipeline:
+    """
+    フル分析パイプライン（分析→戦略→練習計画）
+
+    各ステージの結果は完了次第チェックポイントに保存され、
+    同じ動画・パラメータの既存結果は索引から再利用される。
+    """
+
+    STAGES = ["analysis", "strategy", "practice_plan"]
+
+    def __init__(
+        self,
+        analyzer_factory: Callable[[], Any],
+        output_dir: str = "data/results",
+        use_cache: bool = True,
+        store=None,
+        export_json: bool = True,
+        group_runs: bool = False,
+        artifacts=None
+    ):
+        """
+        初期化
+
+        Args:
+            analyzer_factory: LLMAnalyzer を生成する関数
+            output_dir: 出力ディレクトリ
+            use_cache: 既存の結果を再利用するか
+            store: ResultsStore（省略時はデータベースに保存しない）
+            export_json: full_analysis_*.json を書き出すか
+            group_runs: 成果物を <出力ディレクトリ>/<実行ID>/ にまとめるか
+            artifacts: ArtifactStore（結果JSONを圧縮して保存する場合）
+        """
+        self.analyzer_factory = analyzer_factory
+        self.output_dir = output_dir
+        self.use_cache = use_cache
+        self.store = store
+        self.export_json = export_json
+        self.group_runs = group_runs
+        self.artifacts = artifacts
+        self.index = ResultIndex(output_dir, store=store)
+
+    def is_analyzed(self, video: str, player: str, team: str) -> bool:
+        """
+        同じ動画・選手・モデルの分析結果が既に索引にあるか
+
+        Args:
+            video: 動画ファイルのパス
+            player: 選手名
+            team: 所属チーム名
+
+        Returns:
+            分析済みならTrue
+        """
+        key = analysis_key(self.index, self.analyzer_factory(), video, player, team)
+        return self.index.lookup(key) is not None
+
+    def run(
+        self,
+        video: Optional[str] = None,
+        player: str = "浅見江里佳",
+        team: str = "文化学園大学杉並",
+        analysis_file: Optional[str] = None,
+        strategy_file: Optional[str] = None,
+        resume: Optional[str] = None,
+        opponent: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Optional[Path]]:
+        """
+        フル分析を実行
+
+        Args:
+            video: 動画ファイルのパス
+            player: 選手名
+            team: 所属チーム名
+            analysis_file: 既存の分析結果ファイル
+            strategy_file: 既存の戦略ファイル
+            resume: 再開する実行ID
+            opponent: 対戦相手名（技術評価を相手ごとに集計するために保存する）
+
+        Returns:
+            (統合結果, 保存先ファイル) のタプル。JSONを書き出さない場合のファイルはNone
+        """
+        # チェックポイントを作成、または既存の実行を読み込む
+        if resume:
+            checkpoint = RunCheckpoint.load(self.output_dir, resume)
+            params = checkpoint.params
+            video = params.get("video")
+            player = params.get("player", player)
+            team = params.get("team", team)
+            analysis_file = params.get("analysis_file")
+            strategy_file = params.get("strategy_file")
+            opponent = params.get("opponent", opponent)
+            print(f"=== フル分析を再開 ===")
+        else:
+            checkpoint = RunCheckpoint.create(self.output_dir, {
+                "video": video,
+                "player": player,
+                "team": team,
+                "analysis_file": analysis_file,
+                "strategy_file": strategy_file,
+                "opponent": opponent
+            })
+            print(f"=== フル分析を開始 ===")
+
+        analyzer = self.analyzer_factory()
+        index = self.index
+
+        print(f"実行ID: {checkpoint.run_id}")
+        print(f"対象: {video}")
+        print(f"選手: {player}")
+        print()
+
+        try:
+            # 1. 動画分析
+            a_key = None
+            if checkpoint.has_stage("analysis"):
+                print("【Step 1/3】動画分析: チェックポイントから復元")
+                analysis = checkpoint.load_stage("analysis")
+                # 復元した分析も索引に登録し、以後の analyze / strategy で再利用できるようにする
+                if video and not analysis_file:
+                    a_key = analysis_key(index, analyzer, video, player, team)
+            else:
+                print("【Step 1/3】動画分析を実行中...")
+                analysis, a_key = resolve_analysis(
+                    analyzer, index, video, player, team, analysis_file, self.use_cache
+                )
+                checkpoint.save_stage("analysis", analysis)
+
+            # 2. 戦略生成
+            s_key = strategy_key(index, analyzer, analysis)
+            if checkpoint.has_stage("strategy"):
+                print("【Step 2/3】戦略生成: チェックポイントから復元")
+                strategy = checkpoint.load_stage("strategy")
+            else:
+                print("【Step 2/3】戦略を生成中...")
+                if strategy_file:
+                    print(f"戦略を読み込み中: {strategy_file}")
+                    strategy = load_stage_file(strategy_file, "strategy")
+                else:
+                    strategy = reuse_or_run(
+                        index, s_key, self.use_cache,
+                        lambda: analyzer.generate_strategy(analysis)
+                    )
+                checkpoint.save_stage("strategy", strategy)
+
+            # 3. 練習計画生成
+            p_key = practice_key(index, analyzer, analysis)
+            if checkpoint.has_stage("practice_plan"):
+                print("【Step 3/3】練習計画生成: チェックポイントから復元")
+                practice_plan = checkpoint.load_stage("practice_plan")
+            else:
+                print("【Step 3/3】練習計画を生成中...")
+                practice_plan = reuse_or_run(
+                    index, p_key, self.use_cache,
+                    lambda: analyzer.generate_practice_plan(analysis)
+                )
+                checkpoint.save_stage("practice_plan", practice_plan)
+        except Exception as e:
+            print(f"Error: {e}")
+            print(f"完了したステージは保存済みです。再開するには --resume {checkpoint.run_id} を指定してください")
+            raise
+
+        # 結果を統合
+        full_result = {
+            "player": player,
+            "team": team,
+            "video": video,
+            "run_id": checkpoint.run_id,
+            "timestamp": datetime.now().isoformat(),
+            "analysis": analysis,
+            "strategy": strategy,
+            "practice_plan": practice_plan
+        }
+
+        # 結果を保存
+        if self.store is not None:
+            self.store.save_run(
+                checkpoint.run_id,
+                "full",
+                {
+                    "analysis": (analysis, a_key),
+                    "strategy": (strategy, None if strategy_file else s_key),
+                    "practice_plan": (practice_plan, p_key)
+                },
+                player=player,
+                team=team,
+                video_hash=index.video_hash(video) if video else None,
+                video_path=str(Path(video).resolve()) if video else None,
+                video_size=Path(video).stat().st_size if video else None,
+                model=analyzer.model,
+                params={"opponent": opponent}
+            )
+
+        output_file = None
+        if self.export_json:
+            writer = ResultWriter(self.output_dir, checkpoint.run_id, self.group_runs, self.artifacts)
+            output_file = writer.write_json("full_analysis", full_result)
+
+            if a_key:
+                index.record(a_key, output_file, "analysis")
+            if not strategy_file:
+                index.record(s_key, output_file, "strategy")
+            index.record(p_key, output_file, "practice_plan")
+
+        checkpoint.finish(str(output_file) if output_file else None)
+
+        return full_result, output_file
+
+    def render_reports(self, full_result: Dict[str, Any]) -> Dict[str, str]:
+        """
+        フル分析結果からMarkdownレポート一式を生成
+
+        Args:
+            full_result: run() が返した統合結果
+
+        Returns:
+            レポート種別 → 生成したファイルパス の辞書
+        """
+        from output.report_generator import ReportGenerator
+
+        writer = ResultWriter(self.output_dir, full_result.get("run_id"), self.group_runs)
+        generator = ReportGenerator(self.output_dir, writer=writer)
+        player = full_result.get("player") or "浅見江里佳"
+        team = full_result.get("team") or "文化学園大学杉並"
+        return {
+            "analysis_report": generator.generate_analysis_report(
+                full_result["analysis"], player_name=player, team_name=team
+            ),
+            "strategy_sheet": generator.generate_strategy_sheet(
+                full_result["strategy"], player_name=player
+            ),
+            "practice_plan": generator.generate_practice_plan(
+                full_result["practice_plan"], player_name=player
+            )
+        }
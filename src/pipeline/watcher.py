@@ -0,0 +1,190 @@
+"""
+Watcher Module
+動画フォルダを監視し、新しく置かれた試合動画を自動で分析する
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+
+DEFAULT_EXTENSIONS = (".mp4", ".mov", ".avi")
+
+
+class VideoWatcher:
+    """
+    動画フォルダの監視クラス
+
+    一定間隔でフォルダを走査し（標準ライブラリのみで動く軽量なポーリング）、
+    サイズと更新時刻が一定時間変化しなくなった動画をコピー完了とみなして
+    ワーカープールに投入する。処理中・待機中の件数には上限があり、
+    APIが遅い間は新しい動画の投入を保留する（バックプレッシャー）。
+    """
+
+    def __init__(
+        self,
+        watch_dir: str,
+        process_video: Callable[[str], Any],
+        poll_interval: float = 2.0,
+        settle_seconds: float = 5.0,
+        max_workers: int = 2,
+        max_pending: int = 4,
+        extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS
+    ):
+        """
+        初期化
+
+        Args:
+            watch_dir: 監視するディレクトリ
+            process_video: 動画1本を処理する関数（動画パスを受け取る）
+            poll_interval: 走査間隔（秒）
+            settle_seconds: コピー完了とみなすまでの無変化時間（秒）
+            max_workers: 同時に処理する動画数
+            max_pending: 処理中＋待機中の動画数の上限
+            extensions: 対象とする拡張子
+        """
+        self.watch_dir = Path(watch_dir)
+        self.process_video = process_video
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.max_workers = max_workers
+        self.extensions = tuple(ext.lower() for ext in extensions)
+
+        self._slots = threading.BoundedSemaphore(max(max_pending, max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="watch")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # パス → (サイズ, 更新時刻, 最後に変化を観測した時刻)
+        self._observed: Dict[str, Tuple[int, int, float]] = {}
+        # パス → 投入済みの (サイズ, 更新時刻)。内容が変わったら再投入する
+        self._submitted: Dict[str, Tuple[int, int]] = {}
+        # パス → 投入時刻
+        self._in_flight: Dict[str, float] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def _list_videos(self) -> List[os.DirEntry]:
+        """監視ディレクトリ直下の動画ファイルを列挙"""
+        if not self.watch_dir.exists():
+            return []
+        with os.scandir(self.watch_dir) as entries:
+            return [
+                entry for entry in entries
+                if entry.is_file()
+                and not entry.name.startswith(".")
+                and entry.name.lower().endswith(self.extensions)
+            ]
+
+    def poll(self, now: Optional[float] = None) -> List[str]:
+        """
+        フォルダを1回走査し、コピー完了した動画を投入
+
+        Args:
+            now: 現在時刻（テスト用。省略時は time.monotonic()）
+
+        Returns:
+            今回投入した動画パスのリスト
+        """
+        now = time.monotonic() if now is None else now
+        submitted = []
+        seen = set()
+
+        for entry in self._list_videos():
+            path = entry.path
+            seen.add(path)
+            stat = entry.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+
+            previous = self._observed.get(path)
+            if previous is None or previous[:2] != signature:
+                # 新規、またはコピー中でサイズ・更新時刻が変化している
+                self._observed[path] = (signature[0], signature[1], now)
+                continue
+
+            if stat.st_size == 0 or now - previous[2] < self.settle_seconds:
+                continue
+            if self._submitted.get(path) == signature:
+                continue
+
+            # 上限に達していれば投入を保留し、次回の走査で再試行する
+            if not self._slots.acquire(blocking=False):
+                break
+
+            self._submitted[path] = signature
+            with self._lock:
+                self._in_flight[path] = now
+            self._executor.submit(self._run, path)
+            submitted.append(path)
+            print(f"[watch] 分析キューに追加: {path}")
+
+        # 削除されたファイルの観測情報を捨てる
+        for path in list(self._observed):
+            if path not in seen:
+                del self._observed[path]
+
+        return submitted
+
+    def _run(self, path: str):
+        """ワーカースレッドで動画1本を処理"""
+        started = time.monotonic()
+        status = {"status": "failed", "error": "interrupted"}
+        try:
+            result = self.process_video(path)
+            status = {"status": "completed", "result": result}
+            print(f"[watch] 完了: {path} ({time.monotonic() - started:.1f}秒)")
+        except Exception as e:
+            status = {"status": "failed", "error": str(e)}
+            print(f"[watch] Error: {path}: {e}")
+        finally:
+            with self._lock:
+                self.results[path] = status
+                self._in_flight.pop(path, None)
+            self._slots.release()
+        return status
+
+    @property
+    def in_flight(self) -> int:
+        """処理中・待機中の動画数"""
+        with self._lock:
+            return len(self._in_flight)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        投入済みの動画の処理がすべて終わるまで待つ
+
+        Args:
+            timeout: 最大待ち時間（秒）
+
+        Returns:
+            時間内に終われば True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.in_flight:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def run_forever(self):
+        """停止されるまで監視を続ける（Ctrl+Cで停止）"""
+        print(f"[watch] 監視を開始: {self.watch_dir}（{self.poll_interval}秒間隔）")
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            print("\n[watch] 停止要求を受け付けました。処理中の動画の完了を待ちます...")
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """監視ループを停止"""
+        self._stop.set()
+
+    def shutdown(self):
+        """ワーカープールを終了（処理中の動画は最後まで実行）"""
+        self._stop.set()
+        self._executor.shutdown(wait=True)
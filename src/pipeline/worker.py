@@ -0,0 +1,211 @@
+"""
+Worker Module
+SQLiteジョブキューからジョブを取り出して処理するワーカー
+"""
+
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from typing import Optional, Dict, Any, Callable
+
+from storage.job_queue import JobQueue
+
+
+def default_worker_id() -> str:
+    """ホスト名とプロセスIDからワーカーIDを生成"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_full_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    full ステージのジョブを実行（フル分析＋レポート生成）
+
+    Args:
+        payload: video / player / team / opponent / output / db を含む辞書
+
+    Returns:
+        出力ファイルのパスを含む辞書
+    """
+    from analysis.llm_analyzer import LLMAnalyzer
+    from pipeline.runner import FullPipeline
+    from storage.artifacts import ArtifactStore
+    from storage.results_store import ResultsStore
+
+    pipeline = FullPipeline(
+        LLMAnalyzer,
+        payload.get("output", "data/results"),
+        store=ResultsStore(payload.get("db")),
+        export_json=payload.get("export_json", True),
+        group_runs=payload.get("group_runs", False),
+        artifacts=ArtifactStore() if payload.get("artifacts") else None
+    )
+    full_result, output_file = pipeline.run(
+        video=payload["video"],
+        player=payload.get("player", "浅見江里佳"),
+        team=payload.get("team", "文化学園大学杉並"),
+        opponent=payload.get("opponent")
+    )
+    reports = pipeline.render_reports(full_result)
+    return {
+        "run_id": full_result["run_id"],
+        "output_file": str(output_file) if output_file else None,
+        "reports": reports
+    }
+
+
+# ステージ名 → ジョブ実行関数
+DEFAULT_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "full": run_full_job,
+}
+
+
+class Worker:
+    """
+    ジョブキューのワーカー
+
+    ジョブを1件ずつ取り出し、処理中は別スレッドでリースを延長し続ける。
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 300,
+        poll_interval: float = 2.0
+    ):
+        """
+        初期化
+
+        Args:
+            queue: JobQueue
+            handlers: ステージ名 → ジョブ実行関数
+            worker_id: ワーカーID（省略時はホスト名:PID）
+            lease_seconds: リースの有効期間（秒）
+            poll_interval: キューが空の時の待ち時間（秒）
+        """
+        self.queue = queue
+        self.handlers = handlers if handlers is not None else DEFAULT_HANDLERS
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def _keep_alive(self, job_id: int, done: threading.Event):
+        """処理が終わるまでリースを定期的に延長"""
+        while not done.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                print(f"[worker {self.worker_id}] リースを失いました: job {job_id}")
+                return
+
+    def run_one(self) -> Optional[Dict[str, Any]]:
+        """
+        ジョブを1件処理
+
+        Returns:
+            処理したジョブ（キューが空ならNone）
+        """
+        job = self.queue.claim(self.worker_id, self.lease_seconds, stages=list(self.handlers))
+        if job is None:
+            return None
+
+        print(f"[worker {self.worker_id}] job {job['id']} ({job['stage']}) を開始 (試行 {job['attempts']}/{job['max_attempts']})")
+        done = threading.Event()
+        keeper = threading.Thread(target=self._keep_alive, args=(job["id"], done), daemon=True)
+        keeper.start()
+        try:
+            result = self.handlers[job["stage"]](job["payload"])
+            if self.queue.complete(job["id"], self.worker_id, result):
+                job["status"] = "completed"
+                print(f"[worker {self.worker_id}] job {job['id']} 完了")
+            else:
+                # リースが切れて別のワーカーが取り直したため、このワーカーの結果は記録されない
+                job["status"] = "lost"
+                print(f"[worker {self.worker_id}] リースを失ったため結果を破棄: job {job['id']}")
+        except Exception as e:
+            traceback.print_exc()
+            self.queue.fail(job["id"], self.worker_id, f"{type(e).__name__}: {e}")
+            job["status"] = "failed"
+            print(f"[worker {self.worker_id}] Error: job {job['id']}: {e}")
+        finally:
+            done.set()
+            keeper.join()
+        return job
+
+    def run(self, drain: bool = False, max_jobs: Optional[int] = None) -> int:
+        """
+        ジョブを処理し続ける
+
+        Args:
+            drain: キューが空になったら終了する
+            max_jobs: 処理するジョブ数の上限
+
+        Returns:
+            処理したジョブ数
+        """
+        processed = 0
+        try:
+            while max_jobs is None or processed < max_jobs:
+                job = self.run_one()
+                if job is None:
+                    if drain:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                processed += 1
+        except KeyboardInterrupt:
+            pass
+        return processed
+
+
+def _worker_process(db_path: Optional[str], lease_seconds: float, poll_interval: float, drain: bool, journal_mode: str):
+    """ワーカープロセスのエントリーポイント"""
+    worker = Worker(
+        JobQueue(db_path, journal_mode),
+        lease_seconds=lease_seconds,
+        poll_interval=poll_interval
+    )
+    worker.run(drain=drain)
+
+
+def run_workers(
+    processes: int,
+    db_path: Optional[str] = None,
+    lease_seconds: float = 300,
+    poll_interval: float = 2.0,
+    drain: bool = False,
+    journal_mode: str = "WAL"
+):
+    """
+    複数のワーカープロセスを起動し、終了を待つ
+
+    Args:
+        processes: ワーカープロセス数
+        db_path: SQLiteファイルのパス
+        lease_seconds: リースの有効期間（秒）
+        poll_interval: キューが空の時の待ち時間（秒）
+        drain: キューが空になったら終了する
+        journal_mode: ジャーナルモード
+    """
+    if processes <= 1:
+        _worker_process(db_path, lease_seconds, poll_interval, drain, journal_mode)
+        return
+
+    workers = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(db_path, lease_seconds, poll_interval, drain, journal_mode),
+            name=f"worker-{i}"
+        )
+        for i in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    try:
+        for p in workers:
+            p.join()
+    except KeyboardInterrupt:
+        for p in workers:
+            p.join()
@@ -0,0 +1,7 @@
+# AI主導型 卓球パフォーマンス最大化システム - 保存・再利用モジュール
+
+from .result_index import ResultIndex
+from .checkpoint import RunCheckpoint
+from .writer import ResultWriter, atomic_write_json, atomic_write_text, new_run_id
+
+__all__ = ['ResultIndex', 'RunCheckpoint', 'ResultWriter', 'atomic_write_json', 'atomic_write_text', 'new_run_id']
@@ -0,0 +1,318 @@
+"""
+Artifacts Module
+結果JSONなどの成果物を SHA-256 をキーに圧縮して保存する（内容アドレス方式）
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator, Set, Tuple
+
+from .database import load_settings
+from .writer import atomic_write_bytes, atomic_write_json
+
+
+DEFAULT_ARTIFACTS_PATH = "data/artifacts"
+
+# 参照ファイルの目印となるキー
+POINTER_KEY = "__artifact__"
+
+# 参照ファイルはこのサイズ以下（これより大きいJSONは中身を読まずに実データとみなす）
+MAX_POINTER_SIZE = 1024
+
+# 圧縮形式 → 拡張子
+CODECS = {"zstd": ".zst", "gzip": ".gz"}
+
+# 書き出し途中のブロブを誤って回収しないよう、作成からこの秒数が経つまでは残す
+DEFAULT_GRACE_SECONDS = 3600
+
+
+def default_codec() -> str:
+    """zstandard があれば zstd、なければ gzip"""
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def get_artifacts_path(settings_path: Optional[str] = None) -> str:
+    """
+    設定ファイルから artifact store のパスを取得
+
+    Args:
+        settings_path: 設定ファイルのパス
+
+    Returns:
+        artifact store のディレクトリ
+    """
+    artifacts = load_settings(settings_path).get("artifacts") or {}
+    return artifacts.get("path", DEFAULT_ARTIFACTS_PATH)
+
+
+def read_pointer(path: str) -> Optional[Dict[str, Any]]:
+    """
+    参照ファイルであれば、その参照情報を返す
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        参照情報（sha256 / size / store）。通常のファイルならNone
+    """
+    try:
+        if os.path.getsize(path) > MAX_POINTER_SIZE:
+            return None
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if isinstance(data, dict) and isinstance(data.get(POINTER_KEY), dict):
+        return data[POINTER_KEY]
+    return None
+
+
+def read_bytes(path: str) -> bytes:
+    """
+    ファイルの内容を読む（参照ファイルなら artifact store から読み出す）
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        ファイル（または参照先のブロブ）の内容
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    if len(raw) > MAX_POINTER_SIZE or POINTER_KEY.encode() not in raw:
+        return raw
+    pointer = read_pointer(path)
+    if pointer is None:
+        return raw
+    store = ArtifactStore(pointer.get("store"))
+    if not store.exists(pointer["sha256"]):
+        # store を移動した場合は設定ファイルの場所を探す
+        store = ArtifactStore()
+    return store.get(pointer["sha256"])
+
+
+def load_json(path: str) -> Any:
+    """
+    JSONファイルを読み込む（参照ファイルなら artifact store から読み出す）
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        JSONの内容
+    """
+    return json.loads(read_bytes(path))
+
+
+def iter_pointers(paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    ディレクトリ以下の参照ファイルを列挙
+
+    Args:
+        paths: 走査するディレクトリ
+
+    Yields:
+        (参照ファイルのパス, 参照情報) のタプル
+    """
+    for root in paths:
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, name)
+                pointer = read_pointer(path)
+                if pointer is not None:
+                    yield path, pointer
+
+
+class ArtifactStore:
+    """
+    内容アドレス方式の artifact store
+
+    ブロブは圧縮前の内容の SHA-256 をキーに
+    <root>/objects/<先頭2文字>/<残り>.<zst|gz> に保存する。
+    同じ内容は何度保存しても1つのブロブにまとまる。
+    出力ディレクトリには元のファイル名で小さな参照ファイルを置き、
+    load_json / read_bytes で読むと参照先の内容が返る。
+    """
+
+    def __init__(self, root: Optional[str] = None, codec: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            root: 保存先ディレクトリ（省略時は設定ファイルの artifacts.path）
+            codec: 圧縮形式（zstd / gzip。省略時は zstandard があれば zstd）
+        """
+        codec = codec or default_codec()
+        if codec not in CODECS:
+            raise ValueError(f"未対応の圧縮形式です: {codec}")
+        self.root = Path(root or get_artifacts_path())
+        self.codec = codec
+
+    @property
+    def objects_dir(self) -> Path:
+        return self.root / "objects"
+
+    def _path(self, digest: str, codec: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}{CODECS[codec]}"
+
+    def blob_path(self, digest: str) -> Optional[Path]:
+        """
+        ブロブのパスを取得（どの圧縮形式で保存されていても探す）
+
+        Args:
+            digest: SHA-256（16進数）
+
+        Returns:
+            ブロブのパス（なければNone）
+        """
+        for codec in (self.codec, *CODECS):
+            path = self._path(digest, codec)
+            if path.exists():
+                return path
+        return None
+
+    def exists(self, digest: str) -> bool:
+        return self.blob_path(digest) is not None
+
+    def put(self, data: bytes) -> str:
+        """
+        内容を保存（同じ内容がすでにあれば更新日時だけを新しくし、gc の猶予期間で保護する）
+
+        Args:
+            data: 保存する内容
+
+        Returns:
+            SHA-256（16進数）
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if path is None:
+            atomic_write_bytes(str(self._path(digest, self.codec)), _compress(data, self.codec))
+        else:
+            # ポインタを書く前に gc が走っても、再利用したブロブを消さない
+            os.utime(path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """
+        内容を読み出す
+
+        Args:
+            digest: SHA-256（16進数）
+
+        Returns:
+            圧縮前の内容
+        """
+        path = self.blob_path(digest)
+        if path is None:
+            raise FileNotFoundError(f"ブロブが見つかりません: {digest}")
+        codec = next(name for name, suffix in CODECS.items() if path.name.endswith(suffix))
+        with open(path, "rb") as f:
+            return _decompress(f.read(), codec)
+
+    def write_pointer(self, file_path: str, data: bytes) -> str:
+        """
+        内容をブロブとして保存し、file_path に参照ファイルを書き出す
+
+        Args:
+            file_path: 参照ファイルのパス
+            data: 保存する内容
+
+        Returns:
+            SHA-256（16進数）
+        """
+        digest = self.put(data)
+        atomic_write_json(file_path, {
+            POINTER_KEY: {"sha256": digest, "size": len(data), "store": str(self.root.resolve())}
+        })
+        return digest
+
+    def pack(self, file_path: str) -> int:
+        """
+        既存のファイルをブロブに移し、参照ファイルに置き換える
+
+        Args:
+            file_path: 対象ファイル
+
+        Returns:
+            出力ディレクトリ側で減ったバイト数（すでに参照ファイルなら0）
+        """
+        if read_pointer(file_path) is not None:
+            return 0
+        with open(file_path, "rb") as f:
+            data = f.read()
+        self.write_pointer(file_path, data)
+        return len(data) - os.path.getsize(file_path)
+
+    def iter_blobs(self) -> Iterator[Tuple[str, Path]]:
+        """
+        保存済みのブロブを列挙
+
+        Yields:
+            (SHA-256, ブロブのパス) のタプル
+        """
+        if not self.objects_dir.exists():
+            return
+        for prefix in sorted(self.objects_dir.iterdir()):
+            if not prefix.is_dir():
+                continue
+            for path in sorted(prefix.iterdir()):
+                if path.name.startswith("."):
+                    continue
+                yield prefix.name + path.name.split(".", 1)[0], path
+
+    def gc(
+        self,
+        referenced: Set[str],
+        grace_seconds: float = DEFAULT_GRACE_SECONDS,
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        参照されていないブロブを削除
+
+        Args:
+            referenced: 参照されている SHA-256 の集合
+            grace_seconds: 作成からこの秒数以内のブロブは残す
+            dry_run: 削除せずに集計だけ行う
+
+        Returns:
+            kept / removed / freed（削除したバイト数）
+        """
+        stats = {"kept": 0, "removed": 0, "freed": 0}
+        cutoff = time.time() - grace_seconds
+        for digest, path in self.iter_blobs():
+            stat = path.stat()
+            if digest in referenced or stat.st_mtime > cutoff:
+                stats["kept"] += 1
+                continue
+            if not dry_run:
+                path.unlink()
+            stats["removed"] += 1
+            stats["freed"] += stat.st_size
+        return stats
@@ -0,0 +1,148 @@
+"""
+Checkpoint Module
+フル分析の各ステージ結果を実行IDごとに保存し、途中から再開できるようにする
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from .writer import atomic_write_json, new_run_id
+
+
+RUNS_DIRNAME = "runs"
+MANIFEST_FILENAME = "manifest.json"
+
+
+class RunCheckpoint:
+    """
+    1回のパイプライン実行のチェックポイント
+
+    <出力ディレクトリ>/runs/<実行ID>/ 以下に、
+    manifest.json（実行パラメータと進捗）と各ステージの結果JSONを保存する。
+    """
+
+    def __init__(self, output_dir: str, run_id: str):
+        """
+        初期化
+
+        Args:
+            output_dir: 出力ディレクトリ
+            run_id: 実行ID
+        """
+        self.run_id = run_id
+        self.run_dir = Path(output_dir) / RUNS_DIRNAME / run_id
+        self.manifest_path = self.run_dir / MANIFEST_FILENAME
+        self.manifest: Dict[str, Any] = {}
+
+    @classmethod
+    def create(cls, output_dir: str, params: Dict[str, Any], run_id: Optional[str] = None) -> "RunCheckpoint":
+        """
+        新しい実行のチェックポイントを作成
+
+        Args:
+            output_dir: 出力ディレクトリ
+            params: 実行パラメータ（選手名、動画パスなど）
+            run_id: 実行ID（省略時は自動生成）
+
+        Returns:
+            RunCheckpoint
+        """
+        checkpoint = cls(output_dir, run_id or new_run_id())
+        checkpoint.manifest = {
+            "run_id": checkpoint.run_id,
+            "created_at": datetime.now().isoformat(),
+            "status": "running",
+            "params": params,
+            "stages": {}
+        }
+        checkpoint._save_manifest()
+        return checkpoint
+
+    @classmethod
+    def load(cls, output_dir: str, run_id: str) -> "RunCheckpoint":
+        """
+        既存の実行のチェックポイントを読み込む
+
+        Args:
+            output_dir: 出力ディレクトリ
+            run_id: 実行ID
+
+        Returns:
+            RunCheckpoint
+
+        Raises:
+            FileNotFoundError: 指定した実行IDが存在しない場合
+        """
+        checkpoint = cls(output_dir, run_id)
+        if not checkpoint.manifest_path.exists():
+            raise FileNotFoundError(f"Run not found: {run_id} ({checkpoint.run_dir})")
+        with open(checkpoint.manifest_path, "r", encoding="utf-8") as f:
+            checkpoint.manifest = json.load(f)
+        return checkpoint
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """実行パラメータ"""
+        return self.manifest.get("params", {})
+
+    def _stage_path(self, stage: str) -> Path:
+        return self.run_dir / f"{stage}.json"
+
+    def _save_manifest(self):
+        atomic_write_json(str(self.manifest_path), self.manifest)
+
+    def has_stage(self, stage: str) -> bool:
+        """ステージが完了済みか"""
+        return (
+            self.manifest.get("stages", {}).get(stage, {}).get("status") == "completed"
+            and self._stage_path(stage).exists()
+        )
+
+    def load_stage(self, stage: str) -> Dict[str, Any]:
+        """完了済みステージの結果を読み込む"""
+        with open(self._stage_path(stage), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_stage(self, stage: str, data: Dict[str, Any]):
+        """
+        ステージの結果を保存し、完了として記録
+
+        Args:
+            stage: ステージ名
+            data: ステージ結果
+        """
+        atomic_write_json(str(self._stage_path(stage)), data)
+        self.manifest.setdefault("stages", {})[stage] = {
+            "status": "completed",
+            "completed_at": datetime.now().isoformat()
+        }
+        self._save_manifest()
+
+    def first_incomplete(self, stages: List[str]) -> Optional[str]:
+        """
+        最初の未完了ステージを取得
+
+        Args:
+            stages: ステージ名のリスト（実行順）
+
+        Returns:
+            未完了ステージ名（すべて完了していればNone）
+        """
+        for stage in stages:
+            if not self.has_stage(stage):
+                return stage
+        return None
+
+    def finish(self, output_file: Optional[str] = None):
+        """
+        実行を完了として記録
+
+        Args:
+            output_file: 最終結果ファイルのパス
+        """
+        self.manifest["status"] = "completed"
+        self.manifest["output_file"] = str(output_file) if output_file else None
+        self.manifest["completed_at"] = datetime.now().isoformat()
+        self._save_manifest()
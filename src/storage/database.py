@@ -0,0 +1,75 @@
+"""
+Database Module
+config/settings.yaml の database 設定に従って SQLite に接続する
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_SETTINGS_PATH = PROJECT_ROOT / "config" / "settings.yaml"
+DEFAULT_DATABASE_PATH = "data/database.sqlite"
+
+
+def load_settings(settings_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    設定ファイルを読み込む
+
+    Args:
+        settings_path: 設定ファイルのパス（省略時は config/settings.yaml）
+
+    Returns:
+        設定の辞書（ファイルがなければ空）
+    """
+    path = Path(settings_path) if settings_path else DEFAULT_SETTINGS_PATH
+    if not path.exists():
+        return {}
+
+    import yaml  # 起動時間に影響しないよう遅延読み込み
+
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_database_path(settings_path: Optional[str] = None) -> str:
+    """
+    設定ファイルからデータベースのパスを取得
+
+    Args:
+        settings_path: 設定ファイルのパス
+
+    Returns:
+        SQLiteファイルのパス
+    """
+    database = load_settings(settings_path).get("database") or {}
+    return database.get("path", DEFAULT_DATABASE_PATH)
+
+
+def connect(db_path: Optional[str] = None, journal_mode: str = "WAL") -> sqlite3.Connection:
+    """
+    SQLiteに接続
+
+    自動コミットモード（isolation_level=None）で開くため、
+    複数文をまとめる場合は呼び出し側で BEGIN / COMMIT を発行する。
+    複数のマシンから共有ボリューム上のDBを使う場合は、
+    WAL が使えないファイルシステムがあるため journal_mode="DELETE" を指定する。
+
+    Args:
+        db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+        journal_mode: ジャーナルモード
+
+    Returns:
+        sqlite3.Connection
+    """
+    path = db_path or get_database_path()
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
@@ -0,0 +1,170 @@
+"""
+Events Module
+動画ごとのラリー・サーブ・得点のイベントと、キーフレームの位置の索引
+"""
+
+from contextlib import closing
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .database import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS video_keyframes (
+    video_hash TEXT NOT NULL,
+    time REAL NOT NULL,
+    byte_offset INTEGER,
+    PRIMARY KEY (video_hash, time)
+);
+CREATE TABLE IF NOT EXISTS video_events (
+    video_hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    time REAL NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    keyframe_time REAL,
+    keyframe_offset INTEGER,
+    PRIMARY KEY (video_hash, kind, number)
+);
+CREATE INDEX IF NOT EXISTS idx_video_events_time ON video_events (video_hash, kind, time);
+"""
+
+EVENT_COLUMNS = ("kind", "number", "time", "start_time", "end_time", "keyframe_time", "keyframe_offset")
+
+
+class EventIndex:
+    """
+    ラリー・サーブ・得点のイベントの索引
+
+    イベントごとに、切り出す区間と区間の直前のキーフレーム（時刻・ファイル内のバイト位置）を持ち、
+    動画全体をデコードせずに区間の先頭へシークできるようにする。
+    動画（内容ハッシュ）ごとに丸ごと置き換えて保存する。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+        """
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    def save(
+        self,
+        video_hash: str,
+        events: Iterable[Dict[str, Any]],
+        keyframes: Iterable[Tuple[float, Optional[int]]] = ()
+    ) -> int:
+        """
+        動画のイベントとキーフレームを保存（既存の内容は置き換える）
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+            events: kind / number / time / start_time / end_time / keyframe_time / keyframe_offset を持つイベント
+            keyframes: (時刻, バイト位置) の並び
+
+        Returns:
+            保存したイベント数
+        """
+        rows = [(video_hash, *(event.get(column) for column in EVENT_COLUMNS)) for event in events]
+        keyframe_rows = [(video_hash, float(t), None if offset is None else int(offset)) for t, offset in keyframes]
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM video_events WHERE video_hash = ?", (video_hash,))
+                conn.execute("DELETE FROM video_keyframes WHERE video_hash = ?", (video_hash,))
+                conn.executemany(
+                    f"""
+                    INSERT INTO video_events (video_hash, {', '.join(EVENT_COLUMNS)})
+                    VALUES ({', '.join('?' * (len(EVENT_COLUMNS) + 1))})
+                    """,
+                    rows
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO video_keyframes (video_hash, time, byte_offset) VALUES (?, ?, ?)",
+                    keyframe_rows
+                )
+                conn.execute("COMMIT")
+                return len(rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def events(
+        self,
+        video_hash: str,
+        kind: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        動画のイベントを時刻順に取得
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+            kind: イベントの種類（"rally" / "serve" / "point"。省略時はすべて）
+            start: この時刻以降のイベントだけ
+            end: この時刻より前のイベントだけ
+
+        Returns:
+            EVENT_COLUMNS の辞書のリスト
+        """
+        query = f"SELECT {', '.join(EVENT_COLUMNS)} FROM video_events WHERE video_hash = ?"
+        params: List[Any] = [video_hash]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if start is not None:
+            query += " AND time >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND time < ?"
+            params.append(end)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + " ORDER BY time, kind", params).fetchall()
+            return [dict(row) for row in rows]
+
+    def keyframe_before(self, video_hash: str, time: float) -> Optional[Tuple[float, Optional[int]]]:
+        """
+        指定した時刻以前で最も近いキーフレーム
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+            time: 時刻（秒）
+
+        Returns:
+            (時刻, バイト位置)。キーフレームが保存されていなければ None
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                SELECT time, byte_offset FROM video_keyframes
+                WHERE video_hash = ? AND time <= ? ORDER BY time DESC LIMIT 1
+                """,
+                (video_hash, time)
+            ).fetchone()
+            return (row["time"], row["byte_offset"]) if row else None
+
+    def counts(self, video_hash: str) -> Dict[str, int]:
+        """
+        イベントの種類ごとの数
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+
+        Returns:
+            種類 → 数
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT kind, COUNT(*) AS n FROM video_events WHERE video_hash = ? GROUP BY kind",
+                (video_hash,)
+            ).fetchall()
+            return {row["kind"]: row["n"] for row in rows}
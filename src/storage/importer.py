@@ -0,0 +1,233 @@
+"""
+Importer Module
+過去の結果JSON（full_analysis_*.json など）を結果データベースに一括取り込みする
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Optional, Dict, Any, Iterable, Iterator, List
+
+from .artifacts import read_bytes
+from .result_index import INDEX_FILENAME, canonical_json
+from .results_store import ResultsStore
+from .ratings import extract_ratings
+from .search import build_search_row
+from .schema import DATE_KEYS, PLAYER_KEYS, TEAM_KEYS, detect_schema, first_value, split_stages
+
+
+# ファイル名の接頭辞 → 実行コマンド名
+COMMAND_PREFIXES = [
+    ("full_analysis_", "full"),
+    ("strategy_", "strategy"),
+    ("practice_plan_", "practice"),
+    ("analysis_", "analyze"),
+]
+
+# 取り込み対象外（チェックポイントと索引）
+SKIP_DIRS = {"runs"}
+SKIP_FILES = {INDEX_FILENAME, "manifest.json"}
+
+_FILENAME_TIMESTAMP = re.compile(r"(\d{8})_(\d{6})")
+_JA_DATE = re.compile(r"(\d{4})年(\d{1,2})月(\d{1,2})日")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def iter_result_files(paths: Iterable[str]) -> Iterator[str]:
+    """
+    取り込み対象のJSONファイルを順に列挙（ディレクトリは再帰的に走査）
+
+    Args:
+        paths: ファイルまたはディレクトリのパス
+
+    Yields:
+        JSONファイルのパス
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            stack = [path]
+            while stack:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            if entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                                stack.append(entry.path)
+                        elif entry.name.endswith(".json") and entry.name not in SKIP_FILES:
+                            yield entry.path
+        elif path.endswith(".json"):
+            yield path
+
+
+def _parse_date(value: Optional[str]) -> Optional[str]:
+    """日付文字列をISO形式に揃える（解釈できなければNone）"""
+    if not value:
+        return None
+    if _ISO_DATE.match(value):
+        return value if "T" in value else f"{value[:10]}T00:00:00"
+    match = _JA_DATE.search(value)
+    if match:
+        year, month, day = (int(g) for g in match.groups())
+        return f"{year:04d}-{month:02d}-{day:02d}T00:00:00"
+    return None
+
+
+def _command_for(filename: str) -> str:
+    for prefix, command in COMMAND_PREFIXES:
+        if filename.startswith(prefix):
+            return command
+    return "import"
+
+
+def parse_result_file(path: str) -> Dict[str, Any]:
+    """
+    結果ファイル1件を読み込み、保存用の実行データに変換
+
+    ワーカープロセスで実行するため、JSONの解析に加えて内容ハッシュの計算、
+    保存用のシリアライズ、検索索引のトークン化、技術評価の取り出しもここで済ませる。
+    ステージ結果は元のキーのまま保存する（スキーマの扱いは schema モジュールを参照）。
+
+    Args:
+        path: 結果ファイルのパス
+
+    Returns:
+        実行の辞書（ResultsStore.insert_runs の形式）。
+        取り込めない場合は error または skipped を持つ辞書
+    """
+    try:
+        raw = read_bytes(path)
+        data = json.loads(raw)
+    except (OSError, ValueError) as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+
+    stages = split_stages(data)
+    if not stages:
+        return {"path": path, "skipped": True}
+
+    sources = [data] + list(stages.values())
+    filename = os.path.basename(path)
+    created_at = _parse_date(first_value(sources, DATE_KEYS))
+    if created_at is None:
+        match = _FILENAME_TIMESTAMP.search(filename)
+        if match:
+            created_at = datetime.strptime("".join(match.groups()), "%Y%m%d%H%M%S").isoformat()
+        else:
+            created_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+    schema = next(filter(None, (detect_schema(result) for result in stages.values())), None)
+
+    # 内容ハッシュ用の正規化JSONをそのまま保存用にも使い、シリアライズを1回で済ませる
+    outputs = []
+    for stage, result in stages.items():
+        text = canonical_json(result)
+        outputs.append((
+            stage, hashlib.sha256(text.encode("utf-8")).hexdigest(), text, build_search_row(result),
+            extract_ratings(result) if stage == "analysis" else None
+        ))
+
+    return {
+        "path": path,
+        "id": f"import_{hashlib.sha256(raw).hexdigest()[:16]}",
+        "command": _command_for(filename),
+        "player": first_value(sources, PLAYER_KEYS),
+        "team": first_value(sources, TEAM_KEYS),
+        "created_at": created_at,
+        "params": {
+            "source": os.path.abspath(path),
+            "schema": schema,
+            "video": data.get("video"),
+            "opponent": data.get("opponent") or first_value([stages.get("opponent_analysis")], PLAYER_KEYS),
+        },
+        "outputs": outputs,
+    }
+
+
+class ResultImporter:
+    """
+    結果JSONの一括取り込み
+
+    ファイルを逐次列挙しながら一定件数ずつプロセスプールで解析し、
+    バッチごとに1トランザクションでまとめて挿入する。
+    内容ハッシュが既存の結果と一致するステージ結果は取り込まない。
+    """
+
+    def __init__(self, store: ResultsStore, workers: Optional[int] = None, batch_size: int = 1000):
+        """
+        初期化
+
+        Args:
+            store: 取り込み先の ResultsStore
+            workers: 解析プロセス数（1ならプロセスを使わない。省略時はCPU数）
+            batch_size: 1トランザクションで挿入するファイル数
+        """
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def _dedupe(self, parsed: List[Dict[str, Any]], seen: set, stats: Dict[str, int]) -> List[Dict[str, Any]]:
+        """既存・バッチ内の重複を除き、挿入する実行だけを返す"""
+        runs = []
+        for item in parsed:
+            if "error" in item:
+                stats["errors"] += 1
+                print(f"[import] Error: {item['path']}: {item['error']}")
+                continue
+            if item.get("skipped"):
+                stats["skipped"] += 1
+                continue
+
+            outputs = []
+            for output in item["outputs"]:
+                if output[1] in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(output[1])
+                outputs.append(output)
+            if outputs:
+                item["outputs"] = outputs
+                runs.append(item)
+        return runs
+
+    def run(self, paths: Iterable[str]) -> Dict[str, int]:
+        """
+        ファイル・ディレクトリを取り込む
+
+        Args:
+            paths: ファイルまたはディレクトリのパス
+
+        Returns:
+            件数の集計（files / runs / outputs / duplicates / skipped / errors）
+        """
+        stats = {"files": 0, "runs": 0, "outputs": 0, "duplicates": 0, "skipped": 0, "errors": 0}
+        seen = self.store.content_hashes()
+        files = iter_result_files(paths)
+
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+
+        def submit():
+            batch = list(islice(files, self.batch_size))
+            stats["files"] += len(batch)
+            if not batch:
+                return None
+            if executor is None:
+                return [parse_result_file(path) for path in batch]
+            # 結果は遅延評価されるので、前のバッチを挿入している間も解析が進む
+            chunksize = max(1, len(batch) // (self.workers * 4))
+            return executor.map(parse_result_file, batch, chunksize=chunksize)
+
+        try:
+            pending = submit()
+            while pending is not None:
+                parsed = list(pending)
+                pending = submit()
+                runs = self._dedupe(parsed, seen, stats)
+                stats["runs"] += len(runs)
+                stats["outputs"] += self.store.insert_runs(runs)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        return stats
@@ -0,0 +1,313 @@
+"""
+Job Queue Module
+SQLite上の永続ジョブキュー（リース方式で複数ワーカーから安全に取り出す）
+"""
+
+import json
+import time
+from contextlib import closing
+from typing import Optional, Dict, Any, List
+
+from .database import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    dedupe_key TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    available_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority DESC, available_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key)
+    WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running');
+"""
+
+# ジョブの状態
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    SQLiteベースのジョブキュー
+
+    ワーカーは claim() でジョブにリース（有効期限付きの占有権）を取得し、
+    処理中は heartbeat() でリースを延長する。ワーカーが落ちてリースが切れた
+    ジョブは、次の claim() 時に自動的にキューへ戻される。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, journal_mode: str = "WAL"):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+            journal_mode: ジャーナルモード（共有ボリューム上では "DELETE"）
+        """
+        self.db_path = db_path
+        self.journal_mode = journal_mode
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # スレッド・プロセスをまたいで使えるよう、操作ごとに接続する
+        return connect(self.db_path, self.journal_mode)
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        if job.get("result"):
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def enqueue(
+        self,
+        stage: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        max_attempts: int = 3,
+        dedupe_key: Optional[str] = None
+    ) -> int:
+        """
+        ジョブを登録
+
+        Args:
+            stage: ステージ名（full など）
+            payload: ジョブの入力（動画パス、選手名など）
+            priority: 優先度（大きいほど先に処理）
+            max_attempts: 最大試行回数
+            dedupe_key: 重複防止キー（同じキーの未完了ジョブがあれば登録しない）
+
+        Returns:
+            ジョブID（重複時は既存ジョブのID）
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key:
+                    row = conn.execute(
+                        "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)",
+                        (dedupe_key, QUEUED, RUNNING)
+                    ).fetchone()
+                    if row:
+                        conn.execute("COMMIT")
+                        return row["id"]
+                cursor = conn.execute(
+                    """
+                    INSERT INTO jobs (stage, payload, priority, max_attempts, dedupe_key,
+                                      available_at, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (stage, json.dumps(payload, ensure_ascii=False), priority, max_attempts,
+                     dedupe_key, now, now, now)
+                )
+                conn.execute("COMMIT")
+                return cursor.lastrowid
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _requeue_expired(self, conn, now: float) -> int:
+        """リース切れの実行中ジョブをキューに戻す（試行回数を使い切ったものは失敗に）"""
+        conn.execute(
+            """
+            UPDATE jobs SET status = ?, error = 'lease expired', lease_owner = NULL,
+                            lease_expires_at = NULL, updated_at = ?
+            WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts
+            """,
+            (FAILED, now, RUNNING, now)
+        )
+        cursor = conn.execute(
+            """
+            UPDATE jobs SET status = ?, error = 'lease expired', lease_owner = NULL,
+                            lease_expires_at = NULL, available_at = ?, updated_at = ?
+            WHERE status = ? AND lease_expires_at < ?
+            """,
+            (QUEUED, now, now, RUNNING, now)
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """
+        リース切れのジョブをキューに戻す
+
+        Returns:
+            キューに戻したジョブ数
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = self._requeue_expired(conn, now)
+                conn.execute("COMMIT")
+                return count
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, worker_id: str, lease_seconds: float = 300, stages: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        次のジョブを取り出し、リースを取得
+
+        BEGIN IMMEDIATE で書き込みロックを取ってから選択・更新するため、
+        複数のワーカーが同じジョブを取得することはない。
+
+        Args:
+            worker_id: ワーカーの識別子
+            lease_seconds: リースの有効期間（秒）
+            stages: 取り出すステージ（省略時はすべて）
+
+        Returns:
+            ジョブの辞書（キューが空ならNone）
+        """
+        now = time.time()
+        stage_filter = ""
+        params: List[Any] = [QUEUED, now]
+        if stages:
+            stage_filter = f" AND stage IN ({', '.join('?' for _ in stages)})"
+            params.extend(stages)
+
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._requeue_expired(conn, now)
+                row = conn.execute(
+                    f"""
+                    SELECT id FROM jobs
+                    WHERE status = ? AND available_at <= ?{stage_filter}
+                    ORDER BY priority DESC, available_at, id
+                    LIMIT 1
+                    """,
+                    params
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?,
+                                    attempts = attempts + 1, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (RUNNING, worker_id, now + lease_seconds, now, row["id"])
+                )
+                job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                conn.execute("COMMIT")
+                return self._row_to_job(job)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 300) -> bool:
+        """
+        リースを延長
+
+        Args:
+            job_id: ジョブID
+            worker_id: ワーカーの識別子
+            lease_seconds: 延長後の有効期間（秒）
+
+        Returns:
+            延長できれば True（リースを失っていれば False）
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = ?
+                """,
+                (now + lease_seconds, now, job_id, worker_id, RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        ジョブを完了にする
+
+        Args:
+            job_id: ジョブID
+            worker_id: ワーカーの識別子
+            result: 処理結果
+
+        Returns:
+            更新できれば True（リースを失っていれば False）
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL,
+                                lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = ?
+                """,
+                (COMPLETED, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 now, job_id, worker_id, RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True, backoff_seconds: float = 30) -> bool:
+        """
+        ジョブの失敗を記録
+
+        試行回数が残っていれば、試行回数に応じて待ち時間を延ばしてキューに戻す。
+
+        Args:
+            job_id: ジョブID
+            worker_id: ワーカーの識別子
+            error: エラー内容
+            retry: 再試行するか
+            backoff_seconds: 再試行までの基本待ち時間（秒）
+
+        Returns:
+            更新できれば True（リースを失っていれば False）
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET
+                    status = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END,
+                    available_at = ? + ? * attempts,
+                    error = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = ?
+                """,
+                (int(retry), QUEUED, FAILED, now, backoff_seconds, error, now,
+                 job_id, worker_id, RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """ジョブを取得"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        状態ごとのジョブ数を取得
+
+        Returns:
+            状態 → 件数 の辞書
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            return {row["status"]: row["n"] for row in rows}
@@ -0,0 +1,298 @@
+"""
+Ratings Module
+分析結果の技術評価（1-5）を時系列テーブルに取り出し、推移を集計する
+"""
+
+import json
+from contextlib import closing
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .database import connect
+from .schema import canonical_key, get_field
+
+
+# 技術カテゴリ → カテゴリとみなす技術名（番号なし・前方一致）
+TECHNIQUES = {
+    "フォアハンド": ["フォアハンド", "フォア", "forehand"],
+    "バックハンド": ["バックハンド", "バック", "backhand"],
+    "サーブ": ["サーブ", "serve"],
+    "レシーブ": ["レシーブ", "receive"],
+    "フットワーク": ["フットワーク", "footwork"],
+}
+
+# 評価値として扱うキー（これ以外の数値は "（1-5）" 付きのキーのみ）
+RATING_KEYS = {"評価", "総合評価", "rating", "score"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS technique_ratings (
+    output_id INTEGER NOT NULL REFERENCES stage_outputs (id) ON DELETE CASCADE,
+    player_id INTEGER REFERENCES players (id),
+    opponent TEXT,
+    technique TEXT NOT NULL,
+    rating REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (output_id, technique)
+);
+CREATE INDEX IF NOT EXISTS idx_technique_ratings_player ON technique_ratings (player_id, technique, created_at);
+"""
+
+
+def _technique_for(name: str) -> Optional[str]:
+    canonical = canonical_key(name).lower()
+    for technique, names in TECHNIQUES.items():
+        if any(canonical.startswith(prefix) for prefix in names):
+            return technique
+    return None
+
+
+def _rating(value: Any) -> Optional[float]:
+    """1-5 の評価値（数値、または "4" / "4.5" のような数値の文字列）。それ以外は None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)) or not 1 <= value <= 5:
+        return None
+    return float(value)
+
+
+def _scores(value: Any) -> List[float]:
+    """技術ごとの辞書から1-5の評価値を集める"""
+    if not isinstance(value, dict):
+        rating = _rating(value)
+        return [] if rating is None else [rating]
+    scores = []
+    for key, item in value.items():
+        if canonical_key(key) in RATING_KEYS or "1-5" in str(key):
+            rating = _rating(item)
+            if rating is not None:
+                scores.append(rating)
+    return scores
+
+
+def extract_ratings(analysis: Dict[str, Any]) -> Dict[str, float]:
+    """
+    分析結果から技術カテゴリごとの評価を取り出す
+
+    日本語キー（"2.技術分析" → "2.1_フォアハンドドライブ" → "スイング軌道の評価（1-5）" など）
+    と英語キー（"techniques" → "forehand_drive" → "rating"）の両方に対応する。
+    1つの技術に複数の評価項目がある場合と、同じカテゴリの技術が複数ある場合は平均する。
+
+    Args:
+        analysis: 分析結果
+
+    Returns:
+        技術カテゴリ → 評価（1-5）
+    """
+    if not isinstance(analysis, dict):
+        return {}
+    techniques = analysis.get("techniques")
+    if not isinstance(techniques, dict):
+        techniques = get_field(analysis, "技術分析")
+    if not isinstance(techniques, dict):
+        return {}
+
+    collected: Dict[str, List[float]] = {}
+    for name, value in techniques.items():
+        technique = _technique_for(name)
+        if technique:
+            collected.setdefault(technique, []).extend(_scores(value))
+
+    return {
+        technique: round(sum(scores) / len(scores), 3)
+        for technique, scores in collected.items()
+        if scores
+    }
+
+
+def index_ratings(conn, rows: Iterable[Tuple[int, Optional[int], Optional[str], str, Dict[str, float]]]):
+    """
+    技術評価を時系列テーブルに登録（呼び出し側のトランザクション内で使う）
+
+    Args:
+        conn: sqlite3.Connection
+        rows: (stage_outputs.id, 選手ID, 対戦相手, 日時, extract_ratings の戻り値) の並び
+    """
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO technique_ratings (output_id, player_id, opponent, technique, rating, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (output_id, player_id, opponent, technique, rating, created_at)
+            for output_id, player_id, opponent, created_at, ratings in rows
+            for technique, rating in (ratings or {}).items()
+        ]
+    )
+
+
+def rebuild_index(conn) -> int:
+    """
+    保存済みのすべての分析結果から技術評価を取り出し直す（呼び出し側のトランザクション内で使う）
+
+    Args:
+        conn: sqlite3.Connection
+
+    Returns:
+        評価を登録した分析結果の件数
+    """
+    conn.execute("DELETE FROM technique_ratings")
+    rows = [
+        (row["id"], row["player_id"], json.loads(row["params"] or "{}").get("opponent"),
+         row["created_at"], extract_ratings(json.loads(row["data"])))
+        for row in conn.execute(
+            """
+            SELECT o.id, o.data, r.created_at, r.player_id, r.params
+            FROM stage_outputs o JOIN runs r ON r.id = o.run_id
+            WHERE o.stage = 'analysis'
+            """
+        )
+    ]
+    index_ratings(conn, rows)
+    return sum(1 for row in rows if row[-1])
+
+
+def _rolling_mean(values, window: int):
+    """末尾揃えの移動平均（先頭の window-1 件は、そこまでの平均）"""
+    import numpy as np
+
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    starts = np.arange(1, len(values) + 1) - counts
+    return (cumsum[1:] - cumsum[starts]) / counts
+
+
+class RatingTrends:
+    """
+    技術評価の推移の集計
+
+    technique_ratings テーブル（分析結果の保存時に ResultsStore が登録する）だけを読み、
+    結果JSONは解析しない。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+        """
+        # テーブルの作成は ResultsStore に任せる
+        from .results_store import ResultsStore
+
+        self.db_path = db_path
+        ResultsStore(db_path)
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    def series(
+        self,
+        player: str,
+        technique: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> Dict[str, Dict[str, list]]:
+        """
+        選手の技術評価の時系列を取得
+
+        Args:
+            player: 選手名
+            technique: 技術カテゴリ（省略時はすべて）
+            since: この日時以降（ISO形式）
+            until: この日時より前（ISO形式）
+
+        Returns:
+            技術カテゴリ → {"dates", "ratings", "opponents"}（日時の古い順）
+        """
+        conditions = ["p.name = ?"]
+        params: List[Any] = [player]
+        if technique:
+            conditions.append("t.technique = ?")
+            params.append(technique)
+        if since:
+            conditions.append("t.created_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("t.created_at < ?")
+            params.append(until)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT t.technique, t.created_at, t.rating, t.opponent
+                FROM technique_ratings t
+                JOIN players p ON p.id = t.player_id
+                WHERE {" AND ".join(conditions)}
+                ORDER BY t.technique, t.created_at, t.output_id
+                """,
+                params
+            ).fetchall()
+
+        series: Dict[str, Dict[str, list]] = {}
+        for name, created_at, rating, opponent in rows:
+            item = series.setdefault(name, {"dates": [], "ratings": [], "opponents": []})
+            item["dates"].append(created_at)
+            item["ratings"].append(rating)
+            item["opponents"].append(opponent)
+        return series
+
+    def trend(
+        self,
+        player: str,
+        technique: Optional[str] = None,
+        window: int = 5,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        技術評価の推移を集計（移動平均・変化量・対戦相手別）
+
+        Args:
+            player: 選手名
+            technique: 技術カテゴリ（省略時はすべて）
+            window: 移動平均の試合数
+            since: この日時以降（ISO形式）
+            until: この日時より前（ISO形式）
+
+        Returns:
+            技術カテゴリ → 集計結果の辞書
+            （count / latest / mean / rolling / rolling_latest / delta_last /
+              delta_window / by_opponent / dates / ratings）
+        """
+        import numpy as np
+
+        window = max(1, window)
+        trends = {}
+        for name, data in self.series(player, technique, since, until).items():
+            ratings = np.asarray(data["ratings"], dtype=float)
+            rolling = _rolling_mean(ratings, window)
+
+            opponents = np.asarray([opponent or "" for opponent in data["opponents"]])
+            labels, inverse = np.unique(opponents, return_inverse=True)
+            counts = np.bincount(inverse)
+            sums = np.bincount(inverse, weights=ratings)
+
+            trends[name] = {
+                "count": int(len(ratings)),
+                "latest": float(ratings[-1]),
+                "mean": float(ratings.mean()),
+                "rolling": rolling.round(3).tolist(),
+                "rolling_latest": float(rolling[-1]),
+                # 直前の試合からの変化
+                "delta_last": float(ratings[-1] - ratings[-2]) if len(ratings) > 1 else None,
+                # 直近 window 試合の平均と、その前の window 試合の平均の差
+                "delta_window": (
+                    float(rolling[-1] - rolling[-1 - window]) if len(ratings) > window else None
+                ),
+                "by_opponent": {
+                    label or None: {"count": int(count), "mean": round(float(total / count), 3)}
+                    for label, count, total in zip(labels.tolist(), counts, sums)
+                },
+                "dates": data["dates"],
+                "ratings": ratings.tolist(),
+            }
+        return trends
@@ -0,0 +1,261 @@
+"""
+Result Index Module
+動画ハッシュとパラメータをキーに、各ステージの出力ファイルを索引する
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from .artifacts import load_json
+from .writer import atomic_write_json
+
+
+INDEX_FILENAME = "result_index.json"
+
+# 同一プロセス内の複数スレッドからの更新を直列化する
+_SAVE_LOCK = threading.Lock()
+
+# 各ステージの結果が、どの出力ファイルのどのキーに格納され得るか
+STAGE_WRAPPER_KEYS = {
+    "analysis": ["analysis", "self_analysis"],
+    "opponent_analysis": ["opponent_analysis"],
+    "strategy": ["strategy"],
+    "practice_plan": ["practice_plan"],
+}
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    ファイル内容のSHA-256ハッシュを計算
+
+    Args:
+        file_path: ファイルのパス
+        chunk_size: 読み込み単位（バイト）
+
+    Returns:
+        16進数のハッシュ文字列
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def canonical_json(data: Any) -> str:
+    """
+    キー順序・空白を正規化したJSON文字列を生成
+
+    Args:
+        data: JSON化可能なデータ
+
+    Returns:
+        JSON文字列
+    """
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def content_hash(data: Any) -> str:
+    """
+    JSON化可能なデータの内容ハッシュを計算（キー順序に依存しない）
+
+    Args:
+        data: ハッシュ対象のデータ
+
+    Returns:
+        16進数のハッシュ文字列
+    """
+    return hashlib.sha256(canonical_json(data).encode("utf-8")).hexdigest()
+
+
+def load_stage_file(file_path: str, stage: str) -> Dict[str, Any]:
+    """
+    結果ファイルを読み込み、指定ステージの結果を取り出す
+
+    full_analysis_*.json や strategy_*.json のようにステージ結果を
+    包んだファイルが渡された場合は、該当するキーの中身を返す。
+
+    Args:
+        file_path: 結果ファイルのパス
+        stage: ステージ名（analysis / strategy / practice_plan など）
+
+    Returns:
+        ステージ結果の辞書
+    """
+    data = load_json(file_path)
+
+    if isinstance(data, dict):
+        for key in STAGE_WRAPPER_KEYS.get(stage, []):
+            if isinstance(data.get(key), dict):
+                return data[key]
+    return data
+
+
+class ResultIndex:
+    """
+    ステージ出力の索引クラス
+
+    出力ディレクトリの result_index.json に、
+    「ステージ名 + キー（動画ハッシュ・パラメータ）」から
+    「結果ファイルとその中のキー」への対応を保持する。
+    ResultsStore が渡された場合は、まずデータベースを検索する。
+    """
+
+    def __init__(self, output_dir: str = "data/results", store=None):
+        """
+        初期化
+
+        Args:
+            output_dir: 出力ディレクトリ（索引ファイルの保存先）
+            store: ResultsStore（省略時はJSONの索引のみ）
+        """
+        self.output_dir = Path(output_dir)
+        self.index_path = self.output_dir / INDEX_FILENAME
+        self.store = store
+        self._data = self._load()
+        self._removed = set()
+        self._store_hits: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        """索引ファイルを読み込む（存在しない・壊れている場合は空）"""
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    data.setdefault("videos", {})
+                    data.setdefault("entries", {})
+                    return data
+            except (json.JSONDecodeError, OSError):
+                pass
+        return {"version": 1, "videos": {}, "entries": {}}
+
+    def _save(self):
+        """
+        索引ファイルを書き出す（一時ファイル経由で置き換え）
+
+        他のインスタンスが先に書き込んだエントリを失わないよう、
+        ディスク上の最新の内容に自分の内容を重ねてから書き出す。
+        """
+        with _SAVE_LOCK:
+            on_disk = self._load()
+            on_disk["videos"].update(self._data["videos"])
+            on_disk["entries"].update(self._data["entries"])
+            for key in self._removed:
+                on_disk["entries"].pop(key, None)
+            self._data = on_disk
+            atomic_write_json(str(self.index_path), self._data)
+
+    def video_hash(self, video_path: str) -> str:
+        """
+        動画ファイルのハッシュを取得
+
+        サイズと更新時刻が変わっていなければ、前回計算したハッシュを再利用する。
+
+        Args:
+            video_path: 動画ファイルのパス
+
+        Returns:
+            動画内容のSHA-256ハッシュ
+        """
+        path = str(Path(video_path).resolve())
+        stat = os.stat(path)
+        cached = self._data["videos"].get(path)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return cached["sha256"]
+
+        sha256 = compute_file_hash(path)
+        self._data["videos"][path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256
+        }
+        self._save()
+        return sha256
+
+    @staticmethod
+    def make_key(stage: str, **params) -> str:
+        """
+        ステージ名とパラメータから索引キーを生成
+
+        Args:
+            stage: ステージ名
+            **params: 結果を一意に決めるパラメータ（動画ハッシュ、選手名など）
+
+        Returns:
+            索引キー
+        """
+        return f"{stage}:{content_hash(params)}"
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        索引キーに対応する既存の結果を取得
+
+        参照先のファイルが消えている場合は索引から取り除き、Noneを返す。
+
+        Args:
+            key: make_key で生成した索引キー
+
+        Returns:
+            既存の結果（見つからなければNone）
+        """
+        if self.store is not None:
+            hit = self.store.lookup(key)
+            if hit is not None:
+                data, run_id = hit
+                self._store_hits[key] = f"{self.store.db_path or 'database'} (run {run_id})"
+                return data
+
+        entry = self._data["entries"].get(key)
+        if not entry:
+            return None
+
+        try:
+            data = load_json(entry["file"])
+        except (OSError, json.JSONDecodeError):
+            del self._data["entries"][key]
+            self._removed.add(key)
+            self._save()
+            return None
+
+        field = entry.get("field")
+        if field:
+            data = data.get(field) if isinstance(data, dict) else None
+        return data if isinstance(data, dict) else None
+
+    def lookup_file(self, key: str) -> Optional[str]:
+        """
+        索引キーに対応する結果ファイルのパスを取得
+
+        Args:
+            key: 索引キー
+
+        Returns:
+            結果ファイルのパス（データベースから見つかった場合はその実行ID）
+        """
+        if key in self._store_hits:
+            return self._store_hits[key]
+        entry = self._data["entries"].get(key)
+        return entry["file"] if entry else None
+
+    def record(self, key: str, file_path: str, field: Optional[str] = None):
+        """
+        結果ファイルを索引に登録
+
+        Args:
+            key: 索引キー
+            file_path: 結果を保存したファイルのパス
+            field: ファイル内で結果が格納されているキー（ファイル全体ならNone）
+        """
+        self._removed.discard(key)
+        self._data["entries"][key] = {
+            "file": str(Path(file_path).resolve()),
+            "field": field,
+            "recorded_at": datetime.now().isoformat()
+        }
+        self._save()
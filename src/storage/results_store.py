@@ -0,0 +1,408 @@
+"""
+Results Store Module
+分析結果をSQLiteに保存し、選手・日付・動画ハッシュで検索する
+"""
+
+import json
+from contextlib import closing
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from .database import connect
+from .result_index import content_hash
+from . import ratings, search
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    team TEXT NOT NULL DEFAULT '',
+    UNIQUE (name, team)
+);
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sha256 TEXT NOT NULL UNIQUE,
+    path TEXT,
+    size INTEGER,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    command TEXT NOT NULL,
+    player_id INTEGER REFERENCES players (id),
+    video_id INTEGER REFERENCES videos (id),
+    model TEXT,
+    params TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_outputs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    cache_key TEXT,
+    content_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_player_date ON runs (player_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_video ON runs (video_id);
+CREATE INDEX IF NOT EXISTS idx_stage_outputs_stage ON stage_outputs (stage, created_at);
+CREATE INDEX IF NOT EXISTS idx_stage_outputs_cache_key ON stage_outputs (cache_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_stage_outputs_content_hash ON stage_outputs (content_hash);
+"""
+
+# 結果の保存と同じトランザクションで更新する派生テーブル: (テーブル名, スキーマ, 再構築関数)
+DERIVED_TABLES = [
+    ("result_search", search.SCHEMA, search.rebuild_index),
+    ("technique_ratings", ratings.SCHEMA, ratings.rebuild_index),
+]
+
+
+class ResultsStore:
+    """
+    SQLiteベースの分析結果リポジトリ
+
+    テーブル構成:
+    - players: 選手（名前 + 所属）
+    - videos: 動画（内容のSHA-256で一意）
+    - runs: 1回のコマンド実行（選手・動画・モデル・日時）
+    - stage_outputs: 実行ごとのステージ結果（analysis / strategy / practice_plan など）
+    - result_search: テキスト項目の全文検索索引（storage.search）
+    - technique_ratings: 分析結果の技術評価の時系列（storage.ratings）
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+        """
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            for table, schema, rebuild in DERIVED_TABLES:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = ?", (table,)
+                ).fetchone()
+                conn.executescript(schema)
+                if exists:
+                    continue
+                # 後から追加した索引は、保存済みの結果から作る
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    rebuild(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    @staticmethod
+    def _get_or_create_player(conn, name: Optional[str], team: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+        conn.execute(
+            "INSERT OR IGNORE INTO players (name, team) VALUES (?, ?)",
+            (name, team or "")
+        )
+        return conn.execute(
+            "SELECT id FROM players WHERE name = ? AND team = ?", (name, team or "")
+        ).fetchone()["id"]
+
+    @staticmethod
+    def _get_or_create_video(conn, sha256: Optional[str], path: Optional[str], size: Optional[int], now: str) -> Optional[int]:
+        if not sha256:
+            return None
+        conn.execute(
+            "INSERT OR IGNORE INTO videos (sha256, path, size, created_at) VALUES (?, ?, ?, ?)",
+            (sha256, path, size, now)
+        )
+        return conn.execute("SELECT id FROM videos WHERE sha256 = ?", (sha256,)).fetchone()["id"]
+
+    def save_run(
+        self,
+        run_id: str,
+        command: str,
+        outputs: Dict[str, Tuple[Dict[str, Any], Optional[str]]],
+        player: Optional[str] = None,
+        team: Optional[str] = None,
+        video_hash: Optional[str] = None,
+        video_path: Optional[str] = None,
+        video_size: Optional[int] = None,
+        model: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        created_at: Optional[str] = None
+    ):
+        """
+        1回の実行とそのステージ結果を1トランザクションで保存
+
+        Args:
+            run_id: 実行ID
+            command: コマンド名（analyze / strategy / practice / full など）
+            outputs: ステージ名 → (結果, 索引キー) の辞書
+            player: 選手名
+            team: 所属チーム名
+            video_hash: 動画のSHA-256
+            video_path: 動画ファイルのパス
+            video_size: 動画ファイルのサイズ
+            model: 使用したモデル名
+            params: その他の実行パラメータ
+            created_at: 実行日時（ISO形式。省略時は現在時刻）
+        """
+        now = created_at or datetime.now().isoformat()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                player_id = self._get_or_create_player(conn, player, team)
+                video_id = self._get_or_create_video(conn, video_hash, video_path, video_size, now)
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO runs (id, command, player_id, video_id, model, params, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (run_id, command, player_id, video_id, model,
+                     json.dumps(params or {}, ensure_ascii=False), now)
+                )
+                opponent = (params or {}).get("opponent")
+                search_rows = []
+                rating_rows = []
+                for stage, (data, cache_key) in outputs.items():
+                    if data is None:
+                        continue
+                    # 置き換える結果は先に削除し、派生テーブルの行も連動して消す
+                    conn.execute("DELETE FROM stage_outputs WHERE run_id = ? AND stage = ?", (run_id, stage))
+                    cursor = conn.execute(
+                        """
+                        INSERT INTO stage_outputs (run_id, stage, cache_key, content_hash, data, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (run_id, stage, cache_key, content_hash(data),
+                         json.dumps(data, ensure_ascii=False), now)
+                    )
+                    search_rows.append((cursor.lastrowid, search.build_search_row(data)))
+                    if stage == "analysis":
+                        rating_rows.append((cursor.lastrowid, player_id, opponent, now, ratings.extract_ratings(data)))
+                search.index_outputs(conn, search_rows)
+                ratings.index_ratings(conn, rating_rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def content_hashes(self) -> Set[str]:
+        """
+        保存済みのステージ結果の内容ハッシュを取得（重複排除用）
+
+        Returns:
+            内容ハッシュの集合
+        """
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute("SELECT DISTINCT content_hash FROM stage_outputs")}
+
+    def insert_runs(self, runs: List[Dict[str, Any]]) -> int:
+        """
+        シリアライズ済みの実行をまとめて1トランザクションで保存（一括取り込み用）
+
+        同じ実行IDが既にあれば、その実行は無視する。
+
+        Args:
+            runs: 実行の辞書のリスト。各要素は id / command / player / team /
+                created_at / params と、(ステージ名, 内容ハッシュ, 結果JSON, 検索索引の行,
+                技術評価) のリスト outputs を持つ
+
+        Returns:
+            保存したステージ結果の件数
+        """
+        if not runs:
+            return 0
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                players: Dict[Tuple[str, str], Optional[int]] = {}
+                run_rows = []
+                output_rows = []
+                search_rows = {}
+                rating_rows = {}
+                for run in runs:
+                    player_key = (run.get("player") or "", run.get("team") or "")
+                    if player_key not in players:
+                        players[player_key] = self._get_or_create_player(conn, *player_key)
+                    run_rows.append((
+                        run["id"], run["command"], players[player_key], run.get("model"),
+                        json.dumps(run.get("params") or {}, ensure_ascii=False), run["created_at"]
+                    ))
+                    for stage, digest, text, search_row, run_ratings in run["outputs"]:
+                        output_rows.append((run["id"], stage, None, digest, text, run["created_at"]))
+                        search_rows[digest] = search_row
+                        if run_ratings:
+                            rating_rows[digest] = (
+                                players[player_key], (run.get("params") or {}).get("opponent"),
+                                run["created_at"], run_ratings
+                            )
+
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO runs (id, command, player_id, model, params, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    run_rows
+                )
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM stage_outputs").fetchone()[0]
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO stage_outputs (run_id, stage, cache_key, content_hash, data, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    output_rows
+                )
+                # 今回挿入した行のIDを内容ハッシュから引き、検索索引に登録
+                inserted_rows = conn.execute(
+                    "SELECT id, content_hash FROM stage_outputs WHERE id > ?", (last_id,)
+                ).fetchall()
+                search.index_outputs(conn, [(row["id"], search_rows.get(row["content_hash"])) for row in inserted_rows])
+                ratings.index_ratings(conn, [
+                    (row["id"],) + rating_rows[row["content_hash"]]
+                    for row in inserted_rows if row["content_hash"] in rating_rows
+                ])
+                inserted = len(inserted_rows)
+                conn.execute("COMMIT")
+                return inserted
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def lookup(self, cache_key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        索引キーに対応する最新のステージ結果を取得
+
+        Args:
+            cache_key: ResultIndex.make_key で生成したキー
+
+        Returns:
+            (結果, 実行ID) のタプル（見つからなければNone）
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                SELECT data, run_id FROM stage_outputs
+                WHERE cache_key = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT 1
+                """,
+                (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["data"]), row["run_id"]
+
+    def find_outputs(
+        self,
+        stage: Optional[str] = None,
+        player: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        video_hash: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_data: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        条件に合うステージ結果を新しい順に検索
+
+        Args:
+            stage: ステージ名
+            player: 選手名
+            since: この日時以降（ISO形式、例: 2026-03-01）
+            until: この日時より前（ISO形式）
+            video_hash: 動画のSHA-256
+            limit: 最大件数
+            include_data: 結果本体（JSON）を含めるか
+
+        Returns:
+            結果の辞書のリスト
+        """
+        conditions = []
+        params: List[Any] = []
+        if stage:
+            conditions.append("o.stage = ?")
+            params.append(stage)
+        if player:
+            conditions.append("p.name = ?")
+            params.append(player)
+        if since:
+            conditions.append("r.created_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("r.created_at < ?")
+            params.append(until)
+        if video_hash:
+            conditions.append("v.sha256 = ?")
+            params.append(video_hash)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = "LIMIT ?" if limit else ""
+        if limit:
+            params.append(limit)
+
+        data_column = ", o.data" if include_data else ""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT o.id, o.run_id, o.stage, o.content_hash, r.command, r.model, r.created_at,
+                       p.name AS player, p.team AS team, v.sha256 AS video_hash, v.path AS video_path
+                       {data_column}
+                FROM stage_outputs o
+                JOIN runs r ON r.id = o.run_id
+                LEFT JOIN players p ON p.id = r.player_id
+                LEFT JOIN videos v ON v.id = r.video_id
+                {where}
+                ORDER BY r.created_at DESC, o.id DESC
+                {limit_clause}
+                """,
+                params
+            ).fetchall()
+
+        results = []
+        for row in rows:
+            item = dict(row)
+            if include_data:
+                item["data"] = json.loads(item["data"])
+            results.append(item)
+        return results
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        実行とそのステージ結果を取得
+
+        Args:
+            run_id: 実行ID
+
+        Returns:
+            実行情報と outputs（ステージ名 → 結果）の辞書
+        """
+        with closing(self._connect()) as conn:
+            run = conn.execute(
+                """
+                SELECT r.*, p.name AS player, p.team AS team, v.sha256 AS video_hash, v.path AS video_path
+                FROM runs r
+                LEFT JOIN players p ON p.id = r.player_id
+                LEFT JOIN videos v ON v.id = r.video_id
+                WHERE r.id = ?
+                """,
+                (run_id,)
+            ).fetchone()
+            if run is None:
+                return None
+            outputs = conn.execute(
+                "SELECT stage, data FROM stage_outputs WHERE run_id = ?", (run_id,)
+            ).fetchall()
+
+        result = dict(run)
+        result["params"] = json.loads(result["params"] or "{}")
+        result["outputs"] = {row["stage"]: json.loads(row["data"]) for row in outputs}
+        return result
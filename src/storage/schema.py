@@ -0,0 +1,200 @@
+"""
+Schema Module
+結果JSONのスキーマ（日本語キー / 英語キー）の判定と、ステージ結果の取り出し
+
+取り込み時に両方のスキーマを1つの形式に書き換えることはしない。ステージ結果は元のキーのまま
+保存し（パイプラインが save_run で保存する結果と内容ハッシュを揃え、重複を判定するため）、
+スキーマの違いは読み出す側（get_field、ratings.extract_ratings、search.extract_fields）で吸収する。
+判定したスキーマは実行の params["schema"] に記録する。
+"""
+
+import re
+from typing import Optional, Dict, Any, List
+
+from .result_index import STAGE_WRAPPER_KEYS
+
+
+# 日本語キー: VideoAnalyzer / LLMAnalyzer のプロンプトが返す形式
+SCHEMA_JA = "ja"
+# 英語キー: ReportGenerator が前提とする形式
+SCHEMA_EN = "en"
+
+# 英語キー形式で、各ステージに特有のキー
+EN_STAGE_KEYS = {
+    "analysis": {"player_info", "techniques", "scoring_patterns", "losing_patterns", "overall_assessment"},
+    "strategy": {"serve_strategy", "receive_strategy", "rally_strategy", "key_points"},
+    "practice_plan": {"priority_issues", "weekly_plan", "drills", "goals"},
+}
+
+# 日本語キー形式で、各ステージに特有のキー（番号を除いた形）
+JA_STAGE_KEYS = {
+    "analysis": {"技術分析", "戦術分析", "基本情報"},
+    "strategy": {"サーブ戦略", "レシーブ戦略", "ラリー戦略", "戦略の基本方針"},
+    "practice_plan": {"優先課題", "週間練習計画", "具体的なドリル", "目標設定"},
+}
+
+# 選手名・日付が入り得るキー
+PLAYER_KEYS = ["player", "選手名"]
+TEAM_KEYS = ["team", "所属"]
+DATE_KEYS = ["timestamp", "分析日", "評価日", "戦略立案日", "練習計画作成日"]
+
+# "2.技術分析" / "2.1_フォアハンドドライブ" / "5.キーポイント（...）" の先頭番号
+_KEY_NUMBER = re.compile(r"^\d+(?:\.\d+)*[._\s]*")
+# 末尾の補足（"（1-5）"、"(トップ3)" など）
+_KEY_SUFFIX = re.compile(r"[（(][^）)]*[）)]$")
+_JAPANESE = re.compile(r"[぀-ヿ一-鿿]")
+
+
+def canonical_key(key: str) -> str:
+    """
+    キーから先頭の番号と末尾の補足を取り除く
+
+    例: "2.1_フォアハンドドライブ" → "フォアハンドドライブ"、
+        "スイング軌道の評価（1-5）" → "スイング軌道の評価"
+
+    Args:
+        key: 元のキー
+
+    Returns:
+        正規化したキー
+    """
+    key = _KEY_NUMBER.sub("", str(key)).strip()
+    return _KEY_SUFFIX.sub("", key).strip()
+
+
+def find_key(data: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    正規化したキーが name と一致する（または name で始まる）キーを探す
+
+    Args:
+        data: 探索する辞書
+        name: 探すキー（番号なし）
+
+    Returns:
+        元のキー（見つからなければNone）
+    """
+    fallback = None
+    for key in data:
+        canonical = canonical_key(key)
+        if canonical == name:
+            return key
+        if fallback is None and canonical.startswith(name):
+            fallback = key
+    return fallback
+
+
+def get_field(data: Dict[str, Any], *path: str) -> Any:
+    """
+    番号付きキーを気にせずに入れ子の値を取り出す
+
+    例: get_field(analysis, "技術分析", "フォアハンドドライブ")
+
+    Args:
+        data: 結果の辞書
+        path: 番号を除いたキーの並び
+
+    Returns:
+        値（見つからなければNone）
+    """
+    current: Any = data
+    for name in path:
+        if not isinstance(current, dict):
+            return None
+        key = name if name in current else find_key(current, name)
+        if key is None:
+            return None
+        current = current[key]
+    return current
+
+
+def detect_schema(data: Dict[str, Any]) -> Optional[str]:
+    """
+    結果の辞書が日本語キー形式か英語キー形式かを判定
+
+    Args:
+        data: ステージ結果の辞書
+
+    Returns:
+        SCHEMA_JA / SCHEMA_EN（判定できなければNone）
+    """
+    if not isinstance(data, dict) or not data:
+        return None
+    keys = set(data)
+    if any(keys & stage_keys for stage_keys in EN_STAGE_KEYS.values()):
+        return SCHEMA_EN
+    if any(_JAPANESE.search(str(key)) for key in keys):
+        return SCHEMA_JA
+    return None
+
+
+def detect_stage(data: Dict[str, Any]) -> Optional[str]:
+    """
+    包まれていないステージ結果がどのステージのものかを判定
+
+    Args:
+        data: ステージ結果の辞書
+
+    Returns:
+        ステージ名（判定できなければNone）
+    """
+    if not isinstance(data, dict):
+        return None
+    keys = set(data)
+    for stage, stage_keys in EN_STAGE_KEYS.items():
+        if keys & stage_keys:
+            return stage
+    canonical = {canonical_key(key) for key in keys}
+    for stage, stage_keys in JA_STAGE_KEYS.items():
+        if canonical & stage_keys:
+            return stage
+    return None
+
+
+def split_stages(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    結果ファイルの内容をステージごとの結果に分ける
+
+    full_analysis_*.json / strategy_*.json のような包んだ形式と、
+    analysis_*.json のようなステージ結果そのものの両方に対応する。
+
+    Args:
+        data: 結果ファイルの内容
+
+    Returns:
+        ステージ名 → 結果 の辞書
+    """
+    if not isinstance(data, dict):
+        return {}
+
+    stages = {}
+    for stage, keys in STAGE_WRAPPER_KEYS.items():
+        for key in keys:
+            if isinstance(data.get(key), dict):
+                stages[stage] = data[key]
+                break
+    if stages:
+        return stages
+
+    stage = detect_stage(data)
+    return {stage: data} if stage else {}
+
+
+def first_value(sources: List[Dict[str, Any]], keys: List[str]) -> Optional[str]:
+    """
+    複数の辞書から、指定キーのうち最初に見つかった文字列値を返す
+
+    Args:
+        sources: 探索する辞書のリスト（先頭を優先）
+        keys: 探すキー（番号なし）
+
+    Returns:
+        値（見つからなければNone）
+    """
+    for source in sources:
+        if not isinstance(source, dict):
+            continue
+        for name in keys:
+            value = get_field(source, name)
+            if isinstance(value, str) and value:
+                return value
+    return None
@@ -0,0 +1,314 @@
+"""
+Search Module
+結果データベースのテキスト項目（得点パターン・失点パターン・改善点・キーポイント）の全文検索
+"""
+
+import json
+import re
+from contextlib import closing
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .database import connect
+from .schema import canonical_key
+
+
+# 検索対象の項目 → (FTS5の列名, 項目とみなすキー（番号なし・前方一致）)
+SEARCH_FIELDS = {
+    "得点パターン": ("scoring", ["得点パターン", "scoring_patterns"]),
+    "失点パターン": ("losing", ["失点パターン", "losing_patterns"]),
+    "改善点": ("improvement", ["改善点", "改善すべき点", "優先課題", "weaknesses",
+                               "priority_improvements", "priority_issues"]),
+    "キーポイント": ("key_points", ["キーポイント", "key_points"]),
+}
+
+# rowid は stage_outputs.id と一致させ、結果の削除・置き換えに追従させる
+SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS result_search USING fts5(
+    {", ".join(column for column, _ in SEARCH_FIELDS.values())},
+    tokenize = 'unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS stage_outputs_search_delete AFTER DELETE ON stage_outputs BEGIN
+    DELETE FROM result_search WHERE rowid = old.id;
+END;
+"""
+
+# 日本語の文字の連続（bigram に分割する）と、英数字の単語
+_CJK_RUN = re.compile(r"[぀-ヿㇰ-ㇿ㐀-䶿一-鿿豈-﫿々〆ー]+")
+_WORD = re.compile(r"[0-9A-Za-z０-９Ａ-Ｚａ-ｚ]+")
+_TOKEN = re.compile(f"{_CJK_RUN.pattern}|{_WORD.pattern}")
+
+
+def ngram_tokens(text: str, for_query: bool = False) -> List[str]:
+    """
+    テキストを検索用のトークンに分割
+
+    日本語は分かち書きせずに2文字ずつずらした bigram にする
+    （"台上のミス" → "台上 上の のミ ミス"）。英数字は小文字の単語のまま。
+    索引側では1文字の検索にも当たるよう、日本語の連続の末尾に1文字のトークンを加える。
+
+    Args:
+        text: 対象テキスト
+        for_query: 検索語として分割するか
+
+    Returns:
+        トークンのリスト
+    """
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        run = match.group()
+        if not _CJK_RUN.fullmatch(run):
+            tokens.append(run.lower())
+            continue
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        if not for_query:
+            tokens.append(run[-1])
+    return tokens
+
+
+def _collect_strings(value: Any, out: List[str]):
+    """値に含まれる文字列をすべて集める"""
+    if isinstance(value, str):
+        out.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_strings(item, out)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_strings(item, out)
+
+
+def _field_for_key(key: str) -> Optional[str]:
+    canonical = canonical_key(key)
+    for field, (_, names) in SEARCH_FIELDS.items():
+        if any(canonical.startswith(name) for name in names):
+            return field
+    return None
+
+
+def extract_fields(data: Any) -> Dict[str, List[str]]:
+    """
+    ステージ結果から検索対象の項目のテキストを取り出す
+
+    日本語キー（番号付きを含む）と英語キーの両方に対応し、
+    入れ子のどの深さにある項目も対象にする。
+
+    Args:
+        data: ステージ結果
+
+    Returns:
+        項目名 → テキストのリスト
+    """
+    fields: Dict[str, List[str]] = {}
+
+    def walk(value: Any):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                field = _field_for_key(key)
+                if field:
+                    _collect_strings(item, fields.setdefault(field, []))
+                else:
+                    walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(data)
+    return fields
+
+
+def build_search_row(data: Any) -> Optional[Tuple[str, ...]]:
+    """
+    ステージ結果から result_search の1行（列順のトークン列）を作る
+
+    Args:
+        data: ステージ結果
+
+    Returns:
+        列の値のタプル（検索対象の項目がなければNone）
+    """
+    fields = extract_fields(data)
+    if not fields:
+        return None
+    return tuple(
+        " ".join(token for text in fields.get(field, []) for token in ngram_tokens(text))
+        for field in SEARCH_FIELDS
+    )
+
+
+def index_outputs(conn, rows: Iterable[Tuple[int, Optional[Tuple[str, ...]]]]):
+    """
+    ステージ結果を検索索引に登録（呼び出し側のトランザクション内で使う）
+
+    Args:
+        conn: sqlite3.Connection
+        rows: (stage_outputs.id, build_search_row の戻り値) の並び
+    """
+    columns = ", ".join(column for column, _ in SEARCH_FIELDS.values())
+    placeholders = ", ".join("?" for _ in SEARCH_FIELDS)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO result_search (rowid, {columns}) VALUES (?, {placeholders})",
+        [(output_id,) + row for output_id, row in rows if row is not None]
+    )
+
+
+def rebuild_index(conn) -> int:
+    """
+    保存済みのすべての結果から検索索引を作り直す（呼び出し側のトランザクション内で使う）
+
+    Args:
+        conn: sqlite3.Connection
+
+    Returns:
+        登録したステージ結果の件数
+    """
+    conn.execute("DELETE FROM result_search")
+    rows = [
+        (row["id"], build_search_row(json.loads(row["data"])))
+        for row in conn.execute("SELECT id, data FROM stage_outputs")
+    ]
+    index_outputs(conn, rows)
+    return sum(1 for _, row in rows if row is not None)
+
+
+def build_match_query(query: str, field: Optional[str] = None) -> Optional[str]:
+    """
+    検索語を FTS5 の MATCH 式に変換
+
+    空白区切りの語はすべて含むもの（AND）を探す。各語は bigram の連続（フレーズ）として照合する。
+
+    Args:
+        query: 検索語
+        field: 対象の項目名（省略時はすべての項目）
+
+    Returns:
+        MATCH 式（検索できる語がなければNone）
+    """
+    terms = []
+    for word in query.split():
+        tokens = ngram_tokens(word, for_query=True)
+        if not tokens:
+            continue
+        if len(tokens) == 1 and len(tokens[0]) == 1 and _CJK_RUN.fullmatch(tokens[0]):
+            # 1文字の語は、その文字で始まるトークンの前方一致
+            terms.append(f'"{tokens[0]}"*')
+        else:
+            terms.append('"' + " ".join(tokens) + '"')
+    if not terms:
+        return None
+
+    expression = " AND ".join(terms)
+    if field:
+        column = SEARCH_FIELDS[field][0]
+        return f"{{{column}}} : ({expression})"
+    return expression
+
+
+class SearchIndex:
+    """
+    結果データベースの全文検索
+
+    索引への登録は ResultsStore が結果の保存と同じトランザクションで行う。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+        """
+        # 結果テーブルと検索索引の作成は ResultsStore に任せる
+        from .results_store import ResultsStore
+
+        self.db_path = db_path
+        ResultsStore(db_path)
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    def rebuild(self) -> int:
+        """
+        保存済みのすべての結果から検索索引を作り直す
+
+        Returns:
+            登録したステージ結果の件数
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = rebuild_index(conn)
+                conn.execute("COMMIT")
+                return count
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def search(
+        self,
+        query: str,
+        field: Optional[str] = None,
+        player: Optional[str] = None,
+        stage: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        テキスト項目を全文検索
+
+        Args:
+            query: 検索語（空白区切りでAND）
+            field: 対象の項目名（得点パターン / 失点パターン / 改善点 / キーポイント）
+            player: 選手名で絞り込み
+            stage: ステージ名で絞り込み
+            limit: 最大件数
+
+        Returns:
+            一致した結果の辞書のリスト（関連度順）。各要素の matches は
+            項目名 → 検索語を含むテキストのリスト
+        """
+        expression = build_match_query(query, field)
+        if expression is None:
+            return []
+
+        conditions = ["result_search MATCH ?"]
+        params: List[Any] = [expression]
+        if player:
+            conditions.append("p.name = ?")
+            params.append(player)
+        if stage:
+            conditions.append("o.stage = ?")
+            params.append(stage)
+        params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT o.id, o.run_id, o.stage, o.data, r.command, r.created_at,
+                       p.name AS player, p.team AS team
+                FROM result_search s
+                JOIN stage_outputs o ON o.id = s.rowid
+                JOIN runs r ON r.id = o.run_id
+                LEFT JOIN players p ON p.id = r.player_id
+                WHERE {" AND ".join(conditions)}
+                ORDER BY s.rank
+                LIMIT ?
+                """,
+                params
+            ).fetchall()
+
+        words = query.split()
+        results = []
+        for row in rows:
+            item = dict(row)
+            fields = extract_fields(json.loads(item.pop("data")))
+            item["matches"] = {}
+            for name, texts in fields.items():
+                if field and name != field:
+                    continue
+                hits = [text for text in texts if any(word.lower() in text.lower() for word in words)]
+                if hits:
+                    item["matches"][name] = hits
+            results.append(item)
+        return results
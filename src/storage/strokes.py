@@ -0,0 +1,117 @@
+"""
+Strokes Module
+打球イベント（動画ごとの打球の時刻と種類）の索引
+"""
+
+from contextlib import closing
+from typing import Optional, Dict, Any, List, Iterable
+
+from .database import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stroke_events (
+    video_hash TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    time REAL NOT NULL,
+    stroke TEXT NOT NULL,
+    confidence REAL,
+    model TEXT,
+    PRIMARY KEY (video_hash, frame)
+);
+CREATE INDEX IF NOT EXISTS idx_stroke_events_stroke ON stroke_events (video_hash, stroke, time);
+"""
+
+
+class StrokeIndex:
+    """
+    打球イベントの索引
+
+    動画（内容ハッシュ）ごとに検出結果を丸ごと置き換えて保存し、
+    種類ごとの本数や時刻の一覧を結果JSONを読まずに取り出せるようにする。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（省略時は設定ファイルの値）
+        """
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    def save(self, video_hash: str, events: Iterable[Dict[str, Any]], model: Optional[str] = None) -> int:
+        """
+        動画の打球イベントを保存（既存のイベントは置き換える）
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+            events: frame / time / stroke / confidence を持つイベント
+            model: 分類に使ったモデル（パスなど）
+
+        Returns:
+            保存したイベント数
+        """
+        rows = [
+            (video_hash, int(event["frame"]), float(event["time"]), event["stroke"],
+             event.get("confidence"), model)
+            for event in events
+        ]
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM stroke_events WHERE video_hash = ?", (video_hash,))
+                conn.executemany(
+                    """
+                    INSERT INTO stroke_events (video_hash, frame, time, stroke, confidence, model)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    rows
+                )
+                conn.execute("COMMIT")
+                return len(rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def events(self, video_hash: str, stroke: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        動画の打球イベントを時刻順に取得
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+            stroke: 打球の種類（省略時はすべて）
+
+        Returns:
+            frame / time / stroke / confidence のリスト
+        """
+        query = "SELECT frame, time, stroke, confidence FROM stroke_events WHERE video_hash = ?"
+        params: List[Any] = [video_hash]
+        if stroke:
+            query += " AND stroke = ?"
+            params.append(stroke)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + " ORDER BY frame", params).fetchall()
+            return [dict(row) for row in rows]
+
+    def counts(self, video_hash: str) -> Dict[str, int]:
+        """
+        打球の種類ごとの本数
+
+        Args:
+            video_hash: 動画の内容ハッシュ
+
+        Returns:
+            種類 → 本数
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT stroke, COUNT(*) AS n FROM stroke_events WHERE video_hash = ? GROUP BY stroke",
+                (video_hash,)
+            ).fetchall()
+            return {row["stroke"]: row["n"] for row in rows}
@@ -0,0 +1,164 @@
+"""
+Writer Module
+結果ファイルを一時ファイル経由で原子的に書き出す
+"""
+
+import json
+import os
+import secrets
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional
+
+
+def new_run_id() -> str:
+    """
+    実行IDを生成（日時 + 乱数で、同じ秒の実行でも衝突しない）
+
+    Returns:
+        実行ID（例: 20260103_162330_a1b2c3）
+    """
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+
+
+def atomic_write_bytes(file_path: str, data: bytes):
+    """
+    バイト列を原子的に書き出す
+
+    同じディレクトリの一時ファイルに書き込み、fsync後に rename で置き換える。
+    途中でプロセスが落ちても、書きかけのファイルが残ることはない。
+
+    Args:
+        file_path: 出力先のパス
+        data: 書き出す内容
+    """
+    path = Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(file_path: str, text: str):
+    """
+    テキストを原子的に書き出す
+
+    Args:
+        file_path: 出力先のパス
+        text: 書き出す内容
+    """
+    atomic_write_bytes(file_path, text.encode("utf-8"))
+
+
+def atomic_write_json(file_path: str, data: Any):
+    """
+    JSONを原子的に書き出す
+
+    Args:
+        file_path: 出力先のパス
+        data: JSON化可能なデータ
+    """
+    atomic_write_text(file_path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+class ResultWriter:
+    """
+    1回の実行の成果物（結果JSON・レポート）の書き出し
+
+    ファイル名には秒単位の日時ではなく実行IDを使うため、
+    並行して動くワーカーが互いのファイルを上書きすることはない。
+    書き込みはすべて atomic_write_text を通す。
+
+    - group=False: <出力先>/<接頭辞>_<実行ID>.<拡張子>
+    - group=True: <出力先>/<実行ID>/<接頭辞>.<拡張子>（1回の実行の成果物を1つのディレクトリにまとめる）
+
+    artifacts を渡すと、JSONは圧縮して artifact store に保存し、
+    上記のパスには参照ファイルだけを置く（Markdownレポートはそのまま書き出す）。
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        run_id: Optional[str] = None,
+        group: bool = False,
+        artifacts=None
+    ):
+        """
+        初期化
+
+        Args:
+            output_dir: 出力ディレクトリ
+            run_id: 実行ID（省略時は自動生成）
+            group: 成果物を実行IDのディレクトリにまとめるか
+            artifacts: ArtifactStore（省略時はJSONをそのまま書き出す）
+        """
+        self.output_dir = Path(output_dir)
+        self.run_id = run_id or new_run_id()
+        self.group = group
+        self.artifacts = artifacts
+        self.files: List[Path] = []
+
+    @property
+    def run_dir(self) -> Path:
+        """成果物の保存先ディレクトリ"""
+        return self.output_dir / self.run_id if self.group else self.output_dir
+
+    def path_for(self, prefix: str, suffix: str = ".json") -> Path:
+        """
+        成果物のパスを決める
+
+        Args:
+            prefix: ファイル名の接頭辞（analysis, strategy_sheet など）
+            suffix: 拡張子
+
+        Returns:
+            出力先のパス
+        """
+        if self.group:
+            return self.run_dir / f"{prefix}{suffix}"
+        return self.output_dir / f"{prefix}_{self.run_id}{suffix}"
+
+    def write_text(self, prefix: str, text: str, suffix: str = ".md") -> Path:
+        """
+        テキストの成果物を書き出す
+
+        Args:
+            prefix: ファイル名の接頭辞
+            text: 書き出す内容
+            suffix: 拡張子
+
+        Returns:
+            書き出したファイルのパス
+        """
+        path = self.path_for(prefix, suffix)
+        atomic_write_text(str(path), text)
+        self.files.append(path)
+        return path
+
+    def write_json(self, prefix: str, data: Any) -> Path:
+        """
+        JSONの成果物を書き出す
+
+        Args:
+            prefix: ファイル名の接頭辞
+            data: JSON化可能なデータ
+
+        Returns:
+            書き出したファイルのパス
+        """
+        if self.artifacts is None:
+            return self.write_text(prefix, json.dumps(data, ensure_ascii=False, indent=2), ".json")
+        path = self.path_for(prefix, ".json")
+        self.artifacts.write_pointer(str(path), json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        self.files.append(path)
+        return path
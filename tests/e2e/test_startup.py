@@ -0,0 +1,56 @@
+"""
+E2Eテスト: CLI起動時の import
+--help や引数エラーで重い依存ライブラリを読み込まないこと
+"""
+
+import pytest
+import os
+import sys
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+HEAVY_MODULES = ["openai", "cv2", "mediapipe", "pandas", "weasyprint"]
+
+
+def _imported_modules(cli_args):
+    """-X importtime で読み込まれたトップレベルモジュールを取得"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'src/main.py'] + cli_args,
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '[us]' not in line:
+            modules.add(line.split('|')[-1].strip().split('.')[0])
+    return modules
+
+
+class TestLazyImports:
+    """起動時に重い依存ライブラリを読み込まない"""
+    
+    @pytest.mark.parametrize("cli_args", [
+        ['--help'],
+        ['full', '--help'],
+        ['analyze', '--video', '/nonexistent/video.mp4'],
+    ])
+    def test_no_heavy_imports(self, cli_args):
+        """--help や入力エラーでは重いライブラリを読み込まない"""
+        modules = _imported_modules(cli_args)
+        assert 'argparse' in modules
+        for heavy in HEAVY_MODULES:
+            assert heavy not in modules
+    
+    def test_missing_video_reports_error(self):
+        """存在しない動画はクライアント生成前にエラーになる"""
+        result = subprocess.run(
+            [sys.executable, 'src/main.py', 'analyze', '--video', '/nonexistent/video.mp4'],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            env={k: v for k, v in os.environ.items() if k != 'OPENAI_API_KEY'}
+        )
+        assert 'Error' in result.stdout
+        assert 'Traceback' not in result.stderr
@@ -0,0 +1,123 @@
+"""
+単体テスト: Analytics Export モジュール
+結果の列指向エクスポート
+"""
+
+import pytest
+import os
+import sys
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from output.analytics_export import AnalyticsExporter, build_rows, flatten, load_table, partition_value
+from storage.results_store import ResultsStore
+
+
+ANALYSIS = {
+    "2.技術分析": {"2.1_フォアハンドドライブ": {"スイング軌道の評価（1-5）": 4}},
+    "3.戦術分析": {"3.1_得点パターン": ["3球目攻撃", "台上からのチキータ"]}
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "database.sqlite")
+    store = ResultsStore(path)
+    store.save_run("r1", "analyze", {"analysis": (ANALYSIS, None)},
+                   player="選手A", params={"opponent": "相手X"}, created_at="2026-03-05T10:00:00")
+    store.save_run("r2", "strategy", {"strategy": ({"5.キーポイント": ["ロングサーブ"]}, None)},
+                   player="選手B", created_at="2026-04-01T09:00:00")
+    return path
+
+
+class TestFlatten:
+    """行への展開（pandas 不要）"""
+
+    def test_flatten_paths(self):
+        """番号を除いたパスと、リスト要素の位置"""
+        rows = list(flatten(ANALYSIS))
+        assert rows[0] == {"path": "技術分析/フォアハンドドライブ/スイング軌道の評価",
+                           "position": -1, "value": "4", "number": 4.0}
+        assert rows[2] == {"path": "戦術分析/得点パターン", "position": 1,
+                           "value": "台上からのチキータ", "number": None}
+
+    def test_build_rows(self):
+        """1件のステージ結果を4つの表の行に分ける"""
+        rows = build_rows({
+            "output_id": 1, "run_id": "r1", "stage": "analysis", "command": "analyze",
+            "player": "選手 A", "team": "", "opponent": "相手X", "model": "m",
+            "created_at": "2026-03-05T10:00:00", "data": ANALYSIS
+        })
+        assert rows["outputs"][0]["month"] == "2026-03"
+        assert rows["outputs"][0]["player"] == "選手_A"
+        assert rows["ratings"][0]["technique"] == "フォアハンド"
+        assert [row["text"] for row in rows["text_items"]] == ["3球目攻撃", "台上からのチキータ"]
+        assert len(rows["fields"]) == 3
+
+    def test_partition_value(self):
+        """ディレクトリ名に使えない文字と空の選手名"""
+        assert partition_value("a/b c") == "a_b_c"
+        assert partition_value(None) == "__unknown__"
+
+    def test_collect_incremental(self, db_path, tmp_path):
+        """指定IDより後の結果だけを集める"""
+        exporter = AnalyticsExporter(str(tmp_path / "analytics"), db_path)
+        assert len(exporter.collect()["outputs"]) == 2
+        assert [row["run_id"] for row in exporter.collect(after_id=1)["outputs"]] == ["r2"]
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            AnalyticsExporter(str(tmp_path), fmt="csv")
+
+
+class TestExport:
+    """Parquet / Feather への書き出しと読み込み"""
+
+    @pytest.fixture(autouse=True)
+    def require_pandas(self):
+        pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+
+    @pytest.mark.parametrize("fmt", ["parquet", "feather"])
+    def test_export_partitions_and_types(self, db_path, tmp_path, fmt):
+        """選手・月で分割し、型付きの列で書き出す"""
+        export_dir = tmp_path / "analytics"
+        counts = AnalyticsExporter(str(export_dir), db_path, fmt).export()
+        assert counts["outputs"] == 2
+        assert (export_dir / "outputs" / "player=選手A" / "month=2026-03").is_dir()
+        assert (export_dir / "outputs" / "player=選手B" / "month=2026-04").is_dir()
+
+        ratings = load_table(str(export_dir), "ratings")
+        assert ratings["rating"].dtype == "float32"
+        assert ratings["technique"].dtype == "category"
+        assert ratings.loc[0, "opponent"] == "相手X"
+
+        outputs = load_table(str(export_dir), "outputs", columns=["stage", "created_at"], players=["選手B"])
+        assert list(outputs.columns) == ["player", "month", "stage", "created_at"]
+        assert outputs["stage"].tolist() == ["strategy"]
+        assert str(outputs["created_at"].dtype).startswith("datetime64")
+
+    def test_incremental_append(self, db_path, tmp_path):
+        """2回目以降は新しい結果だけを別ファイルに追記する"""
+        export_dir = str(tmp_path / "analytics")
+        exporter = AnalyticsExporter(export_dir, db_path)
+        exporter.export()
+        assert exporter.export()["outputs"] == 0
+
+        ResultsStore(db_path).save_run("r3", "analyze", {"analysis": (ANALYSIS, None)},
+                                       player="選手A", created_at="2026-03-20T10:00:00")
+        assert exporter.export()["outputs"] == 1
+
+        outputs = load_table(export_dir, "outputs", months=["2026-03"])
+        assert sorted(outputs["run_id"].tolist()) == ["r1", "r3"]
+        assert len(list((tmp_path / "analytics" / "outputs" / "player=選手A" / "month=2026-03").iterdir())) == 2
+
+    def test_full_rewrite(self, db_path, tmp_path):
+        """--full は既存の出力を消して書き直す"""
+        export_dir = str(tmp_path / "analytics")
+        AnalyticsExporter(export_dir, db_path).export()
+        with pytest.raises(ValueError):
+            AnalyticsExporter(export_dir, db_path, "feather").export()
+        AnalyticsExporter(export_dir, db_path, "feather").export(full=True)
+        assert len(load_table(export_dir, "outputs")) == 2
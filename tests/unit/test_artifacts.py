@@ -0,0 +1,154 @@
+"""
+単体テスト: Artifacts モジュール
+内容アドレス方式の圧縮保存と参照ファイル経由の読み込み
+"""
+
+import pytest
+import os
+import sys
+import json
+import argparse
+from unittest.mock import patch, MagicMock
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.artifacts import ArtifactStore, iter_pointers, load_json, read_pointer
+from storage.importer import parse_result_file
+from storage.result_index import load_stage_file
+from storage.writer import ResultWriter
+
+
+RESULT = {"player": "選手A", "analysis": {"技術分析": {"フォアハンド": {"評価": 4}}, "改善点": ["台上"] * 50}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "artifacts"), codec="gzip")
+
+
+class TestArtifactStore:
+    """ブロブの保存と読み出し"""
+
+    def test_put_and_get(self, store):
+        """圧縮して保存し、元の内容を読み出せる"""
+        data = json.dumps(RESULT, ensure_ascii=False).encode("utf-8")
+        digest = store.put(data)
+
+        assert store.get(digest) == data
+        assert store.blob_path(digest).name.endswith(".gz")
+        assert store.blob_path(digest).stat().st_size < len(data)
+
+    def test_deduplicates(self, store):
+        """同じ内容は1つのブロブにまとまる"""
+        digests = {store.put(b"same") for _ in range(3)}
+        assert len(digests) == 1
+        assert len(list(store.iter_blobs())) == 1
+
+    def test_missing_blob(self, store):
+        with pytest.raises(FileNotFoundError):
+            store.get("0" * 64)
+
+    def test_zstd(self, tmp_path):
+        """zstandard があれば zstd で保存する"""
+        pytest.importorskip("zstandard")
+        zstd_store = ArtifactStore(str(tmp_path / "artifacts"), codec="zstd")
+        digest = zstd_store.put(b"frames" * 100)
+        assert zstd_store.blob_path(digest).name.endswith(".zst")
+        assert zstd_store.get(digest) == b"frames" * 100
+
+
+class TestReadThrough:
+    """参照ファイルの透過的な読み込み"""
+
+    def test_writer_writes_pointer(self, tmp_path, store):
+        """artifacts を渡した ResultWriter は参照ファイルを置く"""
+        path = ResultWriter(str(tmp_path / "results"), "run1", artifacts=store).write_json("full_analysis", RESULT)
+
+        assert read_pointer(str(path))["size"] > os.path.getsize(path)
+        assert load_json(str(path)) == RESULT
+        assert load_stage_file(str(path), "analysis") == RESULT["analysis"]
+
+    def test_importer_reads_pointer(self, tmp_path, store):
+        """取り込みも参照先の内容を使う"""
+        path = ResultWriter(str(tmp_path / "results"), "run1", artifacts=store).write_json("full_analysis", RESULT)
+        run = parse_result_file(str(path))
+        assert run["player"] == "選手A"
+        assert [output[0] for output in run["outputs"]] == ["analysis"]
+
+    def test_plain_files_unchanged(self, tmp_path):
+        """通常のJSONはそのまま読む"""
+        path = tmp_path / "analysis.json"
+        path.write_text(json.dumps({"__artifact__": "text"}), encoding="utf-8")
+        assert load_json(str(path)) == {"__artifact__": "text"}
+
+
+class TestGarbageCollection:
+    """参照されていないブロブの回収"""
+
+    def test_pack_and_gc(self, tmp_path, store):
+        """pack で既存ファイルを移し、参照のなくなったブロブだけを削除する"""
+        results = tmp_path / "results"
+        results.mkdir()
+        keep, drop = results / "analysis_a.json", results / "analysis_b.json"
+        keep.write_text(json.dumps(RESULT, ensure_ascii=False, indent=2), encoding="utf-8")
+        drop.write_text(json.dumps({"v": 2}), encoding="utf-8")
+
+        assert store.pack(str(keep)) > 0
+        assert store.pack(str(keep)) == 0
+        store.pack(str(drop))
+        drop.unlink()
+
+        referenced = {pointer["sha256"] for _, pointer in iter_pointers([str(results)])}
+        assert store.gc(referenced)["removed"] == 0  # 作成直後は猶予期間内
+        stats = store.gc(referenced, grace_seconds=0, dry_run=True)
+        assert stats["removed"] == 1 and len(list(store.iter_blobs())) == 2
+        assert store.gc(referenced, grace_seconds=0) == {"kept": 1, "removed": 1, "freed": stats["freed"]}
+        assert load_json(str(keep)) == RESULT
+
+    def test_reused_blob_is_protected(self, store):
+        """既存のブロブを再利用すると更新日時が新しくなり、猶予期間内は削除されない"""
+        digest = store.put(b"old")
+        path = store.blob_path(digest)
+        os.utime(path, (0, 0))
+        assert store.gc(set(), grace_seconds=3600, dry_run=True)["removed"] == 1
+
+        assert store.put(b"old") == digest
+        assert path.stat().st_mtime > 0
+        assert store.gc(set(), grace_seconds=3600) == {"kept": 1, "removed": 0, "freed": 0}
+
+
+class TestArtifactsCommand:
+    """--artifacts 指定時のコマンド"""
+
+    def _args(self, output_dir, **kwargs):
+        defaults = dict(
+            video=None, player="選手A", team="チームA", output=str(output_dir),
+            verbose=False, no_cache=False, analysis_file=None, strategy_file=None,
+            opponent=None, opponent_video=None, opponent_team=None, placement=None, resume=None,
+            db=os.path.join(str(output_dir), "database.sqlite"), no_json=False, group_runs=False, artifacts=True
+        )
+        defaults.update(kwargs)
+        return argparse.Namespace(**defaults)
+
+    def test_full_then_strategy_from_pointer(self, tmp_path, monkeypatch):
+        """圧縮保存した結果ファイルを --analysis-file にそのまま渡せる"""
+        import main
+        monkeypatch.chdir(tmp_path)
+        analyzer = MagicMock()
+        analyzer.model = "test-model"
+        analyzer.generate_strategy.return_value = {"キーポイント": ["a"]}
+        analyzer.generate_practice_plan.return_value = {"ドリル": []}
+        analysis_file = tmp_path / "analysis.json"
+        analysis_file.write_text(json.dumps({"技術分析": {}}), encoding="utf-8")
+
+        with patch.object(main, "LLMAnalyzer", return_value=analyzer):
+            main.full_command(self._args(tmp_path / "results", analysis_file=str(analysis_file)))
+            [full_file] = (tmp_path / "results").glob("full_analysis_*.json")
+            assert read_pointer(str(full_file)) is not None
+
+            result = main.strategy_command(self._args(tmp_path / "results", analysis_file=str(full_file), no_cache=True))
+
+        assert result == {"キーポイント": ["a"]}
+        assert analyzer.generate_strategy.call_args[0][0] == {"技術分析": {}}
+        assert (tmp_path / "data" / "artifacts" / "objects").is_dir()
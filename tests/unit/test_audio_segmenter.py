@@ -0,0 +1,136 @@
+"""
+単体テスト: Audio Segmenter モジュール
+打球音の検出とラリー区間への分割
+"""
+
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.audio_segmenter import (
+    SAMPLE_RATE, AudioSegmenter, SpectralFlux, cluster_rallies, pick_onsets, rally_frame_ranges,
+    select_frame_times, spectral_flux
+)
+
+
+def synthetic_audio(seconds=20.0, clicks=(), seed=0):
+    """雑音の上に 4kHz の減衰する打球音を重ねた合成音声"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0.0, 0.01, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    t = np.arange(int(0.03 * SAMPLE_RATE)) / SAMPLE_RATE
+    click = (0.5 * np.sin(2 * np.pi * 4000 * t) * np.exp(-t / 0.005)).astype(np.float32)
+    for time in clicks:
+        start = int(time * SAMPLE_RATE)
+        audio[start:start + len(click)] += click[:len(audio) - start]
+    return audio
+
+
+def chunked(audio, size):
+    return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+# 2つのラリー（打球5回と4回）と、単発の音
+CLICKS = [2.0, 3.0, 4.0, 5.0, 6.0, 11.0, 11.8, 12.6, 13.4, 17.0]
+
+
+class TestOnsets:
+    """打球音の検出"""
+
+    def test_flux_is_chunk_invariant(self):
+        """チャンクの切り方によらず同じフラックスになる"""
+        audio = synthetic_audio(seconds=5.0, clicks=[1.0, 2.5])
+        whole = spectral_flux([audio])
+        assert np.allclose(spectral_flux(chunked(audio, 7919)), whole, atol=1e-4)
+        assert np.allclose(spectral_flux(chunked(audio, 100)), whole, atol=1e-4)
+
+    def test_incremental_flux(self):
+        """逐次計算では新しく計算できたフレームだけを返す"""
+        audio = synthetic_audio(seconds=2.0, clicks=[1.0])
+        stream = SpectralFlux()
+        parts = [stream.update(chunk) for chunk in chunked(audio, 8000)]
+        assert [len(part) for part in parts] == [50, 50, 50, 50]
+        assert stream.frames == 200
+        assert np.allclose(np.concatenate(parts), spectral_flux([audio]), atol=1e-4)
+
+    def test_detects_clicks(self):
+        onsets = pick_onsets(spectral_flux(chunked(synthetic_audio(clicks=CLICKS), SAMPLE_RATE)))
+        assert len(onsets) == len(CLICKS)
+        assert np.abs(onsets - np.array(CLICKS)).max() < 0.03
+
+    def test_noise_only(self):
+        """雑音だけなら打球音は検出しない"""
+        assert len(pick_onsets(spectral_flux([synthetic_audio(seconds=10.0)]))) == 0
+        assert len(pick_onsets(np.zeros(2))) == 0
+
+
+class TestRallies:
+    """ラリー区間への分割"""
+
+    def test_cluster_rallies(self):
+        rallies = cluster_rallies(np.array(CLICKS), max_gap=2.0, min_hits=3, padding=0.5)
+        assert [(r["start"], r["end"], r["hits"]) for r in rallies] == [(1.5, 6.5, 5), (10.5, 13.9, 4)]
+        assert [r["index"] for r in rallies] == [0, 1]
+        assert cluster_rallies(np.zeros(0)) == []
+
+    def test_frame_ranges_and_frame_times(self):
+        rallies = cluster_rallies(np.array(CLICKS))
+        assert rally_frame_ranges(rallies, 30.0) == [(45, 195), (315, 417)]
+        assert select_frame_times(rallies) == [4.0, 12.6]
+        assert select_frame_times(rallies, max_frames=1) == [4.0]
+
+
+class TestAudioSegmenter:
+    """ラリー検出と結果の保存"""
+
+    def test_segment_chunks(self):
+        result = AudioSegmenter().segment_chunks(chunked(synthetic_audio(clicks=CLICKS), SAMPLE_RATE))
+        assert result["duration"] == pytest.approx(20.0, abs=0.05)
+        assert result["onsets"] == len(CLICKS)
+        assert [r["hits"] for r in result["rallies"]] == [5, 4]
+
+    def test_cached_result_is_reused(self, tmp_path):
+        """保存済みの動画は音声を読まずに、現在の設定でラリーにまとめ直す"""
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+        (tmp_path / "rallies").mkdir()
+        (tmp_path / "rallies" / "abc_d8.json").write_text(
+            '{"video_hash": "abc", "duration": 20.0, "onset_times": %s}' % CLICKS, encoding="utf-8"
+        )
+        result = AudioSegmenter(str(tmp_path / "rallies")).segment(str(video), video_hash="abc")
+        assert result["duration"] == 20.0 and result["onsets"] == len(CLICKS)
+        assert [r["hits"] for r in result["rallies"]] == [5, 4]
+
+        result = AudioSegmenter(str(tmp_path / "rallies"), max_gap=9.0, min_hits=1).segment(
+            str(video), video_hash="abc"
+        )
+        assert [r["hits"] for r in result["rallies"]] == [10]
+
+
+class TestVideoAnalyzerFrames:
+    """ラリーをもとにした LLM 用フレームの選択"""
+
+    def test_frames_follow_rallies(self, monkeypatch):
+        from analysis.video_analyzer import VideoAnalyzer
+
+        rallies = cluster_rallies(np.array(CLICKS))
+        monkeypatch.setattr(AudioSegmenter, "segment", lambda self, path: {"rallies": rallies})
+        analyzer = VideoAnalyzer()
+        assert analyzer._rally_frame_times("match.mp4") == [4.0, 12.6]
+
+        monkeypatch.setattr(AudioSegmenter, "segment", lambda self, path: {"rallies": []})
+        assert analyzer._rally_frame_times("match.mp4") is None
+
+    def test_no_audio_falls_back(self, monkeypatch):
+        """音声を取り出せない動画は None（一定間隔の抽出に戻る）"""
+        from analysis.video_analyzer import VideoAnalyzer
+
+        def fail(self, path):
+            raise ValueError("音声を取り出せません")
+
+        monkeypatch.setattr(AudioSegmenter, "segment", fail)
+        assert VideoAnalyzer()._rally_frame_times("match.mp4") is None
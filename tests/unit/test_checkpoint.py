@@ -0,0 +1,158 @@
+"""
+単体テスト: Checkpoint / Writer モジュール
+フル分析のステージ単位の保存と再開
+"""
+
+import pytest
+import os
+import sys
+import json
+import argparse
+from unittest.mock import patch, MagicMock
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.checkpoint import RunCheckpoint, new_run_id
+from storage.writer import ResultWriter, atomic_write_json
+
+
+class TestAtomicWrite:
+    """原子的な書き出し"""
+
+    def test_writes_json(self, tmp_path):
+        """JSONが書き出され、一時ファイルが残らない"""
+        path = tmp_path / "sub" / "result.json"
+        atomic_write_json(str(path), {"選手名": "A"})
+
+        assert json.loads(path.read_text(encoding="utf-8")) == {"選手名": "A"}
+        assert [p.name for p in path.parent.iterdir()] == ["result.json"]
+
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        """書き出しに失敗しても既存ファイルは壊れない"""
+        path = tmp_path / "result.json"
+        atomic_write_json(str(path), {"v": 1})
+
+        with pytest.raises(TypeError):
+            atomic_write_json(str(path), {"v": object()})
+
+        assert json.loads(path.read_text(encoding="utf-8")) == {"v": 1}
+        assert len(list(tmp_path.iterdir())) == 1
+
+
+class TestResultWriter:
+    """実行IDごとの成果物の書き出し"""
+
+    def test_same_second_writers_do_not_collide(self, tmp_path):
+        """同じ秒に書き出しても別々のファイルになる"""
+        paths = {ResultWriter(str(tmp_path)).write_json("analysis", {"i": i}) for i in range(20)}
+        assert len(paths) == 20
+        assert all(path.name.startswith("analysis_") for path in paths)
+
+    def test_group_by_run(self, tmp_path):
+        """group=True では1回の実行の成果物が1つのディレクトリにまとまる"""
+        writer = ResultWriter(str(tmp_path), "run1", group=True)
+        json_path = writer.write_json("full_analysis", {"v": 1})
+        report_path = writer.write_text("strategy_sheet", "# 戦略")
+
+        assert json_path == tmp_path / "run1" / "full_analysis.json"
+        assert report_path == tmp_path / "run1" / "strategy_sheet.md"
+        assert writer.files == [json_path, report_path]
+        assert sorted(p.name for p in (tmp_path / "run1").iterdir()) == ["full_analysis.json", "strategy_sheet.md"]
+
+
+class TestRunCheckpoint:
+    """チェックポイントの保存と読み込み"""
+
+    def test_run_ids_are_unique(self):
+        """同じ秒に生成しても実行IDは衝突しない"""
+        assert len({new_run_id() for _ in range(50)}) == 50
+
+    def test_save_and_resume(self, tmp_path):
+        """保存したステージは別インスタンスから読み込める"""
+        checkpoint = RunCheckpoint.create(str(tmp_path), {"player": "A"})
+        checkpoint.save_stage("analysis", {"技術分析": {}})
+
+        resumed = RunCheckpoint.load(str(tmp_path), checkpoint.run_id)
+        assert resumed.params == {"player": "A"}
+        assert resumed.has_stage("analysis")
+        assert resumed.load_stage("analysis") == {"技術分析": {}}
+        assert resumed.first_incomplete(["analysis", "strategy", "practice_plan"]) == "strategy"
+
+    def test_unknown_run_id(self, tmp_path):
+        """存在しない実行IDはエラー"""
+        with pytest.raises(FileNotFoundError):
+            RunCheckpoint.load(str(tmp_path), "missing")
+
+
+class TestFullCommandResume:
+    """full コマンドの --resume"""
+
+    def _args(self, output_dir, video, **kwargs):
+        defaults = dict(
+            video=video, player="選手A", team="チームA", output=str(output_dir),
+            verbose=False, no_cache=False, analysis_file=None, strategy_file=None, resume=None,
+            db=os.path.join(str(output_dir), "database.sqlite"), no_json=False, group_runs=False, artifacts=False
+        )
+        defaults.update(kwargs)
+        return argparse.Namespace(**defaults)
+
+    def test_resume_after_failure(self, tmp_path):
+        """練習計画生成で失敗しても、再開時に動画分析をやり直さない"""
+        import main
+
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+
+        analyzer = MagicMock()
+        analyzer.model = "test-model"
+        analyzer.analyze_video.return_value = {"技術分析": {}}
+        analyzer.generate_strategy.return_value = {"キーポイント": []}
+        analyzer.generate_practice_plan.side_effect = ConnectionError("network")
+
+        output_dir = tmp_path / "results"
+        with patch.object(main, "LLMAnalyzer", return_value=analyzer):
+            with pytest.raises(ConnectionError):
+                main.full_command(self._args(output_dir, str(video)))
+
+            run_id = next((output_dir / "runs").iterdir()).name
+            analyzer.generate_practice_plan.side_effect = None
+            analyzer.generate_practice_plan.return_value = {"ドリル": []}
+
+            result = main.full_command(self._args(output_dir, None, resume=run_id, no_cache=True))
+
+        assert analyzer.analyze_video.call_count == 1
+        assert analyzer.generate_strategy.call_count == 1
+        assert result["run_id"] == run_id
+        assert result["practice_plan"] == {"ドリル": []}
+        assert RunCheckpoint.load(str(output_dir), run_id).manifest["status"] == "completed"
+
+    def test_resumed_analysis_is_indexed(self, tmp_path):
+        """チェックポイントから復元した分析も索引に登録され、以後の分析で再利用される"""
+        import main
+        from pipeline.runner import analysis_key
+        from storage.result_index import ResultIndex
+
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+
+        analyzer = MagicMock()
+        analyzer.model = "test-model"
+        analyzer.analyze_video.return_value = {"技術分析": {"サーブ": {"評価": 4}}}
+        analyzer.generate_strategy.side_effect = ConnectionError("network")
+
+        output_dir = tmp_path / "results"
+        with patch.object(main, "LLMAnalyzer", return_value=analyzer):
+            with pytest.raises(ConnectionError):
+                main.full_command(self._args(output_dir, str(video)))
+
+            run_id = next((output_dir / "runs").iterdir()).name
+            analyzer.generate_strategy.side_effect = None
+            analyzer.generate_strategy.return_value = {"キーポイント": []}
+            analyzer.generate_practice_plan.return_value = {"ドリル": []}
+            main.full_command(self._args(output_dir, None, resume=run_id))
+
+        index = ResultIndex(str(output_dir))
+        key = analysis_key(index, analyzer, str(video), "選手A", "チームA")
+        assert index.lookup(key) == {"技術分析": {"サーブ": {"評価": 4}}}
+        assert analyzer.analyze_video.call_count == 1
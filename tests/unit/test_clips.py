@@ -0,0 +1,106 @@
+"""
+単体テスト: Clips モジュール
+ラリー・サーブ・得点のイベントの索引と、キーフレームからの切り出し
+"""
+
+import pytest
+import os
+import sys
+import subprocess
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis import clips
+from analysis.clips import align_keyframes, extract_event_clips, index_events, probe_keyframes, rally_events
+from storage.events import EventIndex
+
+
+RALLIES = [
+    {"index": 0, "start": 4.5, "end": 9.5, "hits": 4, "onsets": [5.0, 6.1, 7.8, 9.0]},
+    {"index": 1, "start": 20.5, "end": 23.0, "hits": 3, "onsets": [21.0, 21.9, 22.5]},
+]
+
+# 2秒ごとのキーフレーム（ffprobe の packet=pts_time,pos,flags の出力）
+PACKETS = "\n".join(
+    f"{t / 30:.6f},{48 + t * 1000},{'K_' if t % 60 == 0 else '__'}" for t in range(0, 900)
+) + "\n"
+
+
+def fake_run(commands):
+    def run(command, **kwargs):
+        commands.append(command)
+        if command[0] == "ffprobe":
+            return subprocess.CompletedProcess(command, 0, PACKETS, "")
+        with open(command[-1], "wb") as f:
+            f.write(b"clip")
+        return subprocess.CompletedProcess(command, 0, "", "")
+    return run
+
+
+class TestEvents:
+    """イベントとキーフレーム"""
+
+    def test_probe_keyframes(self, monkeypatch):
+        monkeypatch.setattr(clips.subprocess, "run", fake_run([]))
+        keyframes = probe_keyframes("match.mp4")
+        assert keyframes.shape == (15, 2)
+        assert keyframes[1].tolist() == [2.0, 60048.0]
+
+    def test_rally_events(self):
+        events = rally_events(RALLIES)
+        assert [(e["kind"], e["number"]) for e in events[:3]] == [("rally", 0), ("serve", 0), ("point", 0)]
+        serve, point = events[1], events[2]
+        assert (serve["time"], serve["start_time"], serve["end_time"]) == (5.0, 3.0, 6.5)
+        assert (point["time"], point["start_time"], point["end_time"]) == (9.0, 7.0, 11.0)
+
+    def test_align_keyframes(self):
+        keyframes = np.array([[0.0, 48.0], [2.0, 6048.0], [4.0, 12048.0], [6.0, np.nan]])
+        events = align_keyframes(rally_events(RALLIES[:1]), keyframes)
+        # 区間の開始以前で最も近いキーフレーム（ちょうど同じ時刻も含む）
+        assert [(e["start_time"], e["keyframe_time"], e["keyframe_offset"]) for e in events] == [
+            (4.5, 4.0, 12048), (3.0, 2.0, 6048), (7.0, 6.0, None)
+        ]
+        assert align_keyframes(events, np.empty((0, 2)))[0]["keyframe_time"] is None
+
+
+class TestEventIndex:
+    """イベントの索引と切り出し"""
+
+    def test_index_and_query(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(clips.subprocess, "run", fake_run([]))
+        db_path = str(tmp_path / "events.sqlite")
+        index_events("match.mp4", "abc", db_path, rallies=RALLIES)
+
+        index = EventIndex(db_path)
+        assert index.counts("abc") == {"rally": 2, "serve": 2, "point": 2}
+        serves = index.events("abc", kind="serve")
+        assert [e["time"] for e in serves] == [5.0, 21.0]
+        assert serves[1]["keyframe_time"] == 18.0 and serves[1]["keyframe_offset"] == 540048
+        assert [e["kind"] for e in index.events("abc", start=9.0, end=21.0)] == ["point", "rally"]
+        assert index.keyframe_before("abc", 5.9) == (4.0, 120048)
+        assert index.keyframe_before("other", 5.9) is None
+
+        # 作り直すと置き換える
+        index_events("match.mp4", "abc", db_path, rallies=RALLIES[:1])
+        assert index.counts("abc") == {"rally": 1, "serve": 1, "point": 1}
+
+    def test_extract_stream_copy(self, tmp_path, monkeypatch):
+        """キーフレームから再エンコードせずに切り出し、作成済みのクリップは再利用する"""
+        commands = []
+        monkeypatch.setattr(clips.subprocess, "run", fake_run(commands))
+        events = align_keyframes(rally_events(RALLIES), probe_keyframes("match.mp4"))
+        serves = [e for e in events if e["kind"] == "serve"]
+
+        paths = extract_event_clips("match.mp4", serves, str(tmp_path), "abc")
+        assert len(paths) == 2 and all(os.path.exists(path) for path in paths)
+        cut = commands[-1]
+        assert cut[cut.index("-c") + 1] == "copy"
+        assert cut[cut.index("-ss") + 1] == "18.000"
+        assert cut[cut.index("-t") + 1] == "4.500"
+
+        count = len(commands)
+        assert extract_event_clips("match.mp4", serves, str(tmp_path), "abc") == paths
+        assert len(commands) == count
@@ -0,0 +1,125 @@
+"""
+単体テスト: CV Analyzer モジュール
+ボールの検出と追跡
+"""
+
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.cv_analyzer import (
+    BallTracker, CVAnalyzer, color_mask, detect_candidates, iter_frame_batches, summarize_track
+)
+
+
+def synthetic_frames(count=48, height=180, width=320, positions=None, seed=0):
+    """緑の台の上を白いボールが動く合成フレーム（処理解像度）"""
+    rng = np.random.default_rng(seed)
+    frames = np.full((count, height, width, 3), (40, 90, 30), dtype=np.uint8)
+    frames += rng.integers(0, 10, frames.shape, dtype=np.uint8)
+    # 白いユニフォームの選手（大きな塊）
+    frames[:, 40:140, 10:60] = 210
+    yy, xx = np.ogrid[:height, :width]
+    if positions is None:
+        positions = [(80 + 4 * i, 100 - 20 * np.sin(i / 6)) for i in range(count)]
+    for frame, position in zip(frames, positions):
+        if position is not None:
+            frame[(xx - position[0]) ** 2 + (yy - position[1]) ** 2 <= 6] = (235, 235, 235)
+    return frames, positions
+
+
+class TestDetection:
+    """ボール候補の検出"""
+
+    def test_color_mask(self):
+        frames = np.array([[[[240, 240, 240], [40, 120, 230], [40, 90, 30]]]], dtype=np.uint8)
+        assert color_mask(frames).tolist() == [[[True, True, False]]]
+        assert color_mask(frames, colors=("white",)).tolist() == [[[True, False, False]]]
+
+    def test_rejects_large_blobs(self):
+        """ボールより大きな塊は候補にしない"""
+        mask = np.zeros((1, 64, 64), dtype=bool)
+        mask[0, 5:40, 5:40] = True
+        mask[0, 50:53, 50:53] = True
+        positions, scores = detect_candidates(mask)
+        assert scores[0, 0] == 9
+        assert positions[0, 0] == pytest.approx([51.5, 51.5])
+        assert (scores[0, 1:] == 0).all()
+
+    def test_detects_moving_ball(self):
+        """背景差分と色マスクで動くボールだけを検出する"""
+        frames, truth = synthetic_frames()
+        positions, scores = CVAnalyzer("unused").detect(frames)
+        assert (scores[:, 0] > 0).all()
+        assert np.abs(positions[:, 0] - np.array(truth)).max() < 1.5
+
+
+class TestTracking:
+    """カルマンフィルタによる追跡"""
+
+    def test_track_through_occlusion(self):
+        """数フレーム見えなくても同じ軌跡として追跡を続ける"""
+        truth = [(80 + 4 * i, 90.0) for i in range(40)]
+        hidden = [p if not 20 <= i < 23 else None for i, p in enumerate(truth)]
+        frames, _ = synthetic_frames(count=40, positions=hidden)
+
+        track = CVAnalyzer("unused").track_batches([(0, frames[:16]), (16, frames[16:])], fps=30.0)
+        assert track["frame"].tolist() == list(range(40))
+        assert track["detected"][20:23].tolist() == [False, False, False]
+        assert set(track["track_id"].tolist()) == {0}
+        # 見えない間は予測位置、座標は元の解像度（縮小率2）
+        assert track["x"][22] == pytest.approx(2 * truth[22][0], abs=4)
+        assert summarize_track(track) == {"frames": 40, "duration": 1.33, "detection_rate": 0.925, "tracks": 1}
+
+    def test_gate_starts_new_track(self):
+        """見失った後の遠い候補は新しい軌跡になる"""
+        tracker = BallTracker(gate=10, max_missed=1)
+        far = np.array([[200.0, 200.0]])
+        assert tracker.update(np.array([[10.0, 10.0]]), np.array([5]))[3] == 0
+        assert tracker.update(far, np.array([5]))[2] is False
+        assert tracker.update(far, np.array([5]))[2:] == (True, 1)
+
+    def test_no_candidates(self):
+        x, y, hit, track_id = BallTracker().update(np.zeros((3, 2)), np.zeros(3))
+        assert np.isnan(x) and not hit and track_id == -1
+
+
+class TestVideoDecoding:
+    """OpenCV による動画のデコード"""
+
+    def test_iter_frame_batches(self, tmp_path):
+        cv2 = pytest.importorskip("cv2")
+        path = str(tmp_path / "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+        for i in range(10):
+            writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+        writer.release()
+
+        batches = list(iter_frame_batches(path, batch_size=4, downscale=2))
+        assert [start for start, _ in batches] == [0, 4, 8]
+        assert batches[0][1].shape == (4, 24, 32, 3)
+        assert batches[-1][1].shape[0] == 2
+
+    def test_track_segments_in_parallel(self, tmp_path):
+        """区間ごとの追跡は並列でも逐次と同じ結果を区間の順に返す"""
+        cv2 = pytest.importorskip("cv2")
+        path = str(tmp_path / "clip.avi")
+        frames, _ = synthetic_frames(count=40)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 180))
+        for frame in frames:
+            writer.write(frame)
+        writer.release()
+
+        analyzer = CVAnalyzer(path, batch_size=8, downscale=1)
+        ranges = [(0, 12), (20, 40)]
+        serial = analyzer.track_segments(ranges, workers=1)
+        parallel = analyzer.track_segments(ranges, workers=2)
+        assert [track["frame"].tolist() for track in parallel] == [list(range(12)), list(range(20, 40))]
+        for a, b in zip(serial, parallel):
+            np.testing.assert_array_equal(a["x"], b["x"])
+            np.testing.assert_array_equal(a["detected"], b["detected"])
@@ -0,0 +1,119 @@
+"""
+単体テスト: Footwork モジュール
+姿勢の時系列からのフットワーク指標
+"""
+
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.footwork import fill_gaps, footwork_metrics, ground_footwork, rolling_mean
+from analysis.pose_estimator import LANDMARKS, NUM_LANDMARKS
+from analysis.table_calibration import TableCalibration
+from storage.ratings import extract_ratings
+
+
+META = {"fps": 30.0, "frame_step": 1, "width": 1280, "height": 720}
+
+
+def side_steps(seconds=60, out_time=0.4, back_time=0.6, distance=0.6, pixels_per_meter=200):
+    """3秒ごとに左右交互へ distance メートル動いて戻る選手のキーポイント（胴体は 100 画素 = 0.5m）"""
+    t = np.arange(int(seconds * META["fps"])) / META["fps"]
+    phase = t % 3
+    lateral = np.where(
+        phase < out_time, distance * phase / out_time,
+        np.where(phase < out_time + back_time, distance * (1 - (phase - out_time) / back_time), 0.0)
+    )
+    x = (640 + np.where((t // 3) % 2 == 0, 1, -1) * lateral * pixels_per_meter) / 1280
+    keypoints = np.full((len(t), NUM_LANDMARKS, 4), np.nan, dtype=np.float16)
+    for name, y in (("left_hip", 0.6), ("right_hip", 0.6), ("left_shoulder", 0.6 - 100 / 720),
+                    ("right_shoulder", 0.6 - 100 / 720)):
+        keypoints[:, LANDMARKS[name], 0] = x
+        keypoints[:, LANDMARKS[name], 1] = y
+    return keypoints
+
+
+class TestRollingOperations:
+    """移動平均と補間"""
+
+    def test_rolling_mean_ignores_nan(self):
+        values = np.array([1.0, np.nan, 3.0, 5.0, np.nan, np.nan, np.nan])
+        result = rolling_mean(values, 3)
+        assert result[:4].tolist() == [1.0, 2.0, 4.0, 4.0]
+        assert np.isnan(result[5])
+
+    def test_fill_gaps(self):
+        values = np.array([np.nan, 0.0, np.nan, 2.0, np.nan, np.nan, np.nan, 6.0, np.nan])
+        result = fill_gaps(values, max_gap=2)
+        assert result[2] == 1.0
+        # 長い途切れと先頭・末尾は埋めない
+        assert np.isnan(result[[0, 4, 5, 6, 8]]).all()
+
+
+class TestFootworkMetrics:
+    """フットワーク指標"""
+
+    def test_speed_and_recovery(self):
+        keypoints = side_steps()
+        keypoints[::50] = np.nan  # ときどき人物を見失う
+        metrics = footwork_metrics(keypoints, META)
+
+        assert metrics["scale"] == "torso"
+        assert metrics["lateral_speed"]["peak"] == pytest.approx(1.5, abs=0.15)
+        assert metrics["recovery"]["count"] == 20
+        assert 0.3 <= metrics["recovery"]["median"] <= 0.6
+        assert metrics["coverage"]["range"] == pytest.approx(0.83, abs=0.1)
+        assert metrics["ratings"] == {"移動速度（1-5）": 4, "戻りの速さ（1-5）": 5}
+
+    def test_slower_player_rates_lower(self):
+        fast = footwork_metrics(side_steps(), META)["ratings"]
+        slow = footwork_metrics(side_steps(out_time=1.0, back_time=1.5), META)["ratings"]
+        assert slow["移動速度（1-5）"] < fast["移動速度（1-5）"]
+        assert slow["戻りの速さ（1-5）"] < fast["戻りの速さ（1-5）"]
+
+    def test_table_scale(self):
+        """台の手前のエンドラインの画素数からメートルに換算する"""
+        calibration = TableCalibration({"segments": [{
+            "start_frame": 0, "end_frame": 10 ** 6, "samples": 1, "homography": None,
+            "corners": [[0, 0], [0, 0], [1250, 600], [640, 600]],
+        }]})
+        torso = footwork_metrics(side_steps(), META)
+        table = footwork_metrics(side_steps(), META, calibration)
+        assert table["scale"] == "table"
+        # 1.525m = 610 画素（胴体からの換算の2倍の画素数）
+        assert table["coverage"]["range"] == pytest.approx(torso["coverage"]["range"] / 2, abs=0.01)
+
+    def test_no_person(self):
+        keypoints = np.full((100, NUM_LANDMARKS, 4), np.nan, dtype=np.float16)
+        metrics = footwork_metrics(keypoints, META)
+        assert metrics["detection_rate"] == 0.0
+        assert metrics["ratings"] == {"移動速度（1-5）": None, "戻りの速さ（1-5）": None}
+
+
+class TestGroundFootwork:
+    """分析結果の評価の置き換え"""
+
+    METRICS = {
+        "lateral_speed": {"mean": 1.0}, "recovery": {"median": 0.6}, "coverage": {"range": 1.2},
+        "ratings": {"移動速度（1-5）": 4, "戻りの速さ（1-5）": None},
+    }
+
+    def test_japanese_keys(self):
+        analysis = {"2.技術分析": {"2.5_フットワーク": {"移動速度（1-5）": 2, "戻りの速さ（1-5）": 3}}}
+        grounded = ground_footwork(analysis, self.METRICS)
+
+        footwork = grounded["2.技術分析"]["2.5_フットワーク"]
+        assert footwork["移動速度（1-5）"] == 4
+        assert footwork["戻りの速さ（1-5）"] == 3
+        assert footwork["計測値"]["recovery"] == {"median": 0.6}
+        assert analysis["2.技術分析"]["2.5_フットワーク"]["移動速度（1-5）"] == 2
+        assert extract_ratings(grounded)["フットワーク"] == 3.5
+
+    def test_english_keys(self):
+        grounded = ground_footwork({"techniques": {"forehand": {"rating": 3}}}, self.METRICS)
+        assert grounded["techniques"]["footwork"]["移動速度（1-5）"] == 4
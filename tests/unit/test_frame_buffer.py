@@ -0,0 +1,144 @@
+"""
+単体テスト: Frame Buffer モジュール
+共有メモリのリングバッファと、1回のデコードを複数の処理に配る share_batches
+"""
+
+import pytest
+import os
+import sys
+import time
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.cv_analyzer import CVAnalyzer
+from analysis.frame_buffer import FrameRing, share_batches
+from analysis.table_calibration import TableCalibrator
+
+
+def stream(frames=50, batch_size=8, shape=(36, 64, 3)):
+    """フレーム番号を画素値に持つ合成フレームのバッチ列"""
+    for start in range(0, frames, batch_size):
+        ids = np.arange(start, min(start + batch_size, frames))
+        yield start, np.broadcast_to((ids % 256).astype(np.uint8)[:, None, None, None], (len(ids),) + shape).copy()
+
+
+# 処理プロセスに渡す関数（モジュール関数にしておく）
+
+def frame_sum(batches):
+    return sum(int(frames[:, 0, 0, 0].astype(int).sum()) for _, frames in batches)
+
+
+def slow_frame_ids(batches):
+    ids = []
+    for start, frames in batches:
+        time.sleep(0.005)
+        ids.extend(int(value) for value in frames[:, 0, 0, 0])
+    return ids
+
+
+def first_start(batches):
+    return next(iter(batches))[0]
+
+
+def fail_midway(batches):
+    for start, _ in batches:
+        if start >= 16:
+            raise ValueError("検出に失敗")
+
+
+class TestFrameRing:
+    """リングバッファ（同じプロセス内での読み書き）"""
+
+    def test_write_and_read(self):
+        ring = FrameRing((4, 6, 3), batch_size=4, consumers=1, slots=4)
+        try:
+            # スロットより長いバッチは分けて書き込む
+            ring.write(10, np.arange(10, dtype=np.uint8)[:, None, None, None] * np.ones((1, 4, 6, 3), np.uint8))
+            ring.close()
+            batches = [(start, frames.copy()) for start, frames in ring.batches(0)]
+        finally:
+            ring.release()
+        assert [(start, len(frames)) for start, frames in batches] == [(10, 4), (14, 4), (18, 2)]
+        assert batches[2][1][:, 0, 0, 0].tolist() == [8, 9]
+
+    def test_read_only_views(self):
+        ring = FrameRing((2, 2, 3), batch_size=2, consumers=1, slots=2)
+        try:
+            ring.write(0, np.zeros((2, 2, 2, 3), np.uint8))
+            _, frames = next(ring.batches(0))
+            with pytest.raises(ValueError):
+                frames[0, 0, 0, 0] = 1
+        finally:
+            ring.release()
+
+    def test_shape_mismatch(self):
+        ring = FrameRing((2, 2, 3), batch_size=2, consumers=1)
+        try:
+            with pytest.raises(ValueError):
+                ring.write(0, np.zeros((1, 4, 4, 3), np.uint8))
+        finally:
+            ring.release()
+
+    def test_decode_failure(self):
+        ring = FrameRing((2, 2, 3), batch_size=2, consumers=1)
+        try:
+            ring.write(0, np.zeros((2, 2, 2, 3), np.uint8))
+            ring.close(failed=True)
+            with pytest.raises(RuntimeError):
+                list(ring.batches(0))
+        finally:
+            ring.release()
+
+
+class TestShareBatches:
+    """1回のデコードを複数の処理に配る"""
+
+    def test_every_consumer_sees_every_frame(self):
+        """遅い処理や途中でやめる処理があっても、全員が同じバッチ列を読める"""
+        results = share_batches(
+            stream(), {"sum": frame_sum, "ids": slow_frame_ids, "first": first_start}, slots=2
+        )
+        assert results["sum"] == sum(range(50))
+        assert results["ids"] == list(range(50))
+        assert results["first"] == 0
+
+    def test_consumer_failure(self):
+        with pytest.raises(RuntimeError, match="fail"):
+            share_batches(stream(), {"sum": frame_sum, "fail": fail_midway})
+
+    def test_single_consumer_runs_inline(self):
+        """処理が1つならプロセスを使わない（ジェネレータなどもそのまま返せる）"""
+        results = share_batches(stream(), {"batches": lambda batches: batches})
+        assert [start for start, _ in results["batches"]] == [0, 8, 16, 24, 32, 40, 48]
+
+    def test_empty(self):
+        assert share_batches(iter(()), {"sum": frame_sum, "ids": slow_frame_ids}) == {"sum": 0, "ids": []}
+
+
+class TestConsumers:
+    """各処理の共有デコード用の入口"""
+
+    def test_calibrate_batches(self, tmp_path):
+        """バッチ列から抜き出したフレームで、動画から読んだ場合と同じ結果になる"""
+        calibrator = TableCalibrator(str(tmp_path), samples=4)
+        frame = np.full((360, 640, 3), (60, 60, 110), dtype=np.uint8)
+        frame[150:300, 200:450] = (150, 80, 20)  # 青い台
+        batches = [(start, np.repeat(frame[None], 8, axis=0)) for start in range(0, 40, 8)]
+        expected = calibrator.calibrate_frames(
+            ((i, frame[::2, ::2]) for i in calibrator.sample_frames(40)), 40, 2
+        )
+        assert calibrator.calibrate_batches(batches, 40) == expected
+        assert calibrator.save("abc", expected).data["video_hash"] == "abc"
+        assert calibrator.path("abc").exists()
+
+    def test_track_frames(self):
+        """元の解像度のバッチを処理解像度に間引いて追跡する"""
+        batches = list(stream(frames=20, shape=(72, 128, 3)))
+        analyzer = CVAnalyzer("match.mp4", downscale=2)
+        full = analyzer.track_frames(batches)
+        reduced = analyzer.track_batches([(start, frames[:, ::2, ::2]) for start, frames in batches])
+        assert full["frame"].tolist() == list(range(20))
+        assert np.array_equal(full["x"], reduced["x"], equal_nan=True)
@@ -0,0 +1,166 @@
+"""
+単体テスト: Importer / Schema モジュール
+過去の結果JSONのスキーマ判定と一括取り込み
+"""
+
+import pytest
+import os
+import sys
+import json
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.importer import ResultImporter, iter_result_files, parse_result_file
+from storage.results_store import ResultsStore
+from storage.result_index import content_hash
+from storage.schema import (
+    SCHEMA_EN, SCHEMA_JA, canonical_key, detect_schema, detect_stage, get_field, split_stages
+)
+
+
+JA_ANALYSIS = {
+    "選手名": "選手A",
+    "所属": "チームA",
+    "分析日": "2026年3月5日",
+    "2.技術分析": {"2.1_フォアハンドドライブ": {"スイング軌道の評価（1-5）": 4}},
+    "3.戦術分析": {"3.1_得点パターン": ["3球目攻撃"]}
+}
+
+EN_ANALYSIS = {
+    "player_info": {"dominant_hand": "右"},
+    "techniques": {"forehand_drive": {"rating": 4}},
+    "scoring_patterns": ["third ball attack"]
+}
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+class TestSchema:
+    """スキーマの判定とキーの正規化"""
+
+    def test_canonical_key(self):
+        """番号と末尾の補足を取り除く"""
+        assert canonical_key("2.1_フォアハンドドライブ") == "フォアハンドドライブ"
+        assert canonical_key("スイング軌道の評価（1-5）") == "スイング軌道の評価"
+        assert canonical_key("技術分析") == "技術分析"
+
+    def test_get_field_ignores_numbering(self):
+        """番号付き・番号なしのどちらのキーでも値を取り出せる"""
+        assert get_field(JA_ANALYSIS, "技術分析", "フォアハンドドライブ", "スイング軌道の評価") == 4
+        assert get_field({"技術分析": {"フォアハンド": 1}}, "技術分析", "フォアハンド") == 1
+        assert get_field(JA_ANALYSIS, "存在しない") is None
+
+    def test_detect_schema(self):
+        """日本語キーと英語キーを判別する"""
+        assert detect_schema(JA_ANALYSIS) == SCHEMA_JA
+        assert detect_schema(EN_ANALYSIS) == SCHEMA_EN
+        assert detect_schema({}) is None
+
+    def test_detect_stage(self):
+        """包まれていない結果のステージを判別する"""
+        assert detect_stage(JA_ANALYSIS) == "analysis"
+        assert detect_stage(EN_ANALYSIS) == "analysis"
+        assert detect_stage({"5.キーポイント": [], "1.サーブ戦略": {}}) == "strategy"
+        assert detect_stage({"drills": [], "goals": {}}) == "practice_plan"
+
+    def test_split_full_analysis(self):
+        """full_analysis形式をステージごとに分ける"""
+        stages = split_stages({"player": "A", "analysis": JA_ANALYSIS, "strategy": {"キーポイント": []}})
+        assert set(stages) == {"analysis", "strategy"}
+
+
+class TestParseResultFile:
+    """結果ファイル1件の変換"""
+
+    def test_plain_japanese_analysis(self, tmp_path):
+        """選手名・日付を結果本体から取り出す"""
+        item = parse_result_file(write_json(tmp_path / "analysis_old.json", JA_ANALYSIS))
+        assert item["command"] == "analyze"
+        assert item["player"] == "選手A"
+        assert item["team"] == "チームA"
+        assert item["created_at"] == "2026-03-05T00:00:00"
+        assert item["params"]["schema"] == SCHEMA_JA
+        assert [output[0] for output in item["outputs"]] == ["analysis"]
+
+    def test_full_analysis_wrapper(self, tmp_path):
+        """包んだ形式は player / timestamp を優先する"""
+        item = parse_result_file(write_json(tmp_path / "full_analysis_20260301_101500.json", {
+            "player": "選手B", "team": "チームB", "timestamp": "2026-03-01T10:15:00",
+            "analysis": EN_ANALYSIS, "strategy": {"key_points": ["a"]}
+        }))
+        assert item["command"] == "full"
+        assert item["player"] == "選手B"
+        assert item["created_at"] == "2026-03-01T10:15:00"
+        assert item["params"]["schema"] == SCHEMA_EN
+        assert sorted(output[0] for output in item["outputs"]) == ["analysis", "strategy"]
+
+    def test_schemas_are_stored_as_is(self, tmp_path):
+        """どちらのスキーマも元のキーのまま保存し、評価は同じ形で取り出す（save_run と同じ内容ハッシュ）"""
+        for name, data in [("analysis_ja.json", JA_ANALYSIS), ("analysis_en.json", EN_ANALYSIS)]:
+            (stage, digest, text, _, ratings), = parse_result_file(write_json(tmp_path / name, data))["outputs"]
+            assert json.loads(text) == data
+            assert digest == content_hash(data)
+            assert ratings == {"フォアハンド": 4.0}
+
+    def test_invalid_json(self, tmp_path):
+        """壊れたファイルはエラーとして返す"""
+        path = tmp_path / "analysis_broken.json"
+        path.write_text("{", encoding="utf-8")
+        assert "error" in parse_result_file(str(path))
+
+    def test_unknown_content_is_skipped(self, tmp_path):
+        """結果ではないJSONは対象外"""
+        assert parse_result_file(write_json(tmp_path / "other.json", {"foo": 1}))["skipped"]
+
+
+class TestResultImporter:
+    """一括取り込み"""
+
+    @pytest.fixture
+    def results_dir(self, tmp_path):
+        results = tmp_path / "results"
+        results.mkdir()
+        write_json(results / "analysis_1.json", JA_ANALYSIS)
+        # 同じ分析結果を含む full_analysis（analysis は重複）
+        write_json(results / "full_analysis_20260310_090000.json", {
+            "player": "選手A", "analysis": JA_ANALYSIS, "practice_plan": {"1.優先課題": []}
+        })
+        write_json(results / "result_index.json", {"version": 1, "entries": {}})
+        runs = results / "runs" / "20260310_090000_abcdef"
+        runs.mkdir(parents=True)
+        write_json(runs / "analysis.json", JA_ANALYSIS)
+        return results
+
+    def test_skips_index_and_checkpoints(self, results_dir):
+        """索引ファイルとチェックポイントは列挙しない"""
+        names = sorted(os.path.basename(p) for p in iter_result_files([str(results_dir)]))
+        assert names == ["analysis_1.json", "full_analysis_20260310_090000.json"]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_import_dedupes_by_content(self, tmp_path, results_dir, workers):
+        """同じ内容のステージ結果は1回だけ取り込む"""
+        store = ResultsStore(str(tmp_path / "database.sqlite"))
+        stats = ResultImporter(store, workers=workers, batch_size=1).run([str(results_dir)])
+
+        assert stats["files"] == 2
+        assert stats["outputs"] == 2
+        assert stats["duplicates"] == 1
+        rows = store.find_outputs(player="選手A")
+        assert sorted(row["stage"] for row in rows) == ["analysis", "practice_plan"]
+
+        # 再取り込みしても増えない
+        again = ResultImporter(store, workers=workers).run([str(results_dir)])
+        assert again["outputs"] == 0
+        assert again["duplicates"] == 3
+
+    def test_imported_data_roundtrips(self, tmp_path, results_dir):
+        """取り込んだ結果は元の内容のまま読み出せる"""
+        store = ResultsStore(str(tmp_path / "database.sqlite"))
+        ResultImporter(store, workers=1).run([str(results_dir / "analysis_1.json")])
+        rows = store.find_outputs(stage="analysis")
+        assert rows[0]["data"] == JA_ANALYSIS
+        assert rows[0]["created_at"] == "2026-03-05T00:00:00"
@@ -0,0 +1,148 @@
+"""
+単体テスト: Integration モジュール
+計測値と LLM の分析結果の統合・LLM に渡すクリップの選択
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import MagicMock
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis import integration
+from analysis.integration import IntegrationEngine, integrated_analysis
+from analysis.llm_analyzer import LLMAnalyzer
+from pipeline.runner import resolve_analysis
+from storage.result_index import ResultIndex
+
+
+def rally(index, start, end, hits):
+    return {"index": index, "start": start, "end": end, "hits": hits, "onsets": []}
+
+
+def group(counts):
+    return {"n": sum(map(sum, counts)), "counts": counts, "top": "長・右"}
+
+
+CV_RESULT = {
+    "video_hash": "abc",
+    "self_side": "near",
+    "rallies": [rally(0, 10.0, 14.0, 4), rally(1, 30.0, 50.0, 14), rally(2, 60.0, 66.0, 8)],
+    "strokes": [
+        {"frame": 330, "time": 11.0, "stroke": "serve", "confidence": 0.9},
+        {"frame": 1860, "time": 62.0, "stroke": "forehand_drive", "confidence": 0.8},
+        {"frame": 1890, "time": 63.0, "stroke": "push", "confidence": 0.6},
+        {"frame": 1920, "time": 64.0, "stroke": "forehand_drive", "confidence": 0.7},
+    ],
+    "placement": {"players": {
+        "near": {"server": {"serve": group([[3, 0, 0], [0, 0, 0], [0, 0, 1]])}},
+        "far": {
+            "receiver": {"receive": group([[0, 0, 0], [0, 0, 0], [0, 1, 5]])},
+            "server": {"third": group([[1, 1, 0], [0, 1, 0], [0, 0, 1]])},
+        },
+    }},
+    "footwork": {
+        "lateral_speed": {"mean": 1.0}, "recovery": {"median": 0.6}, "coverage": {"range": 1.2},
+        "ratings": {"移動速度（1-5）": 4, "戻りの速さ（1-5）": 3},
+    },
+    "unavailable": {},
+}
+
+
+class TestMetrics:
+    """計測値の集計"""
+
+    def test_rally_patterns(self):
+        patterns = IntegrationEngine(CV_RESULT).analyze_rally_patterns()
+        assert patterns["rallies"] == 3
+        assert patterns["hits"] == {"mean": 8.7, "max": 14}
+        assert patterns["length_mix"] == {"短い（4打以下）": 0.33, "中（5-8打）": 0.33, "長い（9打以上）": 0.33}
+
+    def test_rallies_from_strokes(self):
+        """音声でラリーが検出できなければ打球イベントの時刻からまとめる"""
+        engine = IntegrationEngine({**CV_RESULT, "rallies": None})
+        assert engine.analyze_rally_patterns()["rallies"] == 1
+
+    def test_technique_stats(self):
+        stats = IntegrationEngine(CV_RESULT).calculate_technique_stats()
+        assert stats["strokes"]["フォアハンドドライブ"] == {"n": 2, "share": 0.5, "confidence": 0.75}
+        assert stats["strokes"]["ブロック"]["n"] == 0
+        assert stats["footwork"]["ratings"]["移動速度（1-5）"] == 4
+
+    def test_serve_receive_by_side(self):
+        """配球データの near / far を自分の位置で自分・相手に読み替える"""
+        engine = IntegrationEngine(CV_RESULT)
+        assert engine.analyze_serve_receive() == {"server.serve": {"n": 4, "top": "長・右", "share": 0.75}}
+        assert set(engine.analyze_serve_receive(is_opponent=True)) == {"server.third", "receiver.receive"}
+        assert IntegrationEngine({**CV_RESULT, "self_side": None}).analyze_serve_receive() == {}
+
+    def test_opponent_weakness(self):
+        engine = IntegrationEngine(CV_RESULT, llm_result={"5.注意点": {"弱点": ["バック側の長いサーブ"]}})
+        weakness = engine.identify_opponent_weakness()
+        # 偏りの少ない3球目は含めない
+        assert weakness["predictable"] == [{"role": "receiver", "phase": "receive", "n": 6, "top": "長・右"}]
+        assert weakness["llm"] == ["バック側の長いサーブ"]
+
+
+class TestClipSelection:
+    """LLM に渡すクリップの選択"""
+
+    def test_prefers_long_and_varied_rallies(self):
+        clips = IntegrationEngine(CV_RESULT).select_clips(max_clips=2)
+        # 14打のラリーは中央の8秒に切り詰める。8打のラリーは打球の種類が多い
+        assert [(c["start"], c["end"]) for c in clips] == [(36.0, 44.0), (60.0, 66.0)]
+        assert clips[1]["strokes"] == ["forehand_drive", "push"]
+
+    def test_total_duration(self):
+        clips = IntegrationEngine(CV_RESULT).select_clips(max_total=12.0)
+        assert sum(c["end"] - c["start"] for c in clips) <= 12.0
+        assert len(clips) == 2
+
+
+class TestIntegratedAnalysis:
+    """統合分析"""
+
+    def test_run_integration(self):
+        llm_result = {"2.技術分析": {"2.5_フットワーク": {"移動速度（1-5）": 2}}}
+        merged = IntegrationEngine(CV_RESULT, llm_result).run_integration()
+        assert merged["2.技術分析"]["2.5_フットワーク"]["移動速度（1-5）"] == 4
+        assert merged["定量分析"]["ラリー"]["rallies"] == 3
+        assert llm_result["2.技術分析"]["2.5_フットワーク"]["移動速度（1-5）"] == 2
+
+    def test_sends_clips_and_metrics(self, tmp_path, monkeypatch):
+        """選んだクリップと計測値だけを LLM に渡す"""
+        clip_file = tmp_path / "clip.mp4"
+        clip_file.write_bytes(b"clip")
+        monkeypatch.setattr(
+            integration, "cut_clips", lambda video, clips, *args: [(clip, str(clip_file)) for clip in clips]
+        )
+        analyzer = LLMAnalyzer(api_key="test")
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content='{"総合評価": "良い"}'))
+        ]
+
+        result = integrated_analysis(analyzer, "match.mp4", CV_RESULT, "選手A", "チームA", max_clips=2)
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert sum(part["type"] == "video_url" for part in content) == 2
+        assert "選んだ 2 本の短いクリップ（合計 14 秒）" in content[-1]["text"]
+        assert '"rallies":3' in content[-1]["text"]
+        assert result["総合評価"] == "良い"
+        assert "定量分析" in result
+
+    def test_analysis_key(self, tmp_path, monkeypatch):
+        """統合分析は計測値ごとに別の結果として索引に登録する"""
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+        index = ResultIndex(str(tmp_path / "results"))
+        analyzer = MagicMock(model="m")
+        analyzer.analyze_video.return_value = {"a": 1}
+        _, plain = resolve_analysis(analyzer, index, str(video), "選手A", "チームA")
+
+        analyzer.analyze_clips.return_value = {"a": 2}
+        monkeypatch.setattr(integration, "cut_clips", lambda video, clips, *args: [])
+        result, key = resolve_analysis(analyzer, index, str(video), "選手A", "チームA", cv_result=CV_RESULT)
+        assert key != plain
+        assert result["定量分析"]["ラリー"]["rallies"] == 3
@@ -0,0 +1,186 @@
+"""
+単体テスト: Job Queue / Worker モジュール
+SQLiteジョブキューのリース取得・再キュー・複数プロセスからの取り出し
+"""
+
+import pytest
+import os
+import sys
+import time
+import multiprocessing
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.job_queue import JobQueue
+from pipeline.worker import Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def _drain(db_path, worker_id, result_queue):
+    """別プロセスでキューが空になるまでジョブを取り出す"""
+    q = JobQueue(db_path)
+    claimed = []
+    while True:
+        job = q.claim(worker_id, lease_seconds=60)
+        if job is None:
+            break
+        claimed.append(job["id"])
+        q.complete(job["id"], worker_id, {"by": worker_id})
+    result_queue.put(claimed)
+
+
+class TestClaim:
+    """ジョブの取り出し"""
+
+    def test_priority_order(self, queue):
+        """優先度の高いジョブから、同じ優先度なら登録順に取り出す"""
+        low = queue.enqueue("full", {"video": "a.mp4"})
+        high = queue.enqueue("full", {"video": "b.mp4"}, priority=10)
+        low2 = queue.enqueue("full", {"video": "c.mp4"})
+
+        assert [queue.claim("w")["id"] for _ in range(3)] == [high, low, low2]
+        assert queue.claim("w") is None
+
+    def test_claim_sets_lease(self, queue):
+        """取り出したジョブは実行中になり、試行回数が増える"""
+        job_id = queue.enqueue("full", {"video": "a.mp4"})
+        job = queue.claim("w1", lease_seconds=60)
+
+        assert job["id"] == job_id
+        assert job["status"] == "running"
+        assert job["lease_owner"] == "w1"
+        assert job["attempts"] == 1
+        assert job["payload"] == {"video": "a.mp4"}
+
+    def test_dedupe_key(self, queue):
+        """同じキーの未完了ジョブは重複登録しない"""
+        first = queue.enqueue("full", {"video": "a.mp4"}, dedupe_key="a")
+        assert queue.enqueue("full", {"video": "a.mp4"}, dedupe_key="a") == first
+
+        queue.complete(queue.claim("w")["id"], "w")
+        assert queue.enqueue("full", {"video": "a.mp4"}, dedupe_key="a") != first
+
+    def test_stage_filter(self, queue):
+        """指定したステージのジョブだけを取り出す"""
+        queue.enqueue("other", {})
+        assert queue.claim("w", stages=["full"]) is None
+        assert queue.claim("w", stages=["other"]) is not None
+
+
+class TestLease:
+    """リースと再キュー"""
+
+    def test_expired_lease_is_requeued(self, queue):
+        """ワーカーが落ちてリースが切れたジョブは再度取り出せる"""
+        job_id = queue.enqueue("full", {"video": "a.mp4"})
+        queue.claim("crashed", lease_seconds=0.01)
+        time.sleep(0.05)
+
+        job = queue.claim("w2", lease_seconds=60)
+        assert job["id"] == job_id
+        assert job["attempts"] == 2
+        # 元のワーカーはもう完了にできない
+        assert not queue.complete(job_id, "crashed")
+        assert queue.complete(job_id, "w2")
+
+    def test_attempts_exhausted(self, queue):
+        """試行回数を使い切ったジョブは失敗になる"""
+        job_id = queue.enqueue("full", {}, max_attempts=1)
+        queue.claim("crashed", lease_seconds=0.01)
+        time.sleep(0.05)
+
+        assert queue.claim("w2") is None
+        assert queue.get(job_id)["status"] == "failed"
+
+    def test_heartbeat_extends_lease(self, queue):
+        """リースを延長できるのは保持しているワーカーだけ"""
+        job_id = queue.enqueue("full", {})
+        queue.claim("w1", lease_seconds=1)
+        assert queue.heartbeat(job_id, "w1", lease_seconds=60)
+        assert not queue.heartbeat(job_id, "w2", lease_seconds=60)
+
+    def test_fail_retries_with_backoff(self, queue):
+        """失敗したジョブは待ち時間の後に再試行される"""
+        job_id = queue.enqueue("full", {})
+        queue.claim("w")
+        queue.fail(job_id, "w", "timeout", backoff_seconds=60)
+
+        job = queue.get(job_id)
+        assert job["status"] == "queued"
+        assert job["error"] == "timeout"
+        assert queue.claim("w") is None  # まだ待ち時間中
+
+
+class TestMultipleProcesses:
+    """複数プロセスからの取り出し"""
+
+    def test_no_double_processing(self, tmp_path):
+        """複数プロセスで取り出しても、同じジョブを二重に処理しない"""
+        db_path = str(tmp_path / "jobs.sqlite")
+        queue = JobQueue(db_path)
+        job_ids = {queue.enqueue("full", {"n": i}) for i in range(40)}
+
+        result_queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_drain, args=(db_path, f"w{i}", result_queue))
+            for i in range(4)
+        ]
+        for p in processes:
+            p.start()
+        claimed = []
+        for _ in processes:
+            claimed.extend(result_queue.get(timeout=30))
+        for p in processes:
+            p.join(timeout=30)
+
+        assert sorted(claimed) == sorted(job_ids)
+        assert queue.stats() == {"completed": 40}
+
+
+class TestWorker:
+    """ワーカー"""
+
+    def test_processes_jobs_until_drained(self, queue):
+        """キューが空になるまでジョブを処理する"""
+        handled = []
+        worker = Worker(queue, handlers={"full": lambda payload: handled.append(payload) or {"ok": True}})
+        queue.enqueue("full", {"video": "a.mp4"})
+        queue.enqueue("full", {"video": "b.mp4"})
+
+        assert worker.run(drain=True) == 2
+        assert [p["video"] for p in handled] == ["a.mp4", "b.mp4"]
+        assert queue.stats() == {"completed": 2}
+
+    def test_failed_job_is_recorded(self, queue):
+        """処理中の例外は失敗として記録され、再試行待ちになる"""
+        def fail(payload):
+            raise RuntimeError("API error")
+
+        worker = Worker(queue, handlers={"full": fail})
+        job_id = queue.enqueue("full", {})
+        worker.run_one()
+
+        job = queue.get(job_id)
+        assert job["status"] == "queued"
+        assert "API error" in job["error"]
+
+    def test_lost_lease_is_not_reported_completed(self, queue):
+        """処理中にリースを失ったジョブは完了として扱わない"""
+        job_id = queue.enqueue("full", {})
+        worker = Worker(queue, worker_id="w1", lease_seconds=60)
+
+        def reclaimed(payload):
+            # リースが切れて別のワーカーが取り直した状態にする
+            queue.fail(job_id, "w1", "lease expired", backoff_seconds=0)
+            queue.claim("w2")
+            return {"ok": True}
+
+        worker.handlers = {"full": reclaimed}
+        assert worker.run_one()["status"] == "lost"
+        job = queue.get(job_id)
+        assert job["status"] == "running" and job["lease_owner"] == "w2"
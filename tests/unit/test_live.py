@@ -0,0 +1,159 @@
+"""
+単体テスト: Live モジュール
+録画中の試合の音声からのラリーの逐次検出と、時間内に返すゲーム間の助言
+"""
+
+import pytest
+import os
+import sys
+import time
+import subprocess
+from unittest.mock import MagicMock
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.audio_segmenter import SAMPLE_RATE, cluster_rallies, pick_onsets, spectral_flux
+from analysis.llm_analyzer import LLMAnalyzer
+from pipeline import live
+from pipeline.live import LiveSession, LiveStats, extract_frames, keyframe_times
+
+
+def synthetic_audio(seconds=20.0, clicks=(), seed=0):
+    """雑音の上に 4kHz の減衰する打球音を重ねた合成音声"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0.0, 0.01, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    t = np.arange(int(0.03 * SAMPLE_RATE)) / SAMPLE_RATE
+    click = (0.5 * np.sin(2 * np.pi * 4000 * t) * np.exp(-t / 0.005)).astype(np.float32)
+    for time_ in clicks:
+        start = int(time_ * SAMPLE_RATE)
+        audio[start:start + len(click)] += click[:len(audio) - start]
+    return audio
+
+
+def chunked(audio, size):
+    return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+# 3つのラリー（打球5回・4回・6回）と、単発の音
+CLICKS = [2.0, 3.0, 4.0, 5.0, 6.0, 11.0, 11.8, 12.6, 13.4, 17.0, 21.0, 21.5, 22.0, 22.5, 23.0, 23.5]
+
+
+def fed_stats(seconds=26.0):
+    """合成音声を 0.5 秒ずつ与えた LiveStats と、ラリーが閉じた時刻"""
+    stats = LiveStats()
+    closed_at = []
+    for chunk in chunked(synthetic_audio(seconds, CLICKS), SAMPLE_RATE // 2):
+        closed_at += [(rally["index"], stats.duration) for rally in stats.update(chunk)]
+    return stats, closed_at
+
+
+class TestLiveStats:
+    """ラリーの逐次検出"""
+
+    def test_matches_batch_detection(self):
+        """逐次検出のラリーは、まとめて検出した場合と同じになる"""
+        stats, _ = fed_stats()
+        stats.finish()
+        audio = synthetic_audio(26.0, CLICKS)
+        batch = cluster_rallies(pick_onsets(spectral_flux([audio])))
+        assert [r["hits"] for r in stats.rallies] == [r["hits"] for r in batch] == [5, 4, 6]
+        assert np.allclose([r["start"] for r in stats.rallies], [r["start"] for r in batch], atol=0.02)
+        assert stats.onsets == len(CLICKS)
+
+    def test_rallies_close_while_reading(self):
+        """打球音の間隔が空いた時点でラリーを閉じる（入力の終わりを待たない）"""
+        stats, closed_at = fed_stats()
+        assert [index for index, _ in closed_at] == [0, 1, 2]
+        # 最後の打球から max_gap と確定の遅れを過ぎて最初のチャンクで閉じる
+        assert [t for _, t in closed_at] == pytest.approx([8.5, 16.0, 26.0], abs=0.5)
+
+    def test_window_bounds_memory(self):
+        """保持するフラックスは直近の分だけ"""
+        stats = LiveStats(window_seconds=5.0)
+        for chunk in chunked(synthetic_audio(26.0, CLICKS), SAMPLE_RATE // 2):
+            stats.update(chunk)
+        assert len(stats._recent) == 500
+        assert stats.finish() == [] and len(stats.rallies) == 3
+
+    def test_snapshot(self):
+        stats, _ = fed_stats()
+        snapshot = stats.snapshot(last_rallies=1)
+        assert snapshot["duration"] == pytest.approx(26.0, abs=0.1)
+        assert snapshot["match"]["rallies"] == 3
+        assert snapshot["match"]["hits"] == {"mean": 5.0, "max": 6}
+        assert snapshot["recent"]["rallies"] == 1
+        assert snapshot["recent"]["tempo"] == pytest.approx(0.5, abs=0.02)
+        assert snapshot["recent"]["length_mix"]["中（5-8打）"] == 1.0
+        assert LiveStats().snapshot()["match"] == {"rallies": 0, "tempo": None}
+
+
+class TestAdvice:
+    """ゲーム間の助言"""
+
+    def test_keyframe_times(self):
+        rallies = [{"onsets": [5.0, 6.0, 7.0]}, {"onsets": [20.0, 20.5, 21.0, 21.5]}, {"onsets": [30.0]}]
+        assert keyframe_times(rallies) == [5.0, 6.0, 20.0, 21.0, 30.0]
+        assert keyframe_times(rallies, per_rally=1) == [5.0, 20.0, 30.0]
+
+    def test_extract_frames(self, monkeypatch):
+        commands = []
+
+        def run(command, **kwargs):
+            commands.append((command, kwargs))
+            return subprocess.CompletedProcess(command, 0, b"jpeg", b"")
+        monkeypatch.setattr(live.subprocess, "run", run)
+
+        frames = extract_frames("live.ts", [5.0, 6.0], deadline=time.monotonic() + 10)
+        assert [frame["timestamp"] for frame in frames] == [5.0, 6.0]
+        assert frames[0]["data"] == "anBlZw=="
+        command, kwargs = commands[0]
+        assert command[command.index("-ss") + 1] == "5.000"
+        assert 0 < kwargs["timeout"] <= 10
+        # 期限を過ぎていれば取り出さない
+        assert extract_frames("live.ts", [5.0], deadline=time.monotonic() - 1) == []
+
+    def test_advise(self, monkeypatch):
+        """直近のラリーのフレームと統計を1回の呼び出しで送る"""
+        monkeypatch.setattr(
+            live.subprocess, "run", lambda command, **kwargs: subprocess.CompletedProcess(command, 0, b"jpeg", b"")
+        )
+        analyzer = LLMAnalyzer(api_key="test")
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content='{"継続": [], "変更": [], "次のゲームの最優先事項": "3球目攻撃"}'))
+        ]
+        stats, _ = fed_stats()
+        session = LiveSession("live.ts", analyzer, strategy={"基本戦略": "長いラリー"}, last_rallies=2,
+                              budget=10.0, stats=stats)
+
+        result = session.advise()
+        kwargs = analyzer.client.chat.completions.create.call_args.kwargs
+        content = kwargs["messages"][0]["content"]
+        assert result["rallies"] == [1, 2] and result["frames"] == 4
+        assert sum(part["type"] == "image_url" for part in content) == 4
+        assert "直近 2 ラリー" in content[-1]["text"] and "長いラリー" in content[-1]["text"]
+        assert 0 < kwargs["timeout"] <= 9.0
+        assert result["advice"]["次のゲームの最優先事項"] == "3球目攻撃"
+        assert "error" not in result
+
+    def test_budget_fallback(self):
+        """時間内に応答がなければ統計だけを返す"""
+        analyzer = MagicMock()
+        analyzer.live_advice.side_effect = lambda *args, **kwargs: time.sleep(2.0)
+        stats, _ = fed_stats()
+        session = LiveSession("-", analyzer, budget=1.5, stats=stats)
+
+        result = session.advise()
+        assert result["latency"] < 1.5
+        assert result["advice"] is None and "error" in result
+        assert result["stats"]["match"]["rallies"] == 3
+        # 標準入力からはフレームを取り出さない
+        assert analyzer.live_advice.call_args.args[0] == []
+
+    def test_stats_only(self):
+        stats, _ = fed_stats()
+        result = LiveSession("live.ts", stats=stats).advise()
+        assert result["advice"] is None and result["frames"] == 0 and "error" not in result
@@ -32,6 +32,21 @@ class TestLLMAnalyzerInit:
         assert analyzer is not None
 
 
+class TestDeferredClient:
+    """APIクライアントの遅延生成"""
+    
+    def test_client_not_created_on_init(self):
+        """初期化時点ではクライアントを生成しない"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-api-key'}):
+            with patch('analysis.llm_analyzer.OpenAI') as mock_openai:
+                analyzer = LLMAnalyzer()
+                mock_openai.assert_not_called()
+                
+                client = analyzer.client
+                assert client is analyzer.client
+                mock_openai.assert_called_once()
+
+
 class TestVideoFileValidation:
     """TC-002: 動画ファイル存在チェック"""
     
@@ -0,0 +1,138 @@
+"""
+単体テスト: Placement モジュール
+バウンドの検出とコースの集計
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import MagicMock
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.llm_analyzer import LLMAnalyzer
+from analysis.placement import (
+    PlacementAnalyzer, assign_shots, detect_bounces, placement_heatmaps, placement_stats
+)
+
+
+def make_bounces(times, table_x, table_y):
+    return {
+        "frame": (np.asarray(times) * 30).astype(np.int32),
+        "time": np.asarray(times, dtype=np.float32),
+        "table_x": np.asarray(table_x, dtype=np.float32),
+        "table_y": np.asarray(table_y, dtype=np.float32),
+    }
+
+
+# 1本目: 手前の選手のサーブ（自コート → 奥の長い右）、レシーブ（手前の短い中央）、3球目（奥の長い右）
+# 2本目: 奥の選手のサーブ（自コート → 手前）、レシーブ（奥）
+RALLY_BOUNCES = make_bounces(
+    [1.0, 1.4, 1.9, 2.4, 8.0, 8.4, 8.9],
+    [0.7, 1.4, 0.76, 1.3, 0.7, 0.2, 0.2],
+    [2.3, 0.1, 1.5, 0.2, 0.4, 2.6, 0.2],
+)
+
+
+class TestBounces:
+    """バウンドの検出"""
+
+    def test_detect_bounces(self):
+        """縦方向の速度が下向きから上向きに変わる台上の点をバウンドとする"""
+        frames = np.arange(60, dtype=np.int32)
+        y = 300.0 - 5.0 * np.abs(frames % 20 - 10)
+        table_y = np.where(frames < 20, 2.2, np.where(frames < 40, 0.3, 3.5)).astype(np.float32)
+        track = {
+            "frame": frames,
+            "time": (frames / 30.0).astype(np.float32),
+            "y": y.astype(np.float32),
+            "detected": np.ones(60, dtype=bool),
+            "track_id": np.zeros(60, dtype=np.int32),
+            "table_x": np.full(60, 0.5, dtype=np.float32),
+            "table_y": table_y,
+        }
+        bounces = detect_bounces(track)
+        # 3回目は台の外（3.5m）なので除く
+        assert bounces["frame"].tolist() == [10, 30]
+
+        track["track_id"][30:] = 1
+        assert detect_bounces(track)["frame"].tolist() == [10]
+
+
+class TestShots:
+    """サーバー/レシーバーと何球目か"""
+
+    def test_assign_shots(self):
+        shots = assign_shots(RALLY_BOUNCES)
+        # サーブの自コートへのバウンドは着地に数えない
+        assert shots["rally"].tolist() == [0, 0, 0, 1, 1]
+        assert shots["shot"].tolist() == [1, 2, 3, 1, 2]
+        assert shots["hitter"].tolist() == [0, 1, 0, 1, 0]
+        assert shots["role"].tolist() == [0, 1, 0, 0, 1]
+        assert shots["phase"].tolist() == [0, 1, 2, 0, 1]
+
+    def test_rallies_from_audio(self):
+        """ラリー区間の外のバウンドは除く"""
+        shots = assign_shots(RALLY_BOUNCES, rallies=[{"start": 0.5, "end": 3.0}])
+        assert shots["shot"].tolist() == [1, 2, 3]
+
+    def test_empty(self):
+        shots = assign_shots(make_bounces([], [], []))
+        assert len(shots["shot"]) == 0
+        assert placement_stats(shots)["players"] == {}
+
+
+class TestPlacementStats:
+    """コースの集計"""
+
+    def test_heatmaps(self):
+        heatmaps = placement_heatmaps(assign_shots(RALLY_BOUNCES))
+        assert heatmaps.shape == (2, 2, 5, 3, 3)
+        assert heatmaps.sum() == 5
+        # 手前の選手のサーブは奥のコートの長い右
+        assert heatmaps[0, 0, 0, 2, 2] == 1
+        # 奥の選手のレシーブは手前のコートの短い中央（奥の選手から見て）
+        assert heatmaps[1, 1, 1, 0, 1] == 1
+
+    def test_stats_json(self):
+        stats = placement_stats(assign_shots(RALLY_BOUNCES), self_side="near")
+        assert stats["shots"] == 5 and stats["rallies"] == 2
+        assert stats["players"]["self"]["server"]["serve"] == {
+            "n": 1, "counts": [[0, 0, 0], [0, 0, 0], [0, 0, 1]], "top": "長・右 (100%)"
+        }
+        assert set(stats["players"]["opponent"]) == {"server", "receiver"}
+
+    def test_cached_shots_are_regrouped_by_side(self, tmp_path):
+        """保存済みの着地を再利用し、自分の位置は呼び出しごとに反映する"""
+        PlacementAnalyzer(str(tmp_path)).save_shots("abc", assign_shots(RALLY_BOUNCES))
+
+        near = PlacementAnalyzer(str(tmp_path), self_side="near")
+        stats = near.run("match.mp4", "abc")
+        assert set(stats["players"]) == {"self", "opponent"}
+        assert near.path("abc").name == "abc_near.json" and near.path("abc").exists()
+
+        stats = PlacementAnalyzer(str(tmp_path)).run("match.mp4", "abc")
+        assert set(stats["players"]) == {"near", "far"} and stats["shots"] == 5
+
+
+class TestStrategyPrompt:
+    """戦略生成プロンプトへの埋め込み"""
+
+    def test_placement_in_prompt(self):
+        analyzer = LLMAnalyzer(api_key="test")
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content='{"ok": true}'))
+        ]
+        stats = placement_stats(assign_shots(RALLY_BOUNCES))
+
+        assert analyzer.generate_strategy({"a": 1}, placement=stats) == {"ok": True}
+        prompt = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert '"top":"長・右 (100%)"' in prompt
+
+        analyzer.generate_strategy({"a": 1})
+        prompt = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert "【配球データ（ボール追跡による実測）】\nなし" in prompt
@@ -0,0 +1,100 @@
+"""
+単体テスト: Pose Estimator モジュール
+フレーム範囲の分割とキーポイント配列の保存
+"""
+
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.pose_estimator import NUM_LANDMARKS, PoseEstimator, load_keypoints, shard_ranges
+
+
+def fake_estimate(video_path, start, end, frame_step, model_complexity):
+    """フレーム番号を x に入れた推定結果（プロセス間で渡せるようモジュール関数にする）"""
+    frames = np.arange(start, end, frame_step, dtype=np.float32)
+    keypoints = np.zeros((len(frames), NUM_LANDMARKS, 4), dtype=np.float32)
+    keypoints[:, :, 0] = frames[:, None]
+    keypoints[frames % 10 == 9] = np.nan  # 人物がいないフレーム
+    return start, keypoints
+
+
+class TestShardRanges:
+    """フレーム範囲の分割"""
+
+    def test_even_split(self):
+        assert shard_ranges(1000, 4, min_frames=100) == [(0, 250), (250, 500), (500, 750), (750, 1000)]
+
+    def test_short_video_is_not_split(self):
+        """短い動画はモデルの読み込みを増やさないよう分割しない"""
+        assert shard_ranges(500, 8, min_frames=300) == [(0, 500)]
+        assert shard_ranges(0, 4) == []
+
+
+class TestPoseEstimator:
+    """推定結果の保存と再利用"""
+
+    @pytest.fixture
+    def video(self, tmp_path):
+        path = tmp_path / "match.mp4"
+        path.write_bytes(b"video")
+        return str(path)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_shards_are_stitched_in_order(self, tmp_path, video, workers):
+        """分担した範囲がフレーム順につながり、float16 の .npy に保存される"""
+        estimator = PoseEstimator(str(tmp_path / "poses"), workers=workers, estimate=fake_estimate)
+        keypoints, meta = estimator.run(video, info={"fps": 30.0, "frame_count": 700})
+
+        assert keypoints.shape == (700, NUM_LANDMARKS, 4)
+        assert keypoints.dtype == np.float16
+        assert np.array_equal(keypoints[:9, 0, 0], np.arange(9))
+        assert meta["frames"] == 700 and meta["detected"] == 630
+
+        array_path, _ = estimator.paths(meta["video_hash"])
+        assert np.array_equal(load_keypoints(str(array_path)), keypoints, equal_nan=True)
+
+    def test_frame_step_alignment(self, tmp_path, video):
+        """間引き時も範囲の境目で推定間隔がずれない"""
+        estimator = PoseEstimator(str(tmp_path / "poses"), workers=3, frame_step=3, estimate=fake_estimate)
+        keypoints, meta = estimator.run(video, info={"fps": 30.0, "frame_count": 2000})
+
+        frames = keypoints[:, 1, 0].astype(np.float32)
+        detected = frames[~np.isnan(frames)]
+        assert len(keypoints) == len(range(0, 2000, 3))
+        assert set(np.diff(detected).tolist()) <= {3.0, 6.0}
+        assert meta["frame_step"] == 3
+
+    def test_cached_result_is_reused(self, tmp_path, video):
+        """同じ動画は推論せずに保存済みの配列を読む"""
+        PoseEstimator(str(tmp_path / "poses"), workers=1, estimate=fake_estimate).run(
+            video, info={"fps": 30.0, "frame_count": 50}
+        )
+
+        def fail(*args):
+            raise AssertionError("推論が再実行された")
+
+        keypoints, meta = PoseEstimator(str(tmp_path / "poses"), workers=1, estimate=fail).run(video)
+        assert meta["frames"] == 50
+        assert isinstance(keypoints, np.memmap)
+
+    def test_cache_is_keyed_by_settings(self, tmp_path, video):
+        """推定間隔やモデルが違えば保存済みの結果を使わずに推定し直す"""
+        info = {"fps": 30.0, "frame_count": 60}
+        PoseEstimator(str(tmp_path / "poses"), workers=1, estimate=fake_estimate).run(video, info=info)
+
+        keypoints, meta = PoseEstimator(
+            str(tmp_path / "poses"), workers=1, frame_step=3, estimate=fake_estimate
+        ).run(video, info=info)
+        assert meta["frame_step"] == 3 and len(keypoints) == 20
+
+        _, meta = PoseEstimator(
+            str(tmp_path / "poses"), workers=1, model_complexity=2, estimate=fake_estimate
+        ).run(video, info=info)
+        assert meta["model_complexity"] == 2 and meta["frames"] == 60
+        assert len(os.listdir(tmp_path / "poses")) == 6
@@ -0,0 +1,111 @@
+"""
+単体テスト: Proxy モジュール
+プロキシ動画の作成・保存と、プロキシの座標から元の動画の座標への変換
+"""
+
+import pytest
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis import proxy as proxy_module
+from analysis.cv_analyzer import CVAnalyzer
+from analysis.proxy import ProxyGenerator, proxy_or_source, to_source
+
+
+class FakeFFmpeg:
+    """ffprobe / ffmpeg の代わり（1920x1080 の動画を 854x480 に変換したことにする）"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.commands = []
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command)
+        if command[0] == "ffprobe":
+            size = (854, 480) if command[-1].endswith(".mp4") and "proxies" in command[-1] else (1920, 1080)
+            stdout = json.dumps({"streams": [{"width": size[0], "height": size[1]}]})
+            return subprocess.CompletedProcess(command, 0, stdout, "")
+        if self.fail:
+            return subprocess.CompletedProcess(command, 1, "", "Invalid data found")
+        with open(command[-1], "wb") as f:
+            f.write(b"proxy")
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "match.mov"
+    path.write_bytes(b"video")
+    return str(path)
+
+
+class TestProxyGenerator:
+    """プロキシ動画の作成"""
+
+    def test_generate_and_cache(self, tmp_path, video, monkeypatch):
+        ffmpeg = FakeFFmpeg()
+        monkeypatch.setattr(proxy_module.subprocess, "run", ffmpeg)
+        generator = ProxyGenerator(str(tmp_path / "proxies"))
+
+        proxy = generator.generate(video, "abc")
+        assert proxy["path"] == str(tmp_path / "proxies" / "abc.mp4")
+        assert (proxy["width"], proxy["height"]) == (854, 480)
+        assert proxy["scale"] == pytest.approx([1920 / 854, 2.25])
+        encode = next(command for command in ffmpeg.commands if command[0] == "ffmpeg")
+        assert encode[encode.index("-g") + 1] == "15"
+        assert sorted(os.listdir(tmp_path / "proxies")) == ["abc.json", "abc.mp4"]
+
+        # 2回目は変換しない
+        count = len(ffmpeg.commands)
+        assert generator.generate(video, "abc") == proxy
+        assert len(ffmpeg.commands) == count
+
+    def test_failure(self, tmp_path, video, monkeypatch):
+        monkeypatch.setattr(proxy_module.subprocess, "run", FakeFFmpeg(fail=True))
+        with pytest.raises(ValueError, match="Invalid data"):
+            ProxyGenerator(str(tmp_path / "proxies")).generate(video, "abc")
+        assert os.listdir(tmp_path / "proxies") == []
+
+    def test_falls_back_to_source(self, video, monkeypatch):
+        """ffmpeg がなければ元の動画をそのまま読む"""
+        def missing(command, **kwargs):
+            raise FileNotFoundError(command[0])
+
+        monkeypatch.setattr(proxy_module.subprocess, "run", missing)
+        proxy = proxy_or_source(video, "abc")
+        assert proxy == {"video_hash": "abc", "path": video, "scale": [1.0, 1.0], "proxy": False}
+
+
+class TestCoordinates:
+    """座標の変換"""
+
+    PROXY = {"path": "abc.mp4", "scale": [2.25, 2.25], "proxy": True}
+
+    def test_to_source(self):
+        x, y = to_source(self.PROXY, np.array([100.0, np.nan]), np.array([40.0, 10.0]))
+        assert x[0] == 225.0 and np.isnan(x[1])
+        assert y.tolist() == [90.0, 22.5]
+
+    def test_tracking_on_proxy(self):
+        """プロキシで追跡した位置は元の動画の画素座標で返す"""
+        analyzer = CVAnalyzer.from_proxy(self.PROXY)
+        assert analyzer.video_path == "abc.mp4" and analyzer.downscale == 1
+
+        positions = np.array([[[100.0, 40.0]]] * 4, dtype=np.float32)
+        analyzer.detect = lambda frames: (positions[:len(frames)], np.full((len(frames), 1), 10))
+        track = analyzer.track_batches([(0, np.zeros((4, 8, 8, 3), np.uint8))])
+        assert track["detected"].any()
+        assert track["x"][track["detected"]][0] == pytest.approx(225.0)
+        assert track["y"][track["detected"]][0] == pytest.approx(90.0)
+
+    def test_source_keeps_downscale(self):
+        """プロキシを作成できなかった場合は従来どおり縮小して処理する"""
+        analyzer = CVAnalyzer.from_proxy({"path": "match.mp4", "scale": [1.0, 1.0], "proxy": False})
+        assert analyzer.downscale == 2
@@ -0,0 +1,149 @@
+"""
+単体テスト: Ratings モジュール
+技術評価の時系列テーブルと推移の集計
+"""
+
+import pytest
+import os
+import sys
+import sqlite3
+from contextlib import closing
+from unittest.mock import patch, MagicMock
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.ratings import RatingTrends, extract_ratings
+from storage.results_store import ResultsStore
+
+
+def analysis(forehand, backhand=3):
+    """番号付き日本語キーの分析結果"""
+    return {
+        "2.技術分析": {
+            "2.1_フォアハンドドライブ": {"スイング軌道の評価（1-5）": forehand, "打点の適切さ（1-5）": forehand},
+            "2.2_バックハンドドライブ": {"安定性（1-5）": backhand, "強み": "連打"},
+        }
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "database.sqlite")
+
+
+class TestExtractRatings:
+    """分析結果からの評価の取り出し"""
+
+    def test_numbered_japanese_keys(self):
+        """評価項目の平均を技術カテゴリごとに取る"""
+        data = analysis(4)
+        data["2.技術分析"]["2.1_フォアハンドドライブ"]["体重移動（1-5）"] = 1
+        ratings = extract_ratings(data)
+        assert ratings == {"フォアハンド": 3.0, "バックハンド": 3.0}
+
+    def test_plain_japanese_keys(self):
+        """番号なしのキーと「評価」項目"""
+        ratings = extract_ratings({"技術分析": {"サーブ": {"評価": 5}, "フットワーク": {"評価": 2}}})
+        assert ratings == {"サーブ": 5.0, "フットワーク": 2.0}
+
+    def test_english_keys(self):
+        """英語キーの techniques → rating"""
+        ratings = extract_ratings({"techniques": {"forehand_drive": {"rating": 4}, "receive": {"rating": 2}}})
+        assert ratings == {"フォアハンド": 4.0, "レシーブ": 2.0}
+
+    def test_string_ratings(self):
+        """VideoAnalyzer の出力のように文字列で書かれた評価"""
+        ratings = extract_ratings({"技術分析": {
+            "サーブ": {"評価": "4", "特徴": "短い下回転"},
+            "フットワーク": {"評価": " 2.5 ", "改善点": "戻りが遅い"},
+            "レシーブ": {"評価": "1-5の数値"},
+            "バックハンド": {"評価": "7"},
+        }})
+        assert ratings == {"サーブ": 4.0, "フットワーク": 2.5}
+
+    def test_ignores_out_of_range_and_text(self):
+        """1-5 以外の数値や文字列は評価として扱わない"""
+        ratings = extract_ratings({"技術分析": {"サーブ": {"評価": 9, "回転量": "中"}, "メンタル": {"評価": 3}}})
+        assert ratings == {}
+
+
+class TestRatingTrends:
+    """推移の集計"""
+
+    @pytest.fixture
+    def store(self, db_path):
+        store = ResultsStore(db_path)
+        for day, (forehand, opponent) in enumerate([(2, "相手X"), (3, "相手Y"), (3, "相手X"), (5, None)], 1):
+            store.save_run(
+                f"r{day}", "analyze", {"analysis": (analysis(forehand), None)},
+                player="選手A", params={"opponent": opponent},
+                created_at=f"2026-03-0{day}T10:00:00"
+            )
+        return store
+
+    def test_ratings_written_with_results(self, store, db_path):
+        """分析結果の保存時に評価が登録される"""
+        series = RatingTrends(db_path).series("選手A", "フォアハンド")
+        assert series["フォアハンド"]["ratings"] == [2.0, 3.0, 3.0, 5.0]
+        assert series["フォアハンド"]["opponents"] == ["相手X", "相手Y", "相手X", None]
+
+    def test_trend(self, store, db_path):
+        """移動平均・変化量・対戦相手別"""
+        trend = RatingTrends(db_path).trend("選手A", window=2)["フォアハンド"]
+        assert trend["count"] == 4
+        assert trend["latest"] == 5.0
+        assert trend["rolling"] == [2.0, 2.5, 3.0, 4.0]
+        assert trend["delta_last"] == 2.0
+        assert trend["delta_window"] == pytest.approx(4.0 - 2.5)
+        assert trend["by_opponent"]["相手X"] == {"count": 2, "mean": 2.5}
+        assert trend["by_opponent"][None] == {"count": 1, "mean": 5.0}
+
+    def test_since_filter(self, store, db_path):
+        """期間で絞り込める"""
+        trend = RatingTrends(db_path).trend("選手A", "フォアハンド", since="2026-03-03")
+        assert trend["フォアハンド"]["ratings"] == [3.0, 5.0]
+        assert trend["フォアハンド"]["delta_window"] is None
+
+    def test_replaced_analysis_replaces_ratings(self, store, db_path):
+        """同じ実行の分析結果を置き換えると評価も置き換わる"""
+        store.save_run("r4", "analyze", {"analysis": (analysis(1), None)},
+                       player="選手A", created_at="2026-03-04T10:00:00")
+        assert RatingTrends(db_path).series("選手A", "フォアハンド")["フォアハンド"]["ratings"] == [2.0, 3.0, 3.0, 1.0]
+
+    def test_existing_database_is_backfilled(self, store, db_path):
+        """評価テーブルのないDBは、開いたときに保存済みの分析結果から作る"""
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute("DROP TABLE technique_ratings")
+            conn.commit()
+        trend = RatingTrends(db_path).trend("選手A", "バックハンド")
+        assert trend["バックハンド"]["count"] == 4
+        assert trend["バックハンド"]["by_opponent"]["相手Y"]["count"] == 1
+
+
+class TestOpponentFromCli:
+    """analyze / full の --opponent が評価の対戦相手として記録される"""
+
+    def test_analyze_and_full(self, tmp_path, db_path, monkeypatch):
+        import main
+
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+        analyzer = MagicMock()
+        analyzer.model = "test-model"
+        analyzer.analyze_video.return_value = analysis(4)
+        analyzer.generate_strategy.return_value = {"キーポイント": []}
+        analyzer.generate_practice_plan.return_value = {"ドリル": []}
+
+        common = ["--video", str(video), "--player", "選手A", "--db", db_path,
+                  "--output", str(tmp_path / "results"), "--no-cache"]
+        with patch.object(main, "LLMAnalyzer", return_value=analyzer):
+            monkeypatch.setattr(sys, "argv", ["main.py", "analyze", *common, "--opponent", "相手X"])
+            main.main()
+            monkeypatch.setattr(sys, "argv", ["main.py", "full", *common, "--opponent", "相手Y"])
+            main.main()
+
+        series = RatingTrends(db_path).series("選手A", "フォアハンド")["フォアハンド"]
+        assert series["opponents"] == ["相手X", "相手Y"]
+        trend = RatingTrends(db_path).trend("選手A", "フォアハンド")["フォアハンド"]
+        assert set(trend["by_opponent"]) == {"相手X", "相手Y"}
@@ -85,6 +85,15 @@ class TestMarkdownReportGeneration:
             assert "基本情報" in content or "# " in content
             assert "強み" in content
             assert "改善" in content
+    
+    def test_default_paths_do_not_collide(self, sample_analysis_result):
+        """出力先を指定しない場合、同じ秒に生成しても別々のファイルになる"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generator = ReportGenerator(tmpdir)
+            paths = {generator.generate_analysis_report(sample_analysis_result) for _ in range(5)}
+            
+            assert len(paths) == 5
+            assert sorted(os.listdir(tmpdir)) == sorted(os.path.basename(p) for p in paths)
 
 
 class TestStrategySheetGeneration:
@@ -0,0 +1,153 @@
+"""
+単体テスト: Result Index モジュール
+ステージ結果の索引と、CLIサブコマンド間での再利用
+"""
+
+import pytest
+import os
+import sys
+import json
+import argparse
+from unittest.mock import patch, MagicMock
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.result_index import ResultIndex, content_hash, load_stage_file
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    """テスト用のダミー動画ファイル"""
+    path = tmp_path / "match.mp4"
+    path.write_bytes(b"dummy video content")
+    return str(path)
+
+
+class TestResultIndex:
+    """索引の登録・検索"""
+
+    def test_video_hash_is_stable(self, tmp_path, video_file):
+        """同じ動画は同じハッシュになる"""
+        index = ResultIndex(str(tmp_path / "results"))
+        assert index.video_hash(video_file) == index.video_hash(video_file)
+        assert len(index.video_hash(video_file)) == 64
+
+    def test_video_hash_changes_with_content(self, tmp_path, video_file):
+        """動画の内容が変わればハッシュも変わる"""
+        index = ResultIndex(str(tmp_path / "results"))
+        before = index.video_hash(video_file)
+        with open(video_file, "ab") as f:
+            f.write(b"more")
+        assert index.video_hash(video_file) != before
+
+    def test_record_and_lookup(self, tmp_path):
+        """登録した結果をキーで取得できる"""
+        output_dir = tmp_path / "results"
+        output_dir.mkdir()
+        result_file = output_dir / "full.json"
+        result_file.write_text(json.dumps({"analysis": {"総合評価": "良い"}}), encoding="utf-8")
+
+        index = ResultIndex(str(output_dir))
+        key = index.make_key("analysis", video="abc", player="選手A")
+        index.record(key, str(result_file), "analysis")
+
+        # 別インスタンスでも索引ファイルから読める
+        reloaded = ResultIndex(str(output_dir))
+        assert reloaded.lookup(key) == {"総合評価": "良い"}
+
+    def test_key_depends_on_params(self):
+        """パラメータが異なれば別のキーになる"""
+        assert ResultIndex.make_key("analysis", video="abc", player="A") != \
+            ResultIndex.make_key("analysis", video="abc", player="B")
+        assert ResultIndex.make_key("analysis", player="A", video="abc") == \
+            ResultIndex.make_key("analysis", video="abc", player="A")
+
+    def test_missing_file_is_dropped(self, tmp_path):
+        """参照先ファイルが消えた索引エントリは無視される"""
+        index = ResultIndex(str(tmp_path))
+        key = index.make_key("analysis", video="abc")
+        index.record(key, str(tmp_path / "deleted.json"))
+        assert index.lookup(key) is None
+        assert index.lookup_file(key) is None
+
+    def test_content_hash_ignores_key_order(self):
+        """内容ハッシュはキー順序に依存しない"""
+        assert content_hash({"a": 1, "b": 2}) == content_hash({"b": 2, "a": 1})
+
+
+class TestLoadStageFile:
+    """結果ファイルからのステージ結果の取り出し"""
+
+    def test_unwraps_full_analysis(self, tmp_path):
+        """full_analysis形式からanalysisを取り出す"""
+        path = tmp_path / "full_analysis.json"
+        path.write_text(json.dumps({
+            "player": "A",
+            "analysis": {"技術分析": {}},
+            "strategy": {"キーポイント": []}
+        }), encoding="utf-8")
+        assert load_stage_file(str(path), "analysis") == {"技術分析": {}}
+        assert load_stage_file(str(path), "strategy") == {"キーポイント": []}
+
+    def test_plain_analysis_file(self, tmp_path):
+        """分析結果そのもののファイルはそのまま返す"""
+        path = tmp_path / "analysis.json"
+        path.write_text(json.dumps({"技術分析": {}}), encoding="utf-8")
+        assert load_stage_file(str(path), "analysis") == {"技術分析": {}}
+
+
+class TestStageReuseAcrossCommands:
+    """サブコマンド間での分析結果の再利用"""
+
+    @pytest.fixture
+    def mock_analyzer(self):
+        analyzer = MagicMock()
+        analyzer.model = "test-model"
+        analyzer.analyze_video.return_value = {"技術分析": {"フォアハンド": {"評価": 4}}}
+        analyzer.generate_strategy.return_value = {"キーポイント": ["a"]}
+        analyzer.generate_practice_plan.return_value = {"ドリル": []}
+        return analyzer
+
+    def _args(self, output_dir, video, **kwargs):
+        defaults = dict(
+            video=video, player="選手A", team="チームA", output=str(output_dir),
+            verbose=False, no_cache=False, analysis_file=None, strategy_file=None,
+            opponent=None, opponent_video=None, opponent_team=None, placement=None, resume=None,
+            db=os.path.join(str(output_dir), "database.sqlite"), no_json=False, group_runs=False, artifacts=False
+        )
+        defaults.update(kwargs)
+        return argparse.Namespace(**defaults)
+
+    def test_strategy_reuses_prior_analysis(self, tmp_path, video_file, mock_analyzer):
+        """analyze の結果を strategy / full が再利用する"""
+        import main
+        with patch.object(main, "LLMAnalyzer", return_value=mock_analyzer):
+            main.analyze_command(self._args(tmp_path, video_file))
+            main.strategy_command(self._args(tmp_path, video_file))
+            main.full_command(self._args(tmp_path, video_file))
+
+        assert mock_analyzer.analyze_video.call_count == 1
+        # 戦略も同じ分析結果から生成済みなので再利用される
+        assert mock_analyzer.generate_strategy.call_count == 1
+
+    def test_no_cache_forces_rerun(self, tmp_path, video_file, mock_analyzer):
+        """--no-cache 指定時は再分析する"""
+        import main
+        with patch.object(main, "LLMAnalyzer", return_value=mock_analyzer):
+            main.analyze_command(self._args(tmp_path, video_file))
+            main.analyze_command(self._args(tmp_path, video_file, no_cache=True))
+
+        assert mock_analyzer.analyze_video.call_count == 2
+
+    def test_explicit_analysis_file(self, tmp_path, mock_analyzer):
+        """--analysis-file 指定時は動画分析を行わない"""
+        import main
+        analysis_file = tmp_path / "analysis.json"
+        analysis_file.write_text(json.dumps({"技術分析": {}}), encoding="utf-8")
+
+        with patch.object(main, "LLMAnalyzer", return_value=mock_analyzer):
+            result = main.full_command(self._args(tmp_path, None, analysis_file=str(analysis_file)))
+
+        mock_analyzer.analyze_video.assert_not_called()
+        assert result["analysis"] == {"技術分析": {}}
@@ -0,0 +1,122 @@
+"""
+単体テスト: Results Store モジュール
+SQLiteへの分析結果の保存と検索
+"""
+
+import pytest
+import os
+import sys
+import argparse
+from unittest.mock import patch, MagicMock
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.results_store import ResultsStore
+from storage.result_index import ResultIndex
+
+
+@pytest.fixture
+def store(tmp_path):
+    """テスト用の結果データベース"""
+    return ResultsStore(str(tmp_path / "database.sqlite"))
+
+
+class TestResultsStore:
+    """実行結果の保存・検索"""
+
+    def test_save_and_lookup(self, store):
+        """保存したステージ結果を索引キーで取得できる"""
+        store.save_run(
+            "run1", "analyze",
+            {"analysis": ({"総合評価": "良い"}, "analysis:abc")},
+            player="選手A", team="チームA", video_hash="f" * 64
+        )
+        data, run_id = store.lookup("analysis:abc")
+        assert data == {"総合評価": "良い"}
+        assert run_id == "run1"
+        assert store.lookup("analysis:missing") is None
+
+    def test_lookup_returns_latest(self, store):
+        """同じキーの結果が複数あれば最新のものを返す"""
+        store.save_run("run1", "analyze", {"analysis": ({"v": 1}, "k")}, created_at="2026-03-01T10:00:00")
+        store.save_run("run2", "analyze", {"analysis": ({"v": 2}, "k")}, created_at="2026-03-02T10:00:00")
+        assert store.lookup("k") == ({"v": 2}, "run2")
+
+    def test_find_by_player_and_date(self, store):
+        """選手・日付・ステージで絞り込める"""
+        store.save_run("r1", "full", {"analysis": ({"n": 1}, None), "strategy": ({"n": 2}, None)},
+                       player="選手A", created_at="2026-03-01T10:00:00")
+        store.save_run("r2", "analyze", {"analysis": ({"n": 3}, None)},
+                       player="選手B", created_at="2026-03-05T10:00:00")
+        store.save_run("r3", "analyze", {"analysis": ({"n": 4}, None)},
+                       player="選手A", created_at="2026-03-10T10:00:00")
+
+        rows = store.find_outputs(stage="analysis", player="選手A")
+        assert [row["run_id"] for row in rows] == ["r3", "r1"]
+
+        rows = store.find_outputs(since="2026-03-02", until="2026-03-06")
+        assert [row["data"] for row in rows] == [{"n": 3}]
+
+        rows = store.find_outputs(player="選手A", limit=1, include_data=False)
+        assert len(rows) == 1 and "data" not in rows[0]
+
+    def test_same_video_is_stored_once(self, store):
+        """同じ動画ハッシュの実行は1つの動画行を共有する"""
+        store.save_run("r1", "analyze", {}, video_hash="a" * 64, video_path="/v/1.mp4")
+        store.save_run("r2", "analyze", {}, video_hash="a" * 64, video_path="/v/1.mp4")
+        assert store.get_run("r1")["video_id"] == store.get_run("r2")["video_id"]
+        assert len(store.find_outputs(video_hash="a" * 64)) == 0
+
+    def test_save_is_transactional(self, store):
+        """途中で失敗した実行は何も残さない"""
+        with pytest.raises(TypeError):
+            store.save_run("bad", "analyze", {"analysis": ({"x": object()}, "k")}, player="選手C")
+        assert store.get_run("bad") is None
+        assert store.lookup("k") is None
+
+    def test_get_run(self, store):
+        """実行とステージ結果をまとめて取得できる"""
+        store.save_run("r1", "full", {"analysis": ({"a": 1}, None), "practice_plan": ({"p": 1}, None)},
+                       player="選手A", team="チームA", model="m", params={"opponent": "X"})
+        run = store.get_run("r1")
+        assert run["player"] == "選手A"
+        assert run["params"] == {"opponent": "X"}
+        assert run["outputs"] == {"analysis": {"a": 1}, "practice_plan": {"p": 1}}
+
+    def test_index_reads_through_store(self, tmp_path, store):
+        """索引はJSONファイルがなくてもデータベースから結果を引ける"""
+        store.save_run("r1", "analyze", {"analysis": ({"a": 1}, "analysis:k")})
+        index = ResultIndex(str(tmp_path / "results"), store=store)
+        assert index.lookup("analysis:k") == {"a": 1}
+
+
+class TestDatabaseOnlyOutput:
+    """--no-json 指定時のCLIの動作"""
+
+    def test_reuse_without_json(self, tmp_path):
+        """JSONを書き出さなくても、次のコマンドが分析結果を再利用する"""
+        import main
+
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+        analyzer = MagicMock()
+        analyzer.model = "test-model"
+        analyzer.analyze_video.return_value = {"技術分析": {}}
+        analyzer.generate_practice_plan.return_value = {"ドリル": []}
+
+        output_dir = tmp_path / "results"
+        args = dict(
+            video=str(video), player="選手A", team="チームA", output=str(output_dir),
+            verbose=False, no_cache=False, analysis_file=None, no_json=True, group_runs=False, artifacts=False,
+            db=str(tmp_path / "database.sqlite")
+        )
+        with patch.object(main, "LLMAnalyzer", return_value=analyzer):
+            main.analyze_command(argparse.Namespace(**args))
+            main.practice_command(argparse.Namespace(**args))
+
+        assert analyzer.analyze_video.call_count == 1
+        assert not list(output_dir.glob("analysis_*.json"))
+        assert not list(output_dir.glob("practice_plan_*.json"))
+        rows = ResultsStore(args["db"]).find_outputs(player="選手A")
+        assert sorted(row["stage"] for row in rows) == ["analysis", "analysis", "practice_plan"]
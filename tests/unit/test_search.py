@@ -0,0 +1,121 @@
+"""
+単体テスト: Search モジュール
+結果データベースのテキスト項目の全文検索
+"""
+
+import pytest
+import os
+import sys
+import sqlite3
+from contextlib import closing
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from storage.results_store import ResultsStore
+from storage.search import SearchIndex, build_match_query, extract_fields, ngram_tokens
+
+
+ANALYSIS = {
+    "3.戦術分析": {
+        "3.1_得点パターン": ["3球目のフォアハンドドライブ"],
+        "3.2_失点パターン": {"主な失点パターンを3つ": ["台上のツッツキをネットにかけるミス"]}
+    },
+    "2.技術分析": {
+        "2.4_レシーブ": {"改善点": "ストップが浮きやすい"}
+    },
+    "4.総合評価": {"4.3_総合コメント": "台上技術は良好"}
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "database.sqlite")
+
+
+class TestTokenize:
+    """bigram トークン化と検索式"""
+
+    def test_bigrams(self):
+        """日本語は bigram、末尾に1文字のトークン"""
+        assert ngram_tokens("台上のミス") == ["台上", "上の", "のミ", "ミス", "ス"]
+        assert ngram_tokens("台上のミス", for_query=True) == ["台上", "上の", "のミ", "ミス"]
+
+    def test_mixed_text(self):
+        """英数字は単語のまま小文字化"""
+        assert ngram_tokens("3球目 Chiquita") == ["3", "球目", "目", "chiquita"]
+
+    def test_match_query(self):
+        """語はフレーズ、複数語はAND、1文字は前方一致"""
+        assert build_match_query("台上") == '"台上"'
+        assert build_match_query("台上 ミス") == '"台上" AND "ミス"'
+        assert build_match_query("台") == '"台"*'
+        assert build_match_query("ミス", "失点パターン") == '{losing} : ("ミス")'
+        assert build_match_query("　") is None
+
+
+class TestExtractFields:
+    """検索対象の項目の取り出し"""
+
+    def test_japanese_keys(self):
+        """番号付きキー・入れ子の項目を取り出し、それ以外は含めない"""
+        fields = extract_fields(ANALYSIS)
+        assert fields["得点パターン"] == ["3球目のフォアハンドドライブ"]
+        assert fields["失点パターン"] == ["台上のツッツキをネットにかけるミス"]
+        assert fields["改善点"] == ["ストップが浮きやすい"]
+        assert "台上技術は良好" not in sum(fields.values(), [])
+
+    def test_english_keys(self):
+        """英語キーの結果にも対応する"""
+        fields = extract_fields({"key_points": ["serve short"], "losing_patterns": ["long push"]})
+        assert fields == {"キーポイント": ["serve short"], "失点パターン": ["long push"]}
+
+
+class TestSearchIndex:
+    """保存と同時の索引登録と検索"""
+
+    def test_search_after_save(self, db_path):
+        """保存した結果がすぐに検索できる"""
+        store = ResultsStore(db_path)
+        store.save_run("r1", "analyze", {"analysis": (ANALYSIS, None)}, player="選手A")
+        store.save_run("r2", "strategy", {"strategy": ({"5.キーポイント": ["ロングサーブを混ぜる"]}, None)},
+                       player="選手B")
+
+        index = SearchIndex(db_path)
+        rows = index.search("台上")
+        assert [row["run_id"] for row in rows] == ["r1"]
+        assert rows[0]["matches"] == {"失点パターン": ["台上のツッツキをネットにかけるミス"]}
+
+        assert index.search("台上", field="得点パターン") == []
+        assert [row["run_id"] for row in index.search("サーブ")] == ["r2"]
+        assert index.search("ミス", player="選手B") == []
+        assert index.search("ツッツキ ネット")[0]["run_id"] == "r1"
+        # 1文字の語
+        assert index.search("浮")[0]["run_id"] == "r1"
+
+    def test_phrase_must_be_contiguous(self, db_path):
+        """bigram が離れて現れるだけのテキストには一致しない"""
+        store = ResultsStore(db_path)
+        store.save_run("r1", "analyze", {"analysis": ({"改善点": ["台の上でのミス"]}, None)})
+        assert SearchIndex(db_path).search("台上") == []
+
+    def test_replaced_output_is_reindexed(self, db_path):
+        """同じ実行のステージ結果を置き換えると古い内容は検索されない"""
+        store = ResultsStore(db_path)
+        store.save_run("r1", "analyze", {"analysis": ({"改善点": ["フォアの打点"]}, None)})
+        store.save_run("r1", "analyze", {"analysis": ({"改善点": ["バックの戻り"]}, None)})
+        index = SearchIndex(db_path)
+        assert index.search("フォア") == []
+        assert len(index.search("バック")) == 1
+
+    def test_existing_database_is_backfilled(self, db_path):
+        """検索索引のないDBは、開いたときに保存済みの結果から索引を作る"""
+        store = ResultsStore(db_path)
+        store.save_run("r1", "analyze", {"analysis": (ANALYSIS, None)})
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute("DROP TRIGGER stage_outputs_search_delete")
+            conn.execute("DROP TABLE result_search")
+            conn.commit()
+
+        assert len(SearchIndex(db_path).search("ツッツキ")) == 1
+        assert SearchIndex(db_path).rebuild() == 1
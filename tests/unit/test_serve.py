@@ -0,0 +1,138 @@
+"""
+単体テスト: Serve モジュール
+トスの検出によるサーブの選手の判定・送るサーブの選択・サーブの場面だけでの分析
+"""
+
+import pytest
+import os
+import sys
+import subprocess
+from unittest.mock import MagicMock
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis import proxy
+from analysis.clips import index_events
+from analysis.llm_analyzer import LLMAnalyzer
+from analysis.pose_estimator import LANDMARKS, NUM_LANDMARKS
+from analysis.serve import build_montage, classify_servers, select_serves, serve_analysis, toss_scores
+
+
+META = {"fps": 30.0, "frame_step": 1, "width": 1280, "height": 720}
+
+
+def serve(time, server=None):
+    return {"kind": "serve", "number": 0, "time": time, "start_time": time - 2.0, "end_time": time + 1.5,
+            "server": server}
+
+
+def player_keypoints(seconds, tosses):
+    """右利きの選手のキーポイント（tosses の時刻の直前に左手首を頭の上まで上げる）"""
+    keypoints = np.zeros((int(seconds * META["fps"]), NUM_LANDMARKS, 4), dtype=np.float16)
+    for name, (x, y) in {
+        "left_shoulder": (600, 400), "right_shoulder": (680, 400),
+        "left_hip": (610, 500), "right_hip": (670, 500), "left_wrist": (590, 480),
+    }.items():
+        keypoints[:, LANDMARKS[name], 0] = x / META["width"]
+        keypoints[:, LANDMARKS[name], 1] = y / META["height"]
+    for t in tosses:
+        frames = slice(int((t - 1.0) * META["fps"]), int((t - 0.3) * META["fps"]))
+        keypoints[frames, LANDMARKS["left_wrist"], 1] = 330 / META["height"]
+    return keypoints
+
+
+def fake_ffmpeg(commands):
+    def run(command, **kwargs):
+        commands.append(command)
+        if command[0] == "ffprobe":
+            return subprocess.CompletedProcess(command, 0, "0.000000,48,K_\n", "")
+        with open(command[-1], "wb") as f:
+            f.write(b"video")
+        return subprocess.CompletedProcess(command, 0, "", "")
+    return run
+
+
+class TestServers:
+    """サーブを出した選手の判定"""
+
+    def test_toss_scores(self):
+        keypoints = player_keypoints(20, tosses=[5.0])
+        scores = toss_scores(keypoints, META, [5.0, 12.0, 30.0])
+        assert scores[0] == pytest.approx(0.7, abs=0.01)
+        assert scores[1] < 0
+        assert np.isnan(scores[2])
+
+    def test_classify_servers(self):
+        keypoints = player_keypoints(20, tosses=[5.0])
+        servers = classify_servers([serve(5.0), serve(12.0), serve(30.0)], keypoints, META)
+        assert [s["server"] for s in servers] == ["self", "opponent", None]
+        assert classify_servers([serve(5.0)])[0]["server"] is None
+
+    def test_select_serves(self):
+        serves = [serve(float(t), "self") for t in range(0, 100, 10)] + [serve(5.0, "opponent"), serve(55.0, "opponent")]
+        selected = select_serves(serves, max_serves=6)
+        assert len(selected) == 6
+        # 少ない相手のサーブはすべて選び、残りの枠を分析対象のサーブに等間隔に割り当てる
+        assert [s["time"] for s in selected if s["server"] == "opponent"] == [5.0, 55.0]
+        assert [s["time"] for s in selected if s["server"] == "self"] == [0.0, 30.0, 60.0, 90.0]
+        assert select_serves(serves, max_serves=50) == sorted(serves, key=lambda s: s["time"])
+
+
+class TestServeAnalysis:
+    """サーブの場面だけでの分析"""
+
+    def test_build_montage(self, tmp_path, monkeypatch):
+        commands = []
+        monkeypatch.setattr(subprocess, "run", fake_ffmpeg(commands))
+        path, placed = build_montage("match.mp4", [serve(5.0), serve(30.0)], str(tmp_path), "abc")
+        assert [s["offset"] for s in placed] == [0.0, 3.5]
+        assert os.path.exists(path)
+        assert commands[-1][commands[-1].index("-f") + 1] == "concat"
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".txt")]
+
+    def test_analyze_serves(self):
+        analyzer = LLMAnalyzer(api_key="test")
+        analyzer._encode_video = lambda path: "dmlkZW8="
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content='{"2.技術分析": {"2.3_サーブ": {"コースの精度（1-5）": 4}}}'))
+        ]
+        placed = [{**serve(5.0, "self"), "offset": 0.0}, {**serve(30.0, "opponent"), "offset": 3.5}]
+
+        result = analyzer.analyze_serves("montage.mp4", placed, "選手A", "チームA")
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert sum(part["type"] == "video_url" for part in content) == 1
+        assert "2 本のクリップ（合計 7 秒）" in content[-1]["text"]
+        assert "- 3.5秒〜 / 30.0秒 / 相手" in content[-1]["text"]
+        assert "2.4 レシーブ" in content[-1]["text"]
+        assert result["2.技術分析"]["2.3_サーブ"]["コースの精度（1-5）"] == 4
+
+        analyzer.analyze_serves("montage.mp4", placed, "相手選手", opponent=True)
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert "3.3 サーブの傾向" in content[-1]["text"]
+
+    def test_serve_analysis(self, tmp_path, monkeypatch):
+        """索引のサーブの区間だけをつないで送る"""
+        monkeypatch.setattr(subprocess, "run", fake_ffmpeg([]))
+        monkeypatch.setattr(proxy, "proxy_or_source", lambda video, video_hash: {"path": video})
+        db_path = str(tmp_path / "events.sqlite")
+        rallies = [
+            {"index": i, "start": t - 0.5, "end": t + 4.0, "hits": 4, "onsets": [t, t + 1.0, t + 2.0, t + 3.5]}
+            for i, t in enumerate([5.0, 20.0, 35.0])
+        ]
+        index_events("match.mp4", "abc", db_path, rallies=rallies)
+        analyzer = MagicMock()
+        analyzer.analyze_serves.return_value = {"2.技術分析": {}}
+
+        result = serve_analysis(
+            analyzer, "match.mp4", "選手A", "チームA", video_hash="abc", db_path=db_path,
+            max_serves=2, use_pose=False, montage_dir=str(tmp_path / "serves")
+        )
+        montage, placed = analyzer.analyze_serves.call_args.args[:2]
+        assert [s["time"] for s in placed] == [5.0, 35.0]
+        assert result["サーブ統計"] == {
+            "serves": 3, "sent": 2, "seconds": 7.0, "by_server": {"不明": 3}, "montage": montage
+        }
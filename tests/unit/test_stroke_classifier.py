@@ -0,0 +1,185 @@
+"""
+単体テスト: Stroke Classifier モジュール
+打球の特徴量・分類モデル・ストリーム検出・打球イベントの索引
+"""
+
+import pytest
+import os
+import sys
+import time
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.pose_estimator import LANDMARKS, NUM_LANDMARKS
+from analysis.stroke_classifier import (
+    FEATURES, SoftmaxClassifier, StrokeDetector, ball_samples, count_strokes, detect_strokes, training_features
+)
+from storage.strokes import StrokeIndex
+
+
+META = {"fps": 30.0, "frame_step": 1, "width": 1280, "height": 720}
+TORSO = 100  # 胴体の長さ（画素）
+
+# 打球ごとの手首の (始点, 終点, スイングの時間)。単位は胴体の長さで、x は利き手側、y は上が正
+SWINGS = {
+    "forehand_drive": ((1.0, -0.2), (-0.5, 1.3), 0.25),
+    "backhand_drive": ((-0.6, 0.3), (0.5, 0.9), 0.25),
+    "push": ((0.05, 0.6), (0.6, 0.25), 0.1),
+    "block": ((-0.2, 0.8), (0.35, 1.0), 0.1),
+    "serve": ((0.3, 0.0), (-0.3, 0.5), 0.2),
+}
+
+
+def rally_sequence(rallies, seed):
+    """サーブで始まるラリーを並べた打球の (時刻, 種類) と右利きの選手のキーポイント"""
+    rng = np.random.default_rng(seed)
+    others = [name for name in SWINGS if name != "serve"]
+    labels = []
+    t = 2.0
+    for _ in range(rallies):
+        labels.append((t, "serve"))
+        for _ in range(4):
+            t += rng.uniform(0.9, 1.3)
+            labels.append((t, others[rng.integers(len(others))]))
+        t += 6.0
+
+    # 手首の経路: 打球の間はなめらかに加速・減速し、打球の間の戻りはゆっくり直線で動く
+    times = np.arange(int((t + 1.0) * META["fps"])) / META["fps"]
+    keyframes = [(0.0, 0.0, 0.3)]
+    segments = []
+    for impact, name in labels:
+        start, end, duration = SWINGS[name]
+        start = np.add(start, rng.normal(0, 0.05, 2))
+        end = np.add(end, rng.normal(0, 0.05, 2))
+        keyframes += [(impact - duration / 2, *start), (impact + duration / 2, *end)]
+        segments.append((impact - duration / 2, duration, start, end))
+    keyframes.append((times[-1] + 1, 0.0, 0.3))
+    key_t, key_x, key_y = np.array(keyframes).T
+    wrist_x, wrist_y = np.interp(times, key_t, key_x), np.interp(times, key_t, key_y)
+    for begin, duration, start, end in segments:
+        inside = (times >= begin) & (times <= begin + duration)
+        phase = (times[inside] - begin) / duration
+        smooth = 3 * phase ** 2 - 2 * phase ** 3
+        wrist_x[inside] = start[0] + (end[0] - start[0]) * smooth
+        wrist_y[inside] = start[1] + (end[1] - start[1]) * smooth
+
+    keypoints = np.zeros((len(times), NUM_LANDMARKS, 4), dtype=np.float16)
+    hip = np.array([640.0, 500.0])
+    points = {
+        "left_hip": (-20, 0), "right_hip": (20, 0),
+        "left_shoulder": (-40, -TORSO), "right_shoulder": (40, -TORSO),
+    }
+    for name, (dx, dy) in points.items():
+        keypoints[:, LANDMARKS[name], 0] = (hip[0] + dx) / META["width"]
+        keypoints[:, LANDMARKS[name], 1] = (hip[1] + dy) / META["height"]
+    keypoints[:, LANDMARKS["right_wrist"], 0] = (hip[0] + wrist_x * TORSO) / META["width"]
+    keypoints[:, LANDMARKS["right_wrist"], 1] = (hip[1] - wrist_y * TORSO) / META["height"]
+    keypoints[:, :, 3] = 1.0
+    return labels, keypoints
+
+
+@pytest.fixture(scope="module")
+def model():
+    labels, keypoints = rally_sequence(30, seed=0)
+    X = training_features(keypoints, META, [t for t, _ in labels])
+    return SoftmaxClassifier().fit(X, [name for _, name in labels])
+
+
+class TestSoftmaxClassifier:
+    """分類モデル"""
+
+    def test_training_features(self):
+        labels, keypoints = rally_sequence(2, seed=0)
+        X = training_features(keypoints, META, [t for t, _ in labels])
+        assert X.shape == (len(labels), len(FEATURES))
+        # サーブは直前の打球から間が空いている
+        gap = X[:, FEATURES.index("gap_before")]
+        assert gap[0] == 5.0 and gap[1] < 1.5
+
+    def test_fit_and_predict(self, model):
+        labels, keypoints = rally_sequence(10, seed=1)
+        X = training_features(keypoints, META, [t for t, _ in labels])
+        predicted = model.predict(X)
+        assert np.mean(predicted == np.array([name for _, name in labels])) >= 0.95
+        assert np.allclose(model.predict_proba(X).sum(axis=1), 1.0)
+
+    def test_save_and_load(self, model, tmp_path):
+        path = tmp_path / "models" / "stroke.npz"
+        model.save(str(path))
+        loaded = SoftmaxClassifier.load(str(path))
+        X = np.random.default_rng(2).normal(size=(5, len(FEATURES)))
+        assert np.allclose(loaded.predict_proba(X), model.predict_proba(X))
+        assert list(loaded.classes_) == list(model.classes_)
+
+    def test_nan_features(self, model):
+        """人物やボールを見失った特徴量は平均値として扱う"""
+        X = np.full((1, len(FEATURES)), np.nan)
+        assert np.isfinite(model.predict_proba(X)).all()
+
+
+class TestStreamingDetection:
+    """ストリーム検出"""
+
+    def test_detects_strokes(self, model):
+        labels, keypoints = rally_sequence(6, seed=3)
+        events = list(detect_strokes(StrokeDetector(model, META), keypoints))
+
+        assert len(events) == len(labels)
+        for event, (impact, name) in zip(events, labels):
+            assert event["time"] == pytest.approx(impact, abs=0.1)
+            assert event["stroke"] == name
+        counts = count_strokes(events)
+        assert counts["serve"] == 6
+        assert sum(counts.values()) == len(labels)
+
+    def test_chunk_invariant(self, model):
+        """チャンクの切り方によらず同じ結果になる"""
+        _, keypoints = rally_sequence(3, seed=4)
+        small = list(detect_strokes(StrokeDetector(model, META), keypoints, chunk=7))
+        large = list(detect_strokes(StrokeDetector(model, META), keypoints, chunk=256))
+        assert small == large
+
+    def test_no_person(self, model):
+        keypoints = np.full((300, NUM_LANDMARKS, 4), np.nan, dtype=np.float16)
+        assert list(detect_strokes(StrokeDetector(model, META), keypoints)) == []
+
+    def test_ball_samples(self):
+        track = {
+            "frame": np.array([0, 2, 4]), "x": np.array([1.0, 2.0, 3.0]), "y": np.array([5.0, 6.0, 7.0]),
+            "detected": np.array([True, False, True]),
+        }
+        ball = ball_samples(track, np.array([0, 1, 2, 4, 6]))
+        assert ball["detected"].tolist() == [True, False, False, True, False]
+        assert ball["x"][3] == 3.0 and np.isnan(ball["x"][1])
+
+    def test_faster_than_realtime(self, model):
+        """10分の姿勢を CPU で実時間の100倍以上の速さで処理する"""
+        _, keypoints = rally_sequence(100, seed=5)
+        started = time.perf_counter()
+        events = list(detect_strokes(StrokeDetector(model, META), keypoints))
+        elapsed = time.perf_counter() - started
+        assert len(events) == 500
+        assert elapsed < len(keypoints) / META["fps"] / 100
+
+
+class TestStrokeIndex:
+    """打球イベントの索引"""
+
+    def test_save_and_counts(self, tmp_path):
+        index = StrokeIndex(str(tmp_path / "strokes.sqlite"))
+        events = [
+            {"frame": 30, "time": 1.0, "stroke": "serve", "confidence": 0.9},
+            {"frame": 60, "time": 2.0, "stroke": "push", "confidence": 0.8},
+            {"frame": 90, "time": 3.0, "stroke": "push", "confidence": 0.7},
+        ]
+        assert index.save("abc", events, model="m.npz") == 3
+        assert index.counts("abc") == {"serve": 1, "push": 2}
+        assert [e["frame"] for e in index.events("abc", stroke="push")] == [60, 90]
+
+        # 検出し直した結果で置き換える
+        index.save("abc", events[:1])
+        assert index.counts("abc") == {"serve": 1}
+        assert index.counts("other") == {}
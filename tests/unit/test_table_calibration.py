@@ -0,0 +1,133 @@
+"""
+単体テスト: Table Calibration モジュール
+台の4隅の検出と射影変換
+"""
+
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from analysis.cv_analyzer import CVAnalyzer
+from analysis.table_calibration import (
+    TABLE_CORNERS, TableCalibration, TableCalibrator, apply_homography, detect_table_corners, fit_homography
+)
+
+
+CORNERS = [(220, 150), (420, 150), (500, 300), (140, 300)]
+
+
+def table_frame(corners=CORNERS, height=360, width=640):
+    """後方から見た青い台（ネットと、台にかかった選手の腕つき）の合成フレーム"""
+    frame = np.full((height, width, 3), (60, 60, 110), dtype=np.uint8)
+    yy, xx = np.mgrid[:height, :width] + 0.5
+    points = np.asarray(corners, dtype=float)
+    inside = np.ones((height, width), dtype=bool)
+    for a, b in zip(points, np.roll(points, -1, axis=0)):
+        inside &= (b[0] - a[0]) * (yy - a[1]) - (b[1] - a[1]) * (xx - a[0]) >= 0
+    frame[inside] = (150, 80, 20)
+    frame[200:204, 150:500] = (230, 230, 230)
+    frame[250:270, 100:180] = (50, 150, 220)
+    return frame
+
+
+def shifted(dx):
+    return [(x + dx, y) for x, y in CORNERS]
+
+
+class TestHomography:
+    """射影変換"""
+
+    def test_fit_and_apply(self):
+        src = np.array([[10.0, 20.0], [300.0, 25.0], [350.0, 200.0], [-20.0, 210.0], [160.0, 100.0]])
+        matrix = np.array([[0.8, 0.1, 5.0], [-0.05, 1.1, -3.0], [0.0004, 0.001, 1.0]])
+        dst = apply_homography(matrix, src)
+        assert np.allclose(fit_homography(src, dst), matrix, atol=1e-6)
+
+    def test_nan_points(self):
+        result = apply_homography(np.eye(3), np.array([[np.nan, 1.0]]))
+        assert np.isnan(result[0, 0])
+
+
+class TestTableDetection:
+    """台の4隅の検出"""
+
+    def test_detects_corners(self):
+        """ネットや腕で欠けても、辺の直線から4隅を求める"""
+        corners = detect_table_corners(table_frame())
+        assert np.abs(corners - np.array(CORNERS)).max() < 1.0
+
+        matrix = fit_homography(corners, TABLE_CORNERS)
+        assert np.allclose(apply_homography(matrix, np.array(CORNERS, dtype=float)), TABLE_CORNERS, atol=0.01)
+
+    def test_no_table(self):
+        assert detect_table_corners(np.full((90, 160, 3), (60, 60, 110), dtype=np.uint8)) is None
+        assert detect_table_corners(table_frame(), color="green") is None
+
+
+class TestTableCalibrator:
+    """カメラ区間ごとの射影変換"""
+
+    def test_camera_segments(self):
+        """台の位置が変わったところと、台が映らない区間で分ける"""
+        blank = np.full((360, 640, 3), (60, 60, 110), dtype=np.uint8)
+        frames = [table_frame(), table_frame(), blank, table_frame(),
+                  table_frame(shifted(60)), table_frame(shifted(60)), blank, blank]
+        data = TableCalibrator(samples=8).calibrate_frames(
+            [(i * 100, frame) for i, frame in enumerate(frames)], 800, scale=2
+        )
+
+        segments = data["segments"]
+        assert [(s["start_frame"], s["end_frame"], s["samples"]) for s in segments] == [
+            (0, 350, 3), (350, 550, 2), (550, 800, 2)
+        ]
+        assert segments[2]["homography"] is None
+
+        calibration = TableCalibration(data)
+        tx, ty = calibration.to_table(np.array([0, 500, 700]), np.array([280.0, 400.0, 280.0]), np.full(3, 600.0))
+        assert tx[:2] == pytest.approx([0.0, 0.0], abs=0.01)
+        assert ty[:2] == pytest.approx([2.74, 2.74], abs=0.01)
+        assert np.isnan(tx[2])
+
+    def test_cached_result_is_reused(self, tmp_path):
+        """保存済みの動画は台を検出せずに結果を返す"""
+        video = tmp_path / "match.mp4"
+        video.write_bytes(b"video")
+        calibrator = TableCalibrator(str(tmp_path / "calibration"))
+        (tmp_path / "calibration").mkdir()
+        calibrator.path("abc").write_text(
+            '{"video_hash": "abc", "segments": [{"start_frame": 0, "end_frame": 10, "samples": 1,'
+            ' "corners": null, "homography": [[1, 0, 0], [0, 1, 0], [0, 0, 1]]}]}',
+            encoding="utf-8"
+        )
+        calibration = calibrator.calibrate(str(video), video_hash="abc")
+        assert calibration.segment_at(5)["end_frame"] == 10
+
+    def test_cache_is_keyed_by_settings(self, tmp_path):
+        """台の色・フレーム数・縮小率が違えば保存済みの結果を使わない"""
+        default = TableCalibrator(str(tmp_path))
+        assert default.path("abc").name == "abc_blue_n24_d2.json"
+        others = [
+            TableCalibrator(str(tmp_path), color="green"),
+            TableCalibrator(str(tmp_path), samples=40),
+            TableCalibrator(str(tmp_path), downscale=1),
+        ]
+        paths = {default.path("abc")} | {calibrator.path("abc") for calibrator in others}
+        assert len(paths) == 4
+
+        default.save("abc", {"segments": []})
+        assert all(not calibrator.path("abc").exists() for calibrator in others)
+
+    def test_track_has_table_coordinates(self):
+        """台の位置を渡すとボールの軌跡に台の座標が付く"""
+        calibration = TableCalibration({"segments": [
+            {"start_frame": 0, "end_frame": 10, "samples": 1, "corners": None,
+             "homography": [[0.01, 0, 0], [0, 0.01, 0], [0, 0, 1]]}
+        ]})
+        frames = np.full((4, 64, 64, 3), (40, 90, 30), dtype=np.uint8)
+        track = CVAnalyzer("unused", calibration=calibration).track_batches([(0, frames)])
+        assert "table_x" in track and len(track["table_y"]) == 4
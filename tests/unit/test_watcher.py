@@ -0,0 +1,103 @@
+"""
+単体テスト: Watcher モジュール
+動画フォルダの監視、コピー完了待ち、バックプレッシャー
+"""
+
+import pytest
+import os
+import sys
+import threading
+
+# プロジェクトのsrcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from pipeline.watcher import VideoWatcher
+
+
+@pytest.fixture
+def watch_dir(tmp_path):
+    path = tmp_path / "videos"
+    path.mkdir()
+    return path
+
+
+class TestDebounce:
+    """コピー中のファイルを処理しない"""
+
+    def test_waits_for_stable_size(self, watch_dir):
+        """サイズが一定時間変化しなくなってから投入する"""
+        processed = []
+        watcher = VideoWatcher(str(watch_dir), processed.append, settle_seconds=5)
+        video = watch_dir / "match.mp4"
+        video.write_bytes(b"part")
+
+        assert watcher.poll(now=0) == []
+        with open(video, "ab") as f:
+            f.write(b"more")
+        assert watcher.poll(now=3) == []   # サイズが変化した
+        assert watcher.poll(now=6) == []   # 変化から5秒未満
+        assert watcher.poll(now=9) == [str(video)]
+        watcher.wait_idle(timeout=5)
+        watcher.shutdown()
+
+        assert processed == [str(video)]
+        assert watcher.results[str(video)]["status"] == "completed"
+
+    def test_ignores_other_files(self, watch_dir):
+        """動画以外や隠しファイルは対象外"""
+        watcher = VideoWatcher(str(watch_dir), lambda path: None, settle_seconds=0)
+        (watch_dir / "notes.txt").write_text("x")
+        (watch_dir / ".match.mp4.part").write_bytes(b"x")
+        watcher.poll(now=0)
+        assert watcher.poll(now=1) == []
+        watcher.shutdown()
+
+    def test_not_resubmitted(self, watch_dir):
+        """同じ内容の動画は一度しか投入しない"""
+        watcher = VideoWatcher(str(watch_dir), lambda path: None, settle_seconds=0)
+        (watch_dir / "match.mp4").write_bytes(b"video")
+        watcher.poll(now=0)
+        assert len(watcher.poll(now=1)) == 1
+        watcher.wait_idle(timeout=5)
+        assert watcher.poll(now=2) == []
+        watcher.shutdown()
+
+
+class TestBackpressure:
+    """処理中の件数の上限"""
+
+    def test_defers_when_full(self, watch_dir):
+        """上限に達している間は投入を保留し、空いたら投入する"""
+        release = threading.Event()
+        watcher = VideoWatcher(
+            str(watch_dir), lambda path: release.wait(5),
+            settle_seconds=0, max_workers=1, max_pending=1
+        )
+        for name in ("a.mp4", "b.mp4"):
+            (watch_dir / name).write_bytes(b"video")
+
+        watcher.poll(now=0)
+        assert len(watcher.poll(now=1)) == 1
+        assert watcher.poll(now=2) == []
+        assert watcher.in_flight == 1
+
+        release.set()
+        assert watcher.wait_idle(timeout=5)
+        assert len(watcher.poll(now=3)) == 1
+        watcher.wait_idle(timeout=5)
+        watcher.shutdown()
+        assert len(watcher.results) == 2
+
+    def test_failure_is_recorded(self, watch_dir):
+        """処理に失敗しても監視は続き、失敗が記録される"""
+        def fail(path):
+            raise RuntimeError("API timeout")
+
+        watcher = VideoWatcher(str(watch_dir), fail, settle_seconds=0)
+        video = watch_dir / "match.mp4"
+        video.write_bytes(b"video")
+        watcher.poll(now=0)
+        watcher.poll(now=1)
+        watcher.wait_idle(timeout=5)
+        watcher.shutdown()
+        assert watcher.results[str(video)] == {"status": "failed", "error": "API timeout"}